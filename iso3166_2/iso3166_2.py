@@ -1,14 +1,24 @@
 import os
 import sys
 import json
+import math
+import marshal
+import time
+import hashlib
+import functools
+import heapq
+import bisect
+import threading
+import weakref
+from array import array
 from dataclasses import dataclass
-from pycountry import countries
-from thefuzz import fuzz
+from types import MappingProxyType
+from typing import NamedTuple
 from urllib.parse import unquote_plus
-import pprint
-import natsort
-import requests
 from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+
+__version__ = "1.8.2"
 
 class Subdivisions():
     """
@@ -54,6 +64,12 @@ class Subdivisions():
         to be filtered into each country's subdivision object, excluding all other attributes. 
         These include: name, localOtherName, type, parentCode, latLng, flag 
         or history. By default, all of the aforementioned keys will be exported for each subdivision.
+    :compact: bool (default=False)
+        use the compact in-memory representation of the dataset, storing the subdivision data in 
+        column arrays shared by all instances of the class rather than a dict per subdivision, 
+        significantly reducing the memory footprint. Each subdivision is then a read-only mapping 
+        of the same attributes, with the same API. The memory footprint of the instance's data can
+        be output via the memory_footprint function.
 
     Methods
     =======
@@ -69,6 +85,30 @@ class Subdivisions():
         'local_other_name_search' parameter to True will include the 'localOtherName'
         attribute in the search space. Setting exclude_match_score to False will include
         the % matching score the subdivision names are to the input. 
+    search_batch(search_terms, likeness_score=100, filter_attribute="", local_other_name_search=True,
+        exclude_match_score=True, max_workers=0, use_processes=False):
+        searching for the subdivisions of each of an iterable of names, searching each 
+        unique name once and returning the results in input order.
+    reverse_geocode(lat_lng, k=1, radius_km=None):
+        return the k nearest subdivisions to a latitude/longitude coordinate, and/or all 
+        subdivisions within a radius of it, via the spatial index of the subdivisions' 
+        latLng attribute. 
+    reverse_geocode_batch(lat_lngs, k=1, radius_km=None, vectorized=True):
+        return the nearest subdivisions to each of an iterable or array of coordinates, 
+        vectorized via NumPy, if installed.
+    children(code):
+        return the subdivision codes of the direct children of a subdivision, via their 
+        parentCode attribute, or the top-level subdivisions of a country.
+    descendants(code):
+        return the subdivision codes of all subdivisions below a subdivision in its hierarchy,
+        or all of a country's subdivisions in hierarchical order.
+    ancestors(subdivision_code):
+        return the subdivision codes of the chain of parents of a subdivision, from its parent
+        up to its top-level subdivision.
+    query(country_code="", type_=None, parent_code=None, has_flag=None, has_history=None, 
+        lat_range=None, lng_range=None):
+        return the subdivisions matching all of the input predicates on their country, type,
+        parent, flag/history presence and coordinates, via the inverted indexes of the data.
         custom_subdivision(alpha_code="", subdivision_code="", name="", local_other_name="", type_="", 
             lat_lng=[], parent_code=None, flag=None, area=None, population=None, history=None, 
             delete=False, custom_attributes={}, save_new=False, save_new_filename: str="iso3166_2_copy.json"):
@@ -77,6 +117,8 @@ class Subdivisions():
         applications that are using the iso3166-2 software but require additional custom 
         subdivisions to be represented. You can also add custom attributes to the custom
         subdivision e.g gdp, gini, hdi etc.
+    memory_footprint():
+        return the memory footprint of the instance's subdivision data, in bytes.
     check_for_updates():
         compare the current object in the software with the same object in the repo (which will
         be the latest version of the dataset). Output any differences in the objects, suggesting
@@ -84,6 +126,9 @@ class Subdivisions():
     convert_to_alpha2(alpha_code):
         converts an ISO 3166 country's 3 letter alpha-3 code or numeric code into its 2 
         letter alpha-2 counterpart. 
+    build_snapshot(iso3166_2_filepath="", user_cache=False):
+        export a binary snapshot of the parsed dataset, loaded instead of parsing the JSON, 
+        for faster cold starts.
     __getitem__(alpha_code):
         return all of a ISO 3166 country's subdivision data by making the class 
         subscriptable, according to its ISO 3166-1 alpha-2, alpha-3 or numeric code.
@@ -158,19 +203,35 @@ class Subdivisions():
     all_subdivisions = Subdivisions()
     all_subdivisions.search("Blue", local_other_name_search=True) 
 
+    #get the nearest subdivision to a coordinate, and the 5 nearest subdivisions within 100km of it
+    all_subdivisions.reverse_geocode([53.349, -6.260])
+    all_subdivisions.reverse_geocode([53.349, -6.260], k=5, radius_km=100)
+
+    #get all states and provinces in the southern hemisphere that have a flag
+    all_subdivisions.query(type_=["State", "Province"], has_flag=True, lat_range=(-90, 0))
+
+    #get the departments of the Auvergne-Rhône-Alpes region of France, and the chain of parents of the Cheshire East unitary authority
+    all_subdivisions.children("FR-ARA")
+    all_subdivisions.ancestors("GB-CHE")
+
     #check for the latest updates - compare current installed object with the latest on the repo
     all_subdivisions.check_for_updates()
 
     #get total number of subdivisions in object
     len(all_subdivisions)
+
+    #get ALL subdivision data for ALL countries using the compact in-memory representation
+    compact_subdivisions = Subdivisions(compact=True)
+    compact_subdivisions.memory_footprint()
     """
-    def __init__(self, country_code: str="", iso3166_2_filepath: str="", filter_attributes: str=""):
+    def __init__(self, country_code: str="", iso3166_2_filepath: str="", filter_attributes: str="", compact: bool=False):
 
         self.country_code = country_code
         self.iso3166_2_filepath = iso3166_2_filepath
         self.iso3166_json_filename= "iso3166-2.json"
         self.filter_attributes = filter_attributes
-        self.__version__ = "1.8.2"
+        self.compact = compact
+        self.__version__ = __version__
 
         #get full path to default object
         self.iso3166_2_module_path = os.path.join(os.path.dirname(os.path.abspath(sys.modules[self.__module__].__file__)), self.iso3166_json_filename)
@@ -185,45 +246,8 @@ class Subdivisions():
             if not (os.path.isfile(self.iso3166_2_module_path)):
                 raise OSError(f"Issue finding custom data file directory: {self.iso3166_2_module_path}.")
 
-        #importing all subdivision data from JSON, open iso3166-2 json file and load it into class variable, raise error if issue reading in JSON
-        try:
-            with open(self.iso3166_2_module_path, encoding="utf-8") as fp:
-                self.all = json.load(fp)
-        except FileNotFoundError: 
-            raise OSError("Error ❗: The ISO 3166-2 file was not found.")
-        except json.JSONDecodeError as e:
-            raise ValueError(
-                "Error ❗: The ISO 3166-2 file contains invalid JSON. "
-                f"{e.msg} at line {e.lineno}, column {e.colno} (char {e.pos})."
-            )
-        
-        #if input country code param set, iterate over data object and get subdivision data for specified input/inputs
-        if (self.country_code != ""):
-            # Validate that country code is not just whitespace or commas
-            country_code_stripped = self.country_code.strip()
-            if not country_code_stripped or all(c in ", " for c in country_code_stripped):
-                raise ValueError("Error ❗: Invalid country code input - cannot be empty or contain only whitespace/commas.")
-            
-            temp_subdivision_data = {}
-            self.country_code = self.country_code.upper().replace(" ", "").split(',')
-            for code in range(0, len(self.country_code)):
-                #if 3 letter alpha-3 or numeric codes input then convert to corresponding alpha-2, if invalid code then raise error
-                temp_alpha_code = self.convert_to_alpha2(self.country_code[code])
-                self.country_code[code] = temp_alpha_code
-
-                #raise error if invalid alpha-2 code input
-                if not (self.country_code[code] in ([country.alpha_2 for country in countries])) or not (self.country_code[code] in list(self.all.keys())):
-                    raise ValueError(f"Invalid alpha-2 country code input: {self.country_code[code]}.")
-                
-                #create temporary subdivision data object
-                temp_subdivision_data[self.country_code[code]] = {}
-                temp_subdivision_data[self.country_code[code]] = self.all[self.country_code[code]]
-            
-            #delete existing 'all' class attribute that currently has all subdivision data for all countries, which aren't needed if input country is specified
-            del self.all
-
-            #set 'all' class attribute to the subdivision data from input country/countries
-            self.all = temp_subdivision_data
+        #list of attributes excluded via the filter_attributes parameter
+        self._removed_attributes = []
 
         #parse input default attributes to include in export
         if (self.filter_attributes != ""):
@@ -245,20 +269,75 @@ class Subdivisions():
                 
                 self.filter_attributes = filter_attributes_converted_list
 
-            #iterate over each attribute and subdivision object in self.all, remove any attributes if applicable 
-            for attr in filter_attributes_expected:
-                if (attr not in self.filter_attributes):
-                    for alpha_code in self.all:
-                        for subdivision in self.all[alpha_code]:
-                            # Only delete if attribute exists in the subdivision object
-                            if attr in self.all[alpha_code][subdivision]:
-                                del self.all[alpha_code][subdivision][attr]
+            #attributes excluded from each subdivision's data, these are never loaded into the instance's dataset
+            self._removed_attributes = [attr for attr in filter_attributes_expected if attr not in self.filter_attributes]
         else:
             #include all attributes in output
             self.filter_attributes = ["name", "localOtherName", "type", "parentCode", "latLng", "flag", "history"]
 
+        #get the subdivision data from the process-wide dataset store, the data is only parsed on the first request
+        #for this path/modification time, every subsequent instance shares the same parsed object
+        self._dataset = _dataset_store.acquire(self.iso3166_2_module_path)
+        weakref.finalize(self, _dataset_store.release, self._dataset)
+
+        #if any attributes are excluded, use the projection of the dataset that's loaded without them, such that the 
+        #excluded attributes are never parsed into memory, the compact representation projects them out on access instead
+        if (self._removed_attributes and not self.compact):
+            self._dataset = self._dataset.projection(self._removed_attributes)
+
+        #set of countries whose subdivision data has been copied from the shared dataset into this instance, prior to being modified
+        self._owned_countries = set()
+
+        #countries not input on class instantiation that have since been loaded on first access via __getitem__
+        self._lazy_countries = {}
+
+        #indexes built from the instance's subdivision data, reset when the data is changed
+        self._indexes = {}
+
+        #cached read-only views of each country's subdivision data returned via __getitem__, keyed by input code
+        self._country_views = {}
+        
+        #if input country code param set, get subdivision data for specified input/inputs, only parsing the shards of these 
+        #countries if the sharded layout is available, otherwise get all subdivision data for all countries
+        if (self.country_code != ""):
+            # Validate that country code is not just whitespace or commas
+            country_code_stripped = self.country_code.strip()
+            if not country_code_stripped or all(c in ", " for c in country_code_stripped):
+                raise ValueError("Error ❗: Invalid country code input - cannot be empty or contain only whitespace/commas.")
+            
+            self.all = {}
+            self.country_code = self.country_code.upper().replace(" ", "").split(',')
+            for code in range(0, len(self.country_code)):
+                #if 3 letter alpha-3 or numeric codes input then convert to corresponding alpha-2, if invalid code then raise error
+                temp_alpha_code = self.convert_to_alpha2(self.country_code[code])
+                self.country_code[code] = temp_alpha_code
+
+                #get country's subdivision data from the dataset, or from its compact representation if applicable
+                if (self.compact):
+                    country_data = self._dataset.load_compact().countries.get(self.country_code[code])
+                else:
+                    country_data = self._dataset.load_country(self.country_code[code])
+
+                #raise error if invalid alpha-2 code input
+                if not (self.country_code[code] in _country_codes().alpha_2) or (country_data is None):
+                    raise ValueError(f"Invalid alpha-2 country code input: {self.country_code[code]}.")
+                
+                #per-country view onto the shared dataset, no subdivision data is copied
+                self.all[self.country_code[code]] = country_data
+        elif (self.compact):
+            #per-country views onto the compact representation of the shared dataset
+            self.all = dict(self._dataset.load_compact().countries)
+        else:
+            #per-country views onto the shared dataset, no subdivision data is copied
+            self.all = dict(self._dataset.load_all())
+
+        #project the excluded attributes out of the compact representation of each country's data
+        if (self.compact and self._removed_attributes):
+            for alpha_code in self.all:
+                self.all[alpha_code] = self.all[alpha_code].project(self._removed_attributes)
+
         #get list of all countries by their 2 letter alpha-2 code using pycountry
-        self.alpha_2 = [country.alpha_2 for country in countries]
+        self.alpha_2 = list(_country_codes().alpha_2)
             
         #get list of all countries by their 3 letter alpha-3 code
         #self.alpha_3 = [country.alpha_3 for country in countries]
@@ -299,12 +378,12 @@ class Subdivisions():
 
         #if no value passed into parameter, return all subdivision codes for all countries
         if (alpha_code == ""):
-            #iterate over all subdivision ISO 3166-2 data, append to subdivision codes dict
-            for key, _ in self.all.items():
-                subdivision_codes_[key] = list(self.all[key])
+            #iterate over all subdivision ISO 3166-2 data, append copy of each country's memoized subdivision codes to dict
+            for key in self.all:
+                subdivision_codes_[key] = list(self._subdivision_code_lists(key)[0])
             #return list of subdivision codes for country if one country in 'self.all' attribute, else return dict
-            if (len(list(self.all.keys())) == 1):
-                return subdivision_codes_[list(self.all.keys())[0]]
+            if (len(self.all) == 1):
+                return subdivision_codes_[next(iter(self.all))]
             else:
                 return subdivision_codes_
         else:
@@ -318,15 +397,12 @@ class Subdivisions():
                 alpha_code[code] = temp_alpha_code
 
                 #raise error if country data not imported on object instantiation 
-                if not (alpha_code[code] in list(self.all.keys())):
+                if not (alpha_code[code] in self.all):
                     raise ValueError(f"Valid alpha-2 code input {alpha_code[code]}, but country data not available as country code parameter was input on class instantiation,"
                                     " try creating another instance of the class with no initial input parameter value, e.g iso = Subdivisions().")
                 
-                #append list of subdivision codes to dict
-                subdivision_codes_[alpha_code[code]] = list(self.all[alpha_code[code]])
-            
-                #sort subdivision codes in json objects in alphabetical order
-                subdivision_codes_[alpha_code[code]] = sorted(subdivision_codes_[alpha_code[code]])
+                #append copy of memoized list of subdivision codes, in alphabetical order, to dict
+                subdivision_codes_[alpha_code[code]] = list(self._subdivision_code_lists(alpha_code[code])[1])
 
             #if only one alpha-2 code input then return list of its subdivision codes else return dict object for all inputs
             if len(alpha_code) == 1:
@@ -372,13 +448,12 @@ class Subdivisions():
 
         #if no value passed into parameter, return all subdivision names for all countries
         if (alpha_code == ""):
-            #iterate over all subdivision ISO 3166-2 data, append to subdivision names dict
-            for key, _ in self.all.items():
-                subdivision_names_[key] = [self.all[key][country]["name"] for country in self.all[key]]
-                subdivision_names_[key] = sorted(subdivision_names_[key])
+            #iterate over all subdivision ISO 3166-2 data, append copy of each country's memoized sorted subdivision names to dict
+            for key in self.all:
+                subdivision_names_[key] = list(self._sorted_subdivision_names(key))
             #return list of subdivision names for country if one country in 'self.all' attribute, else return dict
-            if (len(list(self.all.keys())) == 1):
-                return subdivision_names_[list(self.all.keys())[0]] 
+            if (len(self.all) == 1):
+                return subdivision_names_[next(iter(self.all))]
             else:
                 return subdivision_names_
         else:
@@ -392,15 +467,12 @@ class Subdivisions():
                 alpha_code[code] = temp_alpha_code
 
                 #raise error if country data not imported on object instantiation 
-                if not (alpha_code[code] in list(self.all.keys())):
+                if not (alpha_code[code] in self.all):
                     raise ValueError(f"Valid alpha-2 code input {alpha_code[code]}, but country data not available as country code parameter was input on class instantiation,"
                                     " try creating another instance of the class with no initial input parameter value, e.g iso = Subdivisions().")
                 
-                #append list of subdivision names to dict
-                subdivision_names_[alpha_code[code]] = [self.all[alpha_code[code]][x]["name"] for x in self.all[alpha_code[code]]]
-            
-                #sort subdivision names in json objects in alphabetical order
-                subdivision_names_[alpha_code[code]] = sorted(subdivision_names_[alpha_code[code]])
+                #append copy of memoized list of subdivision names, in alphabetical order, to dict
+                subdivision_names_[alpha_code[code]] = list(self._sorted_subdivision_names(alpha_code[code]))
 
             #if only one alpha-2 code input then return list of its subdivision names else return dict object for all inputs
             if len(alpha_code) == 1:
@@ -544,7 +616,10 @@ class Subdivisions():
         if (copy):
             test_iso3166_2_copy = os.path.join(os.path.dirname(os.path.abspath(sys.modules[self.__module__])), "iso3166_2_copy.json")
             with open(test_iso3166_2_copy, "w") as output_json:
-                json.dump(self.all, output_json)
+                json.dump(self._plain_data(), output_json)
+
+        #copy country's subdivision data out of the shared dataset before it's modified
+        self._own_country(alpha_code)
 
         #get subdivision data for country code
         all_subdivision_data = self.all[alpha_code]
@@ -604,11 +679,10 @@ class Subdivisions():
         #export new subdivision object to custom output file if parameter set
         if (save_new):
             with open(save_new_filename, 'w', encoding='utf-8') as output_json:
-                json.dump(self.all, output_json, ensure_ascii=False, indent=4)  
-        #export new subdivision object to existing object
+                json.dump(self._plain_data(), output_json, ensure_ascii=False, indent=4)  
+        #export new subdivision object to existing object, and its shards if applicable
         else:
-            with open(os.path.join(self.iso3166_2_module_path), 'w', encoding='utf-8') as output_json:
-                json.dump(self.all, output_json, ensure_ascii=False, indent=4)
+            self._export_data(self.iso3166_2_module_path)
         
         #print informative message when new subdivision added
         if (new_update_object and not delete):
@@ -693,24 +767,125 @@ class Subdivisions():
         if not (0 <= likeness_score <= 100):
             raise ValueError(f"Likeness score must be between 0 and 100, got {likeness_score}.")
 
-        #create list of subdivision attributes to search across, add localOtherName to list if applicable
-        attributes_list = ["name"]
-        if local_other_name_search:
-            attributes_list.append("localOtherName")
-
-        #create object of normalized subdivision entries: (normalized_name, alpha2, code)
-        entries = []
-        comma_names_set = set()
-        for alpha2 in self.all:
-            for code, data in self.all[alpha2].items():
-                for attr in attributes_list:
-                    val = data.get(attr)
-                    if val:
-                        normalized = unquote_plus(val).lower()
-                        entries.append((normalized.replace(" ", ""), alpha2, code))
-                        #add normalized name to separate list for names that have a comma in them
-                        if ("," in val):
-                            comma_names_set.add(normalized)
+        #get the search index of normalized subdivision names/local other names, built once per dataset
+        search_index = self._search_index()
+
+        #split input into its normalized search terms
+        terms = self._search_terms(input_search_term, search_index, local_other_name_search)
+
+        #iterate over input search terms, use a fuzzy search algorithm to get any matching names/localOther names,
+        # using the likeness parameter as a % likeness the input terms have to be to the subdivision names
+        term_matches = _match_search_terms(search_index, terms, likeness_score, local_other_name_search)
+
+        return self._search_results(terms, term_matches, filter_attribute, exclude_match_score)
+
+    def search_batch(self, search_terms: Iterable[str], likeness_score: int=100, filter_attribute: str="", local_other_name_search: bool=True, 
+                     exclude_match_score: bool=1, max_workers: int=0, use_processes: bool=False) -> list[dict|list]:
+        """
+        Search for the subdivisions and their corresponding data for each of an iterable of 
+        search terms, e.g a column of free-text region names. The results are the same as 
+        calling the search function on each term, with the same parameters, but the search 
+        index is only retrieved once, repeated inputs are only searched once and the matches
+        of each individual normalized term are shared across all the inputs it's in. The 
+        results are returned in the same order as the input search terms, with any repeated 
+        inputs having their own copy of the results.
+
+        The matching of the unique terms can be split across a pool of threads or processes
+        via the max_workers and use_processes parameters, useful for large batches of terms 
+        with a likeness score below 100.
+
+        Parameters
+        ==========
+        :search_terms: Iterable[str]
+            iterable of subdivision names to search for, each can be a comma separated list of names.
+        :likeness_score: int (default=100)
+            likeness score between 0 and 100 that sets the percentage of likeness the input 
+            subdivision names are to the list of subdivision names in the dataset. The default
+            value of 100 will look for exact matches to the input names.
+        :filter_attribute: str (default="")
+            include only a subset of data attributes from the list of supported attributes
+            in the software. If an attribute is not found then an error will be raised. 
+        :local_other_name_search: bool (default=True)
+            search via the localOtherName attribute as well as the default name attribute
+            for any potential matches, increasing the function search space. 
+        :exclude_match_score: bool (default=True)
+            set to True to exclude the % match the returned subdivision objects are to the input
+            search keywords. 
+        :max_workers: int (default=0)
+            number of workers to split the matching of the unique search terms across, by 
+            default the terms are matched in the current thread.
+        :use_processes: bool (default=False)
+            use a pool of processes rather than threads for the matching of the search terms.
+
+        Returns
+        =======
+        :batch_results: list[dict|list]
+            list of the search results for each input search term, in input order.
+
+        Usage
+        =====
+        from iso3166_2 import *
+        iso = Subdivisions()
+
+        #searching for multiple subdivisions, the repeated Texas input is only searched once
+        iso.search_batch(["Monaghan", "Texas", "Meuse", "Texas"])
+
+        #searching with a likeness score of 85, matching across a pool of 4 processes
+        iso.search_batch(region_names, likeness_score=85, max_workers=4, use_processes=True)
+
+        Raises
+        ======
+        TypeError:
+            Incorrect data type for any of the search terms.
+        ValueError:
+            Invalid likeness score range, should be between 1 and 100.
+            Invalid attributes input to filter attributes parameter.
+        """
+        search_terms = list(search_terms)
+
+        #raise error if any search term isn't a string
+        for search_term in search_terms:
+            if not isinstance(search_term, str):
+                raise TypeError(f"Input subdivision names should be of type str, got {type(search_term)}.")
+
+        #raise error if invalid likeness score input (has to between 1 and 100)
+        if not (0 <= likeness_score <= 100):
+            raise ValueError(f"Likeness score must be between 0 and 100, got {likeness_score}.")
+
+        #raise error if invalid filter attributes input, prior to any searching
+        self._search_results([], {}, filter_attribute, exclude_match_score)
+
+        #get the search index of normalized subdivision names/local other names, built once per dataset
+        search_index = self._search_index()
+
+        #split each unique input into its normalized search terms, get list of unique terms across all inputs 
+        input_terms = {search_term: self._search_terms(search_term, search_index, local_other_name_search) for search_term in dict.fromkeys(search_terms)}
+        unique_terms = list(dict.fromkeys(term for terms in input_terms.values() for term in terms))
+
+        #get the matches of each unique term, splitting the terms across a pool of workers if applicable
+        if (max_workers and max_workers > 1 and len(unique_terms) > 1):
+            from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+            chunk_size = math.ceil(len(unique_terms) / (max_workers * 4))
+            chunks = [unique_terms[i:i + chunk_size] for i in range(0, len(unique_terms), chunk_size)]
+            if (use_processes):
+                with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_search_worker, initargs=(search_index,)) as executor:
+                    chunk_matches = list(executor.map(_match_search_terms_worker, chunks, [likeness_score] * len(chunks), [local_other_name_search] * len(chunks)))
+            else:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    chunk_matches = list(executor.map(lambda chunk: _match_search_terms(search_index, chunk, likeness_score, local_other_name_search), chunks))
+            term_matches = {}
+            for matches in chunk_matches:
+                term_matches.update(matches)
+        else:
+            term_matches = _match_search_terms(search_index, unique_terms, likeness_score, local_other_name_search)
+
+        #get the results of each input, in input order
+        return [self._search_results(input_terms[search_term], term_matches, filter_attribute, exclude_match_score) for search_term in search_terms]
+
+    def _search_terms(self, input_search_term: str, search_index: "_SearchIndex", local_other_name_search: bool=True) -> list[str]:
+        """ Split the input search string into its list of normalized search terms, keeping any subdivision names that contain commas whole. """
+        comma_names_set = search_index.comma_names[bool(local_other_name_search)]
 
         #normalize, remove quotes & lowercase input search terms
         input_normalized = unquote_plus(input_search_term).lower()
@@ -724,27 +899,14 @@ class Subdivisions():
         leftover_terms = [t.strip().replace(" ", "") for t in input_normalized.split(",") if t.strip()]
         terms.extend(leftover_terms)
 
-        #iterate over input search terms, use a fuzzy search algorithm to get any matching names/localOther names,
-        # using the likeness parameter as a % likeness the input terms have to be to the subdivision names
+        return terms
+
+    def _search_results(self, terms: list[str], term_matches: dict, filter_attribute: str="", exclude_match_score: bool=1) -> dict|list:
+        """ Create the output search results object from the matches of each of the input's search terms. """
+        #add found matching objects to found object, including % Match Score, Country & Subdivision Code
         found = {}
         for term in terms:
-            matches = []
-            for norm_name, alpha2, code in entries:
-                likeness = fuzz.ratio(term, norm_name)
-                if likeness_score == 100 and likeness == 100:
-                    matches.append((alpha2, code, likeness))
-                elif likeness_score < 100 and likeness >= likeness_score:
-                    matches.append((alpha2, code, likeness))
-
-            #fallback: if no matches found, reduce the likeness slightly
-            if likeness_score == 100 and not matches:
-                for norm_name, alpha2, code in entries:
-                    likeness = fuzz.ratio(term, norm_name)
-                    if likeness >= 85:
-                        matches.append((alpha2, code, likeness))
-
-            #add found matching objects to found object, including % Match Score, Country & Subdivision Code
-            for alpha2, code, score in matches:
+            for alpha2, code, score in term_matches[term]:
                 if code not in found:
                     found[code] = {
                         **self.all[alpha2][code],
@@ -803,6 +965,421 @@ class Subdivisions():
 
             return final_results
 
+    def reverse_geocode(self, lat_lng: list[float], k: int=1, radius_km: float=None) -> list[dict]:
+        """
+        Return the nearest subdivisions to a latitude/longitude coordinate, by the great-circle
+        distance to each subdivision's latLng attribute. By default the single nearest 
+        subdivision is returned, the k parameter sets the number of nearest subdivisions and the
+        radius_km parameter limits the subdivisions to those within the radius of the coordinate;
+        if k is None all subdivisions within the radius are returned. 
+        
+        The subdivisions are queried via a k-d tree of their coordinates, as unit vectors, built 
+        once per dataset on the first query, rather than calculating the distance to every 
+        subdivision. 
+
+        Parameters
+        ==========
+        :lat_lng: list[float]
+            latitude and longitude of the coordinate, in degrees.
+        :k: int (default=1)
+            number of nearest subdivisions to return, None to return all within the radius.
+        :radius_km: float (default=None)
+            maximum distance of the subdivisions from the coordinate, in km.
+
+        Returns
+        =======
+        :list[dict]
+            list of the nearest subdivisions' data, including their country code, subdivision 
+            code and distance from the coordinate in km, sorted by distance.
+
+        Usage
+        =====
+        from iso3166_2 import *
+        iso = Subdivisions()
+
+        #get the nearest subdivision to a coordinate in Dublin
+        iso.reverse_geocode([53.349, -6.260])
+
+        #get all subdivisions within 50km of the coordinate
+        iso.reverse_geocode([53.349, -6.260], k=None, radius_km=50)
+
+        Raises
+        ======
+        TypeError:
+            Incorrect data type for lat_lng parameter.
+        ValueError:
+            Invalid latitude/longitude, k or radius_km parameter.
+            latLng attribute was excluded on class instantiation.
+        """
+        spatial_index = self._spatial_index()
+        radius2 = self._validate_nearest(k, radius_km)
+        lat, lng = _validate_lat_lng(lat_lng)
+        return self._nearest_results(spatial_index, spatial_index.query(lat, lng, k, radius2))
+
+    def reverse_geocode_batch(self, lat_lngs: Iterable, k: int=1, radius_km: float=None, vectorized: bool=True) -> list[list[dict]]:
+        """
+        Return the nearest subdivisions to each of an iterable of latitude/longitude coordinates,
+        e.g a column of GPS points. The results are the same as calling the reverse_geocode 
+        function on each coordinate, with the same parameters. If NumPy is installed the 
+        coordinates can be input as an array of shape (n, 2) and are queried in vectorized 
+        chunks against every subdivision's coordinates, otherwise each coordinate is queried 
+        via the k-d tree.
+
+        Parameters
+        ==========
+        :lat_lngs: Iterable
+            iterable of latitude and longitude coordinates, or NumPy array of shape (n, 2), in degrees.
+        :k: int (default=1)
+            number of nearest subdivisions to return per coordinate, None to return all within the radius.
+        :radius_km: float (default=None)
+            maximum distance of the subdivisions from each coordinate, in km.
+        :vectorized: bool (default=True)
+            query the coordinates via NumPy, if installed, otherwise via the k-d tree.
+
+        Returns
+        =======
+        :list[list[dict]]
+            list of the nearest subdivisions to each coordinate, in input order.
+
+        Usage
+        =====
+        from iso3166_2 import *
+        iso = Subdivisions()
+        iso.reverse_geocode_batch([[53.349, -6.260], [40.416, -3.703]], k=3)
+
+        Raises
+        ======
+        TypeError:
+            Incorrect data type for any of the coordinates.
+        ValueError:
+            Invalid latitude/longitude, k or radius_km parameter.
+            latLng attribute was excluded on class instantiation.
+        """
+        spatial_index = self._spatial_index()
+        radius2 = self._validate_nearest(k, radius_km)
+        lat_lngs = [_validate_lat_lng(lat_lng) for lat_lng in (lat_lngs.tolist() if hasattr(lat_lngs, "tolist") else lat_lngs)]
+
+        #import NumPy, if installed, for vectorized queries
+        np = None
+        if (vectorized):
+            try:
+                import numpy as np
+            except ImportError:
+                pass
+
+        if (np is not None):
+            batch_matches = spatial_index.query_batch(np, lat_lngs, k, radius2)
+        else:
+            batch_matches = [spatial_index.query(lat, lng, k, radius2) for lat, lng in lat_lngs]
+        return [self._nearest_results(spatial_index, matches) for matches in batch_matches]
+
+    def _validate_nearest(self, k: int|None, radius_km: float|None) -> float:
+        """ Validate the k and radius_km parameters of the reverse geocoding functions, returning the squared chord length of the radius. """
+        #raise error if latLng attribute was excluded on class instantiation 
+        if ("latLng" not in self.filter_attributes):
+            raise ValueError("latLng attribute was excluded from subdivision outputs on class instantiation,\
+                             create a new object of the class without excluding the latLng attribute.")
+        if (k is None and radius_km is None):
+            raise ValueError("The k and radius_km parameters cannot both be None.")
+        if (k is not None and (isinstance(k, bool) or not isinstance(k, int) or k < 1)):
+            raise ValueError(f"Number of nearest subdivisions k must be a positive integer, got {k}.")
+        if (radius_km is None):
+            return 4.0
+        if (isinstance(radius_km, bool) or not isinstance(radius_km, (int, float)) or not (radius_km >= 0)):
+            raise ValueError(f"Radius must be a non-negative number of km, got {radius_km}.")
+        return _SpatialIndex.chord2(radius_km)
+
+    def _nearest_results(self, spatial_index: "_SpatialIndex", matches: list[tuple]) -> list[dict]:
+        """ Create the output reverse geocoding results from the matching (chord length squared, point id) pairs. """
+        results = []
+        for chord2, point_id in matches:
+            alpha2, code = spatial_index.alpha_codes[point_id], spatial_index.codes[point_id]
+            results.append({
+                "countryCode": alpha2,
+                "subdivisionCode": code,
+                **self.all[alpha2][code],
+                "distance": round(_SpatialIndex.distance_km(chord2), 3)
+            })
+        return results
+
+    def children(self, code: str) -> list[str]:
+        """
+        Return the subdivision codes of the direct children of a subdivision, i.e the subdivisions
+        whose parentCode attribute is the subdivision, in their order in the dataset. If an ISO 3166-1
+        alpha-2, alpha-3 or numeric country code is input, the country's top-level subdivisions, 
+        which have no parent, are returned. 
+
+        The children are returned from the hierarchy index of the country's subdivisions, built
+        once per dataset on the first query, rather than scanning the country's subdivisions.
+
+        Parameters
+        ==========
+        :code: str
+            ISO 3166-2 subdivision code, or ISO 3166-1 country code.
+
+        Returns
+        =======
+        :list[str]
+            subdivision codes of the children of the subdivision, or the country's top-level subdivisions.
+
+        Usage
+        =====
+        from iso3166_2 import *
+        iso = Subdivisions()
+
+        #get the departments of the Auvergne-Rhône-Alpes region of France
+        iso.children("FR-ARA")
+
+        #get the top-level subdivisions of France
+        iso.children("FR")
+
+        Raises
+        ======
+        ValueError:
+            Invalid subdivision or country code input.
+            parentCode attribute was excluded on class instantiation.
+        """
+        hierarchy, subdivision_code = self._hierarchy_index(code)
+        return list(hierarchy.children.get(subdivision_code, ()))
+
+    def descendants(self, code: str) -> list[str]:
+        """
+        Return the subdivision codes of all of the subdivisions below a subdivision in its hierarchy,
+        i.e its children, their children etc, in depth-first order such that each subdivision is 
+        followed by its own descendants. If an ISO 3166-1 alpha-2, alpha-3 or numeric country code
+        is input, all of the country's subdivisions are returned in the same order. 
+        
+        Each subdivision's descendants are a contiguous range of the depth-first order of the 
+        country's hierarchy index, so the query costs time proportional to the number of 
+        descendants.
+
+        Parameters
+        ==========
+        :code: str
+            ISO 3166-2 subdivision code, or ISO 3166-1 country code.
+
+        Returns
+        =======
+        :list[str]
+            subdivision codes of the descendants of the subdivision, or of all the country's subdivisions.
+
+        Usage
+        =====
+        from iso3166_2 import *
+        iso = Subdivisions()
+
+        #get all subdivisions below England
+        iso.descendants("GB-ENG")
+
+        #get the total number of subdivisions below each region of France
+        {region: len(iso.descendants(region)) for region in iso.children("FR")}
+
+        Raises
+        ======
+        ValueError:
+            Invalid subdivision or country code input.
+            parentCode attribute was excluded on class instantiation.
+        """
+        hierarchy, subdivision_code = self._hierarchy_index(code)
+        if (subdivision_code is None):
+            return list(hierarchy.order)
+        position = hierarchy.positions[subdivision_code]
+        return list(hierarchy.order[position + 1:hierarchy.ends[position]])
+
+    def ancestors(self, subdivision_code: str) -> list[str]:
+        """
+        Return the subdivision codes of the chain of parents of a subdivision, from its parent 
+        up to its top-level subdivision, via their parentCode attribute. An empty list is 
+        returned for a top-level subdivision.
+
+        Parameters
+        ==========
+        :subdivision_code: str
+            ISO 3166-2 subdivision code.
+
+        Returns
+        =======
+        :list[str]
+            subdivision codes of the ancestors of the subdivision, nearest first.
+
+        Usage
+        =====
+        from iso3166_2 import *
+        iso = Subdivisions()
+
+        #get the chain of parents of the Cheshire East unitary authority, up to England
+        iso.ancestors("GB-CHE")
+
+        Raises
+        ======
+        ValueError:
+            Invalid subdivision code input.
+            parentCode attribute was excluded on class instantiation.
+        """
+        hierarchy, subdivision_code = self._hierarchy_index(subdivision_code)
+        if (subdivision_code is None):
+            raise ValueError("A subdivision code must be input to get its ancestors, not a country code.")
+        return list(hierarchy.ancestors[hierarchy.positions[subdivision_code]])
+
+    def query(self, country_code: str="", type_: str|list[str]=None, parent_code: str|list[str]=None, has_flag: bool=None, 
+              has_history: bool=None, lat_range: tuple[float, float]=None, lng_range: tuple[float, float]=None) -> "QueryResults":
+        """
+        Return the subdivisions matching all of the input predicates, e.g all subdivisions of a 
+        type, with a flag or in a hemisphere. Any predicate left as its default isn't applied.
+        
+        The subdivisions matching each predicate are got from the query index of the instance's
+        data, built once per dataset on the first query: inverted indexes of the subdivisions 
+        per country, type, parent code and flag/history presence, and the subdivisions sorted by
+        their latitude and longitude. The predicates are combined by intersecting their matching
+        subdivisions, starting from the predicate with the fewest. The results are a read-only 
+        mapping of each subdivision code to its data, in dataset order, with each subdivision's
+        data being returned as a read-only SubdivisionView.
+
+        Parameters
+        ==========
+        :country_code: str (default="")
+            one or more ISO 3166-1 alpha-2, alpha-3 or numeric country codes, comma separated.
+        :type_: str|list[str] (default=None)
+            one or more subdivision types, case insensitive.
+        :parent_code: str|list[str] (default=None)
+            one or more subdivision codes of the subdivisions' parent. 
+        :has_flag: bool (default=None)
+            whether the subdivisions have a flag.
+        :has_history: bool (default=None)
+            whether the subdivisions have a history.
+        :lat_range: tuple[float, float] (default=None)
+            minimum and maximum latitude of the subdivisions, inclusive.
+        :lng_range: tuple[float, float] (default=None)
+            minimum and maximum longitude of the subdivisions, inclusive.
+
+        Returns
+        =======
+        :QueryResults
+            read-only mapping of the matching subdivision codes to their data.
+
+        Usage
+        =====
+        from iso3166_2 import *
+        iso = Subdivisions()
+
+        #get all states and provinces worldwide
+        iso.query(type_=["State", "Province"])
+
+        #get all subdivisions of France and Spain without a flag
+        iso.query(country_code="FR,ES", has_flag=False)
+
+        #get all subdivisions in the southern hemisphere with a history
+        iso.query(lat_range=(-90, 0), has_history=True)
+
+        Raises
+        ======
+        TypeError:
+            Incorrect data type for a predicate.
+        ValueError:
+            Invalid country code or coordinate range input.
+            Attribute of a predicate was excluded on class instantiation.
+        """
+        #get each predicate's posting of matching entries: a set from an inverted index, or a range of the sorted coordinates
+        query_index = None
+        postings = []
+        for attribute, values in (("country", country_code), ("type", type_), ("parentCode", parent_code)):
+            if (values is None or values == ""):
+                continue
+            if (attribute != "country" and attribute not in self.filter_attributes):
+                raise ValueError(f"{attribute} attribute was excluded from subdivision outputs on class instantiation, it cannot be queried.")
+            if (isinstance(values, str)):
+                values = values.split(",") if (attribute == "country") else [values]
+            if not (isinstance(values, Iterable) and all(isinstance(value, str) for value in values)):
+                raise TypeError(f"Expected {attribute} predicate to be a string or list of strings, got {values}.")
+            if (attribute == "country"):
+                values = [self.convert_to_alpha2(value.strip()) for value in values]
+            elif (attribute == "type"):
+                values = [value.lower() for value in values]
+            query_index = query_index or self._query_index()
+            index = query_index.postings[attribute]
+            postings.append(frozenset().union(*(index.get(value, ()) for value in values)))
+
+        for attribute, present in (("flag", has_flag), ("history", has_history)):
+            if (present is None):
+                continue
+            if not (isinstance(present, bool)):
+                raise TypeError(f"Expected has_{attribute} predicate to be a bool, got {type(present)}.")
+            if (attribute not in self.filter_attributes):
+                raise ValueError(f"{attribute} attribute was excluded from subdivision outputs on class instantiation, it cannot be queried.")
+            query_index = query_index or self._query_index()
+            postings.append(query_index.postings[attribute][present])
+
+        for axis, value_range in ((0, lat_range), (1, lng_range)):
+            if (value_range is None):
+                continue
+            if ("latLng" not in self.filter_attributes):
+                raise ValueError("latLng attribute was excluded from subdivision outputs on class instantiation, it cannot be queried.")
+            try:
+                min_value, max_value = (float(value) for value in value_range)
+            except (TypeError, ValueError):
+                raise TypeError(f"Expected coordinate range to be a (minimum, maximum) pair of numbers, got {value_range}.")
+            if not (min_value <= max_value):
+                raise ValueError(f"Minimum of the coordinate range must not be greater than its maximum, got {value_range}.")
+            query_index = query_index or self._query_index()
+            postings.append(query_index.coordinate_range(axis, min_value, max_value))
+
+        #no predicates input, all subdivisions match
+        query_index = query_index or self._query_index()
+        if not (postings):
+            return QueryResults(query_index, range(len(query_index.entries)))
+
+        #intersect the postings starting from the smallest, the coordinate ranges are checked per matching entry
+        postings.sort(key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            if not (matches):
+                break
+            if (isinstance(posting, _CoordinateRange)):
+                matches = {entry_id for entry_id in matches if posting.contains(entry_id)}
+            else:
+                matches &= posting
+        return QueryResults(query_index, sorted(matches))
+
+    def _query_index(self) -> "_QueryIndex":
+        """
+        Return the query index of the instance's subdivision data. If the instance's data is 
+        unchanged from the shared dataset the index is shared with every other instance with
+        the same countries, otherwise it's built for the instance. 
+        """
+        query_index = self._indexes.get("query")
+        if (query_index is None):
+            if not (self._owned_countries):
+                query_index = self._dataset.indexes.get(("query", tuple(self.all), tuple(self._removed_attributes)), lambda: _QueryIndex(self.all))
+            else:
+                query_index = _QueryIndex(self.all)
+            self._indexes["query"] = query_index
+        return query_index
+
+    def _hierarchy_index(self, code: str) -> tuple["_HierarchyIndex", str|None]:
+        """ 
+        Return the hierarchy index of the country of a subdivision or country code, and the 
+        subdivision code, None if a country code was input, raising an error if either is invalid. 
+        """
+        #raise error if parentCode attribute was excluded on class instantiation 
+        if ("parentCode" not in self.filter_attributes):
+            raise ValueError("parentCode attribute was excluded from subdivision outputs on class instantiation,\
+                             create a new object of the class without excluding the parentCode attribute.")
+        if not (isinstance(code, str)):
+            raise TypeError(f"Expected input code to be a string, got {type(code)}.")
+        code = code.strip().upper()
+        if ("-" in code):
+            alpha_code, subdivision_code = code.split("-", 1)[0], code
+        else:
+            alpha_code, subdivision_code = self.convert_to_alpha2(code), None
+
+        #raise error if the country's data isn't available or the subdivision isn't in it
+        country_data = self._country_data(alpha_code)
+        if (country_data is None):
+            raise ValueError(f"Invalid alpha-2 country code input: {alpha_code}.")
+        if (subdivision_code is not None and subdivision_code not in country_data):
+            raise ValueError(f"Subdivision code {subdivision_code} not found in the {alpha_code} subdivision data.")
+        return self._country_index(alpha_code, "hierarchy", _HierarchyIndex), subdivision_code
+
     @staticmethod
     def convert_to_alpha2(alpha_code: str) -> str:
         """ 
@@ -840,20 +1417,23 @@ class Subdivisions():
         #uppercase alpha code, remove leading/trailing whitespace
         alpha_code = alpha_code.upper().strip()
 
-        #use iso3166 package to find corresponding alpha-2 code from its numeric code
+        #get the lookup tables of alpha-2, alpha-3 and numeric codes to alpha-2, built once per process
+        country_codes = _country_codes()
+
+        #find corresponding alpha-2 code from its numeric code
         if (alpha_code.isdigit()):
-            if (alpha_code in [country.numeric for country in countries]):
-                return countries.get(numeric=alpha_code).alpha_2
+            if (alpha_code in country_codes.numeric):
+                return country_codes.numeric[alpha_code]
 
         #return input alpha code if its valid
         if len(alpha_code) == 2:
-            if (alpha_code in [country.alpha_2 for country in countries]):
+            if (alpha_code in country_codes.alpha_2):
                 return alpha_code
 
-        #use iso3166 package to find corresponding alpha-2 code from its alpha-3 code
+        #find corresponding alpha-2 code from its alpha-3 code
         if len(alpha_code) == 3:
-            if (alpha_code in [country.alpha_3 for country in countries]):
-                return countries.get(alpha_3=alpha_code).alpha_2
+            if (alpha_code in country_codes.alpha_3):
+                return country_codes.alpha_3[alpha_code]
         
         #return error by default if input country code invalid and can't be converted into alpha-2
         raise ValueError(f"Invalid ISO 3166-1 country code input {alpha_code}.")
@@ -865,6 +1445,8 @@ class Subdivisions():
         subdivision code. A list of country data can be returned if a comma separated list 
         of alpha codes are input. If the alpha-3 or numeric codes are input these will be 
         converted into their alpha-2 counterpart. If no value input then an error is raised.
+        If a country wasn't input on class instantiation, its data is loaded from the dataset
+        on first access.
 
         Parameters
         ==========
@@ -881,7 +1463,9 @@ class Subdivisions():
             If a subdivision code is provided (e.g. 'US-CA'), returns a Subdivision dataclass object.
             If a single country code is provided, returns a CountrySubdivisions object containing 
             all subdivisions for that country. If multiple country codes are provided (comma-separated),
-            returns a dict of CountrySubdivisions objects keyed by alpha-2 country code.
+            returns a dict of CountrySubdivisions objects keyed by alpha-2 country code. The 
+            CountrySubdivisions objects are read-only dicts of the data, cached per country, 
+            so repeated access doesn't copy any of the data.
 
         Usage
         =====
@@ -918,14 +1502,18 @@ class Subdivisions():
         TypeError:
             Invalid data type for alpha code parameter.
         ValueError:
-            When a valid alpha-2 code input but the data is not available as not all
-            country data imported on class instantiation.
+            When a valid alpha-2 code input but the country's data is not available in the dataset.
             When subdivision code is not found in the dataset.
         """
         #raise type error if input isn't a string
         if not (isinstance(alpha_code, str)):
             raise TypeError(f"Input parameter {alpha_code} is not of correct datatype string, got {type(alpha_code)}.")       
 
+        #return the cached view of the country's data if the same code has already been input
+        country_view = self._country_views.get(alpha_code)
+        if (country_view is not None):
+            return country_view
+
         #check if input is a subdivision code (contains hyphen and matches pattern XX-YYY)
         if '-' in alpha_code and ',' not in alpha_code:
             #extract country code from subdivision code (part before hyphen)
@@ -938,17 +1526,17 @@ class Subdivisions():
             except ValueError:
                 raise ValueError(f"Invalid subdivision code format: {alpha_code}. Country code portion '{country_code}' is not valid.")
             
-            #check if country data is available
-            if country_code not in list(self.all.keys()):
-                raise ValueError(f"Valid alpha-2 code input {country_code}, but country data not available as country code parameter was input on class instantiation,"
-                                 " try creating another instance of the class with no initial input parameter value, e.g iso = Subdivisions().")
+            #get country data, loading it on first access if it wasn't input on class instantiation, raise error if not available
+            country_data = self._country_data(country_code)
+            if country_data is None:
+                raise ValueError(f"Valid alpha-2 code input {country_code}, but country data not available in the ISO 3166-2 dataset.")
             
             #check if subdivision code exists for this country
-            if subdivision_code not in self.all[country_code]:
+            if subdivision_code not in country_data:
                 raise ValueError(f"Subdivision code '{subdivision_code}' not found for country {country_code}.")
             
             #return the specific subdivision as a Subdivision dataclass object
-            subdivision_data = self.all[country_code][subdivision_code]
+            subdivision_data = country_data[subdivision_code]
             return Subdivision(
                 code=subdivision_code,
                 name=subdivision_data.get('name'),
@@ -961,6 +1549,7 @@ class Subdivisions():
             )
 
         #separate alpha codes into into comma separated list
+        input_alpha_code = alpha_code
         alpha_code = alpha_code.split(',')
 
         #object to store country data
@@ -972,27 +1561,23 @@ class Subdivisions():
             #if 3 letter alpha-3 or numeric codes input then convert to corresponding alpha-2, else raise error
             alpha_code[code] = self.convert_to_alpha2(alpha_code[code])
 
-            #raise error if country data not imported on object instantiation 
-            if not (alpha_code[code] in list(self.all.keys())):
-                raise ValueError(f"Valid alpha-2 code input {alpha_code[code]}, but country data not available as country code parameter was input on class instantiation,"
-                                 " try creating another instance of the class with no initial input parameter value, e.g iso = Subdivisions().")
-                
-            #add subdivision specific data to output object 
-            country[alpha_code[code]] = self.all[alpha_code[code]]
-
-            #iterate over nested dicts, convert into instances of Map class so they can be accessed via dot notation
-            for key in country[alpha_code[code]].keys():
-                if (isinstance(country[alpha_code[code]][key], dict)):
-                    country[alpha_code[code]][key] = Map(country[alpha_code[code]][key])
+            #get the cached read-only view of the country's data, holding the underlying (shared) subdivision data without 
+            #copying it, allowing the subdivisions and their attributes to be accessed via dot notation
+            country_view = self._country_views.get(alpha_code[code])
+            if (country_view is None):
+                #get country data, loading it on first access if it wasn't input on class instantiation, raise error if not available
+                country_data = self._country_data(alpha_code[code])
+                if (country_data is None):
+                    raise ValueError(f"Valid alpha-2 code input {alpha_code[code]}, but country data not available in the ISO 3166-2 dataset.")
+                country_view = self._country_views[alpha_code[code]] = CountrySubdivisions(self, alpha_code[code], country_data)
+            
+            country[alpha_code[code]] = country_view
 
-        #if only one alpha-2 code input then return its country view; else return dict of views
+        #if only one alpha-2 code input then return its country view, cached against the input code; else return dict of views
         if len(alpha_code) == 1:
-            a2 = alpha_code[0]
-            return CountrySubdivisions(self, a2, country[a2])
+            self._country_views[input_alpha_code] = country[alpha_code[0]]
+            return country[alpha_code[0]]
         else:
-            #wrap each country entry so you can also do subd["AD"].subdivision_names() & subd["AD"].subdivision_codes()
-            for a2 in list(country.keys()):
-                country[a2] = CountrySubdivisions(self, a2, country[a2])
             return country
 
         # #if only one alpha-2 code input then return list of its country data and attributes else return dict object for all inputs
@@ -1001,33 +1586,69 @@ class Subdivisions():
         # else:
         #     return country
     
-    def check_for_updates(self):
+    def check_for_updates(self, base_url: str="https://raw.githubusercontent.com/amckenna41/iso3166-2/main/iso3166_2/", cache_dir: str="") -> dict|None:
         """ 
         Pull the latest version of the object from the repo, comparing it with the current 
         version of the object installed in the software. If new updates/changes are found
         output them and a message encouraging the user to download latest version.
 
+        Rather than downloading the full 3.5MB JSON, only the manifest of the repo's sharded 
+        per-country layout is pulled, via a conditional request using the ETag of the last 
+        manifest pulled, such that an unchanged manifest isn't downloaded again. The hash of 
+        each country's shard in the manifest is compared with the hash of the current data,
+        with only the shards of the countries that differ being pulled and compared. Pulled 
+        shards are cached by their hash, alongside the manifest's ETag, in the cache directory.
+        The size and hash of the JSON recorded in the manifest are compared with the headers of
+        a HEAD request of the repo's JSON, if the repo has no sharded layout or it's out of sync
+        with the JSON, the full JSON is pulled instead.
+
         Parameters
         ==========
-        None
+        :base_url: str (default="https://raw.githubusercontent.com/amckenna41/iso3166-2/main/iso3166_2/")
+            URL of the directory on the repo containing the iso3166-2.json object and its 
+            iso3166-2-shards directory.
+        :cache_dir: str (default="")
+            directory to cache the manifest's ETag and pulled shards in, by default ~/.cache/iso3166-2.
 
         Returns
         =======
-        None
+        :new_iso3166_2: dict|None
+            dict of the new/changed subdivisions found on the repo, per country, None if the 
+            latest data couldn't be pulled.
 
         Raises
         ======
         requests.exceptions.RequestException:
             Error pulling data object from URL.
         """
-        #pull latest data object from repo using requests library
+        #imported on first use, as they're only required when checking for updates
+        import requests
+        import natsort
+        import pprint
+        from pycountry import countries
+
+        base_url = base_url.rstrip("/") + "/"
+        if (cache_dir == ""):
+            cache_dir = _default_cache_dir()
+
+        #pull latest manifest and the shards of any countries that differ from the current data, or the full data object if the repo isn't sharded
         try:
-            response = requests.get("https://raw.githubusercontent.com/amckenna41/iso3166-2/main/iso3166_2/iso3166-2.json")
-            response.raise_for_status()
-            latest_iso3166_2_json = response.json()
-        except requests.exceptions.RequestException as e:
+            with requests.Session() as session:
+                manifest = _pull_manifest(session, base_url + "iso3166-2-shards/manifest.json", cache_dir)
+                #only use the shards if the manifest is in sync with the JSON on the repo, e.g they weren't left stale by an export
+                if (manifest is not None and not _manifest_in_sync(session, base_url + "iso3166-2.json", manifest)):
+                    manifest = None
+                if (manifest is None):
+                    response = session.get(base_url + "iso3166-2.json", timeout=30)
+                    response.raise_for_status()
+                    latest_iso3166_2_json = response.json()
+                else:
+                    current_hashes = self._country_hashes()
+                    latest_iso3166_2_json = {alpha_code: _pull_shard(session, base_url + "iso3166-2-shards/" + shard["file"], shard, cache_dir) 
+                        for alpha_code, shard in manifest["countries"].items() if (current_hashes.get(alpha_code) != shard["sha256"])}
+        except (requests.exceptions.RequestException, ValueError, KeyError, TypeError) as e:
             print(f"Failed to fetch the latest updates data from: {e}.")
-            return
+            return None
             
         #separate object that holds individual data objects that were found on the object in the repo that weren't in the software object
         new_iso3166_2 = {}
@@ -1069,12 +1690,34 @@ class Subdivisions():
             #iterate over all found updates, print them out
             for code, updates in new_iso3166_2.items():
                 #get country name from code
-                country_name = countries.get(alpha_2=code).name
-                print(f"{country_name} ({code}):")
+                country = countries.get(alpha_2=code)
+                print(f"{country.name if (country) else code} ({code}):")
                 pprint.pprint(updates, compact=True)
         #no updates found
         else:
             print("No new updates found for iso3166-2.")
+
+        return new_iso3166_2
+
+    def _country_hashes(self) -> dict:
+        """ 
+        Return the SHA-256 hash of each of the instance's countries' subdivision data, as per the 
+        hashes of the shards in the manifest of the sharded layout. The hashes in the dataset's 
+        manifest are used for any country whose data is unchanged, otherwise they're calculated.
+        """
+        manifest = None
+        if not (self._removed_attributes):
+            with self._dataset._lock:
+                manifest = self._dataset._shard_manifest()
+        country_hashes = {}
+        for alpha_code, country_data in self.all.items():
+            if (manifest and alpha_code not in self._owned_countries and alpha_code in manifest["countries"]):
+                country_hashes[alpha_code] = manifest["countries"][alpha_code]["sha256"]
+            else:
+                if (isinstance(country_data, _CompactCountry)):
+                    country_data = country_data.to_dict()
+                country_hashes[alpha_code] = hashlib.sha256(_dump_country(country_data)).hexdigest()
+        return country_hashes
     
     def remove_attributes(self, attributes_to_remove: list[str], overwrite_data: bool = False) -> None:
         """
@@ -1110,8 +1753,9 @@ class Subdivisions():
                 raise ValueError(f"Invalid attribute to remove: {attribute}. Valid attributes are: {valid_attributes}.")
 
         #iterate over all countries and their subdivisions, removing the inputted attributes from each subdivision object
-        for alpha_code, subdivisions in self.all.items():
-            for subdivision_code, data in subdivisions.items():
+        for alpha_code in self.all:
+            self._own_country(alpha_code)
+            for subdivision_code, data in self.all[alpha_code].items():
                 for attribute in attributes_to_remove:
                     if attribute in data:
                         del self.all[alpha_code][subdivision_code][attribute]
@@ -1121,8 +1765,267 @@ class Subdivisions():
         #overwrite existing iso3166-2.json data file with new data if parameter set
         if overwrite_data:
             print(f"Overwriting existing iso3166-2.json data file at {self.iso3166_2_module_path} with new data with removed attributes.")
-            with open(os.path.join(self.iso3166_2_module_path), 'w', encoding='utf-8') as output_json:
-                json.dump(self.all, output_json, ensure_ascii=False, indent=4)
+            self._export_data(self.iso3166_2_module_path)
+
+    def _own_country(self, alpha_code: str) -> None:
+        """
+        Copy a country's subdivision data from the shared dataset into the instance, prior to it 
+        being modified via the custom_subdivision, remove_attributes functions or the filter_attributes
+        parameter. The parsed dataset is shared across all instances of the class so it is never 
+        modified in place, only the countries that are changed are copied (copy-on-write).
+
+        Parameters
+        ==========
+        :alpha_code: str
+            ISO 3166-1 alpha-2 country code.
+
+        Returns
+        =======
+        None
+        """
+        #reset the instance's indexes and views as the data is about to change
+        self._indexes.clear()
+        self._country_views.clear()
+        if (alpha_code in self._owned_countries or alpha_code not in self.all):
+            return
+        self.all[alpha_code] = {code: {attr: list(val) if isinstance(val, _ReadOnlyList) else val for attr, val in data.items()} 
+                                    for code, data in self.all[alpha_code].items()}
+        self._owned_countries.add(alpha_code)
+
+    def _search_index(self) -> "_SearchIndex":
+        """
+        Return the search index of the instance's subdivision data. If the instance's data is 
+        unchanged from the shared dataset the index is shared with every other instance with
+        the same countries, otherwise it's built for the instance. 
+        """
+        search_index = self._indexes.get("search")
+        if (search_index is None):
+            if not (self._owned_countries):
+                search_index = self._dataset.indexes.get(("search", tuple(self.all), tuple(self._removed_attributes)), lambda: _SearchIndex(self.all))
+            else:
+                search_index = _SearchIndex(self.all)
+            self._indexes["search"] = search_index
+        return search_index
+
+    def _country_index(self, alpha_code: str, index_name: str, build_index) -> tuple:
+        """
+        Return an index built from a country's subdivision data via the build_index function, e.g
+        its sorted subdivision codes or names. The index is built on its first request and, if the
+        country's data is unchanged from the shared dataset, shared with every other instance, 
+        otherwise it's held by the instance until its data is changed.
+
+        Parameters
+        ==========
+        :alpha_code: str
+            ISO 3166-1 alpha-2 country code.
+        :index_name: str
+            name of the index.
+        :build_index: function
+            function that builds the index from the country's subdivision data.
+
+        Returns
+        =======
+        :tuple
+            country's index.
+        """
+        key = (index_name, alpha_code)
+        index = self._indexes.get(key)
+        if (index is None):
+            if (alpha_code in self._owned_countries):
+                index = build_index(self.all[alpha_code])
+            else:
+                index = self._dataset.country_indexes.get(key, lambda: build_index(self._country_data(alpha_code)))
+            self._indexes[key] = index
+        return index
+
+    def _subdivision_code_lists(self, alpha_code: str) -> tuple:
+        """ Return a tuple of a country's subdivision codes, in their original order, and a tuple of them in alphabetical order. """
+        return self._country_index(alpha_code, "codes", lambda country_data: (tuple(country_data), tuple(sorted(country_data))))
+
+    def _sorted_subdivision_names(self, alpha_code: str) -> tuple:
+        """ Return a tuple of a country's subdivision names in alphabetical order. """
+        return self._country_index(alpha_code, "names", lambda country_data: tuple(sorted(data["name"] for data in country_data.values())))
+
+    def _spatial_index(self) -> "_SpatialIndex":
+        """
+        Return the spatial index of the instance's subdivision coordinates. If the instance's data
+        is unchanged from the shared dataset the index is shared with every other instance with
+        the same countries, otherwise it's built for the instance. 
+        """
+        spatial_index = self._indexes.get("spatial")
+        if (spatial_index is None):
+            if not (self._owned_countries):
+                spatial_index = self._dataset.indexes.get(("spatial", tuple(self.all), tuple(self._removed_attributes)), lambda: _SpatialIndex(self.all))
+            else:
+                spatial_index = _SpatialIndex(self.all)
+            self._indexes["spatial"] = spatial_index
+        return spatial_index
+
+    def _country_data(self, alpha_code: str) -> dict|None:
+        """
+        Return a country's subdivision data from the instance. If the country wasn't input on class 
+        instantiation its data is loaded from the dataset on first access, excluding the filter_attributes,
+        and held separately to the 'all' attribute. None is returned if the country isn't in 
+        the dataset.
+
+        Parameters
+        ==========
+        :alpha_code: str
+            ISO 3166-1 alpha-2 country code.
+        
+        Returns
+        =======
+        :dict|None
+            country's subdivision data, None if country not in dataset.
+        """
+        if (alpha_code in self.all):
+            return self.all[alpha_code]
+        if (alpha_code not in self._lazy_countries):
+            if (self.compact):
+                country_data = self._dataset.load_compact().countries.get(alpha_code)
+                if (country_data is not None and self._removed_attributes):
+                    country_data = country_data.project(self._removed_attributes)
+                self._lazy_countries[alpha_code] = country_data
+                return country_data
+            country_data = self._dataset.load_country(alpha_code)
+            if (country_data is None):
+                return None
+            self._lazy_countries[alpha_code] = country_data
+        return self._lazy_countries[alpha_code]
+
+    @staticmethod
+    def build_shards(iso3166_2_filepath: str="") -> str:
+        """
+        Export the sharded per-country layout of the ISO 3166-2 dataset next to its JSON: one 
+        compact JSON file per alpha-2 code in an iso3166-2-shards directory, plus a manifest.json
+        index of each shard's size, hash and number of subdivisions. When creating an instance of
+        the class for one or more countries, only these countries' shards are parsed, rather than 
+        the full 3.5MB JSON, with any other country being loaded on its first access. The shards 
+        are ignored if they're out of sync with the JSON, with the JSON being parsed instead.
+
+        Parameters
+        ==========
+        :iso3166_2_filepath: str (default="")
+            filepath to the ISO 3166-2 JSON to shard, by default the package's iso3166-2.json.
+
+        Returns
+        =======
+        :shards_dir: str
+            directory of the exported shards.
+
+        Usage
+        =====
+        from iso3166_2 import *
+        Subdivisions.build_shards()
+        """
+        if (iso3166_2_filepath == ""):
+            iso3166_2_filepath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "iso3166-2.json")
+        return _write_shards(_parse_json(iso3166_2_filepath), iso3166_2_filepath)
+
+    @staticmethod
+    def build_snapshot(iso3166_2_filepath: str="", user_cache: bool=False) -> str:
+        """
+        Export a binary snapshot of the parsed ISO 3166-2 dataset, via marshal, which is loaded
+        instead of parsing the JSON when the full dataset is first required, more than halving 
+        the time taken. The snapshot is exported next to the JSON, or into the user's cache 
+        directory (~/.cache/iso3166-2/snapshots), e.g if the package directory isn't writable. It's 
+        keyed on the JSON's size and SHA-256 hash, the version of the software and the marshal
+        format, with any stale snapshot being ignored and the JSON parsed instead.
+
+        Parameters
+        ==========
+        :iso3166_2_filepath: str (default="")
+            filepath to the ISO 3166-2 JSON to snapshot, by default the package's iso3166-2.json.
+        :user_cache: bool (default=False)
+            export the snapshot into the user's cache directory rather than next to the JSON.
+
+        Returns
+        =======
+        :snapshot_filepath: str
+            filepath of the exported snapshot.
+
+        Usage
+        =====
+        from iso3166_2 import *
+        Subdivisions.build_snapshot()
+        """
+        if (iso3166_2_filepath == ""):
+            iso3166_2_filepath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "iso3166-2.json")
+        key = _dataset_store._key(iso3166_2_filepath)
+        snapshot_filepath = _snapshot_paths(key[0])[1 if (user_cache) else 0]
+        _write_snapshot(_parse_json(iso3166_2_filepath), key, snapshot_filepath)
+        return snapshot_filepath
+
+    def _export_data(self, filepath: str) -> None:
+        """ Export the instance's subdivision data to the JSON at the filepath, re-exporting its shards if it has a sharded layout. """
+        data = self._plain_data()
+        with open(filepath, 'w', encoding='utf-8') as output_json:
+            json.dump(data, output_json, ensure_ascii=False, indent=4)
+        if (os.path.isfile(os.path.join(_shards_dir(filepath), "manifest.json"))):
+            _write_shards(data, filepath)
+
+    def _plain_data(self) -> dict:
+        """ Return the instance's subdivision data with any compact country data converted into dicts, e.g for exporting to JSON. """
+        return {alpha_code: country_data.to_dict() if isinstance(country_data, _CompactCountry) else country_data 
+                    for alpha_code, country_data in self.all.items()}
+
+    def memory_footprint(self) -> dict:
+        """
+        Return the memory footprint of the instance's subdivision data, calculated as the total
+        size of every object referenced by the 'all' attribute, with any object shared between
+        countries counted once. For the compact representation this includes its column arrays 
+        of the full dataset, which are shared by every instance of the class.
+
+        Parameters
+        ==========
+        None
+
+        Returns
+        =======
+        :dict
+            dict of the backend used (compact or dict), the number of countries and subdivisions,
+            and the size of the data in bytes and MB.
+
+        Usage
+        =====
+        from iso3166_2 import *
+        iso = Subdivisions(compact=True)
+        iso.memory_footprint()
+        """
+        size_in_bytes = _deep_sizeof(self.all)
+        return {"backend": "compact" if (self.compact) else "dict", "countries": len(self.all), "subdivisions": len(self),
+                "bytes": size_in_bytes, "megabytes": round(size_in_bytes / (1024 * 1024), 3)}
+
+    @staticmethod
+    def dataset_cache_info() -> list[dict]:
+        """
+        Return the list of ISO 3166-2 datasets currently parsed and held in the process-wide
+        dataset store, including the number of instances referencing each dataset and the
+        time taken to parse it. 
+
+        Parameters
+        ==========
+        None
+
+        Returns
+        =======
+        :list[dict]
+            list of dicts of each cached dataset's filepath, mtime, size (bytes), number of 
+            countries, whether it was loaded from its snapshot, number of indexes held, reference 
+            count and parse time (seconds).
+
+        Usage
+        =====
+        from iso3166_2 import *
+        iso = Subdivisions()
+        Subdivisions.dataset_cache_info()
+        """
+        return _dataset_store.info()
+
+    @staticmethod
+    def clear_dataset_cache() -> None:
+        """ Remove all datasets from the process-wide dataset store that aren't referenced by an instance. """
+        _dataset_store.clear()
 
     def __str__(self) -> str:
         """ Return string representation of the class instance. """
@@ -1142,6 +2045,1184 @@ class Subdivisions():
         size_in_mb = size_in_bytes / (1024 * 1024) 
         return round(size_in_mb, 3)
     
+class _CountryCodes(NamedTuple):
+    """ Read-only lookup tables of each ISO 3166-1 alpha-2, alpha-3 and numeric code to its alpha-2 code. """
+    alpha_2: MappingProxyType
+    alpha_3: MappingProxyType
+    numeric: MappingProxyType
+
+@functools.lru_cache(maxsize=None)
+def _country_codes() -> _CountryCodes:
+    """ 
+    Return the lookup tables of all ISO 3166-1 alpha-2, alpha-3 and numeric codes to their
+    alpha-2 code, built from pycountry once per process, such that converting and validating 
+    a country code is a single dict lookup rather than iterating over every country.
+    """
+    from pycountry import countries
+
+    alpha_2, alpha_3, numeric = {}, {}, {}
+    for country in countries:
+        alpha_2[country.alpha_2] = country.alpha_2
+        alpha_3[country.alpha_3] = country.alpha_2
+        numeric[country.numeric] = country.alpha_2
+    return _CountryCodes(MappingProxyType(alpha_2), MappingProxyType(alpha_3), MappingProxyType(numeric))
+
+def _parse_json(filepath: str, removed_attributes: tuple=()) -> dict:
+    """ Parse the ISO 3166-2 JSON at the filepath, excluding any removed attributes from each subdivision, raise error if issue reading in JSON. """
+    try:
+        with open(filepath, encoding="utf-8") as fp:
+            return json.load(fp, object_pairs_hook=_projection_hook(removed_attributes))
+    except FileNotFoundError: 
+        raise OSError("Error ❗: The ISO 3166-2 file was not found.")
+    except json.JSONDecodeError as e:
+        raise ValueError(
+            "Error ❗: The ISO 3166-2 file contains invalid JSON. "
+            f"{e.msg} at line {e.lineno}, column {e.colno} (char {e.pos})."
+        )
+
+def _projection_hook(removed_attributes: tuple):
+    """ 
+    Return the object_pairs_hook of the JSON decoder that excludes the removed attributes from each
+    subdivision as it's decoded, such that they're never held in the parsed data, None if no attributes 
+    are removed. The attribute names never clash with the alpha-2 or subdivision code keys of the other objects.
+    """
+    if not (removed_attributes):
+        return None
+    removed_attributes = frozenset(removed_attributes)
+    return lambda pairs: {key: val for key, val in pairs if key not in removed_attributes}
+
+@functools.lru_cache(maxsize=32)
+def _file_sha256(key: tuple) -> str:
+    """ Return the SHA-256 hex digest of a file, memoized on its (path, mtime, size) key. """
+    with open(key[0], "rb") as fp:
+        return hashlib.sha256(fp.read()).hexdigest()
+
+def _shards_dir(filepath: str) -> str:
+    """ Return the directory of the sharded per-country layout of an ISO 3166-2 JSON e.g iso3166-2.json -> iso3166-2-shards. """
+    return os.path.splitext(filepath)[0] + "-shards"
+
+def _freeze_subdivision(data: dict) -> "SubdivisionView":
+    """ Return a read-only copy of a subdivision's data, with any list attributes e.g latLng also being read-only, unless it's already read-only. """
+    if (isinstance(data, SubdivisionView)):
+        return data
+    return SubdivisionView((attr, _ReadOnlyList(val) if isinstance(val, list) else val) for attr, val in data.items())
+
+def _freeze_country(country_data: dict) -> "_ReadOnlyDict":
+    """ Return a read-only copy of a country's subdivision data, such that it can be shared by every instance of the Subdivisions class. """
+    return _ReadOnlyDict((code, _freeze_subdivision(data)) for code, data in country_data.items())
+
+def _dump_country(country_data: dict) -> bytes:
+    """ Serialize a country's subdivision data into the compact JSON form used for its shard. """
+    return json.dumps(country_data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _write_shards(data: dict, filepath: str) -> str:
+    """
+    Export the sharded per-country layout of the ISO 3166-2 data object, that was exported 
+    to the filepath, into the shards directory next to it: one compact JSON file per 
+    alpha-2 code, plus a manifest.json index of each shard's filename, size (bytes), 
+    SHA-256 hash and number of subdivisions. The manifest also stores the size and hash 
+    of the source JSON so the shards are ignored if they become out of sync with it. The
+    manifest is written last, via a temporary file, so partially written shards are never 
+    used.
+
+    Parameters
+    ==========
+    :data: dict
+        ISO 3166-2 subdivision data object, keyed by alpha-2 code.
+    :filepath: str
+        filepath to the ISO 3166-2 JSON the data object was exported to.
+
+    Returns
+    =======
+    :shards_dir: str
+        directory of the exported shards.
+    """
+    shards_dir = _shards_dir(filepath)
+    manifest_path = os.path.join(shards_dir, "manifest.json")
+    os.makedirs(shards_dir, exist_ok=True)
+
+    #remove existing manifest so the shards are never used whilst being exported
+    if (os.path.isfile(manifest_path)):
+        os.remove(manifest_path)
+
+    #export each country's subdivision data to its own compact shard
+    manifest = {"source": {"filename": os.path.basename(filepath), "size": 0, "sha256": ""}, "countries": {}}
+    for alpha_code, country_data in data.items():
+        country_bytes = _dump_country(country_data)
+        with open(os.path.join(shards_dir, alpha_code + ".json"), "wb") as fp:
+            fp.write(country_bytes)
+        manifest["countries"][alpha_code] = {"file": alpha_code + ".json", "size": len(country_bytes), 
+                                             "sha256": hashlib.sha256(country_bytes).hexdigest(), "subdivisions": len(country_data)}
+    
+    #remove any shards of countries no longer in the data object
+    for filename in os.listdir(shards_dir):
+        if (filename.endswith(".json") and filename[:-5] not in manifest["countries"]):
+            os.remove(os.path.join(shards_dir, filename))
+
+    #record size and hash of source json, write manifest
+    key = _DatasetStore._key(filepath)
+    manifest["source"]["size"] = key[2]
+    manifest["source"]["sha256"] = _file_sha256(key)
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as fp:
+        json.dump(manifest, fp, separators=(",", ":"))
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+    return shards_dir
+
+def _default_cache_dir() -> str:
+    """ Return the user's cache directory for the software. """
+    return os.path.join(os.path.expanduser("~"), ".cache", "iso3166-2")
+
+def _snapshot_paths(filepath: str) -> tuple[str, str]:
+    """ Return the filepaths of the snapshot of a data file: next to the file and in the user's cache directory. """
+    return (os.path.splitext(filepath)[0] + ".snapshot",
+            os.path.join(_default_cache_dir(), "snapshots", hashlib.sha256(os.path.realpath(filepath).encode("utf-8")).hexdigest()[:32] + ".snapshot"))
+
+def _snapshot_key(key: tuple) -> dict:
+    """ Return the key of the snapshot of a data file: its size & hash, the software version and marshal format. """
+    return {"format": 2, "version": __version__, "marshal": marshal.version, "source": {"size": key[2], "sha256": _file_sha256(key)}}
+
+def _write_snapshot(data: dict, key: tuple, snapshot_filepath: str) -> None:
+    """ 
+    Write the snapshot of the parsed data file, via a temporary file. The snapshot is the length of 
+    its header, its header and its segments: the layout of each country's subdivision codes, the 
+    attributes of any subdivisions not in the default order, and a column of each attribute's 
+    values, such that only the required attributes are loaded. 
+    """
+    subdivisions = [subdivision for country_data in data.values() for subdivision in country_data.values()]
+    attributes = list(dict.fromkeys(attr for subdivision in subdivisions for attr in subdivision))
+    segments = {"layout": marshal.dumps([(alpha_code, list(country_data)) for alpha_code, country_data in data.items()]),
+                "keys": marshal.dumps({index: list(subdivision) for index, subdivision in enumerate(subdivisions) if list(subdivision) != attributes})}
+    for attr in attributes:
+        segments[attr] = marshal.dumps([subdivision.get(attr) for subdivision in subdivisions])
+
+    offset, segment_offsets = 0, {}
+    for name, segment in segments.items():
+        segment_offsets[name] = (offset, len(segment))
+        offset += len(segment)
+    header = marshal.dumps({**_snapshot_key(key), "attributes": attributes, "segments": segment_offsets})
+
+    os.makedirs(os.path.dirname(snapshot_filepath) or ".", exist_ok=True)
+    with open(snapshot_filepath + ".tmp", "wb") as fp:
+        fp.write(len(header).to_bytes(4, "little"))
+        fp.write(header)
+        for segment in segments.values():
+            fp.write(segment)
+    os.replace(snapshot_filepath + ".tmp", snapshot_filepath)
+
+def _load_snapshot(key: tuple, removed_attributes: tuple=()) -> dict|None:
+    """ 
+    Return the parsed data file from its snapshot, excluding any removed attributes, whose columns 
+    aren't loaded, if a snapshot exists that's in sync with the file, else None. 
+    """
+    for snapshot_filepath in _snapshot_paths(key[0]):
+        if not (os.path.isfile(snapshot_filepath)):
+            continue
+        try:
+            #read the full snapshot, marshal.loads is much faster than marshal.load from the file
+            with open(snapshot_filepath, "rb") as fp:
+                snapshot = memoryview(fp.read())
+            header_size = int.from_bytes(snapshot[:4], "little")
+            header = marshal.loads(snapshot[4:4 + header_size])
+            snapshot_key = _snapshot_key(key)
+            if not (isinstance(header, dict) and header.get("source", {}).get("size") == key[2] and {name: header.get(name) for name in snapshot_key} == snapshot_key):
+                continue
+            segments = snapshot[4 + header_size:]
+            def load_segment(name):
+                offset, size = header["segments"][name]
+                return marshal.loads(segments[offset:offset + size])
+
+            #load the columns of the required attributes, building each subdivision's data from its row
+            attributes = [attr for attr in header["attributes"] if attr not in removed_attributes]
+            columns = {attr: load_segment(attr) for attr in attributes}
+            irregular_keys = load_segment("keys")
+            rows = zip(*columns.values()) if (columns) else iter(lambda: (), None)
+            data, index = {}, 0
+            for alpha_code, codes in load_segment("layout"):
+                country_data = data[alpha_code] = {}
+                for code, row in zip(codes, rows):
+                    keys = irregular_keys.get(index)
+                    if (keys is None):
+                        country_data[code] = dict(zip(attributes, row))
+                    else:
+                        country_data[code] = {attr: columns[attr][index] for attr in keys if attr in columns}
+                    index += 1
+            return data
+        except (OSError, EOFError, ValueError, TypeError, AttributeError, KeyError, IndexError):
+            pass
+    return None
+
+def _read_update_cache(cache_dir: str) -> dict:
+    """ Return the cache of the ETag and content of each manifest pulled by the check_for_updates function. """
+    try:
+        with open(os.path.join(cache_dir, "manifests.json"), encoding="utf-8") as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return {}
+
+def _write_cache_file(cache_dir: str, filename: str, content: bytes) -> None:
+    """ Write a file to the cache directory, via a temporary file, ignoring any errors as the cache is optional. """
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(os.path.join(cache_dir, filename + ".tmp"), "wb") as fp:
+            fp.write(content)
+        os.replace(os.path.join(cache_dir, filename + ".tmp"), os.path.join(cache_dir, filename))
+    except OSError:
+        pass
+
+def _pull_manifest(session: "requests.Session", url: str, cache_dir: str) -> dict|None:
+    """ 
+    Pull the manifest of the sharded layout at the URL, via a conditional request using the ETag
+    of the cached manifest, if applicable. Return the manifest, or None if there's no manifest at
+    the URL.
+    """
+    update_cache = _read_update_cache(cache_dir)
+    cached = update_cache.get(url)
+    headers = {"If-None-Match": cached["etag"]} if (cached and cached.get("etag")) else {}
+    response = session.get(url, headers=headers, timeout=30)
+    if (response.status_code == 304 and cached):
+        return cached["manifest"]
+    if (response.status_code == 404):
+        return None
+    response.raise_for_status()
+    manifest = response.json()
+    if (response.headers.get("ETag")):
+        update_cache[url] = {"etag": response.headers["ETag"], "manifest": manifest}
+        _write_cache_file(cache_dir, "manifests.json", json.dumps(update_cache, separators=(",", ":")).encode("utf-8"))
+    return manifest
+
+def _manifest_in_sync(session: "requests.Session", url: str, manifest: dict) -> bool:
+    """ 
+    Return whether the manifest of the sharded layout is in sync with the JSON at the URL, via a HEAD
+    request of the JSON, comparing its Content-Length and ETag with the size and SHA-256 hash of the 
+    JSON recorded in the manifest. The ETag is only compared if it's a SHA-256 hash, as on GitHub.
+    """
+    response = session.head(url, timeout=30, allow_redirects=True)
+    if not (response.ok):
+        return False
+    source = manifest.get("source") or {}
+    content_length = response.headers.get("Content-Length")
+    if (content_length is not None and "Content-Encoding" not in response.headers and int(content_length) != source.get("size")):
+        return False
+    etag = response.headers.get("ETag", "").removeprefix("W/").strip('"').lower()
+    if (len(etag) == 64 and all(char in "0123456789abcdef" for char in etag) and etag != source.get("sha256")):
+        return False
+    return True
+
+def _pull_shard(session: "requests.Session", url: str, shard: dict, cache_dir: str) -> dict:
+    """ Pull a country's shard from the URL, or from the cache if already pulled, validating its hash against the manifest. """
+    filename = shard["sha256"] + ".json"
+    try:
+        with open(os.path.join(cache_dir, filename), "rb") as fp:
+            country_bytes = fp.read()
+        if (hashlib.sha256(country_bytes).hexdigest() == shard["sha256"]):
+            return json.loads(country_bytes)
+    except (OSError, ValueError):
+        pass
+    response = session.get(url, timeout=30)
+    response.raise_for_status()
+    if (hashlib.sha256(response.content).hexdigest() != shard["sha256"]):
+        raise ValueError(f"Hash of shard at {url} doesn't match its manifest")
+    _write_cache_file(cache_dir, filename, response.content)
+    return json.loads(response.content)
+
+class _Dataset():
+    """
+    ISO 3166-2 dataset held in the process-wide dataset store, keyed by the data file's path, 
+    modification time and size. Nothing is parsed until requested: a single country's data 
+    is read from its shard, if a valid sharded layout exists next to the JSON, otherwise the
+    full JSON is parsed. All parsed data is shared by every instance of the Subdivisions 
+    class using the same file, so each country's data is frozen into read-only dicts and lists
+    as it's parsed.
+    """
+    __slots__ = ("key", "filepath", "mtime", "size", "removed_attributes", "data", "countries", "shards", "compact", "snapshot", "projections", 
+                 "indexes", "country_indexes", "parse_time", "ref_count", "_lock")
+
+    #maximum number of indexes of multiple countries' data e.g the search index, and of individual countries' data, held by the dataset
+    max_indexes = 16
+    max_country_indexes = 1024
+
+    def __init__(self, key: tuple, removed_attributes: tuple=()):
+        self.key = key
+        self.filepath, self.mtime, self.size = key
+        self.removed_attributes = removed_attributes
+        self.projections = {}
+        self.data = None
+        self.countries = {}
+        self.shards = None
+        self.compact = None
+        self.snapshot = False
+        self.parse_time = 0
+        self.ref_count = 0
+        self._lock = threading.RLock()
+        self.indexes = _IndexCache(self.max_indexes, self._lock)
+        self.country_indexes = _IndexCache(self.max_country_indexes, self._lock)
+
+    def load_all(self) -> dict:
+        """ Return the full dataset, parsing the JSON if not already parsed. """
+        if (self.data is not None):
+            return self.data
+        with self._lock:
+            if (self.data is None):
+                start = time.perf_counter()
+                data = self._parse()
+                #freeze each country's data as it's shared by every instance, keeping any country data already parsed from its shard
+                for alpha_code, country_data in data.items():
+                    data[alpha_code] = self.countries[alpha_code] if (alpha_code in self.countries) else _freeze_country(country_data)
+                self.countries = data
+                self.data = data
+                self.parse_time += time.perf_counter() - start
+        return self.data
+
+    def load_country(self, alpha_code: str) -> dict|None:
+        """ Return a country's subdivision data, parsing just its shard if available, None if country not in dataset. """
+        country_data = self.countries.get(alpha_code)
+        if (country_data is not None):
+            return country_data
+        with self._lock:
+            if (self.data is not None):
+                return self.data.get(alpha_code)
+            if (alpha_code in self.countries):
+                return self.countries[alpha_code]
+            manifest = self._shard_manifest()
+            if (manifest):
+                if (alpha_code not in manifest["countries"]):
+                    return None
+                start = time.perf_counter()
+                country_data = self._read_shard(manifest["countries"][alpha_code])
+                if (country_data is not None):
+                    self.countries[alpha_code] = country_data
+                    self.parse_time += time.perf_counter() - start
+                    return country_data
+        #no valid shards, parse the full JSON
+        return self.load_all().get(alpha_code)
+
+    def load_compact(self) -> "_CompactTable":
+        """ Return the compact representation of the full dataset, the parsed JSON is only held whilst it's converted, if not already parsed. """
+        if (self.compact is not None):
+            return self.compact
+        with self._lock:
+            if (self.compact is None):
+                start = time.perf_counter()
+                self.compact = _CompactTable(self.data if self.data is not None else self._parse())
+                self.parse_time += time.perf_counter() - start
+        return self.compact
+
+    def projection(self, removed_attributes: tuple) -> "_Dataset":
+        """ 
+        Return the projection of the dataset excluding the removed attributes, loaded separately to 
+        the full dataset such that the removed attributes are never held in memory. Each projection 
+        is held by the dataset, sharing its key in the dataset store.
+        """
+        removed_attributes = tuple(sorted(removed_attributes))
+        if not (removed_attributes):
+            return self
+        with self._lock:
+            dataset = self.projections.get(removed_attributes)
+            if (dataset is None):
+                dataset = self.projections[removed_attributes] = _Dataset(self.key, removed_attributes)
+            return dataset
+
+    def _parse(self) -> dict:
+        """ Return the full dataset, loaded from its snapshot if it has one in sync with the JSON, otherwise parsed from the JSON. """
+        data = _load_snapshot(self.key, self.removed_attributes)
+        if (data is not None):
+            self.snapshot = True
+            return data
+        return _parse_json(self.filepath, self.removed_attributes)
+
+    def _shard_manifest(self) -> dict|None:
+        """ Return the manifest of the sharded layout, if it exists and is in sync with the JSON, else None. """
+        if (self.shards is None):
+            self.shards = False
+            manifest_path = os.path.join(_shards_dir(self.filepath), "manifest.json")
+            if (os.path.isfile(manifest_path)):
+                try:
+                    with open(manifest_path, encoding="utf-8") as fp:
+                        manifest = json.load(fp)
+                    if (manifest["source"]["size"] == self.size and manifest["source"]["sha256"] == _file_sha256(self.key)):
+                        self.shards = manifest
+                except (OSError, ValueError, KeyError, TypeError):
+                    pass
+        return self.shards or None
+
+    def _read_shard(self, shard: dict) -> dict|None:
+        """ Parse a country's shard, validating its size and hash against the manifest, None if invalid. """
+        try:
+            with open(os.path.join(_shards_dir(self.filepath), shard["file"]), "rb") as fp:
+                country_bytes = fp.read()
+            if (len(country_bytes) == shard["size"] and hashlib.sha256(country_bytes).hexdigest() == shard["sha256"]):
+                return _freeze_country(json.loads(country_bytes, object_pairs_hook=_projection_hook(self.removed_attributes)))
+        except (OSError, ValueError):
+            pass
+        #invalid shard, disable the sharded layout for this dataset
+        self.shards = False
+        return None
+
+    def country_codes(self) -> list:
+        """ Return the list of alpha-2 codes in the dataset, using the shard manifest if the JSON hasn't been parsed. """
+        if (self.data is None):
+            with self._lock:
+                manifest = self._shard_manifest()
+                if (manifest):
+                    return list(manifest["countries"])
+        return list(self.load_all())
+
+class _IndexCache():
+    """
+    LRU cache of the indexes built from a dataset's subdivision data, e.g its search index, which 
+    are shared by every instance of the Subdivisions class using the dataset. At most maxsize 
+    indexes are held, evicting the least recently used, and the cache is guarded by the dataset's
+    lock, such that each index is only built once when requested by multiple threads.
+
+    Parameters
+    ==========
+    :maxsize: int
+        maximum number of indexes held.
+    :lock: threading.RLock
+        lock of the dataset.
+    """
+    __slots__ = ("maxsize", "_indexes", "_lock")
+
+    def __init__(self, maxsize: int, lock: threading.RLock):
+        self.maxsize = maxsize
+        self._indexes = OrderedDict()
+        self._lock = lock
+
+    def get(self, key: tuple, build_index):
+        """ Return the index with the key, building it via the build_index function if it's not held. """
+        with self._lock:
+            index = self._indexes.get(key)
+            if (index is not None):
+                self._indexes.move_to_end(key)
+                return index
+            index = self._indexes[key] = build_index()
+            if (len(self._indexes) > self.maxsize):
+                self._indexes.popitem(last=False)
+            return index
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+class _CompactTable():
+    """
+    Compact, struct-of-arrays representation of the full ISO 3166-2 dataset, used instead of a 
+    dict per subdivision when an instance of the Subdivisions class is created with compact=True.
+    Each subdivision is a row index into a set of columns: its code, name and localOtherName 
+    strings, the index of its (interned) type, the row index of its parent subdivision, its 
+    coordinates in an array of doubles and its flag URL and history, which are only stored where
+    they differ from the default. The row index of each code is kept in a dict for O(1) lookups.
+    Any subdivision whose attributes don't fit into the columns, e.g custom attributes, is stored
+    as is. Each country's subdivisions are a contiguous range of rows, exposed as a read-only 
+    _CompactCountry mapping.
+
+    Parameters
+    ==========
+    :all_data: dict
+        ISO 3166-2 subdivision data object, keyed by alpha-2 code.
+    """
+    attributes = ("name", "localOtherName", "type", "parentCode", "flag", "latLng", "history")
+    flag_url = "https://raw.githubusercontent.com/amckenna41/iso3166-flags/main/iso3166-2-flags/{}/{}.svg"
+    __slots__ = ("codes", "code_ids", "names", "local_names", "types", "type_ids", "parents", "lat_lngs", "flag_kinds", "flags", "histories", "other", "countries")
+
+    def __init__(self, all_data: dict):
+        self.codes, self.names, self.local_names, self.types = [], [], [], []
+        self.type_ids, self.parents, self.lat_lngs, self.flag_kinds = array("I"), array("i"), array("d"), bytearray()
+        self.flags, self.histories, self.other, self.countries = {}, {}, {}, {}
+        type_ids = {}
+        code_ids = self.code_ids = {}
+        parent_codes = []
+        for alpha_code, country_data in all_data.items():
+            start = len(self.codes)
+            for code, data in country_data.items():
+                index = len(self.codes)
+                code_ids[code] = index
+                self.codes.append(sys.intern(code))
+                lat_lng = data.get("latLng")
+                if (tuple(data) != self.attributes or not isinstance(data["name"], str) or not isinstance(data["type"], str)
+                        or not isinstance(lat_lng, list) or len(lat_lng) != 2 or not all(type(val) is float for val in lat_lng)):
+                    #store any subdivision whose attributes don't fit into the columns as is, read-only as it's shared
+                    self.other[index] = _freeze_subdivision(data)
+                    lat_lng = (math.nan, math.nan)
+                    data = dict.fromkeys(self.attributes, None)
+                    data["name"] = data["type"] = ""
+                self.names.append(data["name"])
+                self.local_names.append(data["localOtherName"])
+                self.type_ids.append(type_ids.setdefault(sys.intern(data["type"]), len(type_ids)))
+                self.parents.append(-1)
+                if (data["parentCode"] is not None):
+                    parent_codes.append((index, data["parentCode"]))
+                self.lat_lngs.extend(lat_lng)
+                #flags are mostly at their default URL on the iso3166-flags repo, only store those that aren't
+                if (data["flag"] is None):
+                    self.flag_kinds.append(0)
+                elif (data["flag"] == self.flag_url.format(code.partition("-")[0], code)):
+                    self.flag_kinds.append(1)
+                else:
+                    self.flag_kinds.append(2)
+                    self.flags[index] = data["flag"]
+                if (data["history"] is not None):
+                    self.histories[index] = data["history"]
+            self.countries[alpha_code] = _CompactCountry(self, start, len(self.codes))
+        self.types = list(type_ids)
+
+        #parent codes are stored as the row index of the parent subdivision
+        for index, parent_code in parent_codes:
+            if (parent_code in code_ids):
+                self.parents[index] = code_ids[parent_code]
+            else:
+                self.other[index] = _freeze_subdivision({**{attr: self.value(index, attr) for attr in self.attributes}, "parentCode": parent_code})
+
+    def value(self, index: int, attribute: str):
+        """ Return the value of a subdivision's attribute from its row in the columns. """
+        other = self.other.get(index)
+        if (other is not None):
+            return other[attribute]
+        if (attribute == "name"):
+            return self.names[index]
+        elif (attribute == "localOtherName"):
+            return self.local_names[index]
+        elif (attribute == "type"):
+            return self.types[self.type_ids[index]]
+        elif (attribute == "parentCode"):
+            parent = self.parents[index]
+            return None if (parent < 0) else self.codes[parent]
+        elif (attribute == "flag"):
+            flag_kind = self.flag_kinds[index]
+            if (flag_kind == 1):
+                return self.flag_url.format(self.codes[index].partition("-")[0], self.codes[index])
+            return self.flags.get(index)
+        elif (attribute == "latLng"):
+            return [self.lat_lngs[2 * index], self.lat_lngs[2 * index + 1]]
+        elif (attribute == "history"):
+            return self.histories.get(index)
+        raise KeyError(attribute)
+
+    def keys_of(self, index: int) -> tuple:
+        """ Return the attributes of a subdivision from its row in the columns. """
+        other = self.other.get(index)
+        return self.attributes if (other is None) else tuple(other)
+
+class _CompactCountry(Mapping):
+    """
+    Read-only mapping of a country's subdivision codes to their _CompactSubdivision rows in the
+    compact representation of the dataset, excluding any attributes removed via the 
+    filter_attributes parameter. Each row is created on access, so none are held in memory.
+
+    Parameters
+    ==========
+    :table: _CompactTable
+        compact representation of the full dataset.
+    :start: int
+        row index of the country's first subdivision.
+    :end: int
+        row index after the country's last subdivision.
+    :removed_attributes: frozenset (default=frozenset())
+        attributes excluded from each subdivision.
+    """
+    __slots__ = ("_table", "_start", "_end", "_removed_attributes")
+
+    def __init__(self, table: _CompactTable, start: int, end: int, removed_attributes: frozenset=frozenset()):
+        self._table = table
+        self._start = start
+        self._end = end
+        self._removed_attributes = removed_attributes
+
+    def _index(self, subdivision_code: str) -> int:
+        """ Return the row index of a subdivision code, -1 if it's not in the country. """
+        index = self._table.code_ids.get(subdivision_code, -1)
+        return index if (self._start <= index < self._end) else -1
+
+    def __getitem__(self, subdivision_code: str) -> "_CompactSubdivision":
+        index = self._index(subdivision_code)
+        if (index < 0):
+            raise KeyError(subdivision_code)
+        return _CompactSubdivision(self, index)
+
+    def __contains__(self, subdivision_code) -> bool:
+        return isinstance(subdivision_code, str) and self._index(subdivision_code) >= 0
+
+    def __iter__(self):
+        return iter(self._table.codes[self._start:self._end])
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+    def project(self, removed_attributes: list) -> "_CompactCountry":
+        """ Return the country's data excluding the removed attributes, sharing the same columns. """
+        return _CompactCountry(self._table, self._start, self._end, self._removed_attributes.union(removed_attributes))
+
+    def to_dict(self) -> dict:
+        """ Return the country's subdivision data as a dict of dicts. """
+        return {self._table.codes[index]: dict(_CompactSubdivision(self, index)) for index in range(self._start, self._end)}
+
+class _CompactSubdivision(Mapping):
+    """ Read-only mapping of a subdivision's attributes, read from its row in the compact representation of the dataset. """
+    __slots__ = ("_country", "_index")
+
+    def __init__(self, country: _CompactCountry, index: int):
+        self._country = country
+        self._index = index
+
+    def __getitem__(self, attribute: str):
+        if (attribute in self._country._removed_attributes):
+            raise KeyError(attribute)
+        return self._country._table.value(self._index, attribute)
+
+    def __iter__(self):
+        removed_attributes = self._country._removed_attributes
+        return (attr for attr in self._country._table.keys_of(self._index) if attr not in removed_attributes)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+def _deep_sizeof(obj, seen: set=None) -> int:
+    """ Return the size in bytes of an object and every object it references, counting any shared object once. """
+    if (seen is None):
+        seen = set()
+    if (id(obj) in seen):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if (isinstance(obj, dict)):
+        size += sum(_deep_sizeof(key, seen) + _deep_sizeof(val, seen) for key, val in obj.items())
+    elif (isinstance(obj, (list, tuple, set, frozenset))):
+        size += sum(_deep_sizeof(val, seen) for val in obj)
+    elif (hasattr(type(obj), "__slots__")):
+        size += sum(_deep_sizeof(getattr(obj, slot), seen) for slot in type(obj).__slots__ if hasattr(obj, slot))
+    return size
+
+class _SearchIndex():
+    """
+    Index of the normalized subdivision names and local/other names searched by the search
+    function, built once per dataset rather than on every search. Alongside the normalized 
+    names it holds an exact-match hash, the ids of the names of each length and the postings
+    of each name's trigrams, which are used to prune the names that can't possibly meet the 
+    likeness score before any are scored via fuzz.ratio. 
+    
+    fuzz.ratio is round(100 * (1 - d/(len(a)+len(b)))), where d is the insertion/deletion 
+    distance, so a likeness score limits d to a maximum value per pair of lengths: any name
+    whose length differs from the search term by more than this can't match, and as each 
+    deletion breaks at most q of a string's q-grams and each insertion at most q-1, any name
+    within d edits of the term shares a minimum number of q-grams with it (q-gram lemma). 
+    Only the names that pass these bounds are scored, so the matching names, their scores 
+    and their order are identical to scoring every name.
+
+    Parameters
+    ==========
+    :all_data: dict
+        ISO 3166-2 subdivision data object, keyed by alpha-2 code.
+    """
+    ngram_size = 3
+
+    def __init__(self, all_data: dict):
+        #per entry: normalized name, alpha-2 code, subdivision code and whether the name is a localOtherName
+        self.names, self.alpha_codes, self.codes, self.local = [], [], [], []
+
+        #normalized names with a comma in them, for the name only and the name + localOtherName search spaces
+        self.comma_names = (set(), set())
+
+        self.exact = {}
+        self.lengths = {}
+        self.postings = {}
+        for alpha2 in all_data:
+            for code, data in all_data[alpha2].items():
+                for local, attr in enumerate(("name", "localOtherName")):
+                    val = data.get(attr)
+                    if val:
+                        normalized = unquote_plus(val).lower()
+                        name = normalized.replace(" ", "")
+                        entry_id = len(self.names)
+                        self.names.append(name)
+                        self.alpha_codes.append(alpha2)
+                        self.codes.append(code)
+                        self.local.append(bool(local))
+                        self.exact.setdefault(name, []).append(entry_id)
+                        self.lengths.setdefault(len(name), []).append(entry_id)
+                        for ngram, count in self._ngrams(name).items():
+                            self.postings.setdefault(ngram, []).append((entry_id, count))
+                        #add normalized name to separate list for names that have a comma in them
+                        if ("," in val):
+                            if not (local):
+                                self.comma_names[0].add(normalized)
+                            self.comma_names[1].add(normalized)
+
+    @classmethod
+    def _ngrams(cls, name: str) -> dict:
+        """ Return the count of each q-gram in the name. """
+        ngrams = {}
+        for i in range(len(name) - cls.ngram_size + 1):
+            ngram = name[i:i + cls.ngram_size]
+            ngrams[ngram] = ngrams.get(ngram, 0) + 1
+        return ngrams
+
+    def candidates(self, term: str, likeness_score: int) -> set:
+        """ Return the ids of the names that can have a likeness score to the normalized search term of at least likeness_score. """
+        #exact matches always meet the likeness score
+        candidates = set(self.exact.get(term, ()))
+
+        #get the maximum distance and the minimum number of shared q-grams for the names of each length
+        count_bounds = {}
+        for length, entry_ids in self.lengths.items():
+            total_length = len(term) + length
+            max_distance = math.floor(total_length * (100.5 - likeness_score) / 100 + 1e-9)
+            #the distance has the same parity as the difference in lengths
+            if ((max_distance - abs(len(term) - length)) % 2):
+                max_distance -= 1
+            #only exact matches possible, or length differs by more than max distance 
+            if (max_distance <= 0 or abs(len(term) - length) > max_distance):
+                continue
+            #each deletion breaks at most q of a string's q-grams and each insertion at most q-1, with the number of 
+            #deletions from the term and insertions into it to get the name fixed by the distance and the lengths
+            deletions, insertions = (max_distance + len(term) - length) // 2, (max_distance - len(term) + length) // 2
+            min_shared_ngrams = max(len(term) - self.ngram_size + 1 - self.ngram_size * deletions - (self.ngram_size - 1) * insertions,
+                                    length - self.ngram_size + 1 - self.ngram_size * insertions - (self.ngram_size - 1) * deletions)
+            if (min_shared_ngrams <= 0):
+                candidates.update(entry_ids)
+            else:
+                count_bounds[length] = min_shared_ngrams
+
+        #count the q-grams each name shares with the search term via the postings
+        if (count_bounds):
+            shared_ngrams = {}
+            for ngram, term_count in self._ngrams(term).items():
+                for entry_id, count in self.postings.get(ngram, ()):
+                    shared_ngrams[entry_id] = shared_ngrams.get(entry_id, 0) + min(term_count, count)
+            for entry_id, count in shared_ngrams.items():
+                min_shared_ngrams = count_bounds.get(len(self.names[entry_id]))
+                if (min_shared_ngrams is not None and count >= min_shared_ngrams):
+                    candidates.add(entry_id)
+
+        return candidates
+
+    def match(self, term: str, likeness_score: int, local_other_name_search: bool=True) -> list[tuple]:
+        """ Return list of (alpha-2, subdivision code, score) of the names with a likeness score to the term of at least likeness_score, in dataset order. """
+        from thefuzz import fuzz
+
+        matches = []
+        for entry_id in sorted(self.candidates(term, likeness_score)):
+            if (self.local[entry_id] and not local_other_name_search):
+                continue
+            likeness = fuzz.ratio(term, self.names[entry_id])
+            if (likeness >= likeness_score):
+                matches.append((self.alpha_codes[entry_id], self.codes[entry_id], likeness))
+        return matches
+
+def _match_search_terms(search_index: _SearchIndex, terms: list[str], likeness_score: int=100, local_other_name_search: bool=True) -> dict:
+    """ 
+    Return dict of the matches of each normalized search term in the search index, if no exact
+    match found for a term with the default likeness score of 100 then the likeness is reduced 
+    to 85. 
+    """
+    term_matches = {}
+    for term in terms:
+        if (term in term_matches):
+            continue
+        matches = search_index.match(term, likeness_score, local_other_name_search)
+
+        #fallback: if no matches found, reduce the likeness slightly
+        if likeness_score == 100 and not matches:
+            matches = search_index.match(term, 85, local_other_name_search)
+        
+        term_matches[term] = matches
+    return term_matches
+
+#search index of the current process in the pool of processes used by the search_batch function
+_worker_search_index = None
+
+def _init_search_worker(search_index: _SearchIndex) -> None:
+    """ Set the search index of a process in the pool used by the search_batch function. """
+    global _worker_search_index
+    _worker_search_index = search_index
+
+def _match_search_terms_worker(terms: list[str], likeness_score: int=100, local_other_name_search: bool=True) -> dict:
+    """ Return dict of the matches of each search term, in a process in the pool used by the search_batch function. """
+    return _match_search_terms(_worker_search_index, terms, likeness_score, local_other_name_search)
+
+def _validate_lat_lng(lat_lng) -> tuple[float, float]:
+    """ Validate a latitude/longitude coordinate, returning it as a tuple of floats. """
+    if (isinstance(lat_lng, (str, bytes)) or not hasattr(lat_lng, "__len__") or len(lat_lng) != 2 
+            or not all(isinstance(val, (int, float)) and not isinstance(val, bool) for val in lat_lng)):
+        raise TypeError(f"Input coordinate should be a list or tuple of latitude and longitude, got {lat_lng}.")
+    lat, lng = float(lat_lng[0]), float(lat_lng[1])
+    if not (-90 <= lat <= 90) or not (-180 <= lng <= 180):
+        raise ValueError(f"Invalid latitude/longitude, latitude must be between -90 and 90 and longitude between -180 and 180, got {lat_lng}.")
+    return lat, lng
+
+class _SpatialIndex():
+    """
+    Spatial index of the subdivisions' latLng coordinates, used for reverse geocoding. Each 
+    coordinate is converted into a unit vector in 3D, such that the straight-line (chord) 
+    distance between two vectors increases with the great-circle distance between the 
+    coordinates, without any special-casing of the poles or antimeridian. The vectors are 
+    held in a k-d tree, stored implicitly as an ordering of the point ids, with the median of 
+    each range of ids being the node splitting the range along the axis of largest spread. 
+    Nearest and within-radius queries only visit the nodes whose splitting plane is closer 
+    than the current furthest match. The squared chord length of every pair is calculated 
+    as 2 - 2 * (dot product), both in the k-d tree and in the vectorized NumPy queries, with 
+    ties broken by point id, so both give the same results.
+
+    Parameters
+    ==========
+    :all_data: dict
+        ISO 3166-2 subdivision data object, keyed by alpha-2 code.
+    """
+    earth_radius_km = 6371.0088
+    leaf_size = 8
+
+    def __init__(self, all_data: dict):
+        #per point: alpha-2 code, subdivision code and unit vector coordinates
+        self.alpha_codes, self.codes = [], []
+        self.xyz = (array("d"), array("d"), array("d"))
+        for alpha2 in all_data:
+            for code, data in all_data[alpha2].items():
+                lat_lng = data.get("latLng")
+                if not (lat_lng) or len(lat_lng) != 2 or lat_lng[0] is None or lat_lng[1] is None:
+                    continue
+                self.alpha_codes.append(alpha2)
+                self.codes.append(code)
+                for axis, val in enumerate(self.unit_vector(lat_lng[0], lat_lng[1])):
+                    self.xyz[axis].append(val)
+
+        #k-d tree: ordering of the point ids and the splitting axis of each node, at the node's position 
+        self.order = list(range(len(self.codes)))
+        self.axes = bytearray(len(self.codes))
+        ranges = [(0, len(self.order))]
+        while ranges:
+            lo, hi = ranges.pop()
+            if (hi - lo <= self.leaf_size):
+                continue
+            ids = self.order[lo:hi]
+            axis = max(range(3), key=lambda axis: max(self.xyz[axis][i] for i in ids) - min(self.xyz[axis][i] for i in ids))
+            ids.sort(key=lambda i: (self.xyz[axis][i], i))
+            self.order[lo:hi] = ids
+            mid = (lo + hi) // 2
+            self.axes[mid] = axis
+            ranges.append((lo, mid))
+            ranges.append((mid + 1, hi))
+
+        #array of the unit vectors, built on the first vectorized query
+        self._points = None
+
+    @staticmethod
+    def unit_vector(lat: float, lng: float) -> tuple[float, float, float]:
+        """ Return the unit vector of a latitude/longitude coordinate. """
+        lat, lng = math.radians(lat), math.radians(lng)
+        return (math.cos(lat) * math.cos(lng), math.cos(lat) * math.sin(lng), math.sin(lat))
+
+    @classmethod
+    def chord2(cls, distance_km: float) -> float:
+        """ Return the squared chord length of a great-circle distance. """
+        angle = distance_km / cls.earth_radius_km
+        if (angle >= math.pi):
+            return 4.0
+        return (2 * math.sin(angle / 2)) ** 2
+
+    @classmethod
+    def distance_km(cls, chord2: float) -> float:
+        """ Return the great-circle distance of a squared chord length. """
+        return 2 * math.asin(min(1.0, math.sqrt(max(0.0, chord2)) / 2)) * cls.earth_radius_km
+
+    def query(self, lat: float, lng: float, k: int|None=1, radius2: float=4.0) -> list[tuple]:
+        """ Return the (squared chord length, point id) of the k nearest points within the radius of the coordinate, sorted by distance. """
+        qx, qy, qz = query = self.unit_vector(lat, lng)
+        xs, ys, zs = self.xyz
+        order, axes = self.order, self.axes
+        #max-heap of the k nearest points, or list of all points within the radius
+        matches = []
+        bound = radius2
+        stack = [(0, len(order), 0.0)]
+        while stack:
+            lo, hi, plane2 = stack.pop()
+            if (plane2 > bound):
+                continue
+            if (hi - lo <= self.leaf_size):
+                ids = order[lo:hi]
+            else:
+                mid = (lo + hi) // 2
+                ids = (order[mid],)
+                axis = axes[mid]
+                diff = query[axis] - self.xyz[axis][order[mid]]
+                near, far = ((lo, mid), (mid + 1, hi)) if (diff < 0) else ((mid + 1, hi), (lo, mid))
+                stack.append((far[0], far[1], diff * diff))
+                stack.append((near[0], near[1], 0.0))
+            for i in ids:
+                chord2 = 2.0 - 2.0 * (qx * xs[i] + qy * ys[i] + qz * zs[i])
+                if (chord2 > bound):
+                    continue
+                if (k is None):
+                    matches.append((chord2, i))
+                elif (len(matches) < k):
+                    heapq.heappush(matches, (-chord2, -i))
+                    if (len(matches) == k):
+                        bound = min(radius2, -matches[0][0])
+                elif ((-chord2, -i) > matches[0]):
+                    heapq.heapreplace(matches, (-chord2, -i))
+                    bound = min(radius2, -matches[0][0])
+        if (k is not None):
+            matches = [(-chord2, -i) for chord2, i in matches]
+        return sorted(matches)
+
+    def query_batch(self, np, lat_lngs: list[tuple], k: int|None=1, radius2: float=4.0, chunk_size: int=256) -> list[list[tuple]]:
+        """ Return the k nearest points within the radius of each coordinate, vectorized via NumPy, in chunks of coordinates. """
+        if (self._points is None):
+            self._points = np.array(self.xyz).T.copy()
+        batch_matches = []
+        for start in range(0, len(lat_lngs), chunk_size):
+            coords = np.radians(np.array(lat_lngs[start:start + chunk_size], dtype=float).reshape(-1, 2))
+            lat, lng = coords[:, 0], coords[:, 1]
+            queries = np.stack((np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)), axis=1)
+            #the chord length decreases with the dot product, so the candidates are selected via the dot products, with a 
+            #tolerance for rounding, and the squared chord lengths are only calculated for the candidates
+            dots = queries @ self._points.T
+            if (k is None or k >= len(self.codes)):
+                #all points within the radius, sorted by distance and point id per coordinate
+                rows, ids = np.nonzero(dots >= 1.0 - radius2 / 2 - 1e-12)
+                dists = 2.0 - 2.0 * dots[rows, ids]
+                within = dists <= radius2
+                rows, ids, dists = rows[within], ids[within], dists[within]
+                order = np.lexsort((ids, dists, rows))
+                rows, ids, dists = rows[order], ids[order], dists[order]
+                splits = np.searchsorted(rows, np.arange(1, len(queries)))
+                for row_ids, row_dists in zip(np.split(ids, splits), np.split(dists, splits)):
+                    matches = list(zip(row_dists.tolist(), row_ids.tolist()))
+                    batch_matches.append(matches if (k is None) else matches[:k])
+                continue
+            #k nearest points per coordinate, sorted by distance and point id
+            if (k == 1):
+                ids = np.argmax(dots, axis=1)[:, None]
+            else:
+                ids = np.argpartition(-dots, k - 1, axis=1)[:, :k]
+            kth_dots = np.take_along_axis(dots, ids, axis=1).min(axis=1) - 1e-12
+            dists = 2.0 - 2.0 * np.take_along_axis(dots, ids, axis=1)
+            order = np.lexsort((ids, dists), axis=1)
+            ids, dists = np.take_along_axis(ids, order, axis=1), np.take_along_axis(dists, order, axis=1)
+            #coordinates with ties at their kth nearest distance need the ties to be broken by point id
+            ties = np.count_nonzero(dots >= kth_dots[:, None], axis=1) > k
+            for row, (row_ids, row_dists) in enumerate(zip(ids.tolist(), dists.tolist())):
+                if (ties[row]):
+                    tied_ids = np.flatnonzero(dots[row] >= kth_dots[row])
+                    matches = sorted(zip((2.0 - 2.0 * dots[row][tied_ids]).tolist(), tied_ids.tolist()))[:k]
+                else:
+                    matches = list(zip(row_dists, row_ids))
+                batch_matches.append([match for match in matches if match[0] <= radius2])
+        return batch_matches
+
+class _HierarchyIndex():
+    """
+    Index of the hierarchy of a country's subdivisions, via their parentCode attribute. The
+    subdivisions are held in depth-first order, with each subdivision followed by its descendants,
+    such that a subdivision's descendants are the contiguous range of the order up to its end 
+    position. The children and chain of ancestors of each subdivision are also held, such that
+    each query costs time proportional to its output rather than scanning the country's data. 
+
+    A subdivision whose parent isn't in the country's data is treated as a top-level subdivision,
+    as is the first subdivision in the dataset of any cycle of parents.
+
+    Parameters
+    ==========
+    :country_data: dict
+        country's subdivision data.
+    """
+    __slots__ = ("order", "positions", "ends", "depths", "ancestors", "children")
+
+    def __init__(self, country_data: dict):
+        #get each subdivision's parent in the country's data, and its children in dataset order, top-level subdivisions keyed by None
+        parents = {}
+        children = {None: []}
+        for code, data in country_data.items():
+            parent_code = data.get("parentCode")
+            if (parent_code not in country_data or parent_code == code):
+                parent_code = None
+            parents[code] = parent_code
+            children.setdefault(parent_code, []).append(code)
+
+        #traverse the hierarchy depth-first from each top-level subdivision, then from any subdivisions only reachable via a cycle
+        order, positions, ends, depths, ancestors = [], {}, [], [], []
+        for root in children[None] + list(country_data):
+            if (root in positions):
+                continue
+            stack = [(root, 0, ())]
+            while (stack):
+                code, depth, code_ancestors = stack.pop()
+                if (code in positions):
+                    continue
+                positions[code] = len(order)
+                order.append(code)
+                depths.append(depth)
+                ancestors.append(code_ancestors)
+                ends.append(0)
+                stack.extend((child, depth + 1, (code,) + code_ancestors) for child in reversed(children.get(code, ())))
+
+        #get the end of each subdivision's descendants, the first later position that's not deeper in the hierarchy
+        end_stack = []
+        for position, depth in enumerate(depths):
+            while (end_stack and depths[end_stack[-1]] >= depth):
+                ends[end_stack.pop()] = position
+            end_stack.append(position)
+        for position in end_stack:
+            ends[position] = len(order)
+
+        #get the children of each subdivision from the traversal, excluding the former parent of the root of a cycle
+        hierarchy_children = {}
+        for code, code_ancestors in zip(order, ancestors):
+            hierarchy_children.setdefault(code_ancestors[0] if (code_ancestors) else None, []).append(code)
+
+        self.order = tuple(order)
+        self.positions = positions
+        self.ends = tuple(ends)
+        self.depths = tuple(depths)
+        self.ancestors = tuple(ancestors)
+        self.children = {code: tuple(codes) for code, codes in hierarchy_children.items()}
+
+class _CoordinateRange():
+    """ Posting of the query index's entries whose latitude or longitude is within a range, a contiguous range of the entries sorted by the coordinate. """
+    __slots__ = ("values", "entry_ids", "min_value", "max_value")
+
+    def __init__(self, values: array, entry_ids: memoryview, min_value: float, max_value: float):
+        self.values = values
+        self.entry_ids = entry_ids
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def __len__(self) -> int:
+        return len(self.entry_ids)
+
+    def __iter__(self):
+        return iter(self.entry_ids)
+
+    def contains(self, entry_id: int) -> bool:
+        """ Return whether the entry's coordinate is within the range. """
+        return (self.min_value <= self.values[entry_id] <= self.max_value)
+
+class _QueryIndex():
+    """
+    Index of the subdivision data for querying it via the Subdivisions class' query function.
+    Each subdivision is an entry, in dataset order, with inverted indexes of the entries per 
+    country, lowercase type, parent code and whether they have a flag or history, as frozensets
+    such that they're intersected in time proportional to the smaller of each. The entries are 
+    also sorted by their latitude and longitude, such that the entries within a range of either
+    are found via binary search. 
+
+    Parameters
+    ==========
+    :all_data: dict
+        subdivision data per country.
+    """
+    __slots__ = ("countries", "entries", "postings", "coordinates", "sorted_coordinates")
+
+    def __init__(self, all_data: dict):
+        #references to each country's data, the instance's data object itself isn't held as it can change
+        self.countries = dict(all_data)
+        self.entries = []
+        postings = {"country": {}, "type": {}, "parentCode": {}, "flag": {True: [], False: []}, "history": {True: [], False: []}}
+        coordinates = (array("d"), array("d"))
+        located = []
+        for alpha_code, country_data in self.countries.items():
+            for code, data in country_data.items():
+                entry_id = len(self.entries)
+                self.entries.append((alpha_code, code))
+                postings["country"].setdefault(alpha_code, []).append(entry_id)
+                if (isinstance(data.get("type"), str)):
+                    postings["type"].setdefault(data["type"].lower(), []).append(entry_id)
+                if (data.get("parentCode")):
+                    postings["parentCode"].setdefault(data["parentCode"], []).append(entry_id)
+                postings["flag"][bool(data.get("flag"))].append(entry_id)
+                postings["history"][bool(data.get("history"))].append(entry_id)
+
+                #subdivisions without valid coordinates are excluded from the sorted coordinates
+                try:
+                    lat, lng = _validate_lat_lng(data.get("latLng"))
+                    located.append(entry_id)
+                except (TypeError, ValueError):
+                    lat, lng = math.nan, math.nan
+                coordinates[0].append(lat)
+                coordinates[1].append(lng)
+
+        self.postings = {attribute: {value: frozenset(entry_ids) for value, entry_ids in index.items()} for attribute, index in postings.items()}
+        self.coordinates = coordinates
+        self.sorted_coordinates = tuple(array("I", sorted(located, key=values.__getitem__)) for values in coordinates)
+
+    def coordinate_range(self, axis: int, min_value: float, max_value: float) -> _CoordinateRange:
+        """ Return the posting of the entries whose latitude (axis 0) or longitude (axis 1) is within the range, inclusive. """
+        values, entry_ids = self.coordinates[axis], self.sorted_coordinates[axis]
+        start = bisect.bisect_left(entry_ids, min_value, key=values.__getitem__)
+        end = bisect.bisect_right(entry_ids, max_value, key=values.__getitem__)
+        return _CoordinateRange(values, memoryview(entry_ids)[start:max(start, end)], min_value, max_value)
+
+class _DatasetStore():
+    """
+    Process-wide, thread-safe, reference-counted store of ISO 3166-2 datasets. Each data file
+    is parsed lazily, when an instance of the Subdivisions class first requests its data, with
+    all subsequent instances sharing the same parsed object rather than re-reading and 
+    re-parsing the JSON. Entries are keyed by the file's path and modification time, so if 
+    the file is changed on disk (e.g via custom_subdivision) it is re-parsed, and the stale 
+    version is evicted once no instance references it. Unreferenced entries of the current 
+    file version are kept so short-lived instances don't re-parse the file.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._datasets = {}
+
+    @staticmethod
+    def _key(filepath: str) -> tuple:
+        """ Return the dataset key of a data file: its real path, modification time (ns) and size. """
+        filepath = os.path.realpath(filepath)
+        stat = os.stat(filepath)
+        return (filepath, stat.st_mtime_ns, stat.st_size)
+
+    def acquire(self, filepath: str) -> _Dataset:
+        """ Return the dataset for the filepath, adding it to the store if not present, and increment its reference count. """
+        try:
+            key = self._key(filepath)
+        except FileNotFoundError:
+            raise OSError("Error ❗: The ISO 3166-2 file was not found.")
+
+        with self._lock:
+            dataset = self._datasets.get(key)
+            if (dataset is None):
+                dataset = _Dataset(key)
+                #evict any unreferenced stale versions of the same file
+                for stale_key in [k for k, d in self._datasets.items() if k[0] == key[0] and d.ref_count == 0]:
+                    del self._datasets[stale_key]
+                self._datasets[key] = dataset
+            dataset.ref_count += 1
+            return dataset
+
+    def release(self, dataset: _Dataset) -> None:
+        """ Decrement the reference count of the dataset, evicting it if it's unreferenced and stale. """
+        with self._lock:
+            dataset.ref_count -= 1
+            if (dataset.ref_count <= 0 and self._datasets.get(dataset.key) is dataset):
+                try:
+                    stale = (self._key(dataset.filepath) != dataset.key)
+                except OSError:
+                    stale = True
+                if (stale):
+                    del self._datasets[dataset.key]
+
+    def info(self) -> list[dict]:
+        """ Return a list of dicts describing each dataset currently in the store. """
+        with self._lock:
+            return [{"filepath": d.filepath, "mtime": d.mtime, "size": d.size, "countries": len(d.countries), "fullyParsed": d.data is not None,
+                     "sharded": bool(d.shards), "compact": d.compact is not None, "snapshot": d.snapshot, "projections": len(d.projections), 
+                     "indexes": len(d.indexes) + len(d.country_indexes), "refCount": d.ref_count, "parseTime": d.parse_time} for d in self._datasets.values()]
+
+    def clear(self) -> None:
+        """ Evict all datasets that aren't referenced by an instance. """
+        with self._lock:
+            for key in [k for k, d in self._datasets.items() if d.ref_count <= 0]:
+                del self._datasets[key]
+
+#process-wide store shared by all instances of the Subdivisions class
+_dataset_store = _DatasetStore()
+
 @dataclass
 class Subdivision:
     """
@@ -1242,20 +3323,163 @@ class Map(dict):
         super(Map, self).__delitem__(key)
         del self.__dict__[key]
         
-class CountrySubdivisions(Map):
+class _ReadOnlyDict(dict):
+    """
+    Read-only dict, used for the subdivision data of the dataset shared by every instance of 
+    the Subdivisions class, such that it can't be changed in place via any one instance. Any 
+    mutator raises a TypeError, as per MappingProxyType, with the data remaining a dict.
+    """
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is read-only and cannot be modified.")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+class _ReadOnlyList(list):
+    """ Read-only list, used for the coordinates of the subdivision data shared by every instance of the Subdivisions class. """
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is read-only and cannot be modified.")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+class SubdivisionView(_ReadOnlyDict):
+    """
+    Read-only dict of an individual subdivision's data, the form in which each subdivision of
+    the shared dataset is held, so it's returned without being copied. The attributes can be 
+    accessed via their key or via dot notation, with any attribute not in the subdivision's 
+    data returning None, as per the Map class. As a dict it can be serialized via json.dumps.
+
+    Parameters
+    ==========
+    :data: dict
+        subdivision's data.
+
+    Usage
+    =====
+    iso = Subdivisions()
+    iso["GB"]["GB-ANS"].name 
+    iso["GB"]["GB-ANS"]["type"]
+    """
+    __slots__ = ()
+
+    def __getattr__(self, attr):
+        #only called for attributes not on the class, get the subdivision attribute's value
+        return self.get(attr)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is read-only, cannot set attribute {key}.")
+
+    def __delattr__(self, key):
+        raise AttributeError(f"{type(self).__name__} is read-only, cannot delete attribute {key}.")
+
+class QueryResults(Mapping):
+    """
+    Read-only results of the Subdivisions class' query function, a mapping of each matching 
+    subdivision code to its data, in dataset order. Only the ids of the matching subdivisions 
+    are held, each subdivision's data is returned as a read-only SubdivisionView on access.
+
+    Parameters
+    ==========
+    :query_index: _QueryIndex
+        query index the results are from.
+    :entry_ids: list[int]
+        sorted ids of the matching subdivisions in the query index.
     """
-    Auxiliary class for the subscriptable subdivision data via the Map class,
-    allowing the subdivision_codes() and subdivision_names() functions to be called.
-   ."""
+    __slots__ = ("_index", "_entry_ids", "_codes")
+
+    def __init__(self, query_index: "_QueryIndex", entry_ids: list[int]):
+        object.__setattr__(self, "_index", query_index)
+        object.__setattr__(self, "_entry_ids", entry_ids)
+        object.__setattr__(self, "_codes", None)
+
+    def _positions(self) -> dict:
+        #map of each matching subdivision code to its entry id, created on the first lookup by code
+        if (self._codes is None):
+            object.__setattr__(self, "_codes", {self._index.entries[entry_id][1]: entry_id for entry_id in self._entry_ids})
+        return self._codes
+
+    def __getitem__(self, subdivision_code: str) -> SubdivisionView:
+        alpha_code, code = self._index.entries[self._positions()[subdivision_code]]
+        return _freeze_subdivision(self._index.countries[alpha_code][code])
+
+    def __iter__(self):
+        return (self._index.entries[entry_id][1] for entry_id in self._entry_ids)
+
+    def __len__(self) -> int:
+        return len(self._entry_ids)
+
+    def __contains__(self, subdivision_code) -> bool:
+        return subdivision_code in self._positions()
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is read-only, cannot set attribute {key}.")
+
+    def __repr__(self) -> str:
+        return f"<QueryResults(total_subdivisions={len(self)})>"
+
+    def country_codes(self) -> list[str]:
+        """ Return the alpha-2 codes of the countries of the matching subdivisions, in dataset order. """
+        return list(dict.fromkeys(self._index.entries[entry_id][0] for entry_id in self._entry_ids))
+
+class CountrySubdivisions(_ReadOnlyDict):
+    """
+    Read-only dict of a country's subdivision data, returned via the Subdivisions class'
+    __getitem__ method. Each subdivision's data is held as a read-only SubdivisionView, 
+    those of the shared dataset aren't copied, allowing its attributes to be accessed via 
+    dot notation. As a dict it can be serialized via json.dumps. The subdivision_codes(), 
+    subdivision_names() and hierarchy functions children(), descendants() and ancestors() 
+    can also be called on it.
+
+    Parameters
+    ==========
+    :parent: Subdivisions
+        instance of the Subdivisions class the country's data is from.
+    :alpha2: str
+        ISO 3166-1 alpha-2 country code.
+    :data: dict
+        country's subdivision data.
+    """
+    __slots__ = ("_parent", "_alpha2")
+
     def __init__(self, parent: "Subdivisions", alpha2: str, data: dict):
-        super().__init__(data)
+        super().__init__((code, _freeze_subdivision(subdivision_data)) for code, subdivision_data in data.items())
         object.__setattr__(self, "_parent", parent)
         object.__setattr__(self, "_alpha2", alpha2)
 
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is read-only, cannot set attribute {key}.")
+
+    def __delattr__(self, key):
+        raise AttributeError(f"{type(self).__name__} is read-only, cannot delete attribute {key}.")
+
+    def __reduce__(self):
+        return (_ReadOnlyDict, (dict(self),))
+
     def subdivision_codes(self) -> list[str]:
         #call the function of the parent via the country's alpha-2
         return self._parent.subdivision_codes(self._alpha2)
 
     def subdivision_names(self) -> list[str]:
         #call the function of the parent via the country's alpha-2
-        return self._parent.subdivision_names(self._alpha2)
\ No newline at end of file
+        return self._parent.subdivision_names(self._alpha2)
+
+    def children(self, subdivision_code: str="") -> list[str]:
+        #call the function of the parent via the subdivision code, or the country's alpha-2 to get its top-level subdivisions
+        return self._parent.children(subdivision_code or self._alpha2)
+
+    def descendants(self, subdivision_code: str="") -> list[str]:
+        #call the function of the parent via the subdivision code, or the country's alpha-2 to get all of its subdivisions
+        return self._parent.descendants(subdivision_code or self._alpha2)
+
+    def ancestors(self, subdivision_code: str) -> list[str]:
+        #call the function of the parent via the subdivision code
+        return self._parent.ancestors(subdivision_code)
@@ -3,6 +3,7 @@ import os
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
 from scripts.utils import convert_to_alpha2
+from scripts.scheduler import scheduled_get
 
 BASE_URL = "https://api.countrystatecity.in/v1/countries/"
 USER_AGENT_HEADER = {"User-Agent": "iso3166-2-exporter/1.0"}
@@ -42,9 +43,9 @@ def get_cities_for_subdivision(alpha2: str, subdivision_code: str, api_key: Opti
             raise ValueError("API key for Country State City API not provided and not found in .env file or environment variable COUNTRY_STATE_CITY_API_KEY.")
     headers["X-CSCAPI-KEY"] = api_key
 
-    #make the API request, handle errors, and parse response
+    #make the API request via the request scheduler, handle errors, and parse response
     try:
-        resp = requests.get(url, headers=headers, proxies=proxy, timeout=15)
+        resp = scheduled_get(url, headers=headers, proxies=proxy, timeout=15)
         resp.raise_for_status()
         cities = resp.json()
         return [
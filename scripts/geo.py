@@ -3,8 +3,12 @@ from typing import Optional, Dict, Any, List
 import time
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import json
 import math
+import sqlite3
+import tempfile
+import threading
 import flag
 import pandas as pd
 from statistics import mean, median
@@ -13,12 +17,703 @@ from pycountry import countries
 from tqdm import tqdm
 from wikidata.client import Client
 from iso3166_2 import Subdivisions
-from scripts.utils import convert_to_alpha2
+from scripts.utils import convert_to_alpha2, RunManifest, truncate_partial_line
+from scripts.scheduler import get_scheduler, get_fetch_engine, scheduled_get, PRIORITY_NORMAL, PRIORITY_LOW
 
 # Nominatim API endpoints
 NOMINATIM_API_URL = 'https://nominatim.openstreetmap.org/search'
 NOMINATIM_REVERSE_API_URL = 'https://nominatim.openstreetmap.org/reverse'
 
+class GeoCacheStore:
+    """
+    Keyed in-memory store of the geo cache, mapping each subdivision code to its cached geographical
+    attributes. Every row is parsed once, when it is loaded or updated, so lookups and updates by
+    subdivision code are O(1) dict operations rather than boolean scans over a DataFrame. The serialized
+    value of each attribute is kept alongside its parsed value so the cache is exported unchanged.
+
+    Parameters
+    ==========
+    None
+
+    Methods
+    =======
+    from_frame(frame) -> GeoCacheStore
+        Build a store from a geo cache DataFrame, parsing each row once.
+    to_frame() -> pd.DataFrame
+        Return the store as a geo cache DataFrame, in insertion order.
+    get(subdivision_code, attribute) -> Any
+        Return the parsed value of an attribute for a subdivision, or None if not cached.
+    set(subdivision_code, attribute, value) -> bool
+        Set the serialized value of an attribute for a subdivision, appending a new row if needed.
+    lat_lng(subdivision_code) -> Optional[List[float]]
+        Return the [lat, lng] floats of a subdivision, or None if not cached.
+    count(subdivision_codes, attribute) -> int
+        Return the number of subdivisions with a cached value for an attribute.
+
+    Usage
+    =====
+    store = GeoCacheStore.from_frame(pd.read_csv("geo_cache.csv", dtype={'subdivisionCode': str}))
+    store.get("AD-02", "boundingBox") # [42.5, 42.6, 1.5, 1.6]
+    store.set("AD-02", "perimeter", 35.27)
+    """
+    columns = ['subdivisionCode', 'latLng', 'boundingBox', 'geojson', 'perimeter', 'neighbours']
+    attributes = columns[1:]
+
+    def __init__(self):
+        #serialized and parsed values of each attribute per subdivision code, plus the parsed latLng floats
+        self._raw = {}
+        self._parsed = {}
+        self._lat_lngs = {}
+        #DataFrame view of the store, rebuilt lazily after any update
+        self._frame = None
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "GeoCacheStore":
+        """
+        Build a store from a geo cache DataFrame, parsing each row once. Missing columns are treated 
+        as uncached and a repeated subdivision code keeps its last row.
+
+        Parameters
+        ==========
+        frame : pd.DataFrame
+            Geo cache DataFrame with a subdivisionCode column.
+
+        Returns
+        =======
+        GeoCacheStore
+            Store containing each row of the DataFrame.
+        """
+        store = cls()
+        codes = [str(code) for code in frame['subdivisionCode']]
+        columns = [frame[attribute].tolist() if attribute in frame.columns else [None] * len(codes) for attribute in cls.attributes]
+        for subdivision_code, *values in zip(codes, *columns):
+            for attribute, value in zip(cls.attributes, values):
+                store.set(subdivision_code, attribute, value)
+        return store
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Return the store as a geo cache DataFrame, in insertion order. The DataFrame is cached
+        until the next update so repeated reads are free.
+
+        Parameters
+        ==========
+        None
+
+        Returns
+        =======
+        pd.DataFrame
+            DataFrame with the subdivisionCode, latLng, boundingBox, geojson, perimeter and neighbours columns.
+        """
+        if (self._frame is None):
+            frame = {'subdivisionCode': pd.Series(list(self._raw), dtype=object)}
+            for attribute in self.attributes:
+                values = [record[attribute] for record in self._raw.values()]
+                frame[attribute] = pd.Series(values, dtype=float if attribute == 'perimeter' else object)
+            self._frame = pd.DataFrame(frame, columns=self.columns)
+        return self._frame
+
+    def get(self, subdivision_code: str, attribute: str) -> Any:
+        """
+        Return the parsed value of an attribute for a subdivision: latLng is a str, boundingBox
+        a list of floats, geojson the serialized JSON str, perimeter a float and neighbours a list
+        of subdivision codes.
+
+        Parameters
+        ==========
+        subdivision_code : str
+            ISO 3166-2 subdivision code.
+        attribute : str
+            Name of the cached attribute.
+
+        Returns
+        =======
+        Any
+            Parsed value, or None if the subdivision or attribute isn't cached.
+        """
+        record = self._parsed.get(subdivision_code)
+        return record[attribute] if record is not None else None
+
+    def set(self, subdivision_code: str, attribute: str, value: Any) -> bool:
+        """
+        Set the serialized value of an attribute for a subdivision, appending a new row with the 
+        other attributes empty if the subdivision isn't cached. The value is parsed once here.
+
+        Parameters
+        ==========
+        subdivision_code : str
+            ISO 3166-2 subdivision code.
+        attribute : str
+            Name of the cached attribute.
+        value : Any
+            Serialized value as stored in the cache file, e.g. a "lat,lng" str or JSON str.
+
+        Returns
+        =======
+        bool
+            Whether the store changed, False if the subdivision already had this value.
+        """
+        raw, parsed = self._parse(attribute, value)
+        if (subdivision_code not in self._raw):
+            self._raw[subdivision_code] = dict.fromkeys(self.attributes)
+            self._parsed[subdivision_code] = dict.fromkeys(self.attributes)
+        elif (self._raw[subdivision_code][attribute] == raw):
+            return False
+        self._raw[subdivision_code][attribute] = raw
+        self._parsed[subdivision_code][attribute] = parsed
+        if (attribute == 'latLng'):
+            self._lat_lngs[subdivision_code] = self._parse_lat_lng(parsed)
+        self._frame = None
+        return True
+
+    def lat_lng(self, subdivision_code: str) -> Optional[List[float]]:
+        """
+        Return the [lat, lng] floats of a subdivision, parsed once when its latLng was set.
+
+        Parameters
+        ==========
+        subdivision_code : str
+            ISO 3166-2 subdivision code.
+
+        Returns
+        =======
+        List[float] or None
+            Latitude and longitude, or None if not cached.
+        """
+        lat_lng = self._lat_lngs.get(subdivision_code)
+        return list(lat_lng) if lat_lng is not None else None
+
+    def count(self, subdivision_codes: List[str], attribute: str) -> int:
+        """
+        Return the number of subdivisions with a cached value for an attribute.
+
+        Parameters
+        ==========
+        subdivision_codes : List[str]
+            ISO 3166-2 subdivision codes.
+        attribute : str
+            Name of the cached attribute.
+
+        Returns
+        =======
+        int
+            Number of the subdivisions with the attribute cached.
+        """
+        return sum(1 for subdivision_code in subdivision_codes if self.get(subdivision_code, attribute) is not None)
+
+    def items(self, attribute: str):
+        """ Yield (subdivision code, parsed value) pairs of each subdivision with the attribute cached. """
+        for subdivision_code, record in self._parsed.items():
+            if (record[attribute] is not None):
+                yield subdivision_code, record[attribute]
+
+    @staticmethod
+    def _parse(attribute: str, value: Any):
+        """ Return the normalized serialized value and the parsed value of an attribute, (None, None) if empty or invalid. """
+        #treat None, NaN and blank strings as not cached
+        if (value is None or (isinstance(value, float) and math.isnan(value)) or (isinstance(value, str) and not value.strip())):
+            return None, None
+        try:
+            if (attribute == 'latLng' or attribute == 'geojson'):
+                return str(value), str(value)
+            if (attribute == 'boundingBox'):
+                if (isinstance(value, str)):
+                    return value, json.loads(value)
+                return json.dumps(list(value)), list(value)
+            if (attribute == 'perimeter'):
+                return float(value), float(value)
+            if (attribute == 'neighbours'):
+                return str(value), [code for code in str(value).split(',') if code]
+        except (json.JSONDecodeError, TypeError, ValueError):
+            return value, None
+        raise KeyError(f"Invalid geo cache attribute: {attribute}.")
+
+    @staticmethod
+    def _parse_lat_lng(lat_lng: Optional[str]) -> Optional[List[float]]:
+        """ Split a "lat,lng" str into its floats, None if empty or invalid. """
+        if (lat_lng is None):
+            return None
+        try:
+            return [float(value.strip()) for value in lat_lng.split(',')]
+        except ValueError:
+            return None
+
+    def __contains__(self, subdivision_code: str) -> bool:
+        """ Return whether the subdivision has a row in the store. """
+        return subdivision_code in self._raw
+
+    def __len__(self) -> int:
+        """ Return the number of subdivisions in the store. """
+        return len(self._raw)
+
+
+#file extensions of geo cache paths that use the SQLite cache backend rather than a CSV file
+SQLITE_CACHE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+#one lock per cache file path, shared by the Geo instances of all threads writing to the same cache
+_cache_file_locks = {}
+_cache_file_locks_lock = threading.Lock()
+
+def _cache_file_lock(filepath: str) -> threading.RLock:
+    """ Return the lock shared by all writers of a cache file path. """
+    with _cache_file_locks_lock:
+        return _cache_file_locks.setdefault(os.path.abspath(filepath), threading.RLock())
+
+
+class SQLiteGeoCacheStore(GeoCacheStore):
+    """
+    SQLite backed geo cache store, used by Geo when geo_cache_path ends in .db, .sqlite or .sqlite3.
+    The database is opened in WAL mode so any number of readers can run alongside a writer. It has 
+    one row per subdivision in the subdivisions table, with the large geojson geometries kept in a 
+    separate geometries table. Columns are read lazily: the first access to an attribute reads that
+    one column for every subdivision, while geojson is only read per subdivision, so a latLng-only 
+    read never touches the geometry blobs. Updates are held in memory and written in batches by 
+    flush(), with writers serialized across threads by a lock and across processes by SQLite.
+
+    Parameters
+    ==========
+    path : str
+        Path to the SQLite database file, created if it doesn't exist.
+    batch_size : int, optional
+        Number of updated subdivisions after which flush(min_pending=batch_size) writes them.
+        Default is 100.
+
+    Methods
+    =======
+    flush(min_pending=0) -> int
+        Write the pending updates to the database in one transaction.
+    write(store) -> None
+        Replace the contents of the database with the rows of another cache store.
+    close() -> None
+        Close the calling thread's database connection.
+
+    Usage
+    =====
+    store = SQLiteGeoCacheStore("iso3166_2_resources/geo_cache.db")
+    store.lat_lng("AD-02") # [42.5868, 1.6574], reads the latLng column only
+    store.set("AD-02", "perimeter", 56.11)
+    store.flush()
+    """
+    scalar_attributes = ['latLng', 'boundingBox', 'perimeter', 'neighbours']
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS subdivisions (
+            subdivisionCode TEXT PRIMARY KEY,
+            latLng TEXT,
+            boundingBox TEXT,
+            perimeter REAL,
+            neighbours TEXT
+        );
+        CREATE TABLE IF NOT EXISTS geometries (
+            subdivisionCode TEXT PRIMARY KEY,
+            geojson TEXT
+        );
+    """
+
+    def __init__(self, path: str, batch_size: int = 100):
+        super().__init__()
+        self.path = path
+        self.batch_size = batch_size
+        #one connection per thread, sqlite3 connections can't be shared across threads
+        self._local = threading.local()
+        self._write_lock = _cache_file_lock(path)
+        self._reset()
+
+    def _reset(self) -> None:
+        """ Clear the in-memory state and list the subdivisions in the database, in insertion order. """
+        GeoCacheStore.__init__(self)
+        self._loaded_columns = set()
+        self._loaded_geojson = set()
+        self._pending = {}
+        for (subdivision_code,) in self._connection().execute("SELECT subdivisionCode FROM subdivisions ORDER BY rowid"):
+            self._raw[subdivision_code] = dict.fromkeys(self.attributes)
+            self._parsed[subdivision_code] = dict.fromkeys(self.attributes)
+
+    def _connection(self) -> sqlite3.Connection:
+        """ Return the calling thread's database connection, opening it in WAL mode if needed. """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            cache_dir = os.path.dirname(self.path)
+            if cache_dir and not os.path.exists(cache_dir):
+                os.makedirs(cache_dir, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(self.schema)
+            self._local.connection = connection
+        return connection
+
+    def _load_column(self, attribute: str) -> None:
+        """ Read a scalar attribute column for every subdivision, once. """
+        if (attribute in self._loaded_columns):
+            return
+        rows = self._connection().execute(f"SELECT subdivisionCode, {attribute} FROM subdivisions WHERE {attribute} IS NOT NULL").fetchall()
+        for subdivision_code, value in rows:
+            GeoCacheStore.set(self, subdivision_code, attribute, value)
+        self._loaded_columns.add(attribute)
+
+    def _load_geojson(self, subdivision_codes: List[str]) -> None:
+        """ Read the geojson of the subdivisions not read yet, 500 per query. """
+        unloaded = [subdivision_code for subdivision_code in subdivision_codes if subdivision_code not in self._loaded_geojson]
+        for i in range(0, len(unloaded), 500):
+            chunk = unloaded[i:i + 500]
+            rows = self._connection().execute(f"SELECT subdivisionCode, geojson FROM geometries WHERE subdivisionCode IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+            for subdivision_code, value in rows:
+                GeoCacheStore.set(self, subdivision_code, 'geojson', value)
+        self._loaded_geojson.update(unloaded)
+
+    def _load(self, attribute: str, subdivision_codes: Optional[List[str]] = None) -> None:
+        """ Read an attribute for the given subdivisions, or all of them, if not read yet. """
+        if (attribute == 'geojson'):
+            self._load_geojson(list(self._raw) if subdivision_codes is None else subdivision_codes)
+        else:
+            self._load_column(attribute)
+
+    def get(self, subdivision_code: str, attribute: str) -> Any:
+        """ Return the parsed value of an attribute for a subdivision, reading it from the database on first access. """
+        self._load(attribute, [subdivision_code])
+        return super().get(subdivision_code, attribute)
+
+    def set(self, subdivision_code: str, attribute: str, value: Any) -> bool:
+        """ Set the serialized value of an attribute for a subdivision, holding it until the next flush(). """
+        self._load(attribute, [subdivision_code])
+        changed = super().set(subdivision_code, attribute, value)
+        if changed:
+            self._pending.setdefault(subdivision_code, set()).add(attribute)
+        return changed
+
+    def lat_lng(self, subdivision_code: str) -> Optional[List[float]]:
+        """ Return the [lat, lng] floats of a subdivision, reading the latLng column on first access. """
+        self._load_column('latLng')
+        return super().lat_lng(subdivision_code)
+
+    def count(self, subdivision_codes: List[str], attribute: str) -> int:
+        """ Return the number of subdivisions with a cached value for an attribute, without reading geojson blobs. """
+        if (attribute != 'geojson'):
+            self._load_column(attribute)
+            return super().count(subdivision_codes, attribute)
+        loaded = [subdivision_code for subdivision_code in subdivision_codes if subdivision_code in self._loaded_geojson]
+        unloaded = [subdivision_code for subdivision_code in subdivision_codes if subdivision_code not in self._loaded_geojson]
+        total = super().count(loaded, attribute)
+        for i in range(0, len(unloaded), 500):
+            chunk = unloaded[i:i + 500]
+            total += self._connection().execute(f"SELECT COUNT(*) FROM geometries WHERE geojson IS NOT NULL AND subdivisionCode IN ({','.join('?' * len(chunk))})", chunk).fetchone()[0]
+        return total
+
+    def items(self, attribute: str):
+        """ Yield (subdivision code, parsed value) pairs of each subdivision with the attribute cached. """
+        self._load(attribute)
+        yield from super().items(attribute)
+
+    def to_frame(self) -> pd.DataFrame:
+        """ Return the store as a geo cache DataFrame, reading every column including the geojson. """
+        for attribute in self.attributes:
+            self._load(attribute)
+        return super().to_frame()
+
+    def flush(self, min_pending: int = 0) -> int:
+        """
+        Write the pending updates to the database in one transaction, inserting rows for new 
+        subdivisions and only updating the changed columns of existing ones.
+
+        Parameters
+        ==========
+        min_pending : int, optional
+            Only write if at least this many subdivisions have pending updates. Default is 0.
+
+        Returns
+        =======
+        int
+            Number of subdivisions written.
+        """
+        if not self._pending or len(self._pending) < min_pending:
+            return 0
+        with self._write_lock:
+            pending, self._pending = self._pending, {}
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany("INSERT INTO subdivisions (subdivisionCode) VALUES (?) ON CONFLICT(subdivisionCode) DO NOTHING",
+                                       [(subdivision_code,) for subdivision_code in pending])
+                for attribute in self.scalar_attributes:
+                    rows = [(self._raw[subdivision_code][attribute], subdivision_code) for subdivision_code, attributes in pending.items() if attribute in attributes]
+                    if rows:
+                        connection.executemany(f"UPDATE subdivisions SET {attribute} = ? WHERE subdivisionCode = ?", rows)
+                geometries = [(subdivision_code, self._raw[subdivision_code]['geojson']) for subdivision_code, attributes in pending.items() if 'geojson' in attributes]
+                if geometries:
+                    connection.executemany("INSERT INTO geometries (subdivisionCode, geojson) VALUES (?, ?) "
+                                           "ON CONFLICT(subdivisionCode) DO UPDATE SET geojson = excluded.geojson", geometries)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                #keep the updates pending so a later flush can retry them
+                for subdivision_code, attributes in pending.items():
+                    self._pending.setdefault(subdivision_code, set()).update(attributes)
+                raise
+        return len(pending)
+
+    def write(self, store: GeoCacheStore) -> None:
+        """
+        Replace the contents of the database with the rows of another cache store, in one transaction.
+
+        Parameters
+        ==========
+        store : GeoCacheStore
+            Cache store to write.
+
+        Returns
+        =======
+        None
+        """
+        frame = store.to_frame()
+        records = frame.astype(object).where(frame.notna(), None).to_dict('records')
+        with self._write_lock:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("DELETE FROM subdivisions")
+                connection.execute("DELETE FROM geometries")
+                connection.executemany("INSERT INTO subdivisions (subdivisionCode, latLng, boundingBox, perimeter, neighbours) VALUES (?, ?, ?, ?, ?)",
+                                       [tuple(record[column] for column in ['subdivisionCode'] + self.scalar_attributes) for record in records])
+                connection.executemany("INSERT INTO geometries (subdivisionCode, geojson) VALUES (?, ?)",
+                                       [(record['subdivisionCode'], record['geojson']) for record in records if record['geojson'] is not None])
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        self._reset()
+
+    def close(self) -> None:
+        """ Close the calling thread's database connection. """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def is_sqlite_cache_path(filepath: Optional[str]) -> bool:
+    """ Return whether a geo cache path uses the SQLite cache backend, by its file extension. """
+    return filepath is not None and filepath.lower().endswith(SQLITE_CACHE_EXTENSIONS)
+
+
+class GeoCacheJournal:
+    """
+    Append-only write-ahead journal of geo cache updates, stored next to the cache CSV as 
+    <geo_cache_path>.journal. Each new or updated attribute value is appended as one JSON line as 
+    soon as it is fetched, so writes are O(delta) and a crash mid-run loses nothing already fetched. 
+    Compaction folds the journal into the main cache file atomically, by writing the merged cache 
+    to a temporary file, replacing the cache file with it and then removing the journal.
+
+    Parameters
+    ==========
+    cache_path : str
+        Path to the geo cache CSV file.
+    compact_threshold : int, optional
+        Number of journal entries after which maybe_compact() folds the journal into the cache
+        file. Default is 1000.
+
+    Methods
+    =======
+    append(entries) -> None
+        Append (subdivision code, attribute, value) entries to the journal and sync it to disk.
+    replay(store) -> int
+        Apply the journal entries to a cache store, in the order they were written.
+    load() -> GeoCacheStore
+        Return a cache store of the cache file with the journal applied.
+    compact() -> None
+        Fold the journal into the cache file atomically and remove the journal.
+    maybe_compact() -> bool
+        Compact if the journal has reached the compaction threshold.
+    write(store) -> None
+        Atomically replace the cache file with a cache store and remove the journal.
+
+    Usage
+    =====
+    journal = GeoCacheJournal("iso3166_2_resources/geo_cache.csv")
+    journal.append([("AD-02", "latLng", "42.5868,1.6574")])
+    journal.compact()
+    """
+    def __init__(self, cache_path: str, compact_threshold: int = 1000):
+        self.cache_path = cache_path
+        self.path = cache_path + ".journal"
+        self.compact_threshold = compact_threshold
+        self._lock = _cache_file_lock(self.path)
+
+    def append(self, entries: List[tuple]) -> None:
+        """
+        Append (subdivision code, attribute, value) entries to the journal as JSON lines, flushing 
+        and syncing them to disk before returning. A partially written last line, left by a crash 
+        mid-append, is truncated first so the new entries start on their own line.
+
+        Parameters
+        ==========
+        entries : List[tuple]
+            Entries of subdivision code, attribute name and serialized value.
+
+        Returns
+        =======
+        None
+        """
+        if not entries:
+            return
+        lines = "".join(json.dumps({"subdivisionCode": subdivision_code, "attribute": attribute, "value": value}) + "\n"
+                        for subdivision_code, attribute, value in entries)
+        with self._lock:
+            journal_dir = os.path.dirname(self.path)
+            if journal_dir and not os.path.exists(journal_dir):
+                os.makedirs(journal_dir, exist_ok=True)
+            #drop any partial last line left by a crash mid-append, otherwise these entries would be glued onto it and skipped on replay
+            truncate_partial_line(self.path)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def replay(self, store: GeoCacheStore) -> int:
+        """
+        Apply the journal entries to a cache store, in the order they were written. A partially 
+        written last line, left by a crash mid-append, is skipped.
+
+        Parameters
+        ==========
+        store : GeoCacheStore
+            Cache store to apply the entries to.
+
+        Returns
+        =======
+        int
+            Number of entries applied.
+        """
+        applied = 0
+        with self._lock:
+            if not os.path.exists(self.path):
+                return 0
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    store.set(entry["subdivisionCode"], entry["attribute"], entry["value"])
+                    applied += 1
+        return applied
+
+    def load(self) -> GeoCacheStore:
+        """
+        Return a cache store of the cache file with the journal applied.
+
+        Parameters
+        ==========
+        None
+
+        Returns
+        =======
+        GeoCacheStore
+            Cache store of the cache file and journal, empty if neither exists.
+        """
+        with self._lock:
+            if os.path.exists(self.cache_path):
+                store = GeoCacheStore.from_frame(pd.read_csv(self.cache_path, dtype={'subdivisionCode': str}))
+            else:
+                store = GeoCacheStore()
+            self.replay(store)
+        return store
+
+    def compact(self) -> None:
+        """
+        Fold the journal into the cache file atomically and remove the journal. The merged cache is
+        read from disk rather than memory so entries appended by other Geo instances are kept.
+
+        Parameters
+        ==========
+        None
+
+        Returns
+        =======
+        None
+        """
+        with self._lock:
+            if len(self):
+                self.write(self.load())
+
+    def maybe_compact(self) -> bool:
+        """
+        Compact the journal if it has reached the compaction threshold.
+
+        Parameters
+        ==========
+        None
+
+        Returns
+        =======
+        bool
+            Whether the journal was compacted.
+        """
+        with self._lock:
+            if len(self) < self.compact_threshold:
+                return False
+            self.compact()
+        return True
+
+    def write(self, store: GeoCacheStore) -> None:
+        """
+        Atomically replace the cache file with a cache store and remove the journal, which the 
+        store is expected to already include.
+
+        Parameters
+        ==========
+        store : GeoCacheStore
+            Cache store to write.
+
+        Returns
+        =======
+        None
+        """
+        with self._lock:
+            write_atomic_csv(store.to_frame(), self.cache_path)
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def __len__(self) -> int:
+        """ Return the number of entries in the journal. """
+        with self._lock:
+            if not os.path.exists(self.path):
+                return 0
+            with open(self.path, "rb") as f:
+                return sum(1 for _ in f)
+
+
+def write_atomic_csv(frame: pd.DataFrame, filepath: str) -> None:
+    """
+    Write a DataFrame to a CSV file atomically, via a temporary file in the same directory that 
+    replaces the file once fully written, so readers never see a partially written cache.
+
+    Parameters
+    ==========
+    frame : pd.DataFrame
+        DataFrame to write.
+    filepath : str
+        Path to the CSV file.
+
+    Returns
+    =======
+    None
+    """
+    file_dir = os.path.dirname(filepath)
+    if file_dir and not os.path.exists(file_dir):
+        os.makedirs(file_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=file_dir or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            frame.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
 class Geo:
     """
     A comprehensive utility class for getting a verbose collection of geographical data for ISO 3166-2 subdivisions.
@@ -63,7 +758,8 @@ class Geo:
     geo_cache_path : str, optional
         File path to a custom geo cache CSV file. If None, uses the default cache path at
         'iso3166_2_resources/geo_cache.csv'. Useful for maintaining separate caches or 
-        testing. Default is None.
+        testing. A path ending in .db, .sqlite or .sqlite3 uses the SQLite cache backend 
+        instead, which suits many concurrent instances sharing one cache. Default is None.
     export_to_cache : bool, optional
         Automatically export newly-fetched data to the cache file. When True, data retrieved
         from API calls is saved to cache for future use. Default is True.
@@ -81,8 +777,14 @@ class Geo:
         Instance of the Subdivisions class for accessing ISO 3166-2 data (if country_code was provided).
     subdivision_codes : list or None
         List of all ISO 3166-2 subdivision codes for the country (if country_code was provided).
+    cache_store : GeoCacheStore or None
+        Keyed store of the current cache, parsed once on load, used for O(1) lookups and updates 
+        by subdivision code. A SQLiteGeoCacheStore if geo_cache_path is a SQLite database.
+    cache_journal : GeoCacheJournal or None
+        Append-only journal that new and updated cache values are written to as soon as they are 
+        fetched, periodically compacted into the cache file (if geo_cache_path was provided).
     geo_cache : pd.DataFrame
-        Pandas DataFrame containing the current cache with columns:
+        Pandas DataFrame view of the cache store with columns:
         - subdivisionCode: ISO 3166-2 code (e.g., 'US-CA')
         - latLng: Latitude and longitude as "lat,lon" string
         - bounding_box: Bounding box coordinates [minlat, maxlat, minlon, maxlon]
@@ -106,12 +808,26 @@ class Geo:
         Retrieve all available geographical data (coordinates, bbox, GeoJSON, perimeter, neighbours).
     get_statistics(geo_cache_filepath=None) -> Dict[str, Any]
         Generate comprehensive statistics about the cache including data completeness and coverage.
+    _cached(subdivision_code, attribute) -> Any
+        Look up the parsed cached value of an attribute for a subdivision.
+    _update_cache(subdivision_code, attribute, value, export=True) -> None
+        Update or append the cached value of an attribute for a subdivision.
     _clear_cache() -> None
         Clear all cached data from memory and file.
     _load_cache() -> Optional[pd.DataFrame]
         Load the geo cache from disk or initialize an empty cache.
     _parse_country_codes(country_code=None) -> List[str]
         Normalize and parse comma-separated country codes into a list.
+    _fetch_plan() -> ContextManager
+        Keep the responses fetched by _plan_fetches for the attribute methods called within the context.
+    _export_batch() -> ContextManager
+        Defer the full compaction of the cache journal to the export made after the context.
+    _plan_fetches(subdivision_codes, skip_geojson=True, verbose=False) -> int
+        Fetch each subdivision with missing attributes once, for get_all to fan out to every attribute.
+    _prefetch(subdivision_codes, attribute, get_geojson=False, exclude=()) -> Dict[str, Optional[Dict[str, Any]]]
+        Concurrently fetch each subdivision missing an attribute from the cache.
+    _fetch_concurrently(fetches) -> Dict[str, Optional[Dict[str, Any]]]
+        Fetch subdivisions from Nominatim concurrently via the shared asyncio fetch engine.
     _fetch_subdivision_data(subdivision_code, get_geojson=False) -> Optional[Dict[str, Any]]
         Fetch subdivision data from Nominatim and optionally include GeoJSON.
     _export_cache(custom_cache_export_path=None, verbose=False) -> None
@@ -187,8 +903,26 @@ class Geo:
             self.subdivisions = None
             self.subdivision_codes = None
 
-        # Load or initialize cache
-        self.geo_cache = self._load_cache()
+        # Load or initialize cache, a SQLite cache is read lazily from the database while a CSV cache 
+        # is loaded along with any journaled updates not yet compacted into the cache file
+        if is_sqlite_cache_path(self.geo_cache_path):
+            self.cache_journal = None
+            self.cache_store = SQLiteGeoCacheStore(self.geo_cache_path)
+        else:
+            self.cache_journal = GeoCacheJournal(self.geo_cache_path) if self.geo_cache_path is not None else None
+            self.geo_cache = self._load_cache()
+            if self.use_cache and self.cache_journal is not None and len(self.cache_journal):
+                if self.cache_store is None:
+                    self.cache_store = GeoCacheStore()
+                self.cache_journal.replay(self.cache_store)
+        self._cache_replaced = False
+        self._pending_journal_entries = []
+
+        # Nominatim responses fetched up front by get_all's fetch planner, keyed by subdivision code
+        self._planned_fetches = None
+
+        # Depth of nested _export_batch contexts, the journal is only fully compacted by exports made outside of them
+        self._export_depth = 0
 
     def get_lat_lng(self, country_code: Optional[str] = None, verbose: bool = False, export: bool = True) -> Dict[str, str]:
         """
@@ -221,9 +955,10 @@ class Geo:
         # If multiple countries, process each and merge results
         if len(country_codes) > 1:
             latLngs = {}
-            for cc in country_codes:
-                result = self.get_lat_lng(country_code=cc, verbose=verbose, export=export)
-                latLngs.update(result)
+            with self._export_batch():
+                for cc in country_codes:
+                    result = self.get_lat_lng(country_code=cc, verbose=verbose, export=export)
+                    latLngs.update(result)
             if export:
                 self._export_cache(verbose=verbose)
             return latLngs
@@ -261,19 +996,19 @@ class Geo:
         latLngs = {}
         newly_fetched_codes = set()
         
+        # Fetch the subdivisions missing from the cache concurrently, those with a Wikidata fallback only fall back to Nominatim
+        prefetched = self._prefetch(subdivision_codes, 'latLng', get_geojson=False, exclude=wikidata_fallback)
+        
         # Iterate over subdivision codes, checking cache and fetching as needed
         for subdivision_code in subdivision_codes:
             latLng = None
             
             # Check cache first
-            if self.use_cache and self.geo_cache is not None and not self.geo_cache.empty:
-                cached_row = self.geo_cache[self.geo_cache['subdivisionCode'] == subdivision_code]
-                if not cached_row.empty and 'latLng' in self.geo_cache.columns:
-                    cached_latLng = cached_row['latLng'].values[0]
-                    if cached_latLng and pd.notna(cached_latLng) and str(cached_latLng).strip():
-                        latLng = str(cached_latLng)
-                        if verbose:
-                            print(f"  [{subdivision_code}] LatLng found in cache: {latLng}")
+            cached_latLng = self._cached(subdivision_code, 'latLng')
+            if cached_latLng:
+                latLng = cached_latLng
+                if verbose:
+                    print(f"  [{subdivision_code}] LatLng found in cache: {latLng}")
             
             # Fetch from Nominatim API or Wikidata fallback if not in cache
             if latLng is None:
@@ -283,7 +1018,8 @@ class Geo:
                 if subdivision_code in wikidata_fallback:
                     try:
                         client = Client()
-                        entity = client.get(wikidata_fallback[subdivision_code], load=True)
+                        with get_scheduler().slot("https://www.wikidata.org"):
+                            entity = client.get(wikidata_fallback[subdivision_code], load=True)
                         # Extract coordinates from Wikidata
                         if 'claims' in entity.data and 'P625' in entity.data['claims']:
                             coords = entity.data['claims']['P625'][0]['mainsnak']['datavalue']['value']
@@ -293,7 +1029,7 @@ class Geo:
                 
                 # Use Nominatim API if Wikidata not available or failed
                 if data is None:
-                    data = self._fetch_subdivision_data(subdivision_code, get_geojson=False)
+                    data = prefetched[subdivision_code] if subdivision_code in prefetched else self._fetch_subdivision_data(subdivision_code, get_geojson=False)
                 
                 # Process fetched data
                 if data and data.get('latLng'):
@@ -306,32 +1042,8 @@ class Geo:
                         sub_name = self.subdivisions[effective_country_code][subdivision_code].name
                         print(f"  [{subdivision_code}] {sub_name} - Fetched latLng: {latLng}")
                     
-                    # Update cache in memory
-                    if self.geo_cache is None or self.geo_cache.empty:
-                        self.geo_cache = pd.DataFrame(columns=['subdivisionCode', 'latLng', 'boundingBox', 'geojson', 'perimeter', 'neighbours'])
-                    else:
-                        if 'neighbours' not in self.geo_cache.columns:
-                            self.geo_cache['neighbours'] = None
-                        if 'geojson' in self.geo_cache.columns and self.geo_cache['geojson'].dtype != object:
-                            self.geo_cache['geojson'] = self.geo_cache['geojson'].astype('object')
-                    
-                    # Update or append to cache DataFrame
-                    if subdivision_code in self.geo_cache['subdivisionCode'].values:
-                        self.geo_cache.loc[self.geo_cache['subdivisionCode'] == subdivision_code, 'latLng'] = latLng
-                    # Append new row if not in cache
-                    else:
-                        new_row = pd.DataFrame({
-                            'subdivisionCode': [subdivision_code],
-                            'latLng': [latLng],
-                            'boundingBox': [None],
-                            'geojson': [None],
-                            'perimeter': [None],
-                            'neighbours': [None]
-                        })
-                        if self.geo_cache is None or self.geo_cache.empty:
-                            self.geo_cache = new_row
-                        else:
-                            self.geo_cache = pd.concat([self.geo_cache, new_row], ignore_index=True)
+                    # Update or append to cache in memory
+                    self._update_cache(subdivision_code, 'latLng', latLng, export=export)
             
             # Store result if latLng found
             if latLng:
@@ -378,19 +1090,12 @@ class Geo:
         # If no country_code provided in class or function, try to return all bounding box data from cache or fetch for all countries
         if country_code is None and self.country_code is None:
             # Try to return all bounding box data from cache
-            if self.use_cache and self.geo_cache is not None and not self.geo_cache.empty:
+            if self.use_cache and self.cache_store is not None and len(self.cache_store):
                 try:
                     if verbose:
                         print(f"[START] Loading ALL bounding boxes from cache...")
                     
-                    bounding_boxes = {}
-                    for _, row in self.geo_cache.iterrows():
-                        if pd.notna(row.get('boundingBox')):
-                            try:
-                                bbox = json.loads(row['boundingBox']) if isinstance(row['boundingBox'], str) else row['boundingBox']
-                                bounding_boxes[row['subdivisionCode']] = bbox
-                            except (json.JSONDecodeError, TypeError):
-                                pass
+                    bounding_boxes = dict(self.cache_store.items('boundingBox'))
                     
                     if verbose:
                         print(f"[END] Loaded {len(bounding_boxes)} bounding boxes from cache for ALL countries/subdivisions")
@@ -410,9 +1115,10 @@ class Geo:
             print(f"Fetching bounding boxes for {len(all_country_codes)} countries from API...")
             
             bounding_boxes = {}
-            for cc in all_country_codes:
-                result = self.get_bounding_box(country_code=cc, verbose=verbose, export=export)
-                bounding_boxes.update(result)
+            with self._export_batch():
+                for cc in all_country_codes:
+                    result = self.get_bounding_box(country_code=cc, verbose=verbose, export=export)
+                    bounding_boxes.update(result)
             
             # Export to cache if requested
             if export:
@@ -429,9 +1135,10 @@ class Geo:
         # If multiple countries, process each and merge results
         if len(country_codes) > 1:
             bounding_boxes = {}
-            for cc in country_codes:
-                result = self.get_bounding_box(country_code=cc, verbose=verbose, export=export)
-                bounding_boxes.update(result)
+            with self._export_batch():
+                for cc in country_codes:
+                    result = self.get_bounding_box(country_code=cc, verbose=verbose, export=export)
+                    bounding_boxes.update(result)
             if export:
                 self._export_cache(verbose=verbose)
             return bounding_boxes
@@ -461,26 +1168,23 @@ class Geo:
         bounding_boxes = {}
         newly_fetched_codes = set()
         
+        # Fetch the subdivisions missing from the cache concurrently
+        prefetched = self._prefetch(subdivision_codes, 'boundingBox', get_geojson=False)
+        
         # Iterate over subdivision codes, checking cache and fetching as needed
         for subdivision_code in subdivision_codes:
             bbox = None
             
             # Check cache first
-            if self.use_cache and self.geo_cache is not None and not self.geo_cache.empty:
-                cached_row = self.geo_cache[self.geo_cache['subdivisionCode'] == subdivision_code]
-                if not cached_row.empty and 'boundingBox' in self.geo_cache.columns:
-                    cached_bbox = cached_row['boundingBox'].values[0]
-                    if cached_bbox and pd.notna(cached_bbox):
-                        try:
-                            bbox = json.loads(cached_bbox) if isinstance(cached_bbox, str) else cached_bbox
-                            if verbose:
-                                print(f"  [{subdivision_code}] Bounding box found in cache: {bbox}")
-                        except (json.JSONDecodeError, TypeError):
-                            bbox = None
+            cached_bbox = self._cached(subdivision_code, 'boundingBox')
+            if cached_bbox:
+                bbox = cached_bbox
+                if verbose:
+                    print(f"  [{subdivision_code}] Bounding box found in cache: {bbox}")
             
             # Fetch from API if not in cache
             if bbox is None:
-                data = self._fetch_subdivision_data(subdivision_code, get_geojson=False)
+                data = prefetched[subdivision_code] if subdivision_code in prefetched else self._fetch_subdivision_data(subdivision_code, get_geojson=False)
                 if data and data.get('bounding_box'):
                     bbox = data['bounding_box']
                     # Round all 4 values to 4 decimal places [minlat, maxlat, minlon, maxlon]
@@ -492,27 +1196,11 @@ class Geo:
                         sub_name = subdivisions[effective_country_code][subdivision_code].name
                         print(f"  [{subdivision_code}] {sub_name} - Fetched bounding box from API: {bbox}")
                     
-                    # Update cache in memory
-                    if self.geo_cache is None or self.geo_cache.empty:
-                        self.geo_cache = pd.DataFrame(columns=['subdivisionCode', 'latLng', 'boundingBox', 'geojson', 'perimeter', 'neighbours'])
-                    
                     # Serialize bbox to JSON string for storage
                     bbox_json = json.dumps(bbox) if bbox else None
                     
-                    # Update or append to cache DataFrame
-                    if subdivision_code in self.geo_cache['subdivisionCode'].values:
-                        self.geo_cache.loc[self.geo_cache['subdivisionCode'] == subdivision_code, 'boundingBox'] = bbox_json
-                    else:
-                        # Append new row if not in cache
-                        new_row = pd.DataFrame({
-                            'subdivisionCode': [subdivision_code],
-                            'latLng': [None],
-                            'boundingBox': [bbox_json],
-                            'geojson': [None],
-                            'perimeter': [None],
-                            'neighbours': [None]
-                        })
-                        self.geo_cache = pd.concat([self.geo_cache, new_row], ignore_index=True)
+                    # Update or append to cache in memory
+                    self._update_cache(subdivision_code, 'boundingBox', bbox_json)
                 else:
                     if verbose:
                         sub_name = subdivisions[effective_country_code][subdivision_code].name
@@ -565,9 +1253,10 @@ class Geo:
         # If multiple countries, process each and merge results, then export if requested
         if len(country_codes) > 1:
             geojsons = {}
-            for cc in country_codes:
-                result = self.get_geojson(country_code=cc, verbose=verbose, export=export, export_to_geojson=export_to_geojson)
-                geojsons.update(result)
+            with self._export_batch():
+                for cc in country_codes:
+                    result = self.get_geojson(country_code=cc, verbose=verbose, export=export, export_to_geojson=export_to_geojson)
+                    geojsons.update(result)
             if export:
                 self._export_cache(verbose=verbose)
             if export_to_geojson:
@@ -602,26 +1291,26 @@ class Geo:
         for subdivision_code in subdivision_codes:
             geojsons[subdivision_code] = {}
         
+        # Fetch the subdivisions missing from the cache concurrently
+        prefetched = self._prefetch(subdivision_codes, 'geojson', get_geojson=True)
+        
         # Iterate over subdivision codes, checking cache and fetching as needed
         for subdivision_code in subdivision_codes:
             geojson_data = None
             
             # Check cache first
-            if self.use_cache and self.geo_cache is not None and not self.geo_cache.empty:
-                cached_row = self.geo_cache[self.geo_cache['subdivisionCode'] == subdivision_code]
-                if not cached_row.empty and 'geojson' in self.geo_cache.columns:
-                    cached_geojson = cached_row['geojson'].values[0]
-                    if cached_geojson and pd.notna(cached_geojson):
-                        try:
-                            geojson_data = json.loads(cached_geojson)
-                            if verbose:
-                                print(f"  [{subdivision_code}] GeoJSON found in cache")
-                        except (json.JSONDecodeError, TypeError):
-                            geojson_data = None
+            cached_geojson = self._cached(subdivision_code, 'geojson')
+            if cached_geojson:
+                try:
+                    geojson_data = json.loads(cached_geojson)
+                    if verbose:
+                        print(f"  [{subdivision_code}] GeoJSON found in cache")
+                except (json.JSONDecodeError, TypeError):
+                    geojson_data = None
             
             # Fetch from API if not in cache, and update cache
             if geojson_data is None:
-                data = self._fetch_subdivision_data(subdivision_code, get_geojson=True)
+                data = prefetched[subdivision_code] if subdivision_code in prefetched else self._fetch_subdivision_data(subdivision_code, get_geojson=True)
                 if data and data.get('geojson'):
                     geojson_data = data['geojson']
                     newly_fetched_codes.add(subdivision_code)
@@ -632,32 +1321,11 @@ class Geo:
                         geom_type = geojson_data.get('type', 'Unknown') if geojson_data else 'None'
                         print(f"  [{subdivision_code}] {sub_name} - Fetched GeoJSON from API (type: {geom_type})")
                     
-                    # Update cache in memory
-                    if self.geo_cache is None or self.geo_cache.empty:
-                        self.geo_cache = pd.DataFrame(columns=['subdivisionCode', 'latLng', 'boundingBox', 'geojson', 'perimeter', 'neighbours'])
-                    else:
-                        if 'neighbours' not in self.geo_cache.columns:
-                            self.geo_cache['neighbours'] = None
-                        if 'geojson' in self.geo_cache.columns and self.geo_cache['geojson'].dtype != object:
-                            self.geo_cache['geojson'] = self.geo_cache['geojson'].astype('object')
-                    
                     # Serialize geojson to JSON string for storage
                     geojson_json = json.dumps(geojson_data)
                     
-                    # Update or append to cache DataFrame
-                    if subdivision_code in self.geo_cache['subdivisionCode'].values:
-                        self.geo_cache.loc[self.geo_cache['subdivisionCode'] == subdivision_code, 'geojson'] = geojson_json
-                    else:
-                        # Append new row if not in cache, with other fields as None
-                        new_row = pd.DataFrame({
-                            'subdivisionCode': [subdivision_code],
-                            'latLng': [None],
-                            'boundingBox': [None],
-                            'geojson': [geojson_json],
-                            'perimeter': [None],
-                            'neighbours': [None]
-                        })
-                        self.geo_cache = pd.concat([self.geo_cache, new_row], ignore_index=True)
+                    # Update or append to cache in memory, with other fields as None
+                    self._update_cache(subdivision_code, 'geojson', geojson_json, export=export)
                 else:
                     # Verbose logging for failure
                     if verbose:
@@ -724,19 +1392,12 @@ class Geo:
         # If no country_code provided in class or function, try to return all perimeter data from cache or fetch for all countries
         if country_code is None and self.country_code is None:
             # Try to return all perimeter data from cache
-            if self.use_cache and self.geo_cache is not None and not self.geo_cache.empty:
+            if self.use_cache and self.cache_store is not None and len(self.cache_store):
                 try:
                     if verbose:
                         print(f"[START] Loading ALL perimeters from cache...")
                     
-                    perimeters = {}
-                    for _, row in self.geo_cache.iterrows():
-                        if pd.notna(row.get('perimeter')):
-                            try:
-                                perimeter = float(row['perimeter'])
-                                perimeters[row['subdivisionCode']] = perimeter
-                            except (ValueError, TypeError):
-                                pass
+                    perimeters = dict(self.cache_store.items('perimeter'))
                     
                     if verbose:
                         print(f"[END] Loaded {len(perimeters)} perimeters from cache for ALL countries/subdivisions")
@@ -756,9 +1417,10 @@ class Geo:
             print(f"Fetching perimeters for {len(all_country_codes)} countries from API...")
             
             perimeters = {}
-            for cc in all_country_codes:
-                result = self.get_perimeter(country_code=cc, verbose=verbose, export=export)
-                perimeters.update(result)
+            with self._export_batch():
+                for cc in all_country_codes:
+                    result = self.get_perimeter(country_code=cc, verbose=verbose, export=export)
+                    perimeters.update(result)
             
             # Export to cache if requested
             if export:
@@ -775,9 +1437,10 @@ class Geo:
         # If multiple countries, process each and merge results
         if len(country_codes) > 1:
             perimeters = {}
-            for cc in country_codes:
-                result = self.get_perimeter(country_code=cc, verbose=verbose, export=export)
-                perimeters.update(result)
+            with self._export_batch():
+                for cc in country_codes:
+                    result = self.get_perimeter(country_code=cc, verbose=verbose, export=export)
+                    perimeters.update(result)
             if export:
                 self._export_cache(verbose=verbose)
             return perimeters
@@ -855,26 +1518,23 @@ class Geo:
         perimeters = {}
         newly_fetched_codes = set()
         
+        # Fetch the subdivisions missing from the cache concurrently
+        prefetched = self._prefetch(subdivision_codes, 'perimeter', get_geojson=True)
+        
         # Iterate over subdivision codes, checking cache and fetching as needed
         for subdivision_code in subdivision_codes:
             perimeter_km = None
             
             # Check cache first
-            if self.use_cache and self.geo_cache is not None and not self.geo_cache.empty:
-                cached_row = self.geo_cache[self.geo_cache['subdivisionCode'] == subdivision_code]
-                if not cached_row.empty and 'perimeter' in self.geo_cache.columns:
-                    cached_perimeter = cached_row['perimeter'].values[0]
-                    if cached_perimeter and pd.notna(cached_perimeter):
-                        try:
-                            perimeter_km = float(cached_perimeter)
-                            if verbose:
-                                print(f"  [{subdivision_code}] Perimeter found in cache: {perimeter_km} km")
-                        except (ValueError, TypeError):
-                            perimeter_km = None
+            cached_perimeter = self._cached(subdivision_code, 'perimeter')
+            if cached_perimeter:
+                perimeter_km = cached_perimeter
+                if verbose:
+                    print(f"  [{subdivision_code}] Perimeter found in cache: {perimeter_km} km")
             
             # Fetch from API if not in cache
             if perimeter_km is None:
-                data = self._fetch_subdivision_data(subdivision_code, get_geojson=True)
+                data = prefetched[subdivision_code] if subdivision_code in prefetched else self._fetch_subdivision_data(subdivision_code, get_geojson=True)
                 if data and data.get('geojson'):
                     geojson_data = data['geojson']
                     perimeter_km = calculate_perimeter(geojson_data)
@@ -888,27 +1548,11 @@ class Geo:
                             api_url = f"{NOMINATIM_API_URL}?q={subdivision_code}&countrycode={subdivision_code.split('-')[0].lower()}&format=jsonv2&polygon_geojson=1&extratags=1&limit=1"
                             print(f"  [{subdivision_code}] - Failed to calculate perimeter. API URL: {api_url}")
                     
-                    # Update cache in memory
-                    if self.geo_cache is None or self.geo_cache.empty:
-                        self.geo_cache = pd.DataFrame(columns=['subdivisionCode', 'latLng', 'boundingBox', 'geojson', 'perimeter', 'neighbours'])
-                    
                     # Round perimeter to 2 decimal places for storage
                     perimeter_rounded = round(perimeter_km, 2) if perimeter_km is not None else None
                     
-                    # Update or append to cache DataFrame
-                    if subdivision_code in self.geo_cache['subdivisionCode'].values:
-                        self.geo_cache.loc[self.geo_cache['subdivisionCode'] == subdivision_code, 'perimeter'] = perimeter_rounded
-                    else:
-                        # Append new row if not in cache
-                        new_row = pd.DataFrame({
-                            'subdivisionCode': [subdivision_code],
-                            'latLng': [None],
-                            'boundingBox': [None],
-                            'geojson': [None],
-                            'perimeter': [perimeter_rounded],
-                            'neighbours': [None]
-                        })
-                        self.geo_cache = pd.concat([self.geo_cache, new_row], ignore_index=True)
+                    # Update or append to cache in memory
+                    self._update_cache(subdivision_code, 'perimeter', perimeter_rounded)
                 else:
                     if verbose:
                         sub_name = subdivisions[effective_country_code][subdivision_code].name
@@ -958,19 +1602,12 @@ class Geo:
         # If no country_code provided in class or function, try to return all neighbour data from cache or fetch for all countries
         if country_code is None and self.country_code is None:
             # Try to return all neighbour data from cache
-            if self.use_cache and self.geo_cache is not None and not self.geo_cache.empty:
+            if self.use_cache and self.cache_store is not None and len(self.cache_store):
                 try:
                     if verbose:
                         print(f"[START] Loading ALL neighbours from cache...")
                     
-                    neighbours = {}
-                    for _, row in self.geo_cache.iterrows():
-                        if pd.notna(row.get('neighbours')):
-                            try:
-                                neighbour = float(row['neighbours'])
-                                neighbours[row['subdivisionCode']] = neighbour
-                            except (ValueError, TypeError):
-                                pass
+                    neighbours = dict(self.cache_store.items('neighbours'))
                     
                     if verbose:
                         print(f"[END] Loaded {len(neighbours)} neighbours from cache for ALL countries/subdivisions")
@@ -990,9 +1627,10 @@ class Geo:
             print(f"Fetching neighbours for {len(all_country_codes)} countries from API...")
             
             neighbours = {}
-            for cc in all_country_codes:
-                result = self.get_neighbours(country_code=cc, verbose=verbose, export=export)
-                neighbours.update(result)
+            with self._export_batch():
+                for cc in all_country_codes:
+                    result = self.get_neighbours(country_code=cc, verbose=verbose, export=export)
+                    neighbours.update(result)
             
             # Export to cache if requested
             if export:
@@ -1009,9 +1647,10 @@ class Geo:
         # If multiple countries, process each and merge results
         if len(country_codes) > 1:
             neighbours = {}
-            for cc in tqdm(country_codes, desc="Processing neighbours data for countries"):
-                result = self.get_neighbours(country_code=cc, verbose=verbose, export=export)
-                neighbours.update(result)
+            with self._export_batch():
+                for cc in tqdm(country_codes, desc="Processing neighbours data for countries"):
+                    result = self.get_neighbours(country_code=cc, verbose=verbose, export=export)
+                    neighbours.update(result)
             if export:
                 self._export_cache(verbose=verbose)
             return neighbours
@@ -1049,23 +1688,16 @@ class Geo:
         cache_hits = 0
         
         # Check cache for bounding boxes, collect codes needing fetch
-        if self.use_cache and self.geo_cache is not None and not self.geo_cache.empty:
+        if self.use_cache and self.cache_store is not None and len(self.cache_store):
             for subdivision_code in subdivision_codes:
-                cached_row = self.geo_cache[self.geo_cache['subdivisionCode'] == subdivision_code]
-                # Check if bounding box exists in cache, use it if valid
-                if not cached_row.empty and 'boundingBox' in self.geo_cache.columns:
-                    cached_bbox = cached_row['boundingBox'].values[0]
-                    # Validate and load cached bounding box
-                    if cached_bbox and pd.notna(cached_bbox):
-                        try:
-                            bbox = json.loads(cached_bbox) if isinstance(cached_bbox, str) else cached_bbox
-                            bounding_boxes[subdivision_code] = bbox
-                            cache_hits += 1
-                            if verbose:
-                                print(f"  [CACHE HIT] {subdivision_code} - Bounding box found in cache file, API call skipped: {bbox}")
-                            continue
-                        except (json.JSONDecodeError, ValueError):
-                            pass
+                # Check if a valid bounding box exists in cache, use it if so
+                bbox = self.cache_store.get(subdivision_code, 'boundingBox')
+                if bbox:
+                    bounding_boxes[subdivision_code] = bbox
+                    cache_hits += 1
+                    if verbose:
+                        print(f"  [CACHE HIT] {subdivision_code} - Bounding box found in cache file, API call skipped: {bbox}")
+                    continue
                 
                 subdivision_codes_needing_fetch.append(subdivision_code)
         else:
@@ -1106,25 +1738,16 @@ class Geo:
                 neighbor_names = [f"{code} ({subdivisions[effective_country_code][code].name})" for code in neighbours[subdivision_code]]
                 print(f"  [{subdivision_code}] {sub_name} - Neighbors: {', '.join(neighbor_names)}")
         
-        # Cache neighbours data - update cache with comma-separated neighbour lists
+        # Cache neighbours data - update cache with comma-separated neighbour lists, journaling the changed ones in one batch
+        journal_entries = []
         for subdivision_code, neighbor_list in neighbours.items():
             neighbours_str = ','.join(neighbor_list) if neighbor_list else None
             
-            # Update or append to cache DataFrame
-            if self.geo_cache is not None and not self.geo_cache.empty:
-                if subdivision_code in self.geo_cache['subdivisionCode'].values:
-                    self.geo_cache.loc[self.geo_cache['subdivisionCode'] == subdivision_code, 'neighbours'] = neighbours_str
-                else:
-                    # Add new row with neighbours data
-                    new_row = pd.DataFrame({
-                        'subdivisionCode': [subdivision_code],
-                        'latLng': [None],
-                        'boundingBox': [None],
-                        'geojson': [None],
-                        'perimeter': [None],
-                        'neighbours': [neighbours_str]
-                    })
-                    self.geo_cache = pd.concat([self.geo_cache, new_row], ignore_index=True)
+            # Update or append to cache in memory
+            if self.cache_store is not None and len(self.cache_store):
+                if self.cache_store.set(subdivision_code, 'neighbours', neighbours_str):
+                    journal_entries.append((subdivision_code, 'neighbours', neighbours_str))
+        self._journal_updates(journal_entries)
         
         # Export to cache if export_to_cache is enabled
         if self.export_to_cache:
@@ -1142,8 +1765,10 @@ class Geo:
         Get all geographical data (latLng, bounding_box, geojson, perimeter, neighbours) for each ISO 3166-2 
         subdivision in the country or countries. Retrieves all attributes in a single call by delegating 
         to get_lat_lng(), get_bounding_box(), get_geojson(), get_perimeter(), and get_neighbours(). Checks 
-        cache first for all attributes, then fetches missing data from Nominatim API. Due to the geojson
-        export taking significant space, geojson fetching is skipped by default unless explicitly requested.
+        cache first for all attributes, then fetches missing data from Nominatim API. Each subdivision
+        missing any attribute is fetched with at most one request, whose response is shared by all of the
+        attribute methods. Due to the geojson export taking significant space, geojson fetching is skipped 
+        by default unless explicitly requested.
         
         Parameters
         ==========
@@ -1186,12 +1811,16 @@ class Geo:
         # Parse comma-separated country codes
         country_codes = self._parse_country_codes(country_code)
         
-        # If multiple countries, process each and merge results
+        # If multiple countries, fetch the subdivisions of all of them concurrently up front, then process each and merge results
         if len(country_codes) > 1:
             all_geo_data = {}
-            for cc in country_codes:
-                result = self.get_all(country_code=cc, verbose=verbose, export=export, skip_geojson=skip_geojson)
-                all_geo_data.update(result)
+            with self._fetch_plan(), self._export_batch():
+                subdivisions = Subdivisions()
+                self._plan_fetches([subdivision_code for cc in country_codes for subdivision_code in subdivisions.subdivision_codes(cc)], 
+                                   skip_geojson=skip_geojson, verbose=verbose)
+                for cc in country_codes:
+                    result = self.get_all(country_code=cc, verbose=verbose, export=export, skip_geojson=skip_geojson)
+                    all_geo_data.update(result)
             if export:
                 self._export_cache(verbose=verbose)
             return all_geo_data
@@ -1208,21 +1837,6 @@ class Geo:
             flag_emoji = flag.flag(effective_country_code) if effective_country_code != "XK" else ""
             print(f"[START] Fetching all geographical data for {country_name} {effective_country_code} {flag_emoji}...")
         
-        # Fetch all attributes using the respective methods
-        latLngs = self.get_lat_lng(country_code=country_code, verbose=verbose, export=export)
-        bounding_boxes = self.get_bounding_box(country_code=country_code, verbose=verbose, export=export)
-        perimeters = self.get_perimeter(country_code=country_code, verbose=verbose, export=export)
-        neighbours = self.get_neighbours(country_code=country_code, verbose=verbose, export=export)
-        
-        # Conditionally fetch GeoJSON if not skipping
-        if not skip_geojson:
-            geojsons = self.get_geojson(country_code=country_code, verbose=verbose, export=export)
-        else:
-            geojsons = {}
-        
-        # Combine all attributes into a single result dictionary
-        all_geo_data = {}
-        
         # Get subdivision codes - reuse self.subdivisions if country matches, otherwise create temp instance
         if country_code is not None and convert_to_alpha2(country_code) != self.country_code:
             subdivisions = Subdivisions()
@@ -1230,6 +1844,24 @@ class Geo:
         else:
             subdivision_codes = self.subdivision_codes
         
+        # Fetch all attributes using the respective methods, after fetching each subdivision missing any of 
+        # them once up front so the methods share a single Nominatim response per subdivision
+        with self._fetch_plan(), self._export_batch():
+            self._plan_fetches(subdivision_codes, skip_geojson=skip_geojson, verbose=verbose)
+            latLngs = self.get_lat_lng(country_code=country_code, verbose=verbose, export=export)
+            bounding_boxes = self.get_bounding_box(country_code=country_code, verbose=verbose, export=export)
+            perimeters = self.get_perimeter(country_code=country_code, verbose=verbose, export=export)
+            neighbours = self.get_neighbours(country_code=country_code, verbose=verbose, export=export)
+            
+            # Conditionally fetch GeoJSON if not skipping
+            if not skip_geojson:
+                geojsons = self.get_geojson(country_code=country_code, verbose=verbose, export=export)
+            else:
+                geojsons = {}
+        
+        # Combine all attributes into a single result dictionary
+        all_geo_data = {}
+        
         # Iterate over subdivision codes to assemble all data, skipping empty entries
         for subdivision_code in subdivision_codes:
             geo_entry = {}
@@ -1312,9 +1944,13 @@ class Geo:
         if not os.path.exists(cache_path):
             raise FileNotFoundError(f"Cache file not found: {cache_path}")
         
-        # Read cache file
+        # Read cache file, applying any journaled updates not yet compacted into it
         try:
-            cache_df = pd.read_csv(cache_path, dtype={'subdivisionCode': str})
+            if is_sqlite_cache_path(cache_path):
+                cache_df = SQLiteGeoCacheStore(cache_path).to_frame()
+            else:
+                journal = GeoCacheJournal(cache_path)
+                cache_df = journal.load().to_frame() if len(journal) else pd.read_csv(cache_path, dtype={'subdivisionCode': str})
             # subdivisionCode column is already in correct format
         except Exception as e:
             raise ValueError(f"Failed to read cache file {cache_path}: {str(e)}")
@@ -1461,6 +2097,95 @@ class Geo:
         
         return stats
 
+    @property
+    def geo_cache(self) -> Optional[pd.DataFrame]:
+        """ DataFrame view of the keyed geo cache store, None if no cache is loaded. """
+        return self.cache_store.to_frame() if self.cache_store is not None else None
+
+    @geo_cache.setter
+    def geo_cache(self, geo_cache: Optional[pd.DataFrame]) -> None:
+        """ Replace the geo cache store with the rows of a DataFrame, parsing each row once. """
+        self.cache_store = GeoCacheStore.from_frame(geo_cache) if geo_cache is not None else None
+        #the next export rewrites the whole cache file from memory rather than compacting the journal
+        self._cache_replaced = True
+        self._pending_journal_entries = []
+
+    def _cached(self, subdivision_code: str, attribute: str) -> Any:
+        """
+        Return the parsed cached value of an attribute for a subdivision via an O(1) lookup in the 
+        geo cache store.
+
+        Parameters
+        ==========
+        subdivision_code : str
+            ISO 3166-2 subdivision code.
+        attribute : str
+            Name of the cached attribute, e.g. latLng or boundingBox.
+
+        Returns
+        =======
+        Any
+            Parsed cached value, or None if the cache isn't used or the value isn't cached.
+        """
+        if not self.use_cache or self.cache_store is None:
+            return None
+        return self.cache_store.get(subdivision_code, attribute)
+
+    def _update_cache(self, subdivision_code: str, attribute: str, value: Any, export: bool = True) -> None:
+        """
+        Update the serialized value of an attribute for a subdivision in the geo cache store, 
+        creating the store and appending a new row as needed. Changed values are appended to the
+        cache journal straight away if export_to_cache is True, or held until the next export if
+        export is False.
+
+        Parameters
+        ==========
+        subdivision_code : str
+            ISO 3166-2 subdivision code.
+        attribute : str
+            Name of the cached attribute, e.g. latLng or boundingBox.
+        value : Any
+            Serialized value as stored in the cache file.
+        export : bool, optional
+            Journal the value straight away rather than at the next export. Default is True.
+
+        Returns
+        =======
+        None
+        """
+        if self.cache_store is None:
+            self.cache_store = GeoCacheStore()
+        if self.cache_store.set(subdivision_code, attribute, value):
+            self._journal_updates([(subdivision_code, attribute, value)], export=export)
+
+    def _journal_updates(self, entries: List[tuple], export: bool = True) -> None:
+        """
+        Append updated cache values, along with any held back from earlier updates, to the cache 
+        journal if export_to_cache is True and a cache path was provided.
+
+        Parameters
+        ==========
+        entries : List[tuple]
+            Entries of subdivision code, attribute name and serialized value.
+        export : bool, optional
+            Append the entries now, otherwise hold them until the next export. Default is True.
+
+        Returns
+        =======
+        None
+        """
+        # Updates to a SQLite cache are held by the store and written in batches
+        if isinstance(self.cache_store, SQLiteGeoCacheStore):
+            if export and self.export_to_cache:
+                self.cache_store.flush(min_pending=self.cache_store.batch_size)
+            return
+        if not self.export_to_cache or self.cache_journal is None:
+            return
+        self._pending_journal_entries.extend(entries)
+        if export and self._pending_journal_entries:
+            self.cache_journal.append(self._pending_journal_entries)
+            self._pending_journal_entries = []
+
     def _clear_cache(self) -> None:
         """
         Clear the in-memory cache. Clears all cached geographical data from memory. 
@@ -1474,7 +2199,8 @@ class Geo:
         =======
         None
         """
-        self.geo_cache = None
+        self.cache_store = None
+        self._pending_journal_entries = []
 
     def _load_cache(self) -> Optional[pd.DataFrame]:
         """ 
@@ -1507,20 +2233,8 @@ class Geo:
         
         # Load the cache file
         try:
-            # Read CSV with subdivisionCode as string to preserve leading zeros
-            cache = pd.read_csv(self.geo_cache_path, dtype={'subdivisionCode': str})
-
-            # Ensure expected columns exist and use object dtype for JSON/string columns
-            expected_columns = ['subdivisionCode', 'latLng', 'boundingBox', 'geojson', 'perimeter', 'neighbours']
-            for column in expected_columns:
-                if column not in cache.columns:
-                    cache[column] = None
-
-            for column in ['latLng', 'boundingBox', 'geojson', 'neighbours']:
-                if column in cache.columns and cache[column].dtype != object:
-                    cache[column] = cache[column].astype('object')
-
-            return cache
+            # Read CSV with subdivisionCode as string to preserve leading zeros, missing columns are filled in by the cache store
+            return pd.read_csv(self.geo_cache_path, dtype={'subdivisionCode': str})
         except Exception as e:
             print(f"Error reading geo_cache CSV from {self.geo_cache_path}: {e}. Geo cache set to None.")
             return None
@@ -1554,6 +2268,144 @@ class Geo:
         codes = [convert_to_alpha2(code.strip()) for code in country_code.split(',') if code.strip()]
         return codes
     
+    @contextmanager
+    def _export_batch(self):
+        """
+        Treat the cache exports made within the context as part of one top-level export, such that 
+        they only compact the cache journal once it reaches its compaction threshold. The export made 
+        after the outermost context then folds the whole journal into the cache file.
+
+        Parameters
+        ==========
+        None
+
+        Returns
+        =======
+        None
+        """
+        self._export_depth += 1
+        try:
+            yield
+        finally:
+            self._export_depth -= 1
+
+    @contextmanager
+    def _fetch_plan(self):
+        """
+        Keep the responses fetched by _plan_fetches in self._planned_fetches for the duration of the 
+        context, such that the attribute methods called within it reuse them. Nested contexts share 
+        the plan of the outermost one.
+
+        Parameters
+        ==========
+        None
+
+        Returns
+        =======
+        Dict[str, tuple]
+            Planned fetches of subdivision code to whether the GeoJSON was fetched and the response.
+        """
+        if self._planned_fetches is not None:
+            yield self._planned_fetches
+            return
+        self._planned_fetches = {}
+        try:
+            yield self._planned_fetches
+        finally:
+            self._planned_fetches = None
+
+    def _plan_fetches(self, subdivision_codes: List[str], skip_geojson: bool = True, verbose: bool = False) -> int:
+        """
+        Work out which attributes are missing from the cache per subdivision and fetch each subdivision 
+        missing any of them with a single Nominatim request, which includes the GeoJSON polygon if the 
+        perimeter or GeoJSON is missing. The requests are made concurrently via the fetch engine. The 
+        responses are kept in self._planned_fetches, where _fetch_subdivision_data finds them, so every 
+        attribute method reuses the one response instead of issuing its own request. Neighbours are 
+        derived from the bounding boxes so need no request.
+
+        Parameters
+        ==========
+        subdivision_codes : List[str]
+            ISO 3166-2 subdivision codes to plan fetches for.
+        skip_geojson : bool, optional
+            Don't consider missing GeoJSON. Default is True.
+        verbose : bool, optional
+            Enable verbose logging. Default is False.
+
+        Returns
+        =======
+        int
+            Number of Nominatim requests made.
+        """
+        # Attributes read from the plain response, and those needing its GeoJSON polygon
+        plain_attributes = ['latLng', 'boundingBox']
+        geojson_attributes = ['perimeter'] if skip_geojson else ['perimeter', 'geojson']
+
+        fetches = {}
+        for subdivision_code in subdivision_codes:
+            if subdivision_code in self._planned_fetches or subdivision_code in fetches:
+                continue
+            missing = [attribute for attribute in plain_attributes + geojson_attributes if not self._cached(subdivision_code, attribute)]
+            if not missing:
+                continue
+            fetches[subdivision_code] = any(attribute in geojson_attributes for attribute in missing)
+            if verbose:
+                print(f"  [{subdivision_code}] Fetching once from API for missing attributes: {', '.join(missing)}")
+        
+        for subdivision_code, data in self._fetch_concurrently(fetches).items():
+            self._planned_fetches[subdivision_code] = (fetches[subdivision_code], data)
+        
+        return len(fetches)
+
+    def _prefetch(self, subdivision_codes: List[str], attribute: str, get_geojson: bool = False, exclude=()) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch each subdivision missing an attribute from the cache concurrently via the fetch engine, 
+        such that the attribute methods only process the responses sequentially rather than making 
+        one request at a time. Subdivisions already fetched by get_all's fetch planner aren't fetched 
+        again.
+
+        Parameters
+        ==========
+        subdivision_codes : List[str]
+            ISO 3166-2 subdivision codes.
+        attribute : str
+            Name of the cached attribute, e.g. latLng or boundingBox.
+        get_geojson : bool, optional
+            Include the GeoJSON polygon in the requests. Default is False.
+        exclude : Iterable[str], optional
+            Subdivision codes not to fetch. Default is ().
+
+        Returns
+        =======
+        Dict[str, Optional[Dict[str, Any]]]
+            Dictionary mapping each fetched subdivision code to its response, as per _fetch_subdivision_data.
+        """
+        planned = self._planned_fetches or {}
+        return self._fetch_concurrently({subdivision_code: get_geojson for subdivision_code in subdivision_codes
+                                         if subdivision_code not in exclude and subdivision_code not in planned 
+                                         and not self._cached(subdivision_code, attribute)})
+
+    def _fetch_concurrently(self, fetches: Dict[str, bool]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch subdivisions from the Nominatim API concurrently via the shared asyncio fetch engine, 
+        bounded by the API's limits in the request scheduler, which are shared by all Geo instances 
+        and threads, such that the subdivisions of all countries being fetched share its rate budget.
+
+        Parameters
+        ==========
+        fetches : Dict[str, bool]
+            Dictionary mapping subdivision codes to whether to include the GeoJSON polygon.
+
+        Returns
+        =======
+        Dict[str, Optional[Dict[str, Any]]]
+            Dictionary mapping each subdivision code to its response, as per _fetch_subdivision_data.
+        """
+        subdivision_codes = list(fetches)
+        results = get_fetch_engine().map(NOMINATIM_API_URL, lambda subdivision_code: self._fetch_subdivision_data(subdivision_code, get_geojson=fetches[subdivision_code]), 
+                                         subdivision_codes)
+        return dict(zip(subdivision_codes, results))
+
     def _fetch_subdivision_data(self, subdivision_code: str, get_geojson: bool = False) -> Optional[Dict[str, Any]]:
         """
         Fetch latLng, bounding box, and GeoJSON for a single subdivision from Nominatim API via its
@@ -1577,6 +2429,12 @@ class Geo:
             - 'geojson': dict with GeoJSON geometry
             Returns None if subdivision not found or API error
         """
+        # Reuse the response fetched by get_all's fetch planner, if it has the GeoJSON when needed
+        if self._planned_fetches is not None and subdivision_code in self._planned_fetches:
+            planned_geojson, planned_data = self._planned_fetches[subdivision_code]
+            if planned_geojson or not get_geojson:
+                return planned_data
+
         try:
             # Extract country code from subdivision code (e.g., 'US-CA' -> 'US')
             country_code = subdivision_code.split('-')[0]
@@ -1594,10 +2452,12 @@ class Geo:
                 params['extratags'] = 1
                 params['limit'] = 1
             
-            # Make the API request, with timeout and proxy if set
+            # Make the API request via the request scheduler, with timeout and proxy if set; the
+            # larger GeoJSON requests are at a lower priority than the latLng/bounding box ones
             user_agent = 'iso3166-2-python/1.0.0 (+https://github.com/amckenna41/iso3166-2)'
-            resp = requests.get(
+            resp = scheduled_get(
                 NOMINATIM_API_URL,
+                priority=PRIORITY_LOW if get_geojson else PRIORITY_NORMAL,
                 params=params,
                 timeout=15,
                 headers={'User-Agent': user_agent},
@@ -1634,9 +2494,13 @@ class Geo:
     
     def _export_cache(self, custom_cache_export_path: Optional[str] = None, verbose: bool = False) -> None:
         """
-        Export in-memory cache to CSV file. Writes the current in-memory cache DataFrame 
-        to a CSV file at the configured cache path or custom export path. Creates any 
-        necessary parent directories if they don't exist.
+        Export in-memory cache to CSV file. Updates are already appended to the cache journal 
+        as they are fetched, so exporting to the configured cache path folds the journal into the 
+        cache file. Within an _export_batch context the journal is only compacted once it reaches its 
+        compaction threshold, the top-level export after the context folding in the rest. The whole 
+        cache file is rewritten atomically from memory if the cache was replaced or export_to_cache is False, 
+        and a custom export path gets a full snapshot. For a SQLite cache the pending updates are
+        written in one transaction. Creates any necessary parent directories if they don't exist.
         
         Parameters
         ==========
@@ -1652,20 +2516,38 @@ class Geo:
             If the cache file cannot be written due to permission or I/O errors.
         """
         # Skip export if cache is empty
-        if self.geo_cache is None or self.geo_cache.empty:
+        if self.cache_store is None or not len(self.cache_store):
             return
         
         # Use custom export path if provided, otherwise use instance cache path
         export_path = custom_cache_export_path if custom_cache_export_path is not None else self.geo_cache_path
         
         try:
-            # Create parent directories if they don't exist
-            cache_dir = os.path.dirname(export_path)
-            if cache_dir and not os.path.exists(cache_dir):
-                os.makedirs(cache_dir, exist_ok=True)
-            
-            # Write cache to CSV file
-            self.geo_cache.to_csv(export_path, index=False)
+            # Write a full snapshot of the in-memory cache to a custom path
+            if custom_cache_export_path is not None and custom_cache_export_path != self.geo_cache_path:
+                if is_sqlite_cache_path(export_path):
+                    SQLiteGeoCacheStore(export_path).write(self.cache_store)
+                else:
+                    write_atomic_csv(self.cache_store.to_frame(), export_path)
+            # Write the pending updates of a SQLite cache in one batch
+            elif isinstance(self.cache_store, SQLiteGeoCacheStore) and not self._cache_replaced:
+                self.cache_store.flush()
+            # Rewrite the whole cache file from memory if the cache was replaced or updates weren't journaled
+            elif self._cache_replaced or not self.export_to_cache or self.cache_journal is None:
+                if is_sqlite_cache_path(export_path):
+                    SQLiteGeoCacheStore(export_path).write(self.cache_store)
+                else:
+                    GeoCacheJournal(export_path).write(self.cache_store)
+                self._cache_replaced = False
+                self._pending_journal_entries = []
+            # Otherwise updates are already in the journal, fold it into the cache file at the end of a top-level 
+            # export, or once it's grown large enough during a batch of exports
+            else:
+                self._journal_updates([])
+                if self._export_depth:
+                    self.cache_journal.maybe_compact()
+                else:
+                    self.cache_journal.compact()
             
             # Verbose logging
             if verbose:
@@ -1721,8 +2603,8 @@ class Geo:
 
     def __repr__(self) -> str:
         """ Return detailed representation of Geo instance. """
-        cache_loaded = self.geo_cache is not None and not self.geo_cache.empty
-        cached_entries = len(self.geo_cache) if cache_loaded else 0
+        cache_loaded = self.cache_store is not None and len(self.cache_store) > 0
+        cached_entries = len(self.cache_store) if cache_loaded else 0
         return (f"Geo(country_code='{self.country_code}', country_name='{self.country_name}', "
                 f"subdivisions={len(self.subdivision_codes) if self.subdivision_codes else 0}, "
                 f"cached_entries={cached_entries}, cache_loaded={cache_loaded}, "
@@ -1738,11 +2620,12 @@ class Geo:
 
     def __len__(self) -> int:
         """ Return the number of cached entries. """
-        return len(self.geo_cache) if self.geo_cache is not None and not self.geo_cache.empty else 0
+        return len(self.cache_store) if self.cache_store is not None else 0
 
 
 def fetch_all_country_geo_data(max_workers: int = 3, verbose: bool = False, country_codes: Optional[str] = None, 
-                               geo_cache_path: Optional[str] = None, skip_attributes: str = 'geojson', export: bool = True):
+                               geo_cache_path: Optional[str] = None, skip_attributes: str = 'geojson', export: bool = True,
+                               resume: bool = False, manifest_path: Optional[str] = None):
     """
     Fetch all geographic data (latLngs, bounding boxes, perimeters, geojson & neighbours) for all country subdivisions
     in parallel using ThreadPoolExecutor via 1 or more workers. By default, ALL ~250 ISO 3166-1 countiries' 
@@ -1755,6 +2638,10 @@ def fetch_all_country_geo_data(max_workers: int = 3, verbose: bool = False, coun
 
     If no geo_cache_path is provided, a timestamped cache file (geo_cache_YYYYMMDD_HHMM.csv) is created in the current 
     working directory.
+
+    Each country is recorded in a run manifest as it completes, along with its fetching stats, which only appends 
+    a line per country. A run that crashed or was interrupted can be resumed via the resume parameter, skipping the 
+    countries it completed, whose geographical data is already in the cache, provided the skipped attributes match.
     
     A detailed summary of the fetching process is printed to the console if verbose is enabled and an output
     statistics cache file is created at the end of the process to capture cache hits, API hits, and failures etc.
@@ -1764,14 +2651,19 @@ def fetch_all_country_geo_data(max_workers: int = 3, verbose: bool = False, coun
     Parameters
     ==========
     max_workers : int, optional
-        Number of parallel workers. Default is 3. Recommended: 3-5 to respect API rate limits.
+        Number of countries processed in parallel. Default is 3. The subdivisions of each country are 
+        fetched concurrently via the shared asyncio fetch engine, and the Nominatim API requests of all 
+        workers are throttled to its rate limit by the request scheduler, so more workers only help 
+        cached countries.
     verbose : bool, optional
         Enable verbose logging. Default is False.
     country_codes : str, optional
         ISO 3166-1 alpha-2 or alpha-3 country code, or comma-separated list of codes (e.g., 'AD' or 'AD,DE,FR'). 
         If None, fetches for all countries. Default is None.
     geo_cache_path : str, optional
-        Path to custom geo cache CSV file. Default is None.
+        Path to custom geo cache CSV file. A path ending in .db, .sqlite or .sqlite3 uses the SQLite 
+        cache backend, letting the workers share one cache with concurrent reads and batched writes. 
+        Default is None.
     skip_attributes : str, optional
         Comma-separated list of geographical attributes to skip during processing.
         Acceptable values: latLng, boundingBox, geojson, perimeter, neighbours
@@ -1780,6 +2672,11 @@ def fetch_all_country_geo_data(max_workers: int = 3, verbose: bool = False, coun
         Default is 'geojson' (GeoJSON data is skipped by default).
     export : bool, optional
         Export newly-fetched data to cache. Default is True.
+    resume : bool, optional
+        Resume the previous run in the run manifest, skipping the countries it completed. Default is False.
+    manifest_path : str, optional
+        Path to the run manifest. Default is None, which stores it next to the geo cache as 
+        <geo_cache_path>.manifest, or as geo_manifest.jsonl in the current working directory.
     
     Returns
     =======
@@ -1818,182 +2715,193 @@ def fetch_all_country_geo_data(max_workers: int = 3, verbose: bool = False, coun
     processed = 0
     keyboard_interrupted = False
     start_time = time.time()
+
+    # Record each completed country in the run manifest, skipping those completed by the previous run if resuming
+    if manifest_path is None:
+        manifest_path = geo_cache_path + ".manifest" if geo_cache_path else os.path.join(os.getcwd(), "geo_manifest.jsonl")
+    manifest = RunManifest(manifest_path, parameters={'skip_attributes': sorted(skip_attrs)}, resume=resume)
+    pending_countries = []
+    for cc in all_countries:
+        if manifest.is_complete(cc, 'geo'):
+            results_list.append(manifest.load(cc, 'geo'))
+            processed += 1
+        else:
+            pending_countries.append(cc)
+    if resume:
+        print(f"Resuming run, {processed}/{len(all_countries)} countries already completed.")
     
     def fetch_country_data(cc: str) -> dict:
         """ Fetch all geo data for a single country. """
         # Create Geo instance for the country, reusing the provided cache path
         try:
             geo = Geo(cc, geo_cache_path=geo_cache_path, verbose=verbose)
-            # get flag emoji for current country
-            flag_emoji = flag.flag(cc) if cc != "XK" else ""
-            print(f"\n Getting subdivision Geo data for {geo.country_name} ({cc}) {flag_emoji}...")
+            # The country's exports are part of the run's top-level export, which compacts the cache journal once at the end
+            with geo._export_batch():
+                # get flag emoji for current country
+                flag_emoji = flag.flag(cc) if cc != "XK" else ""
+                print(f"\n Getting subdivision Geo data for {geo.country_name} ({cc}) {flag_emoji}...")
 
-            # Only proceed if there are subdivisions, e.g AX, AQ has no subdivisions etc
-            if geo.subdivision_codes:
+                # Only proceed if there are subdivisions, e.g AX, AQ has no subdivisions etc
+                if geo.subdivision_codes:
                 
-                # Fetch LatLngs with detailed cache tracking
-                lat_lngs = {}
-                latLng_cache_hits = 0
-                latLng_api_hits = 0
+                    # Fetch LatLngs with detailed cache tracking
+                    lat_lngs = {}
+                    latLng_cache_hits = 0
+                    latLng_api_hits = 0
 
-                # Only fetch latLng if not skipping
-                if 'latlng' not in skip_attrs:
-                    if verbose:
-                        for sub_code in geo.subdivision_codes:
-                            print(f"  [API] GET latLng: https://nominatim.openstreetmap.org/search?q={sub_code}&format=json")
-                    lat_lngs = geo.get_lat_lng(verbose=verbose, export=export)
-                    # Use vectorized pandas operations for capturing the cache hit total via O(1) 
-                    if geo.use_cache and geo.geo_cache is not None and not geo.geo_cache.empty and 'latLng' in geo.geo_cache.columns:
-                        cached_mask = (geo.geo_cache['subdivisionCode'].isin(geo.subdivision_codes)) & (geo.geo_cache['latLng'].notna())
-                        latLng_cache_hits = len(geo.geo_cache[cached_mask])
-                    # Calculate API hits, non-cached subdivisions, total latLng fetched and failed
-                    latLng_api_hits = len(geo.subdivision_codes or []) - latLng_cache_hits
-                    latLng_count = len([c for c in lat_lngs.values() if c])
-                    latLng_failed = len(geo.subdivision_codes or []) - latLng_count
-                else:
-                    latLng_count = 0
-                    latLng_failed = 0
+                    # Only fetch latLng if not skipping
+                    if 'latlng' not in skip_attrs:
+                        if verbose:
+                            for sub_code in geo.subdivision_codes:
+                                print(f"  [API] GET latLng: https://nominatim.openstreetmap.org/search?q={sub_code}&format=json")
+                        lat_lngs = geo.get_lat_lng(verbose=verbose, export=export)
+                        # Use vectorized pandas operations for capturing the cache hit total via O(1) 
+                        if geo.use_cache and geo.cache_store is not None:
+                            latLng_cache_hits = geo.cache_store.count(geo.subdivision_codes, 'latLng')
+                        # Calculate API hits, non-cached subdivisions, total latLng fetched and failed
+                        latLng_api_hits = len(geo.subdivision_codes or []) - latLng_cache_hits
+                        latLng_count = len([c for c in lat_lngs.values() if c])
+                        latLng_failed = len(geo.subdivision_codes or []) - latLng_count
+                    else:
+                        latLng_count = 0
+                        latLng_failed = 0
                 
-                # Fetch Bounding Boxes with detailed cache tracking
-                bounding_boxes = {}
-                bbox_cache_hits = 0
-                bbox_api_hits = 0
+                    # Fetch Bounding Boxes with detailed cache tracking
+                    bounding_boxes = {}
+                    bbox_cache_hits = 0
+                    bbox_api_hits = 0
 
-                # Only fetch bounding box if not skipping
-                if 'boundingbox' not in skip_attrs:
-                    if verbose:
-                        for sub_code in geo.subdivision_codes:
-                            print(f"  [API] GET boundingBox: https://nominatim.openstreetmap.org/search?q={sub_code}&format=json&boundingbox=1")
-                    bounding_boxes = geo.get_bounding_box(verbose=verbose, export=export)
-                    # Use vectorized pandas operations for capturing the cache hit total via O(1) 
-                    if geo.use_cache and geo.geo_cache is not None and not geo.geo_cache.empty and 'boundingBox' in geo.geo_cache.columns:
-                        cached_mask = (geo.geo_cache['subdivisionCode'].isin(geo.subdivision_codes)) & (geo.geo_cache['boundingBox'].notna())
-                        bbox_cache_hits = len(geo.geo_cache[cached_mask])
-                    # Calculate API hits, non-cached subdivisions, total bounding box fetched and failed
-                    bbox_api_hits = len(geo.subdivision_codes or []) - bbox_cache_hits
-                    bbox_count = len([b for b in bounding_boxes.values() if b])
-                    bbox_failed = len(geo.subdivision_codes or []) - bbox_count
-                else:
-                    bbox_count = 0
-                    bbox_failed = 0
+                    # Only fetch bounding box if not skipping
+                    if 'boundingbox' not in skip_attrs:
+                        if verbose:
+                            for sub_code in geo.subdivision_codes:
+                                print(f"  [API] GET boundingBox: https://nominatim.openstreetmap.org/search?q={sub_code}&format=json&boundingbox=1")
+                        bounding_boxes = geo.get_bounding_box(verbose=verbose, export=export)
+                        # Use vectorized pandas operations for capturing the cache hit total via O(1) 
+                        if geo.use_cache and geo.cache_store is not None:
+                            bbox_cache_hits = geo.cache_store.count(geo.subdivision_codes, 'boundingBox')
+                        # Calculate API hits, non-cached subdivisions, total bounding box fetched and failed
+                        bbox_api_hits = len(geo.subdivision_codes or []) - bbox_cache_hits
+                        bbox_count = len([b for b in bounding_boxes.values() if b])
+                        bbox_failed = len(geo.subdivision_codes or []) - bbox_count
+                    else:
+                        bbox_count = 0
+                        bbox_failed = 0
                 
-                # Conditionally fetch GeoJSON if not skipping
-                geojsons = {}
-                geojson_cache_hits = 0
-                geojson_api_hits = 0
+                    # Conditionally fetch GeoJSON if not skipping
+                    geojsons = {}
+                    geojson_cache_hits = 0
+                    geojson_api_hits = 0
 
-                # Only fetch GeoJSON if not skipping
-                if 'geojson' not in skip_attrs:
-                    if verbose:
-                        for sub_code in geo.subdivision_codes:
-                            print(f"  [API] GET geojson: https://nominatim.openstreetmap.org/search?q={sub_code}&format=geojson")
-                    geojsons = geo.get_geojson(verbose=verbose, export=export)
-                    # Use vectorized pandas operations for capturing the cache hit total via O(1) 
-                    if geo.use_cache and geo.geo_cache is not None and not geo.geo_cache.empty and 'geojson' in geo.geo_cache.columns:
-                        cached_mask = (geo.geo_cache['subdivisionCode'].isin(geo.subdivision_codes)) & (geo.geo_cache['geojson'].notna())
-                        geojson_cache_hits = len(geo.geo_cache[cached_mask])
-                    # Calculate API hits, non-cached subdivisions, total GeoJSON fetched and failed
-                    geojson_api_hits = len(geo.subdivision_codes or []) - geojson_cache_hits
-                    geojson_count = len([g for g in geojsons.values() if g])
-                    geojson_failed = len(geo.subdivision_codes or []) - geojson_count
-                else:
-                    geojson_count = 0
-                    geojson_failed = 0
+                    # Only fetch GeoJSON if not skipping
+                    if 'geojson' not in skip_attrs:
+                        if verbose:
+                            for sub_code in geo.subdivision_codes:
+                                print(f"  [API] GET geojson: https://nominatim.openstreetmap.org/search?q={sub_code}&format=geojson")
+                        geojsons = geo.get_geojson(verbose=verbose, export=export)
+                        # Use vectorized pandas operations for capturing the cache hit total via O(1) 
+                        if geo.use_cache and geo.cache_store is not None:
+                            geojson_cache_hits = geo.cache_store.count(geo.subdivision_codes, 'geojson')
+                        # Calculate API hits, non-cached subdivisions, total GeoJSON fetched and failed
+                        geojson_api_hits = len(geo.subdivision_codes or []) - geojson_cache_hits
+                        geojson_count = len([g for g in geojsons.values() if g])
+                        geojson_failed = len(geo.subdivision_codes or []) - geojson_count
+                    else:
+                        geojson_count = 0
+                        geojson_failed = 0
                 
-                # Fetch Perimeters with detailed cache tracking
-                perimeters = {}
-                perimeter_cache_hits = 0
-                perimeter_api_hits = 0
+                    # Fetch Perimeters with detailed cache tracking
+                    perimeters = {}
+                    perimeter_cache_hits = 0
+                    perimeter_api_hits = 0
                 
-                # Only fetch perimeter if not skipping
-                if 'perimeter' not in skip_attrs:
-                    if verbose:
-                        for sub_code in geo.subdivision_codes:
-                            print(f"  [API] CALC perimeter: Calculated from geojson boundaries for {sub_code}")
-                    perimeters = geo.get_perimeter(verbose=verbose, export=export)
-                    # Use vectorized pandas operations for capturing the cache hit total via O(1) 
-                    if geo.use_cache and geo.geo_cache is not None and not geo.geo_cache.empty and 'perimeter' in geo.geo_cache.columns:
-                        cached_mask = (geo.geo_cache['subdivisionCode'].isin(geo.subdivision_codes)) & (geo.geo_cache['perimeter'].notna())
-                        perimeter_cache_hits = len(geo.geo_cache[cached_mask])
-                    # Calculate API hits, non-cached subdivisions, total perimeter fetched and failed
-                    perimeter_api_hits = len(geo.subdivision_codes or []) - perimeter_cache_hits
-                    perimeter_count = len([p for p in perimeters.values() if p])
-                    perimeter_failed = len(geo.subdivision_codes or []) - perimeter_count
-                else:
-                    perimeter_count = 0
-                    perimeter_failed = 0
+                    # Only fetch perimeter if not skipping
+                    if 'perimeter' not in skip_attrs:
+                        if verbose:
+                            for sub_code in geo.subdivision_codes:
+                                print(f"  [API] CALC perimeter: Calculated from geojson boundaries for {sub_code}")
+                        perimeters = geo.get_perimeter(verbose=verbose, export=export)
+                        # Use vectorized pandas operations for capturing the cache hit total via O(1) 
+                        if geo.use_cache and geo.cache_store is not None:
+                            perimeter_cache_hits = geo.cache_store.count(geo.subdivision_codes, 'perimeter')
+                        # Calculate API hits, non-cached subdivisions, total perimeter fetched and failed
+                        perimeter_api_hits = len(geo.subdivision_codes or []) - perimeter_cache_hits
+                        perimeter_count = len([p for p in perimeters.values() if p])
+                        perimeter_failed = len(geo.subdivision_codes or []) - perimeter_count
+                    else:
+                        perimeter_count = 0
+                        perimeter_failed = 0
 
                 
-                # Fetch Neighbours with detailed cache tracking
-                neighbours = {}
-                neighbours_cache_hits = 0
-                neighbours_api_hits = 0
+                    # Fetch Neighbours with detailed cache tracking
+                    neighbours = {}
+                    neighbours_cache_hits = 0
+                    neighbours_api_hits = 0
 
-                # Only fetch neighbours if not skipping
-                if 'neighbours' not in skip_attrs:
-                    if verbose:
-                        for sub_code in geo.subdivision_codes:
-                            print(f"  [API] GET neighbours: https://nominatim.openstreetmap.org/search?q={sub_code}&format=json")
-                    neighbours = geo.get_neighbours(verbose=verbose)
-                    # Use vectorized pandas operations for capturing the cache hit total via O(1) 
-                    if geo.use_cache and geo.geo_cache is not None and not geo.geo_cache.empty and 'neighbours' in geo.geo_cache.columns:
-                        cached_mask = (geo.geo_cache['subdivisionCode'].isin(geo.subdivision_codes)) & (geo.geo_cache['neighbours'].notna())
-                        neighbours_cache_hits = len(geo.geo_cache[cached_mask])
-                    # Calculate API hits, non-cached subdivisions, total neighbours fetched and failed
-                    neighbours_api_hits = len(geo.subdivision_codes or []) - neighbours_cache_hits
-                    neighbours_count = len([n for n in neighbours.values() if n])
-                    neighbours_failed = len(geo.subdivision_codes or []) - neighbours_count
-                else:
-                    neighbours_count = 0
-                    neighbours_failed = 0
+                    # Only fetch neighbours if not skipping
+                    if 'neighbours' not in skip_attrs:
+                        if verbose:
+                            for sub_code in geo.subdivision_codes:
+                                print(f"  [API] GET neighbours: https://nominatim.openstreetmap.org/search?q={sub_code}&format=json")
+                        neighbours = geo.get_neighbours(verbose=verbose)
+                        # Use vectorized pandas operations for capturing the cache hit total via O(1) 
+                        if geo.use_cache and geo.cache_store is not None:
+                            neighbours_cache_hits = geo.cache_store.count(geo.subdivision_codes, 'neighbours')
+                        # Calculate API hits, non-cached subdivisions, total neighbours fetched and failed
+                        neighbours_api_hits = len(geo.subdivision_codes or []) - neighbours_cache_hits
+                        neighbours_count = len([n for n in neighbours.values() if n])
+                        neighbours_failed = len(geo.subdivision_codes or []) - neighbours_count
+                    else:
+                        neighbours_count = 0
+                        neighbours_failed = 0
                 
-                # Export fetched data to cache file
-                if geo.geo_cache is not None and not geo.geo_cache.empty:
-                    geo._export_cache(verbose=verbose)
+                    # Export fetched data to cache file
+                    if geo.cache_store is not None and len(geo.cache_store):
+                        geo._export_cache(verbose=verbose)
                 
-                # Compile result dictionary for this country, including detailed stats per attribute
-                result = {
-                    'country_code': cc,
-                    'total': len(geo.subdivision_codes) if geo.subdivision_codes else 0,
-                    'latLngs': {
-                        'successful': latLng_count if 'latlng' not in skip_attrs else 0,
-                        'failed': latLng_failed if 'latlng' not in skip_attrs else 0,
-                        'cache_hits': latLng_cache_hits if 'latlng' not in skip_attrs else 0,
-                        'api_calls': latLng_api_hits if 'latlng' not in skip_attrs else 0,
-                        'skipped': 'latlng' in skip_attrs
-                    },
-                    'bounding_boxes': {
-                        'successful': bbox_count if 'boundingbox' not in skip_attrs else 0,
-                        'failed': bbox_failed if 'boundingbox' not in skip_attrs else 0,
-                        'cache_hits': bbox_cache_hits if 'boundingbox' not in skip_attrs else 0,
-                        'api_calls': bbox_api_hits if 'boundingbox' not in skip_attrs else 0,
-                        'skipped': 'boundingbox' in skip_attrs
-                    },
-                    'perimeters': {
-                        'successful': perimeter_count if 'perimeter' not in skip_attrs else 0,
-                        'failed': perimeter_failed if 'perimeter' not in skip_attrs else 0,
-                        'cache_hits': perimeter_cache_hits if 'perimeter' not in skip_attrs else 0,
-                        'api_calls': perimeter_api_hits if 'perimeter' not in skip_attrs else 0,
-                        'skipped': 'perimeter' in skip_attrs
-                    },
-                    'neighbours': {
-                        'successful': neighbours_count if 'neighbours' not in skip_attrs else 0,
-                        'failed': neighbours_failed if 'neighbours' not in skip_attrs else 0,
-                        'cache_hits': neighbours_cache_hits if 'neighbours' not in skip_attrs else 0,
-                        'api_calls': neighbours_api_hits if 'neighbours' not in skip_attrs else 0,
-                        'skipped': 'neighbours' in skip_attrs
-                    },
-                    'geojson': {
-                        'successful': geojson_count if 'geojson' not in skip_attrs else 0,
-                        'failed': geojson_failed if 'geojson' not in skip_attrs else 0,
-                        'cache_hits': geojson_cache_hits if 'geojson' not in skip_attrs else 0,
-                        'api_calls': geojson_api_hits if 'geojson' not in skip_attrs else 0,
-                        'skipped': 'geojson' in skip_attrs
-                    },
-                    'error': None
-                }
+                    # Compile result dictionary for this country, including detailed stats per attribute
+                    result = {
+                        'country_code': cc,
+                        'total': len(geo.subdivision_codes) if geo.subdivision_codes else 0,
+                        'latLngs': {
+                            'successful': latLng_count if 'latlng' not in skip_attrs else 0,
+                            'failed': latLng_failed if 'latlng' not in skip_attrs else 0,
+                            'cache_hits': latLng_cache_hits if 'latlng' not in skip_attrs else 0,
+                            'api_calls': latLng_api_hits if 'latlng' not in skip_attrs else 0,
+                            'skipped': 'latlng' in skip_attrs
+                        },
+                        'bounding_boxes': {
+                            'successful': bbox_count if 'boundingbox' not in skip_attrs else 0,
+                            'failed': bbox_failed if 'boundingbox' not in skip_attrs else 0,
+                            'cache_hits': bbox_cache_hits if 'boundingbox' not in skip_attrs else 0,
+                            'api_calls': bbox_api_hits if 'boundingbox' not in skip_attrs else 0,
+                            'skipped': 'boundingbox' in skip_attrs
+                        },
+                        'perimeters': {
+                            'successful': perimeter_count if 'perimeter' not in skip_attrs else 0,
+                            'failed': perimeter_failed if 'perimeter' not in skip_attrs else 0,
+                            'cache_hits': perimeter_cache_hits if 'perimeter' not in skip_attrs else 0,
+                            'api_calls': perimeter_api_hits if 'perimeter' not in skip_attrs else 0,
+                            'skipped': 'perimeter' in skip_attrs
+                        },
+                        'neighbours': {
+                            'successful': neighbours_count if 'neighbours' not in skip_attrs else 0,
+                            'failed': neighbours_failed if 'neighbours' not in skip_attrs else 0,
+                            'cache_hits': neighbours_cache_hits if 'neighbours' not in skip_attrs else 0,
+                            'api_calls': neighbours_api_hits if 'neighbours' not in skip_attrs else 0,
+                            'skipped': 'neighbours' in skip_attrs
+                        },
+                        'geojson': {
+                            'successful': geojson_count if 'geojson' not in skip_attrs else 0,
+                            'failed': geojson_failed if 'geojson' not in skip_attrs else 0,
+                            'cache_hits': geojson_cache_hits if 'geojson' not in skip_attrs else 0,
+                            'api_calls': geojson_api_hits if 'geojson' not in skip_attrs else 0,
+                            'skipped': 'geojson' in skip_attrs
+                        },
+                        'error': None
+                    }
                 
-                return result
+                    return result
         except Exception as e:
             print(f"[ERROR] Exception in fetch_country_data for {cc}: {type(e).__name__}: {str(e)}")
             return {
@@ -2010,11 +2918,14 @@ def fetch_all_country_geo_data(max_workers: int = 3, verbose: bool = False, coun
     try:
         # Use executor.map() for ordered, sequential execution (maintains submission order)
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            with tqdm(total=len(all_countries), desc="Fetching geo data", disable=not verbose) as pbar:
-                for result in executor.map(fetch_country_data, all_countries):
+            with tqdm(total=len(all_countries), initial=processed, desc="Fetching geo data", disable=not verbose) as pbar:
+                for cc, result in zip(pending_countries, executor.map(fetch_country_data, pending_countries)):
                     results_list.append(result)
                     processed += 1
                     pbar.update(1)
+                    # Checkpoint the country unless it failed, its geographical data is already in the cache
+                    if result is None or result.get('error') is None:
+                        manifest.complete(cc, 'geo', data=result)
     
     # Handle keyboard interrupt gracefully, output stats for completed workers so far
     except KeyboardInterrupt:
@@ -2023,6 +2934,10 @@ def fetch_all_country_geo_data(max_workers: int = 3, verbose: bool = False, coun
             print("\nFetch interrupted by user.")
         processed = len(results_list)  # Count only what was actually processed
     
+    # Fold the journal of this run's cache updates into the cache file, whether or not the summary is reported
+    if export and geo_cache_path and not is_sqlite_cache_path(geo_cache_path):
+        GeoCacheJournal(geo_cache_path).compact()
+
     # Calculate total elapsed time
     elapsed = time.time() - start_time
     
@@ -2101,8 +3016,7 @@ def fetch_all_country_geo_data(max_workers: int = 3, verbose: bool = False, coun
         if os.path.exists(cache_file_path):
             cache_size = os.path.getsize(cache_file_path)
             try:
-                cache_df = pd.read_csv(cache_file_path)
-                cache_rows = len(cache_df)
+                cache_rows = len(SQLiteGeoCacheStore(cache_file_path)) if is_sqlite_cache_path(cache_file_path) else len(pd.read_csv(cache_file_path))
                 if cache_size < 1024:
                     cache_size_str = f"{cache_size} B"
                 elif cache_size < 1024 * 1024:
@@ -2166,9 +3080,10 @@ def get_geo_nulls(geo_cache_filepath: str, print_summary: bool = False, export_f
     if not os.path.exists(geo_cache_filepath):
         raise FileNotFoundError(f"Geo cache file not found: {geo_cache_filepath}")
     
-    # Load the cache file
+    # Load the cache file, applying any journaled updates not yet compacted into it
     try:
-        cache_df = pd.read_csv(geo_cache_filepath)
+        cache_columns = pd.read_csv(geo_cache_filepath, nrows=0).columns
+        cache_df = GeoCacheJournal(geo_cache_filepath).load().to_frame()
     except Exception as e:
         raise ValueError(f"Failed to read geo cache file: {str(e)}")
     
@@ -2176,7 +3091,7 @@ def get_geo_nulls(geo_cache_filepath: str, print_summary: bool = False, export_f
     required_attributes = ['latLng', 'boundingBox', 'geojson', 'perimeter', 'neighbours']
     
     # Verify all required columns exist
-    missing_columns = [attr for attr in required_attributes if attr not in cache_df.columns]
+    missing_columns = [attr for attr in required_attributes if attr not in cache_columns]
     if missing_columns:
         raise ValueError(f"Cache file missing required columns: {missing_columns}")
     
@@ -697,9 +697,9 @@ class LanguageLookup:
         user_agent = UserAgent()
         user_agent_header = user_agent.random
 
-        #use requests library to get language code page data
+        #use requests library, via the request scheduler, to get language code page data
         iso_639_2_url = "https://www.loc.gov/standards/iso639-2/php/langcodes-search.php"
-        response = requests.get(iso_639_2_url, headers={"User-Agent": user_agent_header})
+        response = scheduled_get(iso_639_2_url, headers={"User-Agent": user_agent_header})
 
         #scrape language code url using bs4
         soup = BeautifulSoup(response.text, 'html.parser')
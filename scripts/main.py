@@ -2,6 +2,7 @@ import os
 import time
 import json
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 import requests
 from pycountry import countries, subdivisions
 import flag
@@ -13,21 +14,23 @@ import numpy as np
 try:
     from update_subdivisions import update_subdivision
     from local_other_names import add_local_other_names, validate_local_other_names
-    from utils import export_iso3166_2_data, get_alpha_codes_list, get_flag_repo_url
+    from utils import export_iso3166_2_data, get_alpha_codes_list, FlagResolver, RunManifest
     from geo import Geo
-    from restcountries_api import get_rest_countries_country_data, get_supported_fields
-    from city_data import get_cities_for_subdivision
+    from restcountries_api import get_rest_countries_country_data, get_supported_fields, RESTCOUNTRIES_BASE_URL
+    from city_data import get_cities_for_subdivision, BASE_URL as CITY_DATA_BASE_URL
     from history import add_history
     from iso3166_2 import Subdivisions
 except ImportError:
     from scripts.update_subdivisions import update_subdivision
     from scripts.local_other_names import add_local_other_names, validate_local_other_names
-    from scripts.utils import export_iso3166_2_data, get_alpha_codes_list, get_flag_repo_url
+    from scripts.utils import export_iso3166_2_data, get_alpha_codes_list, FlagResolver, RunManifest
     from scripts.geo import Geo
-    from scripts.restcountries_api import get_rest_countries_country_data, get_supported_fields
-    from scripts.city_data import get_cities_for_subdivision
+    from scripts.restcountries_api import get_rest_countries_country_data, get_supported_fields, RESTCOUNTRIES_BASE_URL
+    from scripts.city_data import get_cities_for_subdivision, BASE_URL as CITY_DATA_BASE_URL
     from scripts.history import add_history
     from iso3166_2 import Subdivisions
+#the request scheduler is imported via the scripts package, such that every fetcher shares its session and limits
+from scripts.scheduler import get_fetch_engine, session_stats
 
 #ignore resource warnings
 warnings.filterwarnings(action="ignore", message="unclosed", category=ResourceWarning)
@@ -35,11 +38,163 @@ warnings.filterwarnings(action="ignore", message="unclosed", category=ResourceWa
 #user agent header for requests
 USER_AGENT_HEADER = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
 
+#data shared by every per-country export task - the preloaded iso3166-2 base dataset, geo cache latLngs and the export attributes - set once per worker process
+_EXPORT_CONTEXT = {}
+
+def _init_export_worker(context: dict) -> None:
+    """
+    Initialise a per-country export worker with the data shared by all of its tasks, such that the 
+    base dataset and geo cache are loaded once by the parent rather than once per country.
+
+    Parameters
+    ==========
+    :context: dict
+        the iso3166-2 base dataset, geo cache latLngs and export attributes shared by each task.
+
+    Returns
+    =======
+    None
+    """
+    _EXPORT_CONTEXT.clear()
+    _EXPORT_CONTEXT.update(context)
+
+def _export_country(alpha2: str, country_inputs: dict) -> tuple:
+    """
+    Export the subdivision data of a single country, from pycountry and the iso3166-2 base dataset,
+    along with its prefetched flags, RestCountries data and cities. The task only reads its inputs 
+    and the shared export context, such that it can run in any worker process, in any order.
+
+    Parameters
+    ==========
+    :alpha2: str
+        ISO 3166-1 alpha-2 country code.
+    :country_inputs: dict
+        the country's prefetched flag URLs, RestCountries data and cities.
+
+    Returns
+    =======
+    :alpha2: str
+        ISO 3166-1 alpha-2 country code.
+    :country_data: dict
+        the exported data of each of the country's subdivisions.
+    :log: list
+        the progress messages of the task, printed by the parent in country order.
+    :elapsed: float
+        time taken to export the country, in seconds.
+
+    Raises
+    ======
+    ValueError:
+        Subdivision code already present in the object.
+    """
+    country_iter_start = time.time()
+    filter_attributes = _EXPORT_CONTEXT["filter_attributes"]
+    rest_countries_keys = _EXPORT_CONTEXT["rest_countries_keys"]
+    lat_lngs = _EXPORT_CONTEXT["lat_lngs"]
+    flag_urls = country_inputs.get("flags")
+    country_restcountries_data = country_inputs.get("restcountries")
+    city_data = country_inputs.get("cities", {})
+    country_data = {}
+    log = []
+
+    #kosovo has no associated subdivisions, manually set params
+    if (alpha2 == "XK"):
+        country_name = "Kosovo"
+        all_subdivisions = []
+    else:
+        #get country name and list of its subdivisions using pycountry library
+        country_name = countries.get(alpha_2=alpha2).name
+        all_subdivisions = list(subdivisions.get(country_code=alpha2))
+
+    #record progress if verbose
+    if (_EXPORT_CONTEXT["verbose"]):
+        flag_icon = flag.flag(alpha2) if alpha2 != "XK" else ""
+        log.append(f"\n- {country_name} ({alpha2}) {flag_icon}")
+
+        if all_subdivisions:
+            #record subdivisions & indent
+            for sub in sorted(all_subdivisions, key=lambda s: s.code):
+                log.append(f"  Subdivision: {sub.name} ({sub.code})")
+        else:
+            log.append("  Subdivision: None")
+
+    #iterate over all country's' subdivisions, assigning subdivision code, name, type, parent code and flag URL, where applicable for the json object
+    log.append(f"  [{alpha2}] Processing {len(all_subdivisions)} subdivisions...")
+            
+    for subd in all_subdivisions:
+
+        #removing whitespace at start/end of string, also removing "†" and "*" characters which appears in some official ISO subdivision names e.g MK & ES
+        subdivision_name = subd.name
+        subdivision_name = subdivision_name.replace('†', '').replace("*", '').strip()
+
+        #raise error if subdivision code already in output object
+        if (subd.code in country_data):
+            raise ValueError(f"Subdivision code already present in output object: {subd.code}.")
+
+        #initialise subdivision code object and its attributes
+        country_data[subd.code] = {}
+        country_data[subd.code]["name"] = subdivision_name
+        country_data[subd.code]["localOtherName"] = None
+        country_data[subd.code]["type"] = subd.type
+        country_data[subd.code]["parentCode"] = subd.parent_code
+
+        #get subdivision coordinates (centroid) from the preloaded geo cache
+        if ("latLng" in filter_attributes):
+            cached_latlng = lat_lngs.get(subd.code)
+            country_data[subd.code]["latLng"] = list(cached_latlng) if cached_latlng is not None else None
+        else:
+            country_data[subd.code]["latLng"] = None
+
+        #flag URL from the country's prefetched flag folder listing, None if the folder doesn't exist or flag not included in filter_attributes parameter
+        if ("flag" in filter_attributes and flag_urls is not None):
+            country_data[subd.code]["flag"] = flag_urls.get(subd.code)
+        else:
+            country_data[subd.code]["flag"] = None
+
+        #append rest country key data to country output object if inputted
+        if rest_countries_keys != "" and rest_countries_keys is not None:
+            for key in rest_countries_keys:
+                value = country_restcountries_data.get(key) if country_restcountries_data else None
+                country_data[subd.code][key] = value
+
+        #list of cities per subdivision, fetched up front using city_data.py module
+        if _EXPORT_CONTEXT["state_city_data"]:
+            country_data[subd.code]["cities"] = city_data.get(subd.code, [])
+
+    #add any subdivisions missing from pycountry using the preloaded iso3166_2 dataset
+    iso_subdivision_data = _EXPORT_CONTEXT["base_data"].get(alpha2, {}) if (alpha2 != "XK") else {}
+    for subdivision_code, subdivision_data in iso_subdivision_data.items():
+        if subdivision_code in country_data:
+            continue
+
+        country_data[subdivision_code] = {}
+        country_data[subdivision_code]["name"] = subdivision_data.get("name")
+        country_data[subdivision_code]["localOtherName"] = None
+        country_data[subdivision_code]["type"] = subdivision_data.get("type")
+        country_data[subdivision_code]["parentCode"] = subdivision_data.get("parentCode")
+
+        if ("latLng" in filter_attributes):
+            cached_latlng = lat_lngs.get(subdivision_code)
+            country_data[subdivision_code]["latLng"] = list(cached_latlng) if cached_latlng is not None else subdivision_data.get("latLng")
+        else:
+            country_data[subdivision_code]["latLng"] = None
+
+        if ("flag" in filter_attributes and flag_urls is not None):
+            country_data[subdivision_code]["flag"] = flag_urls.get(subdivision_code)
+        else:
+            country_data[subdivision_code]["flag"] = None
+
+    elapsed = time.time() - country_iter_start
+    log.append(f"  [{alpha2}] Iteration complete - {elapsed:.2f}s total\n")
+
+    return alpha2, country_data, log, elapsed
+
 def export_iso3166_2(alpha_codes: str="", export_folder: str="test-iso3166-2-output", export_filename: str="test-iso3166-2",
                      resources_folder: str="iso3166_2_resources", verbose: bool=1, export: bool=False, export_csv: bool=True, 
                      export_xml: bool=True, alpha_codes_range: str="", rest_countries_keys: str="", filter_attributes: str="", 
                      state_city_data: bool=False, history: bool=True, save_each_iteration: bool=False, use_proxy=False, 
-                     geo_cache_path: str=os.path.join("iso3166_2_resources", "geo_cache_min.csv")) -> None:
+                     geo_cache_path: str=os.path.join("iso3166_2_resources", "geo_cache_min.csv"), resume: bool=False, 
+                     workers: int=1) -> None:
     """
     Export all ISO 3166-2 subdivision related data to JSON, CSV and or XML files. The default attributes
     exported for each subdivision include: subdivision code, name, local name, type, parent code, flag
@@ -122,12 +277,12 @@ def export_iso3166_2(alpha_codes: str="", export_folder: str="test-iso3166-2-out
         include any historical updates/changes per subdivision, published by the ISO, via the custom-built
         iso3166-updates software.
     :save_each_iteration: bool (default=False)
-        if this parameter is set then during each country code iteration, the exported data will be 
-        saved to the export dir, rather than at the end all in one go. This was implemented as
-        during the extraction process if one country/iteration fails, you will loose all the progress 
-        of all the previous iterations. This is only for the JSON exports. The exported JSON on each 
-        iteration will contain all the exported data up to and including the current iteration and not 
-        just the current iteration's data. 
+        if this parameter is set then during each country code iteration, the country's exported data 
+        will be checkpointed to its own JSON file in the export dir, {export_filename}_{alpha2}.json, and 
+        recorded in the run manifest, {export_filename}_manifest.jsonl. This was implemented as during 
+        the extraction process if one country/iteration fails, you will loose all the progress of all 
+        the previous iterations. Only the current country's data is written per iteration, the subdivision 
+        updates, local/other names and history are added once to all countries at the end of the run.
     :use_proxy: bool (default=False)
         if set to True then use a proxy IP when scraping the wiki data via the requests.get, not used for 
         any of the other APIs in extraction process.
@@ -135,6 +290,15 @@ def export_iso3166_2(alpha_codes: str="", export_folder: str="test-iso3166-2-out
         custom path to geo cache CSV file. If not provided or empty string, uses the default cache path
         (iso3166_2_resources/geo_cache.csv). This parameter is passed to the Geo class instance for
         fetching geographical data like latitude/longitude coordinates.
+    :resume: bool (default=False)
+        resume a previous run that crashed or was interrupted, via its run manifest in the export dir. The
+        countries it checkpointed are read from their JSON files rather than exported again, provided the
+        run's attributes match. Implies save_each_iteration.
+    :workers: int (default=1)
+        number of worker processes that export the countries in parallel, each country being an independent 
+        task. The workers share the iso3166-2 base dataset and geo cache preloaded by the parent, with all 
+        network data fetched up front, and their results are merged in country order such that the output 
+        files are identical to those of the sequential run, workers=1.
 
     Returns
     =======
@@ -178,8 +342,9 @@ def export_iso3166_2(alpha_codes: str="", export_folder: str="test-iso3166-2-out
     if not (os.path.isdir(export_folder)):
         os.mkdir(export_folder)
 
-    #start timer
+    #start timer, the time taken by each stage of the export is also recorded
     start = time.time()
+    stage_times = {}
 
     #if less than 5 alpha-2 codes input then don't display progress bar, or print elapsed time
     tqdm_disable = False
@@ -273,223 +438,114 @@ def export_iso3166_2(alpha_codes: str="", export_folder: str="test-iso3166-2-out
         #create proxy addresses for http & https, set to None if not using proxies
         proxy = {"http": random_proxy, "https": random_proxy} if use_proxy else None
 
+    #record each country's exported data in the run manifest if checkpointing, reading in the countries checkpointed by the previous run if resuming
+    manifest = None
+    if (save_each_iteration or resume):
+        manifest = RunManifest(os.path.join(export_folder, os.path.splitext(export_filename)[0] + "_manifest.jsonl"),
+            parameters={"filter_attributes": filter_attributes, "state_city_data": state_city_data}, resume=resume)
+        for alpha2 in alpha_codes:
+            if (manifest.is_complete(alpha2, "subdivisions")):
+                all_country_data.update(manifest.load(alpha2, "subdivisions"))
+        if (verbose and resume):
+            print(f"Resuming export, {len(all_country_data)}/{len(alpha_codes)} countries already checkpointed.")
+
+    #countries still to be exported, all of them unless resuming
+    pending_alpha_codes = [alpha2 for alpha2 in alpha_codes if (alpha2 not in all_country_data)]
+
     #create instance of Geo class, all of the required data should already be exported to the geo cache file
     geo = Geo(proxy=proxy, verbose=False, use_cache=True, export_to_cache=True, geo_cache_path=geo_cache_path if geo_cache_path else None)
 
-    def _get_cached_latlng(subdivision_code: str):
-        if geo.geo_cache is None or geo.geo_cache.empty or 'latLng' not in geo.geo_cache.columns:
-            return None
-        cached_latlng = geo.geo_cache.loc[geo.geo_cache['subdivisionCode'] == subdivision_code, 'latLng']
-        if cached_latlng.empty:
-            return None
-        cached_val = cached_latlng.values[0]
-        if cached_val is None or pd.isna(cached_val):
-            return None
-        if isinstance(cached_val, str) and cached_val.strip():
-            return [float(x.strip()) for x in cached_val.split(',')]
-        return None
-
-    #iterate over all country codes, getting country and subdivision info, append to json object
-    for alpha2 in tqdm(alpha_codes, ncols=70, disable=tqdm_disable):
-        country_iter_start = time.time()
-
-        #kosovo has no associated subdivisions, manually set params
-        if (alpha2 == "XK"):
-            country_name = "Kosovo"
-            all_subdivisions = []
-        else:
-            #get country name and list of its subdivisions using pycountry library
-            country_name = countries.get(alpha_2=alpha2).name
-            all_subdivisions = list(subdivisions.get(country_code=alpha2))
-
-        #print out progress if verbose
+    #list the flag folders of all input countries on the iso3166-flags repo up front, concurrently, each subdivision's flag is then resolved from memory
+    flag_resolver = None
+    if ("flag" in filter_attributes):
+        flag_start = time.time()
+        flag_resolver = FlagResolver(cache_path=os.path.join(resources_folder, "flag_cache.json"), proxy=proxy)
+        flag_resolver.prefetch([alpha2 for alpha2 in pending_alpha_codes if (alpha2 != "XK")])
+        stage_times["flags"] = time.time() - flag_start
         if verbose:
-            flag_icon = flag.flag(alpha2) if alpha2 != "XK" else ""
-            print(f"\n- {country_name} ({alpha2}) {flag_icon}")
-
-            if all_subdivisions:
-                #print subdivisions & indent
-                for sub in sorted(all_subdivisions, key=lambda s: s.code):
-                    print(f"  Subdivision: {sub.name} ({sub.code})")
-            else:
-                print("  Subdivision: None")
-
-        #create country key in json object
-        all_country_data[alpha2] = {}
-
-        #make call to RestCountries api if additional rest countries attributes input, raise error if invalid request
-        if (rest_countries_keys != ""):
-            rc_start = time.time()
-            print(f"  [{alpha2}] Fetching RestCountries data...")
-            country_restcountries_data = get_rest_countries_country_data(alpha2, proxy=proxy)
-            print(f"  [{alpha2}] RestCountries complete - {time.time() - rc_start:.2f}s")
-        
-        #validating that flag folder for current country exists on iso3166-flags repo, only check if flag in desired attributes
-        flag_folder_exists = False
-        if ("flag" in filter_attributes):
-            flag_start = time.time()
-            if (requests.get("https://github.com/amckenna41/iso3166-flags/blob/main/iso3166-2-flags/" + alpha2, headers=USER_AGENT_HEADER, proxies=proxy, timeout=15).status_code != 404):
-                flag_folder_exists = True
-            print(f"  [{alpha2}] Flag check complete - {time.time() - flag_start:.2f}s")
-
-        #iterate over all country's' subdivisions, assigning subdivision code, name, type, parent code and flag URL, where applicable for the json object
-        print(f"  [{alpha2}] Processing {len(all_subdivisions)} subdivisions...")
-                
-        for subd in all_subdivisions:
-
-            #removing whitespace at start/end of string, also removing "†" and "*" characters which appears in some official ISO subdivision names e.g MK & ES
-            subdivision_name = subd.name
-            subdivision_name = subdivision_name.replace('†', '').replace("*", '').strip()
-
-            #raise error if subdivision code already in output object
-            if (subd.code in list(all_country_data[alpha2].keys())):
-                raise ValueError(f"Subdivision code already present in output object: {subd.code}.")
-
-            #raise error if subdivision code already in output object
-            if (subd.code in list(all_country_data[alpha2].keys())):
-                raise ValueError(f"Subdivision code already present in output object: {subd.code}.")
-
-            #initialise subdivision code object and its attributes
-            all_country_data[alpha2][subd.code] = {}
-            all_country_data[alpha2][subd.code]["name"] = subdivision_name
-            all_country_data[alpha2][subd.code]["localOtherName"] = None
-            all_country_data[alpha2][subd.code]["type"] = subd.type
-            all_country_data[alpha2][subd.code]["parentCode"] = subd.parent_code
-
-            #get subdivision coordinates (centroid) using OSM API and Geo class
-            if ("latLng" in filter_attributes):
-                # Use pre-fetched centroids instead of fetching per-subdivision
-                cached_latlng = _get_cached_latlng(subd.code)
-                all_country_data[alpha2][subd.code]["latLng"] = cached_latlng
-            else:
-                all_country_data[alpha2][subd.code]["latLng"] = None
-
-            #don't request.get flag URL if not included in filter_attributes parameter
-            if ("flag" in filter_attributes):
-                if (flag_folder_exists):
-                  all_country_data[alpha2][subd.code]["flag"] = get_flag_repo_url(subdivision_code=subd.code, alpha2_code=alpha2)
-                else:
-                  all_country_data[alpha2][subd.code]["flag"] = None
-            else:
-                all_country_data[alpha2][subd.code]["flag"] = None #temporary key for flag URL attribute
-
-            #append rest country key data to country output object if inputted
-            if rest_countries_keys != "" and rest_countries_keys is not None:
-                for key in rest_countries_keys:
-                    value = country_restcountries_data.get(key) if country_restcountries_data else None
-                    all_country_data[alpha2][subd.code][key] = value
-
-            #get list of cities per subdivision using city_data.py module
-            if state_city_data:
-                cities = get_cities_for_subdivision(alpha2, subd.code, proxy=proxy)
-                all_country_data[alpha2][subd.code]["cities"] = cities
-
-        # # print("demographics", demographics)
-        # if (demographics):
-        #     demo_start = time.time()
-        #     print(f"  [{alpha2}] Fetching demographics data (area/population)...")
-        #     #get area and population data for each subdivision via wikipedia
-        #     demographics_data = export_demographics(alpha2)
-        #     print(f"  [{alpha2}] Demographics complete - {time.time() - demo_start:.2f}s")
-            
-        #     # print("demographics_data", demographics_data)
-        #     #iterate over each subdivision in country object, append area and population data where applicable
-        #     for subdivision_code in all_country_data[alpha2]:
-        #         if (subdivision_code in demographics_data):
-        #             all_country_data[alpha2][subdivision_code]["area"] = demographics_data[subdivision_code]["area"]
-        #             all_country_data[alpha2][subdivision_code]["population"] = demographics_data[subdivision_code]["population"]
-        #             # all_country_data[alpha2][subdivision_code]["population_rank"] = demographics_data[subdivision_code].get("population_rank")
-        #             # all_country_data[alpha2][subdivision_code]["population_density"] = demographics_data[subdivision_code].get("population_density")
-        #         else:
-        #             all_country_data[alpha2][subdivision_code]["area"] = None
-        #             all_country_data[alpha2][subdivision_code]["population"] = None
-        #             # all_country_data[alpha2][subdivision_code]["population_rank"] = None
-        #             # all_country_data[alpha2][subdivision_code]["population_density"] = None
-
-        #add any subdivisions missing from pycountry using iso3166_2 dataset
-        if (alpha2 != "XK"):
-            try:
-                iso_subdivisions = Subdivisions(alpha2)
-                iso_subdivision_data = iso_subdivisions.all.get(alpha2, {})
-            except Exception:
-                iso_subdivision_data = {}
-
-            if iso_subdivision_data:
-                for subdivision_code, subdivision_data in iso_subdivision_data.items():
-                    if subdivision_code in all_country_data[alpha2]:
-                        continue
-
-                    all_country_data[alpha2][subdivision_code] = {}
-                    all_country_data[alpha2][subdivision_code]["name"] = subdivision_data.get("name")
-                    all_country_data[alpha2][subdivision_code]["localOtherName"] = None
-                    all_country_data[alpha2][subdivision_code]["type"] = subdivision_data.get("type")
-                    all_country_data[alpha2][subdivision_code]["parentCode"] = subdivision_data.get("parentCode")
-
-                    if ("latLng" in filter_attributes):
-                        cached_latlng = _get_cached_latlng(subdivision_code)
-                        all_country_data[alpha2][subdivision_code]["latLng"] = cached_latlng if cached_latlng is not None else subdivision_data.get("latLng")
-                    else:
-                        all_country_data[alpha2][subdivision_code]["latLng"] = None
-
-                    if ("flag" in filter_attributes):
-                        if (flag_folder_exists):
-                            all_country_data[alpha2][subdivision_code]["flag"] = get_flag_repo_url(subdivision_code=subdivision_code, alpha2_code=alpha2)
-                        else:
-                            all_country_data[alpha2][subdivision_code]["flag"] = None
-                    else:
-                        all_country_data[alpha2][subdivision_code]["flag"] = None
-
-        #save current exported country subdivision data at the current iteration - useful for saving exported process if one iteration fails 
-        if (save_each_iteration):
-
-            #path to json file will be in the main repo dir by default
-            export_filepath = os.path.join(export_folder, export_filename)  
-
-            #add current country code to filename
-            export_filepath = os.path.splitext(export_filepath)[0] + f"_{alpha2}"
-
-            #append json extension to output filename
-            if (os.path.splitext(export_filepath) != ".json"):
-                export_filepath = export_filepath + ".json"
-
-            #write json data with all country info to json output file
-            with open(export_filepath, 'w', encoding='utf-8') as f:
-                json.dump(all_country_data, f, ensure_ascii=False, indent=4)
-
-            #read json data with all current subdivision data
-            with open(export_filepath, 'r', encoding='utf-8') as input_json:
-                all_country_data = json.load(input_json)
-            
-            #append latest subdivision updates/changes from /iso3166_2_resources folder to the iso3166-2 object
-            all_country_data = update_subdivision(iso3166_2_filename=export_filepath, subdivision_csv=os.path.join(resources_folder, "subdivision_updates.csv"), export=0,
-                                                    rest_countries_keys=rest_countries_keys)
-
-            #get local/other name data for each subdivision, unless localOtherName or name attributes to be excluded from export
-            if (filter_attributes == "" or ("localOtherName" in filter_attributes)):
-                all_country_data = add_local_other_names(all_country_data, filepath=local_other_names_filepath)
-
-            #add historical subdivision data updates from iso3166-updates software - needs to be done here after all attribute values such as local name added to all subdivision objects
-            if (history or "history" in filter_attributes):
-                all_country_data = add_history(all_country_data)
-            
-            #sort individual subdivision attributes into order and sort subdivision codes into natural order
-            all_country_data = {
-                country_code: {
-                    subdivision_code: {
-                        key: subdivisions[subdivision_code].get(key)
-                        for key in filter_attributes
-                    }
-                    for subdivision_code in sorted(subdivisions)
-                }
-                for country_code, subdivisions in sorted(all_country_data.items())
-            }
-
-            #export the subdivision data object to the output files - only JSON when save_each_iteration is True
-            export_iso3166_2_data(all_country_data=all_country_data, export_filepath=export_filepath, export_csv=False, export_xml=False)
-    
-        print(f"  [{alpha2}] Iteration complete - {time.time() - country_iter_start:.2f}s total\n")
-        #sort subdivision codes in json objects in natural alphabetical/numerical order using natsort library
-        # all_country_data[alpha2] = dict(OrderedDict(natsort.natsorted(all_country_data[alpha2].items())))
+            print(f"Flag folders listed for {len(pending_alpha_codes)} countries - {stage_times['flags']:.2f}s")
+
+    #fetch the RestCountries data of all input countries up front, concurrently via the fetch engine under the API's rate limit
+    rest_countries_data = {}
+    if (rest_countries_keys != ""):
+        rc_start = time.time()
+        rest_countries_data = dict(zip(pending_alpha_codes, get_fetch_engine().map(RESTCOUNTRIES_BASE_URL, 
+            lambda alpha2: get_rest_countries_country_data(alpha2, proxy=proxy), pending_alpha_codes)))
+        stage_times["restcountries"] = time.time() - rc_start
+        if verbose:
+            print(f"RestCountries data fetched for {len(pending_alpha_codes)} countries - {stage_times['restcountries']:.2f}s")
+
+    #fetch the cities of every subdivision of all input countries up front, concurrently across countries via the fetch engine
+    city_data = {}
+    if (state_city_data):
+        city_start = time.time()
+        city_subdivisions = [(alpha2, subd.code) for alpha2 in pending_alpha_codes if (alpha2 != "XK") for subd in (subdivisions.get(country_code=alpha2) or [])]
+        city_data = dict(zip([subdivision_code for _, subdivision_code in city_subdivisions], get_fetch_engine().map(CITY_DATA_BASE_URL, 
+            lambda city_subdivision: get_cities_for_subdivision(city_subdivision[0], city_subdivision[1], proxy=proxy), city_subdivisions)))
+        stage_times["cities"] = time.time() - city_start
+        if verbose:
+            print(f"Cities fetched for {len(city_subdivisions)} subdivisions - {stage_times['cities']:.2f}s")
+
+    #group the prefetched cities by country, such that each country's task only receives its own
+    country_city_data = {}
+    for subdivision_code, cities in city_data.items():
+        country_city_data.setdefault(subdivision_code.split("-")[0], {})[subdivision_code] = cities
+
+    #inputs of each country's export task, its flag URLs (None if it has no flag folder), RestCountries data and cities
+    country_inputs = []
+    for alpha2 in pending_alpha_codes:
+        country_flags = flag_resolver.country_flags(alpha2) if (flag_resolver is not None and alpha2 != "XK") else None
+        country_inputs.append({
+            "flags": {subdivision_code: flag_resolver.flag_url(alpha2, subdivision_code) for subdivision_code in country_flags} if (country_flags is not None) else None,
+            "restcountries": rest_countries_data.get(alpha2),
+            "cities": country_city_data.get(alpha2, {})
+        })
+
+    #preload the iso3166-2 base dataset once, used to add any subdivisions missing from pycountry, rather than re-parsing it per country
+    try:
+        base_data = Subdivisions().all
+    except Exception:
+        base_data = {}
+
+    #latLngs of every subdivision in the geo cache, split into floats once when the cache was loaded
+    lat_lngs = {}
+    if (geo.cache_store is not None):
+        lat_lngs = {subdivision_code: geo.cache_store.lat_lng(subdivision_code) for subdivision_code, _ in geo.cache_store.items("latLng")}
+
+    #data shared by every country's export task, passed once to each worker process
+    export_context = {"base_data": {alpha2: base_data.get(alpha2, {}) for alpha2 in pending_alpha_codes}, "lat_lngs": lat_lngs, 
+        "filter_attributes": filter_attributes, "rest_countries_keys": rest_countries_keys, "state_city_data": state_city_data, "verbose": verbose}
+
+    #export each country not yet exported as an independent task, on a pool of worker processes if more than 1 worker, otherwise in this process
+    countries_start = time.time()
+    country_elapsed = 0
+    if (workers > 1 and len(pending_alpha_codes) > 1):
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(pending_alpha_codes)), initializer=_init_export_worker, initargs=(export_context,))
+        country_results = executor.map(_export_country, pending_alpha_codes, country_inputs)
+    else:
+        executor = None
+        _init_export_worker(export_context)
+        country_results = map(_export_country, pending_alpha_codes, country_inputs)
+
+    #results are yielded in country order whatever order the workers complete them in, such that the progress output and checkpoints are deterministic
+    try:
+        for alpha2, country_data, log, elapsed in tqdm(country_results, total=len(pending_alpha_codes), ncols=70, disable=tqdm_disable):
+            for message in log:
+                print(message)
+            all_country_data[alpha2] = country_data
+            country_elapsed += elapsed
+
+            #checkpoint current exported country subdivision data to its own file and the run manifest - useful for resuming the export process if one iteration fails 
+            if (manifest is not None):
+                manifest.complete(alpha2, "subdivisions", data={alpha2: all_country_data[alpha2]}, 
+                    data_path=os.path.join(export_folder, os.path.splitext(export_filename)[0] + f"_{alpha2}.json"))
+    finally:
+        if (executor is not None):
+            executor.shutdown(cancel_futures=True)
+    stage_times["countries"] = time.time() - countries_start
+
+    #merge the countries in input order, whether resumed from the manifest or exported by any of the workers
+    all_country_data = {alpha2: all_country_data[alpha2] for alpha2 in alpha_codes}
 
     #if 10 or less alpha-2 codes input then append to filename, else add range of alpha codes specified by alpha_codes_range parameter
     if (len(alpha_codes) <= 10 and (alpha_codes_range == "")):
@@ -530,16 +586,19 @@ def export_iso3166_2(alpha_codes: str="", export_folder: str="test-iso3166-2-out
     update_start = time.time()
     all_country_data = update_subdivision(iso3166_2_filename=export_filepath, subdivision_csv=os.path.join(resources_folder, "subdivision_updates.csv"), export=0,
                                           rest_countries_keys=rest_countries_keys)
+    stage_times["updates"] = time.time() - update_start
 
     #get local Name data for each subdivision, unless localOtherName or name attributes to be excluded from export
     if (filter_attributes == "" or ("localOtherName" in filter_attributes or "name" in filter_attributes)):
         local_start = time.time()
         all_country_data = add_local_other_names(all_country_data, filepath=local_other_names_filepath)
+        stage_times["localOtherNames"] = time.time() - local_start
 
     #add historical subdivision data updates from iso3166-updates software - needs to be done here after all attribute values such as local name added to all subdivision objects
     if (history or "history" in filter_attributes):
         history_start = time.time()
         all_country_data = add_history(all_country_data)
+        stage_times["history"] = time.time() - history_start
 
     #sort subdivision objects into natural order and convert to regular dicts
     all_country_data = {
@@ -558,6 +617,11 @@ def export_iso3166_2(alpha_codes: str="", export_folder: str="test-iso3166-2-out
     #export the subdivision data object to the output files
     export_iso3166_2_data(all_country_data=all_country_data, export_filepath=export_filepath, export_csv=export_csv, export_xml=export_xml)
 
+    #export the sharded per-country layout of the exported JSON, with its manifest, used by the iso3166_2 software to load 
+    #individual countries and by its check_for_updates function, so the shards are never out of sync with the JSON
+    Subdivisions.build_shards(export_filepath)
+    stage_times["export"] = time.time() - export_start
+
     #stop counter and calculate elapsed time
     end = time.time()
     elapsed = end - start
@@ -566,6 +630,13 @@ def export_iso3166_2(alpha_codes: str="", export_folder: str="test-iso3166-2-out
         print('\n######################################################################\n')
         print(f"ISO 3166-2 data successfully exported to {export_filepath}.")
         print(f"\n[FINAL] Elapsed Time: {(elapsed / 60):.2f} minutes ({elapsed:.1f}s)")
+        #wall time of each stage, the countries stage also includes the summed time of each country's task across the workers
+        for stage, stage_time in stage_times.items():
+            print(f"[STAGE] {stage}: {stage_time:.2f}s" + (f" ({len(pending_alpha_codes)} countries, {country_elapsed:.2f}s of tasks across {workers} worker(s))" if (stage == "countries") else ""))
+        #connections reused via the pooled session and retries of transient errors, across all network fetchers
+        connection_stats = session_stats()
+        print(f"[FINAL] HTTP Requests: {connection_stats['requests']} ({connection_stats['new_connections']} new connections, "
+              f"{connection_stats['reused_connections']} reused, {connection_stats['retries']} retries)")
         print(f"[FINAL] Completed at {time.strftime('%H:%M:%S')}")
         print('######################################################################')
 
@@ -610,6 +681,10 @@ if __name__ == '__main__':
         help='Set to 1 to use a proxy IP when scraping the data from wiki.')
     parser.add_argument('-geo_cache_path', '--geo_cache_path', type=str, required=False, default=os.path.join("iso3166_2_resources", "geo_cache_min.csv"), 
         help='Custom path to geo cache CSV file. If not provided, uses the default cache path.')
+    parser.add_argument('-resume', '--resume', required=False, action=argparse.BooleanOptionalAction, default=0, 
+        help='Set to 1 to resume a previous export that crashed or was interrupted, skipping the countries it checkpointed.')
+    parser.add_argument('-workers', '--workers', type=int, required=False, default=1, 
+        help='Number of worker processes to export the countries in parallel, by default they are exported sequentially.')
     
     #parse input args
     args = parser.parse_args()
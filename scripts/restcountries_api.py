@@ -1,5 +1,6 @@
 import requests
 from typing import Optional, Dict, Any, List
+from scripts.scheduler import scheduled_get
 
 RESTCOUNTRIES_BASE_URL = "https://restcountries.com/v3.1/"
 USER_AGENT_HEADER = {"User-Agent": "iso3166-2-exporter/1.0"}
@@ -25,7 +26,7 @@ def get_rest_countries_country_data(alpha2: str, fields: Optional[List[str]] = N
     """
     url = f"{RESTCOUNTRIES_BASE_URL}alpha/{alpha2}"
     try:
-        resp = requests.get(url, headers=USER_AGENT_HEADER, proxies=proxy, timeout=12)
+        resp = scheduled_get(url, headers=USER_AGENT_HEADER, proxies=proxy, timeout=12)
         resp.raise_for_status()
         data = resp.json()
         if not data or not isinstance(data, list):
@@ -0,0 +1,541 @@
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+#priorities of scheduled requests, requests waiting on the same host are served lowest value first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+#requests per second, burst size and maximum concurrent requests of each host, per their usage policies
+DEFAULT_HOST_LIMITS = {
+    "nominatim.openstreetmap.org": {"rate": 1, "burst": 1, "max_in_flight": 1},
+    "www.wikidata.org": {"rate": 5, "burst": 1, "max_in_flight": 2},
+    "restcountries.com": {"rate": 10, "burst": 5, "max_in_flight": 4},
+    "api.countrystatecity.in": {"rate": 10, "burst": 5, "max_in_flight": 4},
+    "api.github.com": {"rate": 5, "burst": 1, "max_in_flight": 8},
+    "raw.githubusercontent.com": {"rate": 20, "burst": 10, "max_in_flight": 8},
+    "www.loc.gov": {"rate": 2, "burst": 1, "max_in_flight": 1},
+}
+
+#limit of any host not listed above
+DEFAULT_LIMIT = {"rate": 10, "burst": 1, "max_in_flight": 4}
+
+#status codes of transient errors that requests are retried on, with exponential backoff or after the Retry-After header
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+class _TokenBucket():
+    """ Token bucket refilled at rate tokens per second up to burst tokens, plus the requests waiting on and in flight to its host. """
+    def __init__(self, rate: float, burst: int=1, max_in_flight: int=None):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_in_flight = max_in_flight
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.waiting = []
+        self.in_flight = 0
+
+    def refill(self, now: float) -> None:
+        """ Add the tokens accrued since the last refill. """
+        if (self.rate and self.rate > 0):
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        else:
+            self.tokens = float(self.burst)
+        self.updated = now
+
+    def delay(self) -> float:
+        """ Return the seconds until a token is available, 0 if one is available now. """
+        if (self.tokens >= 1 or not (self.rate and self.rate > 0)):
+            return 0
+        return (1 - self.tokens) / self.rate
+
+class RequestScheduler():
+    """
+    Schedule the HTTP requests of every network fetcher in the export scripts. Each host has a
+    token bucket limiting its requests per second and burst size, as well as a maximum number of
+    its requests in flight at once, and a maximum number of requests are in flight across all hosts.
+    Requests waiting on a host are served in order of their priority and then arrival, so bulk
+    requests at a low priority don't hold up interactive ones. Requests run at the maximum allowed
+    rate of their host across all threads, so the total runtime of a run is predictable and the
+    APIs' rate limits aren't exceeded.
+
+    Parameters
+    ==========
+    :host_limits: dict (default=DEFAULT_HOST_LIMITS)
+        limits of each host, {host: {"rate": requests per second, "burst": int, "max_in_flight": int}}.
+    :default_limit: dict (default=DEFAULT_LIMIT)
+        limits of any host not in host_limits.
+    :max_in_flight: int (default=16)
+        maximum number of requests in flight across all hosts.
+
+    Methods
+    =======
+    set_limit(host, rate, burst=1, max_in_flight=None):
+        set the limits of a host.
+    slot(url, priority=PRIORITY_NORMAL):
+        context manager that blocks until a request to the URL's host may be made.
+    get(url, priority=PRIORITY_NORMAL, **kwargs):
+        make a scheduled GET request via the shared pooled session.
+    stats():
+        return the number of requests made to each host.
+
+    Usage
+    =====
+    scheduler = RequestScheduler()
+    response = scheduler.get("https://restcountries.com/v3.1/alpha/FR", timeout=15)
+    with scheduler.slot("https://www.wikidata.org"):
+        ...
+    """
+    def __init__(self, host_limits: dict=None, default_limit: dict=None, max_in_flight: int=16):
+        self.host_limits = dict(DEFAULT_HOST_LIMITS if host_limits is None else host_limits)
+        self.default_limit = dict(DEFAULT_LIMIT if default_limit is None else default_limit)
+        self.max_in_flight = max_in_flight
+        self.buckets = {}
+        self.in_flight = 0
+        self.requests_made = {}
+        self.condition = threading.Condition()
+        self.sequence = itertools.count()
+
+    def set_limit(self, host: str, rate: float, burst: int=1, max_in_flight: int=None) -> None:
+        """
+        Set the limits of a host, replacing any previous limits. A rate of 0 or None doesn't limit
+        the host's requests per second.
+
+        Parameters
+        ==========
+        :host: str
+            hostname, or URL, of the host.
+        :rate: float
+            maximum requests per second.
+        :burst: int (default=1)
+            maximum requests made at once after being idle.
+        :max_in_flight: int (default=None)
+            maximum requests in flight to the host at once, only bounded by the scheduler's if None.
+
+        Returns
+        =======
+        None
+        """
+        host = self._host(host)
+        with self.condition:
+            self.host_limits[host] = {"rate": rate, "burst": burst, "max_in_flight": max_in_flight}
+            bucket = self.buckets.get(host)
+            if (bucket is not None):
+                bucket.refill(time.monotonic())
+                bucket.rate, bucket.burst, bucket.max_in_flight = rate, max(1, burst), max_in_flight
+                bucket.tokens = min(bucket.tokens, bucket.burst)
+            self.condition.notify_all()
+
+    @staticmethod
+    def _host(url: str) -> str:
+        """ Return the hostname of a URL, or the input if it is already a hostname. """
+        return (urlparse(url).hostname or url) if ("//" in url) else url
+
+    def _bucket(self, host: str) -> _TokenBucket:
+        """ Return the token bucket of a host, creating it from its limits if needed. """
+        bucket = self.buckets.get(host)
+        if (bucket is None):
+            limit = self.host_limits.get(host, self.default_limit)
+            bucket = self.buckets[host] = _TokenBucket(limit.get("rate"), limit.get("burst", 1), limit.get("max_in_flight"))
+        return bucket
+
+    @contextmanager
+    def slot(self, url: str, priority: int=PRIORITY_NORMAL):
+        """
+        Block until a request to the URL's host may be made: it is the host's highest priority
+        waiting request, a token is available and neither the host's nor the scheduler's in
+        flight limit is reached. The request counts as in flight until the context exits.
+
+        Parameters
+        ==========
+        :url: str
+            URL, or hostname, of the request.
+        :priority: int (default=PRIORITY_NORMAL)
+            priority of the request, lower values are served first.
+
+        Returns
+        =======
+        None
+        """
+        host = self._host(url)
+        with self.condition:
+            bucket = self._bucket(host)
+            ticket = (priority, next(self.sequence))
+            heapq.heappush(bucket.waiting, ticket)
+            try:
+                while True:
+                    bucket.refill(time.monotonic())
+                    if (bucket.waiting[0] == ticket and (bucket.max_in_flight is None or bucket.in_flight < bucket.max_in_flight)
+                        and (self.max_in_flight is None or self.in_flight < self.max_in_flight)):
+                        delay = bucket.delay()
+                        if (delay <= 0):
+                            break
+                        self.condition.wait(delay)
+                    else:
+                        self.condition.wait()
+            except BaseException:
+                bucket.waiting.remove(ticket)
+                heapq.heapify(bucket.waiting)
+                self.condition.notify_all()
+                raise
+            heapq.heappop(bucket.waiting)
+            bucket.tokens -= 1
+            bucket.in_flight += 1
+            self.in_flight += 1
+            self.requests_made[host] = self.requests_made.get(host, 0) + 1
+            self.condition.notify_all()
+        try:
+            yield
+        finally:
+            with self.condition:
+                bucket.in_flight -= 1
+                self.in_flight -= 1
+                self.condition.notify_all()
+
+    def get(self, url: str, priority: int=PRIORITY_NORMAL, **kwargs) -> requests.Response:
+        """
+        Make a GET request via the shared pooled session once the scheduler allows it.
+
+        Parameters
+        ==========
+        :url: str
+            URL of the request.
+        :priority: int (default=PRIORITY_NORMAL)
+            priority of the request, lower values are served first.
+        :kwargs: dict
+            keyword arguments passed to Session.get, e.g. params, headers, proxies and timeout.
+
+        Returns
+        =======
+        :response: requests.Response
+            response of the request.
+        """
+        with self.slot(url, priority):
+            return get_session().get(url, **kwargs)
+
+    def stats(self) -> dict:
+        """ Return the number of requests made to each host. """
+        with self.condition:
+            return dict(self.requests_made)
+
+class _CountingRetry(Retry):
+    """ 
+    Retry configuration that counts each retry made in the counters shared with its session, and 
+    waits at least min_backoff seconds before each retry. Retries are made within the scheduler slot 
+    of the original request, without taking another token, so min_backoff is set to the interval 
+    between requests of the host to keep its retries within its rate limit.
+    """
+    def __init__(self, *args, counters: dict=None, min_backoff: float=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.counters = {"retries": 0, "lock": threading.Lock()} if counters is None else counters
+        self.min_backoff = min_backoff
+
+    def new(self, **kwargs) -> Retry:
+        """ Return a copy of the retry configuration, sharing its counters. """
+        return super().new(counters=self.counters, min_backoff=self.min_backoff, **kwargs)
+
+    def sleep(self, response=None) -> None:
+        """ Sleep before a retry for the Retry-After header or exponential backoff, and at least min_backoff seconds. """
+        start = time.monotonic()
+        super().sleep(response)
+        remaining = self.min_backoff - (time.monotonic() - start)
+        if (remaining > 0):
+            time.sleep(remaining)
+
+    def increment(self, *args, **kwargs) -> Retry:
+        """ Return the retry configuration after another retry, raising MaxRetryError if they are exhausted. """
+        retry = super().increment(*args, **kwargs)
+        with self.counters["lock"]:
+            self.counters["retries"] += 1
+        return retry
+
+def create_session(host_limits: dict=None, retries: int=3, backoff_factor: float=0.5, pool_maxsize: int=16) -> requests.Session:
+    """
+    Create a session whose connections are kept alive and pooled per host, such that
+    subsequent requests to a host reuse its connections rather than opening a new TCP+TLS
+    connection each. Each host in host_limits has its own adapter with a pool sized to
+    its maximum requests in flight. Requests that fail with a connection error or a
+    transient status code are retried with exponential backoff, or after the time in
+    the response's Retry-After header; the last response is returned if the retries
+    are exhausted, such that the caller can handle it. Retries are made within the
+    scheduler slot of the original request, so each retry also waits at least the
+    interval between requests of its host, 1/rate, to stay within the host's rate limit.
+
+    Parameters
+    ==========
+    :host_limits: dict (default=DEFAULT_HOST_LIMITS)
+        limits of each host, the pool of each host is sized to its max_in_flight and its retries wait
+        at least 1/rate seconds. Hosts not listed use the rate of DEFAULT_LIMIT.
+    :retries: int (default=3)
+        maximum number of retries of each request.
+    :backoff_factor: float (default=0.5)
+        backoff factor of the retries, the first retry is made without backoff and retry n > 1 waits 
+        backoff_factor * 2^(n-1) seconds, either way no less than 1/rate of the host.
+    :pool_maxsize: int (default=16)
+        size of the pool of each host not in host_limits.
+
+    Returns
+    =======
+    :session: requests.Session
+        pooled session with retries.
+    """
+    host_limits = DEFAULT_HOST_LIMITS if host_limits is None else host_limits
+    counters = {"retries": 0, "lock": threading.Lock()}
+
+    def adapter(maxsize, rate):
+        retry = _CountingRetry(total=retries, backoff_factor=backoff_factor, status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["GET", "HEAD"]), respect_retry_after_header=True, raise_on_status=False, counters=counters,
+            min_backoff=1 / rate if (rate and rate > 0) else 0)
+        return HTTPAdapter(pool_connections=32, pool_maxsize=max(1, maxsize), max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter(pool_maxsize, DEFAULT_LIMIT.get("rate")))
+    session.mount("https://", adapter(pool_maxsize, DEFAULT_LIMIT.get("rate")))
+    for host, limit in host_limits.items():
+        host_adapter = adapter(limit.get("max_in_flight") or pool_maxsize, limit.get("rate"))
+        session.mount("https://" + host, host_adapter)
+        session.mount("http://" + host, host_adapter)
+    session.counters = counters
+    return session
+
+@functools.lru_cache(maxsize=None)
+def get_session() -> requests.Session:
+    """ Return the pooled session shared by all network fetchers in the process. """
+    return create_session()
+
+def session_stats(session: requests.Session=None) -> dict:
+    """
+    Return the connection counters of a session: the number of requests made, the
+    number of new connections opened, the number of requests made over a reused
+    connection and the number of retries.
+
+    Parameters
+    ==========
+    :session: requests.Session (default=None)
+        session created via create_session, the shared session if None.
+
+    Returns
+    =======
+    :stats: dict
+        {"requests": int, "new_connections": int, "reused_connections": int, "retries": int}.
+    """
+    session = get_session() if session is None else session
+    stats = {"requests": 0, "new_connections": 0, "reused_connections": 0, "retries": 0}
+    for adapter in {id(adapter): adapter for adapter in session.adapters.values()}.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if (pool is not None):
+                stats["requests"] += pool.num_requests
+                stats["new_connections"] += pool.num_connections
+    stats["reused_connections"] = max(0, stats["requests"] - stats["new_connections"])
+    counters = getattr(session, "counters", None)
+    if (counters is not None):
+        with counters["lock"]:
+            stats["retries"] = counters["retries"]
+    return stats
+
+@functools.lru_cache(maxsize=None)
+def get_scheduler() -> RequestScheduler:
+    """ Return the request scheduler shared by all network fetchers in the process. """
+    return RequestScheduler()
+
+def scheduled_get(url: str, priority: int=PRIORITY_NORMAL, **kwargs) -> requests.Response:
+    """
+    Make a GET request via the shared request scheduler, subject to the rate and in flight
+    limits of the URL's host, over the shared pooled session with retries.
+
+    Parameters
+    ==========
+    :url: str
+        URL of the request.
+    :priority: int (default=PRIORITY_NORMAL)
+        priority of the request, lower values are served first.
+    :kwargs: dict
+        keyword arguments passed to Session.get, e.g. params, headers, proxies and timeout.
+
+    Returns
+    =======
+    :response: requests.Response
+        response of the request.
+    """
+    return get_scheduler().get(url, priority=priority, **kwargs)
+
+class FetchEngine():
+    """
+    Asyncio engine running the fetches of many subdivisions, across countries, concurrently.
+    Each fetch is a coroutine that awaits a bounded semaphore of its host, sized to the host's
+    max in flight in the request scheduler, and a bounded semaphore across all hosts, before
+    running the blocking fetcher in a worker thread. The request scheduler still applies each
+    host's rate limit, the semaphores only keep the worker threads from all waiting on one
+    host, so each host's rate budget is kept full rather than fetching one subdivision at a
+    time. The event loop runs on a background thread, such that the synchronous facade, run
+    and map, can be called from any thread other than the engine's own.
+
+    Parameters
+    ==========
+    :scheduler: RequestScheduler (default=None)
+        scheduler whose host limits size the semaphores, the shared scheduler if None.
+    :max_concurrency: int (default=16)
+        maximum number of fetches running at once across all hosts.
+
+    Methods
+    =======
+    call(url, function, *args, **kwargs):
+        coroutine calling a blocking fetcher once the URL's host and the engine have capacity.
+    get(url, priority=PRIORITY_NORMAL, **kwargs):
+        coroutine making a scheduled GET request.
+    run(coroutine):
+        run a coroutine on the engine's event loop, blocking until it completes.
+    map(url, function, items):
+        call a fetcher on each item concurrently, returning the results in order.
+    close():
+        stop the event loop and its worker threads.
+
+    Usage
+    =====
+    engine = FetchEngine()
+    results = engine.map("https://nominatim.openstreetmap.org", fetch_subdivision, ["FR-75C", "FR-13"])
+    response = engine.run(engine.get("https://restcountries.com/v3.1/alpha/FR", timeout=15))
+    """
+    def __init__(self, scheduler: RequestScheduler=None, max_concurrency: int=16):
+        self.scheduler = scheduler
+        self.max_concurrency = max(1, max_concurrency)
+        self.loop = None
+        self.thread = None
+        self.executor = None
+        self.semaphores = {}
+        self.lock = threading.Lock()
+
+    def _scheduler(self) -> RequestScheduler:
+        """ Return the engine's request scheduler, the shared scheduler if none was provided. """
+        return get_scheduler() if self.scheduler is None else self.scheduler
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        """ Return the engine's event loop, starting it and its worker threads on first use. """
+        with self.lock:
+            if (self.loop is None):
+                self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="fetch-engine")
+                self.loop = asyncio.new_event_loop()
+                self.thread = threading.Thread(target=self.loop.run_forever, name="fetch-engine-loop", daemon=True)
+                self.thread.start()
+            return self.loop
+
+    def _semaphore(self, host: str=None) -> asyncio.BoundedSemaphore:
+        """ Return the semaphore of a host, sized to its current max in flight, or of all hosts if None, only called on the event loop. """
+        size = self.max_concurrency
+        if (host is not None):
+            scheduler = self._scheduler()
+            limit = scheduler.host_limits.get(host, scheduler.default_limit)
+            size = min(limit.get("max_in_flight") or size, size)
+        #a new semaphore is created if the host's limit was changed since, fetches holding the old one still release it
+        if (host not in self.semaphores or self.semaphores[host][0] != size):
+            self.semaphores[host] = (size, asyncio.BoundedSemaphore(size))
+        return self.semaphores[host][1]
+
+    async def call(self, url: str, function, *args, **kwargs):
+        """
+        Call a blocking fetcher in a worker thread once fewer than the host's max in flight
+        fetches to the URL's host, and fewer than max_concurrency fetches in total, are running.
+
+        Parameters
+        ==========
+        :url: str
+            URL, or hostname, of the host the fetcher requests.
+        :function: callable
+            blocking fetcher.
+        :args: tuple
+            positional arguments passed to the fetcher.
+        :kwargs: dict
+            keyword arguments passed to the fetcher.
+
+        Returns
+        =======
+        :result: Any
+            return value of the fetcher.
+        """
+        async with self._semaphore(), self._semaphore(RequestScheduler._host(url)):
+            return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(function, *args, **kwargs))
+
+    async def get(self, url: str, priority: int=PRIORITY_NORMAL, **kwargs) -> requests.Response:
+        """ Make a GET request via the engine's request scheduler, kwargs are passed to Session.get. """
+        return await self.call(url, self._scheduler().get, url, priority=priority, **kwargs)
+
+    def run(self, coroutine):
+        """
+        Run a coroutine on the engine's event loop, blocking the calling thread until it completes.
+
+        Parameters
+        ==========
+        :coroutine: coroutine
+            coroutine to run, e.g. of call or get.
+
+        Returns
+        =======
+        :result: Any
+            return value of the coroutine.
+        """
+        loop = self._start()
+        if (threading.current_thread() is self.thread):
+            coroutine.close()
+            raise RuntimeError("FetchEngine.run can't be called from the engine's own event loop, await the coroutine instead.")
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    def map(self, url: str, function, items) -> list:
+        """
+        Call a blocking fetcher on each item concurrently, within the limits of the URL's host,
+        returning the results in the order of the items. The first exception raised by the
+        fetcher is raised once every call completes.
+
+        Parameters
+        ==========
+        :url: str
+            URL, or hostname, of the host the fetcher requests.
+        :function: callable
+            blocking fetcher, called with each item.
+        :items: iterable
+            items to call the fetcher on, e.g. subdivision codes.
+
+        Returns
+        =======
+        :results: list
+            return value of the fetcher for each item.
+        """
+        items = list(items)
+        if not (items):
+            return []
+
+        async def gather():
+            results = await asyncio.gather(*(self.call(url, function, item) for item in items), return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            return results
+
+        return self.run(gather())
+
+    def close(self) -> None:
+        """ Stop the event loop and shut down its worker threads, they are started again on next use. """
+        with self.lock:
+            loop, thread, executor = self.loop, self.thread, self.executor
+            self.loop = self.thread = self.executor = None
+        if (loop is not None):
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+            executor.shutdown(wait=True)
+        self.semaphores = {}
+
+@functools.lru_cache(maxsize=None)
+def get_fetch_engine() -> FetchEngine:
+    """ Return the fetch engine shared by all network fetchers in the process. """
+    return FetchEngine()
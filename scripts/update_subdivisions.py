@@ -572,8 +572,8 @@ def parse_rest_countries(alpha_code: str, rest_countries_keys: list, new_subdivi
         individual subdivision data object with the applicable restcountries attribute values
         appended to it.
     """
-    #use the RestCountries API to get the attribute values for country/subdivision
-    country_restcountries_response = requests.get(REST_COUNTRIES_BASE_URL + "alpha/" + alpha_code, headers=USER_AGENT_HEADER, timeout=15)
+    #use the RestCountries API, via the request scheduler, to get the attribute values for country/subdivision
+    country_restcountries_response = scheduled_get(REST_COUNTRIES_BASE_URL + "alpha/" + alpha_code, headers=USER_AGENT_HEADER, timeout=15)
     country_restcountries_response.raise_for_status()
     country_restcountries_data = country_restcountries_response.json()
 
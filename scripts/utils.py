@@ -4,9 +4,17 @@ import requests
 import os
 import json
 import time
+import functools
+import threading
+from types import MappingProxyType
 from pycountry import countries 
 from fake_useragent import UserAgent
 from dicttoxml import dicttoxml
+#import the request scheduler via the scripts package if available, such that every fetcher shares its session and limits
+try:
+    from scripts.scheduler import get_scheduler, get_fetch_engine, scheduled_get
+except ImportError:
+    from scheduler import get_scheduler, get_fetch_engine, scheduled_get
 try:
     import openai
 except ImportError:
@@ -18,6 +26,19 @@ import xml.etree.ElementTree as ET
 user_agent = UserAgent()
 USER_AGENT_HEADER = {"User-Agent": user_agent.random}
 
+@functools.lru_cache(maxsize=None)
+def _country_code_lookups() -> tuple[MappingProxyType, MappingProxyType, MappingProxyType]:
+    """ 
+    Return read-only lookup tables of each ISO 3166-1 alpha-2, alpha-3 and numeric code to
+    its alpha-2 code, built from pycountry once per process.
+    """
+    alpha_2_codes, alpha_3_codes, numeric_codes = {}, {}, {}
+    for country in countries:
+        alpha_2_codes[country.alpha_2] = country.alpha_2
+        alpha_3_codes[country.alpha_3] = country.alpha_2
+        numeric_codes[country.numeric] = country.alpha_2
+    return MappingProxyType(alpha_2_codes), MappingProxyType(alpha_3_codes), MappingProxyType(numeric_codes)
+
 def convert_to_alpha2(alpha_code: str) -> str:
     """ 
     Auxiliary function that converts an ISO 3166 country's 3 letter alpha-3 
@@ -54,20 +75,23 @@ def convert_to_alpha2(alpha_code: str) -> str:
     #uppercase alpha code, remove leading/trailing whitespace
     alpha_code = alpha_code.upper().strip()
 
-    #use iso3166 package to find corresponding alpha-2 code from its numeric code
+    #get the lookup tables of alpha-2, alpha-3 and numeric codes to alpha-2, built once per process
+    alpha_2_codes, alpha_3_codes, numeric_codes = _country_code_lookups()
+
+    #find corresponding alpha-2 code from its numeric code
     if (alpha_code.isdigit()):
-        if (alpha_code in [country.numeric for country in countries]):
-            return countries.get(numeric=alpha_code).alpha_2
+        if (alpha_code in numeric_codes):
+            return numeric_codes[alpha_code]
 
     #return input alpha code if its valid
     if len(alpha_code) == 2:
-        if (alpha_code in [country.alpha_2 for country in countries]):
+        if (alpha_code in alpha_2_codes):
             return alpha_code
 
-    #use iso3166 package to find corresponding alpha-2 code from its alpha-3 code
+    #find corresponding alpha-2 code from its alpha-3 code
     if len(alpha_code) == 3:
-        if (alpha_code in [country.alpha_3 for country in countries]):
-            return countries.get(alpha_3=alpha_code).alpha_2
+        if (alpha_code in alpha_3_codes):
+            return alpha_3_codes[alpha_code]
     
     #return error by default if input country code invalid and can't be converted into alpha-2
     raise ValueError(f"Invalid ISO 3166-1 country code input {alpha_code}.")
@@ -107,7 +131,7 @@ def get_alpha_codes_list(alpha_codes: str="", alpha_codes_range: str="") -> tupl
         Invalid alpha code input.
     """
     #get sorted set of all valid ISO 3166 alpha-2 codes
-    all_codes_set = set(country.alpha_2 for country in countries)
+    all_codes_set = set(_country_code_lookups()[0])
     sorted_alpha_codes = sorted(all_codes_set)
     
     if alpha_codes:
@@ -241,12 +265,245 @@ def split_preserving_quotes(text: str) -> list:
 
     return elements
 
+#list of flag file extensions, in order of preference 
+FLAG_FILE_EXTENSIONS = ['.svg', '.png', '.jpeg', '.jpg']
+
+class FlagResolver():
+    """
+    Resolve the URL of each subdivision's flag on the iso3166-flags repo. Rather than probing 
+    the URL of each flag file extension per subdivision, each country's flag folder is listed
+    once: all countries via a single request of the repo's tree if possible, otherwise each
+    country via a directory listing, concurrently across countries via the fetch engine under
+    the request scheduler's rate limit of the API's host. The listings are cached in memory, such that
+    each subdivision's flag is resolved via a dict lookup, and on disk for the TTL, such
+    that subsequent runs don't list the repo again.
+
+    Parameters
+    ==========
+    :cache_path: str (default="iso3166_2_resources/flag_cache.json")
+        path to the JSON cache of each country's flag folder listing, no disk cache if empty.
+    :ttl: int (default=86400)
+        number of seconds each cached listing is valid for.
+    :max_workers: int (default=8)
+        maximum number of countries listed concurrently.
+    :requests_per_second: float (default=5)
+        maximum rate of requests to the GitHub API, across all workers.
+    :proxy: dict (default=None)
+        proxies to use for the requests.
+    :api_base_url: str (default="https://api.github.com")
+        base URL of the GitHub API.
+    :flag_base_url: str (default="https://raw.githubusercontent.com/amckenna41/iso3166-flags/main/iso3166-2-flags/")
+        base URL of the flag files.
+
+    Methods
+    =======
+    prefetch(alpha_codes):
+        list the flag folders of the countries not in the cache, concurrently.
+    country_flags(alpha2_code):
+        return the flag filename of each of a country's subdivisions, None if the country has no flag folder.
+    flag_url(alpha2_code, subdivision_code):
+        return the URL of a subdivision's flag, None if it has no flag.
+
+    Usage
+    =====
+    flag_resolver = FlagResolver()
+    flag_resolver.prefetch(["GB", "IE", "FR"])
+    flag_resolver.flag_url("GB", "GB-EDH")
+    """
+    repo = "amckenna41/iso3166-flags"
+    branch = "main"
+    folder = "iso3166-2-flags"
+
+    def __init__(self, cache_path: str=os.path.join("iso3166_2_resources", "flag_cache.json"), ttl: int=86400, max_workers: int=8, 
+                 requests_per_second: float=5, proxy: dict=None, api_base_url: str="https://api.github.com", 
+                 flag_base_url: str="https://raw.githubusercontent.com/amckenna41/iso3166-flags/main/iso3166-2-flags/"):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self.proxy = proxy
+        self.api_base_url = api_base_url.rstrip("/")
+        self.flag_base_url = flag_base_url.rstrip("/") + "/"
+        #limit the rate and concurrency of requests to the API's host, shared with all other requests to it via the request scheduler
+        get_scheduler().set_limit(self.api_base_url, requests_per_second, max_in_flight=max_workers)
+        self.headers = dict(USER_AGENT_HEADER, Accept="application/vnd.github+json")
+        #authenticate with a GitHub token if set, raising the API rate limit
+        if (os.environ.get("GITHUB_TOKEN")):
+            self.headers["Authorization"] = "Bearer " + os.environ["GITHUB_TOKEN"]
+
+        #listing of each country's flag folder, {alpha-2: {"fetched": timestamp, "files": list|None}}, and the flags resolved from it
+        self.listings = self._read_cache()
+        self.flags = {}
+        self.lock = threading.Lock()
+        self.total_requests = 0
+
+    def _read_cache(self) -> dict:
+        """ Return the unexpired listings from the disk cache. """
+        if not (self.cache_path and os.path.isfile(self.cache_path)):
+            return {}
+        try:
+            with open(self.cache_path, encoding="utf-8") as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+        now = time.time()
+        return {alpha2: listing for alpha2, listing in cache.items() if (isinstance(listing, dict) and now - listing.get("fetched", 0) < self.ttl)}
+
+    def _write_cache(self) -> None:
+        """ Write the listings to the disk cache, via a temporary file. """
+        if not (self.cache_path):
+            return
+        with self.lock:
+            cache = json.dumps(self.listings, separators=(",", ":"))
+        try:
+            if (os.path.dirname(self.cache_path)):
+                os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path + ".tmp", "w", encoding="utf-8") as cache_file:
+                cache_file.write(cache)
+            os.replace(self.cache_path + ".tmp", self.cache_path)
+        except OSError:
+            pass
+
+    def _get(self, url: str) -> requests.Response:
+        """ Make a rate limited GET request to the GitHub API, via the request scheduler. """
+        with self.lock:
+            self.total_requests += 1
+        return scheduled_get(url, headers=self.headers, proxies=self.proxy, timeout=30)
+
+    def _list_tree(self) -> dict|None:
+        """ Return the listing of every country's flag folder via a single request of the repo's tree, None if it failed or was truncated. """
+        try:
+            response = self._get(f"{self.api_base_url}/repos/{self.repo}/git/trees/{self.branch}?recursive=1")
+            if (response.status_code != 200):
+                return None
+            tree = response.json()
+        except (requests.exceptions.RequestException, ValueError):
+            return None
+        if (tree.get("truncated")):
+            return None
+        listings = {}
+        for entry in tree.get("tree", []):
+            path = entry.get("path", "").split("/")
+            if (len(path) == 2 and path[0] == self.folder and entry.get("type") == "tree"):
+                listings.setdefault(path[1], [])
+            elif (len(path) == 3 and path[0] == self.folder and entry.get("type") == "blob"):
+                listings.setdefault(path[1], []).append(path[2])
+        return listings
+
+    def _list_country(self, alpha2_code: str) -> list|None:
+        """ Return the filenames in a country's flag folder via its directory listing, None if the country has no folder. """
+        response = self._get(f"{self.api_base_url}/repos/{self.repo}/contents/{self.folder}/{alpha2_code}?ref={self.branch}")
+        if (response.status_code == 404):
+            return None
+        response.raise_for_status()
+        return [entry["name"] for entry in response.json() if (entry.get("type") == "file")]
+
+    def prefetch(self, alpha_codes: list[str]) -> None:
+        """
+        List the flag folders of each of the countries not in the cache. If more than one country 
+        is missing the repo's tree is listed in a single request, otherwise, or if that fails, each
+        country's folder is listed concurrently under the rate limit. Any country whose listing 
+        fails isn't cached, its subdivisions resolve to None.
+
+        Parameters
+        ==========
+        :alpha_codes: list[str]
+            list of ISO 3166-1 alpha-2 country codes.
+
+        Returns
+        =======
+        None
+        """
+        missing = [alpha2.upper() for alpha2 in dict.fromkeys(alpha_codes) if (alpha2.upper() not in self.listings)]
+        if not (missing):
+            return
+        fetched = time.time()
+        tree_listings = self._list_tree() if (len(missing) > 1) else None
+        if (tree_listings is not None):
+            with self.lock:
+                for alpha2 in missing:
+                    self.listings[alpha2] = {"fetched": fetched, "files": tree_listings.get(alpha2)}
+        else:
+            def list_country(alpha2):
+                try:
+                    files = self._list_country(alpha2)
+                except (requests.exceptions.RequestException, ValueError, KeyError, TypeError):
+                    return
+                with self.lock:
+                    self.listings[alpha2] = {"fetched": fetched, "files": files}
+            get_fetch_engine().map(self.api_base_url, list_country, missing)
+        if any(alpha2 in self.listings for alpha2 in missing):
+            self._write_cache()
+
+    def country_flags(self, alpha2_code: str) -> dict|None:
+        """
+        Return the flag filename of each of a country's subdivisions with a flag, listing the
+        country's flag folder if it's not cached. If a subdivision has multiple flag files, the
+        file with the preferred extension is used, per FLAG_FILE_EXTENSIONS.
+
+        Parameters
+        ==========
+        :alpha2_code: str
+            ISO 3166-1 alpha-2 country code.
+
+        Returns
+        =======
+        :dict|None
+            dict of each subdivision code to its flag filename, None if the country has no flag folder.
+        """
+        alpha2_code = alpha2_code.upper()
+        if (alpha2_code not in self.flags):
+            if (alpha2_code not in self.listings):
+                self.prefetch([alpha2_code])
+            listing = self.listings.get(alpha2_code)
+            if (listing is None or listing["files"] is None):
+                country_flags = None
+            else:
+                country_flags = {}
+                for filename in listing["files"]:
+                    code, extension = os.path.splitext(filename)
+                    if (extension.lower() not in FLAG_FILE_EXTENSIONS):
+                        continue
+                    current = country_flags.get(code.upper())
+                    if (current is None or FLAG_FILE_EXTENSIONS.index(extension.lower()) < FLAG_FILE_EXTENSIONS.index(os.path.splitext(current)[1].lower())):
+                        country_flags[code.upper()] = filename
+            self.flags[alpha2_code] = country_flags
+        return self.flags[alpha2_code]
+
+    def flag_url(self, alpha2_code: str, subdivision_code: str) -> str|None:
+        """
+        Return the URL of a subdivision's flag on the iso3166-flags repo, None if it has no flag.
+
+        Parameters
+        ==========
+        :alpha2_code: str
+            ISO 3166-1 alpha-2 country code.
+        :subdivision_code: str
+            ISO 3166-2 subdivision code.
+
+        Returns
+        =======
+        :str|None
+            URL of the subdivision's flag, None if it has no flag.
+        """
+        country_flags = self.country_flags(alpha2_code)
+        if not (country_flags):
+            return None
+        filename = country_flags.get(subdivision_code.upper())
+        return self.flag_base_url + alpha2_code.upper() + "/" + filename if (filename) else None
+
+@functools.lru_cache(maxsize=None)
+def _default_flag_resolver() -> FlagResolver:
+    """ Return the flag resolver shared by calls to get_flag_repo_url, created on first use. """
+    return FlagResolver()
+
 def get_flag_repo_url(alpha2_code: str, subdivision_code: str="") -> str|None:
     """ 
     Get URL for inputted subdivision code from the iso3166-flags repo.
     The alpha-2 code for the subdivision is optional as it should be able to 
     be parsed from the subdivision code, e.g "GB-ABC", although if just "ABC"
     is input into subdivision_code parameter then an error may be raised. 
+    The flag is resolved from the listing of the country's flag folder, via
+    the shared FlagResolver, which is cached in memory and on disk.
     
     Parameters
     ==========
@@ -257,7 +514,7 @@ def get_flag_repo_url(alpha2_code: str, subdivision_code: str="") -> str|None:
 
     Returns
     =======
-    :alpha2_flag + flag_file_extensions[extension]| None: str|None
+    :flag_url: str|None
         URL for subdivision flag if its found in the repo. If not on 
         the repo then None is returned. 
     
@@ -270,13 +527,6 @@ def get_flag_repo_url(alpha2_code: str, subdivision_code: str="") -> str|None:
         country code before the "-" & the alpha code parameter is "" then 
         the country code for the subdivision can't be parsed.
     """
-    #base url for flag icons repo
-    # flag_icons_folder_base_url = "https://github.com/amckenna41/iso3166-flags/blob/main/iso3166-2-flags/"
-    flag_icons_file_base_url = "https://raw.githubusercontent.com/amckenna41/iso3166-flags/main/iso3166-2-flags/"
-
-    #list of flag file extensions, in order of preference 
-    flag_file_extensions = ['.svg', '.png', '.jpeg', '.jpg']
-
     #raise an error if invalid data type input for parameters
     if (not isinstance(subdivision_code, str) or not isinstance(alpha2_code, str)):
         raise TypeError(f"Subdivision and alpha code parameters should be a string, got {type(subdivision_code)} and {type(alpha2_code)}, respectively.")
@@ -292,21 +542,174 @@ def get_flag_repo_url(alpha2_code: str, subdivision_code: str="") -> str|None:
 
     #uppercase alpha and subdivision code
     alpha2_code, subdivision_code = alpha2_code.upper(), subdivision_code.upper()
-        
-    #url to flag in iso3166-flags repo
-    alpha2_flag = flag_icons_file_base_url + alpha2_code + "/" + subdivision_code
 
-    #verify that path on flag icons repo exists, if not set flag url value to None
-    # if (requests.get(flag_icons_folder_base_url + alpha2_code, headers=USER_AGENT_HEADER, timeout=15).status_code != 404):
-        
-    #iterate over all image extensions checking existence of flag in repo, if no flag with extensions found then set to null
-    for extension in range(0, len(flag_file_extensions)):
-            #if subdivision has a valid flag in flag icons repo set to its GitHub url, else set to None
-            if (requests.get(alpha2_flag + flag_file_extensions[extension], headers=USER_AGENT_HEADER, timeout=15).status_code == 200):
-                time.sleep(1)
-                return alpha2_flag + flag_file_extensions[extension]
-            elif (extension == 4):
-                return None
+    #resolve the flag from the listing of the country's flag folder
+    return _default_flag_resolver().flag_url(alpha2_code, subdivision_code)
+
+def truncate_partial_line(filepath: str) -> bool:
+    """
+    Truncate an append-only JSON lines file to its last complete line, removing any partially
+    written last line left by a crash mid-append, such that the next append starts on a new line
+    rather than being glued onto the partial one and lost along with it.
+
+    Parameters
+    ==========
+    :filepath: str
+        path to the JSON lines file.
+
+    Returns
+    =======
+    :bool
+        whether a partial last line was removed.
+    """
+    if not (os.path.isfile(filepath)):
+        return False
+    with open(filepath, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if (size == 0):
+            return False
+        f.seek(size - 1)
+        if (f.read(1) == b"\n"):
+            return False
+        #search backwards for the last newline, in blocks, truncating to just after it
+        position = size
+        while (position > 0):
+            block_start = max(0, position - 65536)
+            f.seek(block_start)
+            newline = f.read(position - block_start).rfind(b"\n")
+            if (newline != -1):
+                f.truncate(block_start + newline + 1)
+                break
+            position = block_start
+        else:
+            f.truncate(0)
+        f.flush()
+        os.fsync(f.fileno())
+    return True
+
+class RunManifest():
+    """
+    Append-only manifest of the work completed by a long-running run, e.g. export_iso3166_2 or
+    fetch_all_country_geo_data, such that a run that crashed or was interrupted can be resumed,
+    skipping the stages of each country already completed. Each completed stage of a country is
+    appended to the manifest as one JSON line, after any data it produced is written atomically
+    to its own file, so checkpointing a country is O(country) rather than rewriting all of the
+    output so far. A partially written last line, left by a crash mid-append, is truncated on resume. The
+    first line records the run's parameters, a manifest of a run with different parameters
+    isn't resumed but started again.
+
+    Parameters
+    ==========
+    :path: str
+        path to the manifest JSON lines file.
+    :parameters: dict (default=None)
+        JSON serializable parameters of the run that its output depends on.
+    :resume: bool (default=False)
+        resume the run in the manifest if its parameters match, otherwise start a new manifest.
+
+    Methods
+    =======
+    is_complete(country, stage):
+        return whether a country's stage is complete.
+    complete(country, stage, data=None, data_path=None):
+        record a country's stage as complete, along with its data.
+    load(country, stage):
+        return the data of a country's completed stage.
+    completed(stage):
+        return the countries whose stage is complete.
+
+    Usage
+    =====
+    manifest = RunManifest("iso3166-2-output/iso3166-2_manifest.jsonl", parameters={"history": True}, resume=True)
+    if not (manifest.is_complete("FR", "subdivisions")):
+        manifest.complete("FR", "subdivisions", data={"FR": {...}}, data_path="iso3166-2-output/iso3166-2_FR.json")
+    """
+    def __init__(self, path: str, parameters: dict=None, resume: bool=False):
+        self.path = path
+        self.parameters = json.loads(json.dumps(parameters or {}, sort_keys=True, default=str))
+        self.entries = {}
+        self.lock = threading.Lock()
+
+        #read the completed stages of the previous run if resuming it with the same parameters, otherwise start a new manifest
+        if (resume and os.path.isfile(self.path)):
+            #drop any partial last line left by the crash, otherwise the next completed stage would be glued onto it and lost
+            truncate_partial_line(self.path)
+            with open(self.path, encoding="utf-8") as manifest_file:
+                lines = manifest_file.read().splitlines()
+            records = []
+            for line in lines:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+            if (records and records[0].get("parameters") == self.parameters):
+                for record in records[1:]:
+                    if ("country" in record and "stage" in record):
+                        self.entries[(record["country"], record["stage"])] = record
+                return
+        if (os.path.dirname(self.path)):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as manifest_file:
+            manifest_file.write(json.dumps({"parameters": self.parameters, "started": time.time()}) + "\n")
+
+    def is_complete(self, country: str, stage: str) -> bool:
+        """ Return whether a country's stage is complete, and its data file, if any, still exists. """
+        entry = self.entries.get((country, stage))
+        return entry is not None and (entry.get("data_path") is None or os.path.isfile(entry["data_path"]))
+
+    def complete(self, country: str, stage: str, data=None, data_path: str=None) -> None:
+        """
+        Record a country's stage as complete. If a data path is input the data is written to it 
+        atomically first, otherwise any data is stored in the manifest itself, so it should be small.
+
+        Parameters
+        ==========
+        :country: str
+            ISO 3166-1 alpha-2 country code.
+        :stage: str
+            name of the completed stage.
+        :data: Any (default=None)
+            JSON serializable data produced by the stage.
+        :data_path: str (default=None)
+            path to write the data to.
+
+        Returns
+        =======
+        None
+        """
+        entry = {"country": country, "stage": stage, "completed": time.time()}
+        if (data_path is not None):
+            if (os.path.dirname(data_path)):
+                os.makedirs(os.path.dirname(data_path), exist_ok=True)
+            with open(data_path + ".tmp", "w", encoding="utf-8") as data_file:
+                json.dump(data, data_file, ensure_ascii=False, indent=4)
+                data_file.flush()
+                os.fsync(data_file.fileno())
+            os.replace(data_path + ".tmp", data_path)
+            entry["data_path"] = data_path
+        elif (data is not None):
+            entry["data"] = data
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as manifest_file:
+                manifest_file.write(line)
+                manifest_file.flush()
+                os.fsync(manifest_file.fileno())
+            self.entries[(country, stage)] = entry
+
+    def load(self, country: str, stage: str):
+        """ Return the data of a country's completed stage, None if it has none or isn't complete. """
+        entry = self.entries.get((country, stage))
+        if (entry is None):
+            return None
+        if (entry.get("data_path") is not None):
+            with open(entry["data_path"], encoding="utf-8") as data_file:
+                return json.load(data_file)
+        return entry.get("data")
+
+    def completed(self, stage: str) -> list:
+        """ Return the countries whose stage is complete, in the order they were completed. """
+        return [country for (country, entry_stage) in self.entries if (entry_stage == stage and self.is_complete(country, entry_stage))]
 
 def attributes_memory_usage(iso3166_2_json_filepath: str="iso3166-2.json", country_level_usage: bool=False, 
                             export: bool=True, export_folder="iso3166_2_resources") -> None:
@@ -77,7 +77,7 @@ class CityDataUnitTests(unittest.TestCase):
             }
         ]
     
-    @patch('city_data.requests.get')
+    @patch('city_data.requests.Session.get')
     def test_get_cities_success(self, mock_get):
         """Test successful retrieval of cities."""
         mock_response = MagicMock()
@@ -101,7 +101,7 @@ class CityDataUnitTests(unittest.TestCase):
         self.assertEqual(len(result), 3, f"Should return 3 cities, got {len(result)}.")
         self.assertEqual(result, expected_result, "Returned city data does not match expected.")
     
-    @patch('city_data.requests.get')
+    @patch('city_data.requests.Session.get')
     def test_get_cities_with_short_subdivision_code(self, mock_get):
         """Test function with short subdivision code (e.g., 'CA' instead of 'US-CA')."""
         mock_response = MagicMock()
@@ -119,7 +119,7 @@ class CityDataUnitTests(unittest.TestCase):
         self.assertEqual(len(result), 3, f"Should return 3 cities, got {len(result)}.")
         mock_get.assert_called_once()
     
-    @patch('city_data.requests.get')
+    @patch('city_data.requests.Session.get')
     def test_get_cities_empty_result(self, mock_get):
         """Test handling of empty city list."""
         mock_response = MagicMock()
@@ -137,7 +137,7 @@ class CityDataUnitTests(unittest.TestCase):
         self.assertIsInstance(result, list, f"Result should be a list, got {type(result)}.")
         self.assertEqual(len(result), 0, f"Should return 0 cities, got {len(result)}.")
     
-    @patch('city_data.requests.get')
+    @patch('city_data.requests.Session.get')
     def test_get_cities_with_proxy(self, mock_get):
         """Test function with proxy settings."""
         mock_response = MagicMock()
@@ -162,7 +162,7 @@ class CityDataUnitTests(unittest.TestCase):
         self.assertEqual(call_kwargs['proxies'], proxy_settings)
         self.assertEqual(len(result), 3)
     
-    @patch('city_data.requests.get')
+    @patch('city_data.requests.Session.get')
     def test_api_key_missing_error(self, mock_get):
         """Test error when API key is not provided and not in environment."""
         with patch.dict(os.environ, {}, clear=True):
@@ -179,7 +179,7 @@ class CityDataUnitTests(unittest.TestCase):
     
     @patch('city_data.load_dotenv')
     @patch.dict(os.environ, {'COUNTRY_STATE_CITY_API_KEY': 'env_api_key'})
-    @patch('city_data.requests.get')
+    @patch('city_data.requests.Session.get')
     def test_api_key_from_environment(self, mock_get, mock_load_dotenv):
         """Test API key retrieval from environment variable."""
         mock_response = MagicMock()
@@ -198,7 +198,7 @@ class CityDataUnitTests(unittest.TestCase):
         self.assertEqual(len(result), 3)
     
     @patch('builtins.print')
-    @patch('city_data.requests.get')
+    @patch('city_data.requests.Session.get')
     def test_http_error_handling(self, mock_get, mock_print):
         """Test handling of HTTP errors."""
         mock_get.side_effect = Exception("HTTP 404: Not Found")
@@ -213,7 +213,7 @@ class CityDataUnitTests(unittest.TestCase):
         self.assertEqual(result, [])
     
     @patch('builtins.print')
-    @patch('city_data.requests.get')
+    @patch('city_data.requests.Session.get')
     def test_timeout_handling(self, mock_get, mock_print):
         """Test handling of request timeout."""
         import requests
@@ -228,7 +228,7 @@ class CityDataUnitTests(unittest.TestCase):
         self.assertEqual(result, [])
     
     @patch('builtins.print')
-    @patch('city_data.requests.get')
+    @patch('city_data.requests.Session.get')
     def test_connection_error_handling(self, mock_get, mock_print):
         """Test handling of connection errors."""
         import requests
@@ -243,7 +243,7 @@ class CityDataUnitTests(unittest.TestCase):
         self.assertEqual(result, [])
     
     @patch('builtins.print')
-    @patch('city_data.requests.get')
+    @patch('city_data.requests.Session.get')
     def test_malformed_json_response(self, mock_get, mock_print):
         """Test handling of malformed JSON response."""
         mock_response = MagicMock()
@@ -259,7 +259,7 @@ class CityDataUnitTests(unittest.TestCase):
         
         self.assertEqual(result, [])
     
-    @patch('city_data.requests.get')
+    @patch('city_data.requests.Session.get')
     def test_response_with_missing_fields(self, mock_get):
         """Test handling of response with missing latitude/longitude fields."""
         incomplete_response = [
@@ -292,7 +292,7 @@ class CityDataUnitTests(unittest.TestCase):
         self.assertEqual(result[0]['name'], 'Los Angeles')
         self.assertIsNone(result[1]['latLng'][0])  # lat from first dict
     
-    @patch('city_data.requests.get')
+    @patch('city_data.requests.Session.get')
     def test_correct_url_construction(self, mock_get):
         """Test that the correct URL is constructed."""
         mock_response = MagicMock()
@@ -311,7 +311,7 @@ class CityDataUnitTests(unittest.TestCase):
         expected_url = f"{BASE_URL}GB/states/ENG/cities"
         self.assertEqual(call_args[0][0], expected_url)
     
-    @patch('city_data.requests.get')
+    @patch('city_data.requests.Session.get')
     def test_correct_headers_sent(self, mock_get):
         """Test that correct headers are sent with request."""
         mock_response = MagicMock()
@@ -333,7 +333,7 @@ class CityDataUnitTests(unittest.TestCase):
         self.assertEqual(headers['User-Agent'], USER_AGENT_HEADER['User-Agent'])
         self.assertEqual(headers['X-CSCAPI-KEY'], self.test_api_key)
     
-    @patch('city_data.requests.get')
+    @patch('city_data.requests.Session.get')
     def test_timeout_parameter(self, mock_get):
         """Test that timeout parameter is set correctly."""
         mock_response = MagicMock()
@@ -350,7 +350,7 @@ class CityDataUnitTests(unittest.TestCase):
         call_kwargs = mock_get.call_args[1]
         self.assertEqual(call_kwargs['timeout'], 15)
     
-    @patch('city_data.requests.get')
+    @patch('city_data.requests.Session.get')
     def test_multiple_calls_independence(self, mock_get):
         """Test that multiple calls don't interfere with each other."""
         mock_response = MagicMock()
@@ -3,13 +3,17 @@ from unittest.mock import patch, MagicMock
 import sys
 import os
 import json
+import shutil
+import sqlite3
+import threading
 import pandas as pd
 from iso3166_2 import Subdivisions
 
 # Add scripts directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
 
-from geo import Geo
+from geo import Geo, GeoCacheStore, GeoCacheJournal, SQLiteGeoCacheStore, get_geo_nulls
+from scripts.scheduler import get_scheduler, DEFAULT_HOST_LIMITS
 
 # @unittest.skip("")
 class GeoUnitTests(unittest.TestCase):
@@ -39,10 +43,19 @@ class GeoUnitTests(unittest.TestCase):
         Validates neighbor detection via cache based on bounding box overlap.
     test_get_all_cached:
         Validates combined geographical data retrieval from cache combining latLng, bbox, perimeter, and neighbours.
+    test_get_all_single_fetch:
+        Validates get_all issues at most one Nominatim request per subdivision, only for those missing attributes.
     test_get_statistics:
         Validates statistics calculation from cache file including completeness, counts, and spatial metrics.
     test_clear_cache:
         Validates cache clearing functionality sets cache to None.
+    test_geo_cache_store:
+        Validates the keyed cache store parses rows once, matches the cache file and keeps updates in sync.
+    test_geo_cache_journal:
+        Validates cache updates are journaled as they are made, replayed on load and compacted into the cache file
+        at the end of a top-level export.
+    test_sqlite_geo_cache:
+        Validates the SQLite cache backend reads columns lazily, batches writes and supports concurrent instances.
     test_export_cache_file:
         Validates cache export creates a file with correct structure and content.
     test_str:
@@ -57,6 +70,9 @@ class GeoUnitTests(unittest.TestCase):
         self.print_patcher = patch('builtins.print'); self.print_patcher.start()
         self.temp_cache_path = os.path.join("tests", "test_files", "test_geo_cache.csv")
 
+        # API calls are mocked, so don't throttle them to Nominatim's rate limit
+        get_scheduler().set_limit("nominatim.openstreetmap.org", None)
+
         # create Subdivisions instance for reference, get flattened list of subdivision codes
         self.subd = Subdivisions()
         self.subdivision_codes = list(self.subd.subdivision_codes().values())
@@ -420,7 +436,7 @@ class GeoUnitTests(unittest.TestCase):
             self.geo.get_bounding_box("123", verbose=False, export=False)
 
     # @unittest.skip("")
-    @patch('geo.requests.get')
+    @patch('geo.requests.Session.get')
     def test_get_geojson_cached(self, mock_get):
         """ Test successful GeoJSON retrieval via cache - mocking call due to geojson being large. """
 #1.)
@@ -812,6 +828,50 @@ class GeoUnitTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.geo.get_all("123", verbose=False, export=False)
         
+    # @unittest.skip("")
+    @patch('geo.requests.Session.get')
+    def test_get_all_single_fetch(self, mock_get):
+        """ Test get_all fetch planner makes one request per subdivision and fans it out to every attribute. """
+        mock_response = MagicMock()
+        mock_response.json.return_value = [{
+            'lat': '42.5', 'lon': '1.5', 'boundingbox': ['42.4', '42.6', '1.4', '1.6'],
+            'geojson': {'type': 'Polygon', 'coordinates': [[[1.4, 42.4], [1.6, 42.4], [1.6, 42.6], [1.4, 42.6], [1.4, 42.4]]]}
+        }]
+        mock_response.raise_for_status = lambda: None
+        mock_get.return_value = mock_response
+#1.)
+        # Validate an uncached country gets exactly one request per subdivision, including the GeoJSON polygon
+        geo_ad = Geo("AD", use_cache=False, export_to_cache=False)
+        all_ad = geo_ad.get_all(verbose=False, export=False, skip_geojson=False)
+        self.assertEqual(mock_get.call_count, 7)
+        for call in mock_get.call_args_list:
+            self.assertEqual(call.kwargs['params']['polygon_geojson'], 1)
+        self.assertEqual(sorted(all_ad), geo_ad.subdivision_codes)
+        for code, geo_entry in all_ad.items():
+            self.assertEqual(geo_entry['latLng'], "42.5,1.5")
+            self.assertEqual(geo_entry['bounding_box'], [42.4, 42.6, 1.4, 1.6])
+            self.assertGreater(geo_entry['perimeter'], 0)
+            self.assertEqual(sorted(geo_entry['neighbours']), [other for other in geo_ad.subdivision_codes if other != code])
+            self.assertEqual(geo_entry['geojson']['features'][0]['geometry']['type'], 'Polygon')
+        self.assertIsNone(geo_ad._planned_fetches)
+#2.)
+        # Validate a fully cached country makes no requests
+        mock_get.reset_mock()
+        geo_jm = Geo("JM", geo_cache_path=self.temp_cache_path, export_to_cache=False)
+        geo_jm.get_all(verbose=False, export=False)
+        self.assertEqual(mock_get.call_count, 0)
+#3.)
+        # Validate only the subdivisions missing attributes are fetched, with the polygon only when the perimeter is missing
+        geo_jm._update_cache("JM-01", 'perimeter', None)
+        geo_jm._update_cache("JM-02", 'latLng', None)
+        all_jm = geo_jm.get_all(verbose=False, export=False)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual([call.kwargs['params']['q'] for call in mock_get.call_args_list], ["JM-01", "JM-02"])
+        self.assertIn('polygon_geojson', mock_get.call_args_list[0].kwargs['params'])
+        self.assertNotIn('polygon_geojson', mock_get.call_args_list[1].kwargs['params'])
+        self.assertEqual(all_jm["JM-02"]['latLng'], "42.5,1.5")
+        self.assertEqual(all_jm["JM-02"]['bounding_box'], [17.938, 18.1798, -76.8896, -76.6173])
+
     # @unittest.skip("")
     def test_get_statistics(self):
         """ Test statistics calculation with valid cache file. """
@@ -874,6 +934,222 @@ class GeoUnitTests(unittest.TestCase):
         # Verify len() returns 0 for None cache
         self.assertEqual(len(geo_clear_cache), 0)
     
+    # @unittest.skip("")
+    def test_geo_cache_store(self):
+        """ Test keyed geo cache store lookups, parsing and updates. """
+        cache_df = pd.read_csv(self.temp_cache_path, dtype={'subdivisionCode': str})
+        store = self.geo.cache_store
+#1.)
+        self.assertIsInstance(store, GeoCacheStore)
+        self.assertEqual(len(store), 5046)
+        self.assertEqual(len(self.geo), 5046)
+        self.assertIn("AD-02", store)
+        self.assertNotIn("AD-99", store)
+#2.)
+        # Validate each attribute is parsed into its typed value on load
+        for _, row in cache_df.iterrows():
+            subdivision_code = row['subdivisionCode']
+            if pd.notna(row['latLng']):
+                self.assertEqual(store.get(subdivision_code, 'latLng'), row['latLng'])
+                self.assertEqual(store.lat_lng(subdivision_code), [float(x) for x in row['latLng'].split(',')])
+            else:
+                self.assertIsNone(store.lat_lng(subdivision_code))
+            if pd.notna(row['boundingBox']):
+                self.assertEqual(store.get(subdivision_code, 'boundingBox'), json.loads(row['boundingBox']))
+            if pd.notna(row['perimeter']):
+                self.assertEqual(store.get(subdivision_code, 'perimeter'), float(row['perimeter']))
+            if pd.notna(row['neighbours']):
+                self.assertEqual(store.get(subdivision_code, 'neighbours'), row['neighbours'].split(','))
+            else:
+                self.assertIsNone(store.get(subdivision_code, 'neighbours'))
+        self.assertIsNone(store.get("AD-99", 'latLng'))
+        self.assertEqual(store.count(["AD-02", "AD-03", "AD-99"], 'latLng'), 2)
+#3.)
+        # Validate the DataFrame view matches the cache file, so exports are unchanged
+        frame = self.geo.geo_cache
+        self.assertEqual(list(frame.columns), ['subdivisionCode', 'latLng', 'boundingBox', 'geojson', 'perimeter', 'neighbours'])
+        self.assertEqual(frame.fillna("").astype(str).values.tolist(), cache_df[list(frame.columns)].fillna("").astype(str).values.tolist())
+        self.assertIs(self.geo.geo_cache, frame)
+#4.)
+        # Validate updates and appends are visible to lookups and the DataFrame view
+        geo = Geo("AD", geo_cache_path=self.temp_cache_path, export_to_cache=False)
+        geo._update_cache("AD-02", 'latLng', "10.5,-20.25")
+        geo._update_cache("XX-01", 'boundingBox', json.dumps([1.0, 2.0, 3.0, 4.0]))
+        self.assertEqual(geo.cache_store.lat_lng("AD-02"), [10.5, -20.25])
+        self.assertEqual(geo.get_lat_lng()["AD-02"], "10.5,-20.25")
+        self.assertEqual(geo.cache_store.get("XX-01", 'boundingBox'), [1.0, 2.0, 3.0, 4.0])
+        self.assertIsNone(geo.cache_store.get("XX-01", 'latLng'))
+        self.assertEqual(len(geo), 5047)
+        self.assertEqual(geo.geo_cache[geo.geo_cache['subdivisionCode'] == "AD-02"]['latLng'].values[0], "10.5,-20.25")
+        self.assertEqual(geo.geo_cache['subdivisionCode'].values[-1], "XX-01")
+#5.)
+        # Validate assigning a DataFrame rebuilds the store and invalid values are treated as uncached
+        geo.geo_cache = pd.DataFrame({'subdivisionCode': ['US-CA', 'US-NV'], 'latLng': ['37.0,-120.0', None], 'boundingBox': ['[32.5,42.0,-124.5,-114.1]', 'invalid']})
+        self.assertEqual(len(geo), 2)
+        self.assertEqual(geo.cache_store.get("US-CA", 'boundingBox'), [32.5, 42.0, -124.5, -114.1])
+        self.assertIsNone(geo.cache_store.get("US-NV", 'boundingBox'))
+        self.assertEqual(geo.geo_cache['boundingBox'].values.tolist(), ['[32.5,42.0,-124.5,-114.1]', 'invalid'])
+        self.assertIsNone(geo.cache_store.get("US-CA", 'perimeter'))
+
+    # @unittest.skip("")
+    def test_geo_cache_journal(self):
+        """ Test append-only geo cache journal writes, replay and compaction. """
+        cache_path = os.path.join("tests", "test_files", "test_geo_cache_journal.csv")
+        journal_path = cache_path + ".journal"
+        shutil.copy(self.temp_cache_path, cache_path)
+        cache_df = pd.read_csv(cache_path, dtype={'subdivisionCode': str})
+#1.)
+        # Validate no journal is written when nothing changes, e.g. recomputed neighbours
+        geo = Geo("AD", geo_cache_path=cache_path)
+        geo.get_neighbours()
+        self.assertFalse(os.path.exists(journal_path))
+        self.assertEqual(len(geo.cache_journal), 0)
+#2.)
+        # Validate each update is appended to the journal straight away, leaving the cache file untouched
+        cache_mtime = os.path.getmtime(cache_path)
+        geo._update_cache("AD-02", 'latLng', "10.5,-20.25")
+        geo._update_cache("XX-01", 'perimeter', 12.5)
+        geo._update_cache("XX-01", 'perimeter', 12.5)
+        self.assertEqual(len(geo.cache_journal), 2)
+        with open(journal_path) as f:
+            self.assertEqual([json.loads(line) for line in f], [{"subdivisionCode": "AD-02", "attribute": "latLng", "value": "10.5,-20.25"},
+                {"subdivisionCode": "XX-01", "attribute": "perimeter", "value": 12.5}])
+        # Validate updates made with export=False are only journaled at the next export, which within a batch of exports doesn't compact the journal
+        geo._update_cache("XX-04", 'latLng', "1.0,1.0", export=False)
+        self.assertEqual(len(geo.cache_journal), 2)
+        with geo._export_batch():
+            geo._export_cache()
+        self.assertEqual(len(geo.cache_journal), 3)
+        self.assertEqual(os.path.getmtime(cache_path), cache_mtime)
+#3.)
+        # Validate a new instance replays the journal, skipping a partially written last line
+        with open(journal_path, "a") as f:
+            f.write('{"subdivisionCode": "XX-02", "attri')
+        geo_replayed = Geo("AD", geo_cache_path=cache_path, export_to_cache=False)
+        self.assertEqual(len(geo_replayed), 5048)
+        self.assertEqual(geo_replayed.cache_store.lat_lng("AD-02"), [10.5, -20.25])
+        self.assertEqual(geo_replayed.cache_store.get("XX-01", 'perimeter'), 12.5)
+        self.assertNotIn("XX-02", geo_replayed.cache_store)
+        self.assertEqual(geo_replayed.get_statistics()['total_entries'], 5048)
+#4.)
+        # Validate compaction folds the journal into the cache file and removes it, once the threshold is reached
+        geo.cache_journal.compact_threshold = 5
+        self.assertFalse(geo.cache_journal.maybe_compact())
+        self.assertTrue(os.path.exists(journal_path))
+        geo.cache_journal.compact_threshold = 4
+        self.assertTrue(geo.cache_journal.maybe_compact())
+        self.assertFalse(os.path.exists(journal_path))
+        compacted_df = pd.read_csv(cache_path, dtype={'subdivisionCode': str})
+        self.assertEqual(len(compacted_df), 5048)
+        self.assertEqual(compacted_df[compacted_df['subdivisionCode'] == "AD-02"]['latLng'].values[0], "10.5,-20.25")
+        self.assertEqual(compacted_df['perimeter'].values[-2], 12.5)
+        self.assertEqual(compacted_df['latLng'].values[-1], "1.0,1.0")
+        self.assertEqual(compacted_df.iloc[1:5046]['latLng'].fillna("").tolist(), cache_df.iloc[1:]['latLng'].fillna("").tolist())
+        self.assertEqual([name for name in os.listdir(os.path.dirname(cache_path)) if name.endswith(".tmp")], [])
+#5.)
+        # Validate compacting from another instance keeps entries journaled by others
+        GeoCacheJournal(cache_path).append([("XX-03", "boundingBox", "[1.0, 2.0, 3.0, 4.0]")])
+        GeoCacheJournal(cache_path).compact()
+        self.assertEqual(Geo(geo_cache_path=cache_path).cache_store.get("XX-03", 'boundingBox'), [1.0, 2.0, 3.0, 4.0])
+#6.)
+        # Validate appending after a partially written last line, left by a crash mid-append, loses none of the complete entries
+        journal = GeoCacheJournal(cache_path)
+        journal.append([("AD-02", "latLng", "1.5,2.5")])
+        with open(journal_path, "a") as f:
+            f.write('{"subdivisionCode": "AD-03", "attri')
+        journal.append([("AD-04", "latLng", "3.5,4.5")])
+        self.assertEqual(len(journal), 2)
+        replayed_store = GeoCacheStore()
+        self.assertEqual(journal.replay(replayed_store), 2)
+        self.assertEqual(replayed_store.lat_lng("AD-02"), [1.5, 2.5])
+        self.assertEqual(replayed_store.lat_lng("AD-04"), [3.5, 4.5])
+        self.assertNotIn("AD-03", replayed_store)
+        os.remove(journal_path)
+#7.)
+        # Validate a top-level export folds the journal into the cache file, which get_geo_nulls then reads
+        geo._update_cache("XX-06", 'latLng', "5.5,6.5")
+        self.assertTrue(os.path.exists(journal_path))
+        nulls_path = os.path.join("tests", "test_files", "test_geo_cache_journal_nulls.json")
+        get_geo_nulls(cache_path, export_filename=os.path.abspath(nulls_path))
+        with open(nulls_path) as f:
+            null_analysis = json.load(f)
+        self.assertIn("XX-06", null_analysis["attributes"]["boundingBox"]["subdivisionCodes"].split(","))
+        self.assertNotIn("XX-06", null_analysis["attributes"]["latLng"]["subdivisionCodes"].split(","))
+        os.remove(nulls_path)
+        geo._export_cache()
+        self.assertFalse(os.path.exists(journal_path))
+        compacted_df = pd.read_csv(cache_path, dtype={'subdivisionCode': str})
+        self.assertEqual(compacted_df[compacted_df['subdivisionCode'] == "XX-06"]['latLng'].values[0], "5.5,6.5")
+
+        # Remove the test cache file
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+
+    # @unittest.skip("")
+    def test_sqlite_geo_cache(self):
+        """ Test SQLite geo cache backend reads, batched writes and concurrent writers. """
+        cache_path = os.path.join("tests", "test_files", "test_geo_cache.db")
+        cache_df = pd.read_csv(self.temp_cache_path, dtype={'subdivisionCode': str})
+        csv_store = GeoCacheStore.from_frame(cache_df)
+        csv_store.set("AD-02", 'geojson', json.dumps({"type": "Point", "coordinates": [1.6574, 42.5868]}))
+        SQLiteGeoCacheStore(cache_path).write(csv_store)
+#1.)
+        # Validate the database is in WAL mode with separate subdivision and geometry tables
+        connection = sqlite3.connect(cache_path)
+        self.assertEqual(connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(connection.execute("SELECT COUNT(*) FROM subdivisions").fetchone()[0], 5046)
+        self.assertEqual(connection.execute("SELECT COUNT(*) FROM geometries").fetchone()[0], 1)
+        connection.close()
+#2.)
+        # Validate Geo uses the SQLite backend and only reads the requested columns, never the geojson blobs
+        geo = Geo("AD", geo_cache_path=cache_path)
+        self.assertIsInstance(geo.cache_store, SQLiteGeoCacheStore)
+        self.assertIsNone(geo.cache_journal)
+        self.assertEqual(len(geo), 5046)
+        self.assertEqual(geo.get_lat_lng(), {code: csv_store.get(code, 'latLng') for code in geo.subdivision_codes})
+        self.assertEqual(geo.cache_store._loaded_columns, {'latLng'})
+        self.assertEqual(geo.get_bounding_box()["AD-02"], csv_store.get("AD-02", 'boundingBox'))
+        self.assertEqual(geo.cache_store.count(geo.subdivision_codes, 'geojson'), 1)
+        self.assertEqual(geo.cache_store._loaded_geojson, set())
+        self.assertEqual(geo.cache_store.get("AD-02", 'geojson'), csv_store.get("AD-02", 'geojson'))
+        self.assertEqual(geo.cache_store._loaded_geojson, {"AD-02"})
+#3.)
+        # Validate updates are held until flushed, then written in one batch and visible to other instances
+        geo._update_cache("AD-02", 'latLng', "10.5,-20.25")
+        geo._update_cache("XX-01", 'perimeter', 12.5)
+        self.assertIsNone(Geo(geo_cache_path=cache_path).cache_store.get("XX-01", 'perimeter'))
+        geo._export_cache()
+        self.assertEqual(geo.cache_store._pending, {})
+        geo_reader = Geo(geo_cache_path=cache_path)
+        self.assertEqual(geo_reader.cache_store.lat_lng("AD-02"), [10.5, -20.25])
+        self.assertEqual(geo_reader.cache_store.get("XX-01", 'perimeter'), 12.5)
+        self.assertEqual(geo_reader.cache_store.get("AD-02", 'perimeter'), csv_store.get("AD-02", 'perimeter'))
+        self.assertEqual(len(geo_reader.geo_cache), 5047)
+        self.assertEqual(geo_reader.get_statistics()['total_entries'], 5047)
+#4.)
+        # Validate concurrent instances writing to the same database don't overwrite each other's rows
+        def write_rows(worker):
+            geo_worker = Geo(geo_cache_path=cache_path)
+            for i in range(250):
+                geo_worker._update_cache(f"T{worker}-{i}", 'latLng', f"{worker}.0,{i}.0")
+            geo_worker._export_cache()
+            geo_worker.cache_store.close()
+        workers = [threading.Thread(target=write_rows, args=(worker,)) for worker in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        sqlite_store = SQLiteGeoCacheStore(cache_path)
+        self.assertEqual(len(sqlite_store), 6047)
+        self.assertEqual(sqlite_store.lat_lng("T3-249"), [3.0, 249.0])
+        for store in (sqlite_store, geo.cache_store, geo_reader.cache_store):
+            store.close()
+
+        # Remove the test cache database
+        for filepath in (cache_path, cache_path + "-wal", cache_path + "-shm"):
+            if os.path.exists(filepath):
+                os.remove(filepath)
+
     @unittest.skip("")
     def test_export_cache_file(self):
         """ Test that cache export creates a file. """
@@ -930,6 +1206,7 @@ class GeoUnitTests(unittest.TestCase):
     def tearDown(self):
         """ Clean up test fixtures. """
         self.print_patcher.stop()
+        get_scheduler().set_limit("nominatim.openstreetmap.org", **DEFAULT_HOST_LIMITS["nominatim.openstreetmap.org"])
 
 
 # @unittest.skip("")
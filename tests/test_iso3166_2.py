@@ -4,7 +4,16 @@ import requests
 import re
 import json
 import os
+import sys
+import subprocess
 import shutil
+import hashlib
+import math
+import marshal
+import random
+import functools
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from jsonschema import validate, ValidationError
 from fake_useragent import UserAgent
 from importlib.metadata import metadata
@@ -47,6 +56,32 @@ class ISO3166_2_Unit_Tests(unittest.TestCase):
         testing Subdivisions class initialization with edge case inputs and invalid values.
     test_remove_attributes:
         testing remove_attributes functionality for removing specified attributes from subdivision data.
+    test_dataset_store:
+        testing the parsed dataset is shared between instances via the process-wide dataset store.
+    test_shards:
+        testing the sharded per-country layout of the dataset and the lazy loading of countries.
+    test_search_index:
+        testing the search index prunes candidate names without changing the search results.
+    test_search_batch:
+        testing searching for an iterable of subdivision names via the search_batch function.
+    test_getitem_views:
+        testing the read-only views of the subdivision data returned via __getitem__.
+    test_compact:
+        testing the compact in-memory representation of the dataset and the memory footprint of the data.
+    test_reverse_geocode:
+        testing getting the nearest subdivisions to coordinates via the reverse_geocode and reverse_geocode_batch functions.
+    test_check_for_updates_shards:
+        testing checking for updates via the manifest and shards of the sharded layout, using a local HTTP server.
+    test_snapshot:
+        testing the binary snapshot of the parsed dataset is loaded instead of parsing the JSON, unless it's stale.
+    test_projected_loading:
+        testing the data is loaded without the attributes excluded via the filter_attributes parameter.
+    test_import_time:
+        testing the import of the software only imports the standard library, with the optional dependencies imported on first use.
+    test_hierarchy:
+        testing getting the children, descendants and ancestors of subdivisions via the hierarchy index.
+    test_query:
+        testing querying the subdivisions via predicates on their attributes, via the query index.
     """
     @classmethod
     def setUp(self):
@@ -131,6 +166,17 @@ class ISO3166_2_Unit_Tests(unittest.TestCase):
             test_iso3166_2_bg_instance.subdivision_codes("AD")
             test_iso3166_2_sz_instance.subdivision_codes("KM")
             test_iso3166_2_wf_instance.subdivision_codes("090")
+#10.)
+        test_iso3166_2_sm_instance.subdivision_codes().append("SM-XX")
+        test_iso3166_2_mg_sb_instance.subdivision_codes("MG")[0] = "MG-XX"
+        self.assertEqual(test_iso3166_2_sm_instance.subdivision_codes(), expected_sm_subdivision_codes, "Modifying output list shouldn't change the memoized subdivision codes.")
+        self.assertEqual(test_iso3166_2_mg_sb_instance.subdivision_codes("MG"), expected_mg_sb_subdivision_codes["MG"], "Modifying output list shouldn't change the memoized subdivision codes.")
+#11.)
+        with redirect_stdout(StringIO()):
+            test_iso3166_2_sm_instance.custom_subdivision("SM", "SM-10", name="Custom", type_="Municipality", save_new=True, 
+                save_new_filename=os.path.join(self.test_output_dir, "iso3166_2_codes_copy.json"))
+        self.assertEqual(test_iso3166_2_sm_instance.subdivision_codes(), expected_sm_subdivision_codes + ["SM-10"], "Expected custom subdivision code in output.")
+        self.assertEqual(Subdivisions("SM").subdivision_codes(), expected_sm_subdivision_codes, "Custom subdivision shouldn't be in the subdivision codes of another instance.")
 
     # @unittest.skip("")
     def test_subdivision_names(self):
@@ -196,6 +242,17 @@ class ISO3166_2_Unit_Tests(unittest.TestCase):
             test_iso3166_2_er_instance.subdivision_names("DO")
             test_iso3166_2_zm_instance.subdivision_names("CPV")
             test_iso3166_2_dj_va_instance.subdivision_names("218")
+#10.)
+        test_iso3166_2_km_instance.subdivision_names().append("Invalid")
+        self.all_iso3166_2.subdivision_names()["KM"].append("Invalid")
+        self.assertEqual(test_iso3166_2_km_instance.subdivision_names(), expected_km_subdivision_names, "Modifying output list shouldn't change the memoized subdivision names.")
+        self.assertEqual(self.all_iso3166_2.subdivision_names("KM"), expected_km_subdivision_names, "Modifying output list shouldn't change the memoized subdivision names.")
+#11.)
+        with redirect_stdout(StringIO()):
+            test_iso3166_2_km_instance.custom_subdivision("KM", "KM-XX", name="Custom", type_="Island", save_new=True, 
+                save_new_filename=os.path.join(self.test_output_dir, "iso3166_2_names_copy.json"))
+        self.assertEqual(test_iso3166_2_km_instance.subdivision_names(), sorted(expected_km_subdivision_names + ["Custom"]), "Expected custom subdivision name in output.")
+        self.assertEqual(self.all_iso3166_2.subdivision_names("KM"), expected_km_subdivision_names, "Custom subdivision shouldn't be in the subdivision names of another instance.")
 
     # @unittest.skip("")
     def test_alpha_2(self):
@@ -347,6 +404,537 @@ class ISO3166_2_Unit_Tests(unittest.TestCase):
             self.all_iso3166_2.search(test_search_10)
             self.all_iso3166_2.search(test_search_11)
 
+    # @unittest.skip("")
+    def test_search_batch(self):
+        """ Testing searching for an iterable of subdivision names in a single batch. """
+        test_search_terms = ["Monaghan", "Texas, Meuse", "North", "Monaghan", "Rheinland Pfalz", "zzzzqqq", "Roche Caiman", "North"]
+#1.)
+        for likeness_score, exclude_match_score in [(100, 1), (80, 0), (90, 1)]:
+            expected_results = [self.all_iso3166_2.search(term, likeness_score=likeness_score, exclude_match_score=exclude_match_score) for term in test_search_terms]
+            self.assertEqual(self.all_iso3166_2.search_batch(test_search_terms, likeness_score=likeness_score, exclude_match_score=exclude_match_score), expected_results,
+                f"Expected batch search results to match individual search results at likeness score {likeness_score}.")
+            self.assertEqual(self.all_iso3166_2.search_batch(iter(test_search_terms), likeness_score=likeness_score, exclude_match_score=exclude_match_score, max_workers=3), expected_results,
+                f"Expected batch search results using a thread pool to match individual search results at likeness score {likeness_score}.")
+#2.)
+        self.assertEqual(self.all_iso3166_2.search_batch(test_search_terms[:4], likeness_score=85, filter_attribute="name,type", max_workers=2, use_processes=True),
+            [self.all_iso3166_2.search(term, likeness_score=85, filter_attribute="name,type") for term in test_search_terms[:4]], "Expected batch search results using a process pool to match individual search results.")
+#3.)
+        batch_results = self.all_iso3166_2.search_batch(["Monaghan", "Monaghan"])
+        self.assertEqual(list(batch_results[0]["IE"].keys()), ["IE-MN"], f"Expected IE-MN subdivision to be found, got {batch_results[0]}.")
+        self.assertIsNot(batch_results[0]["IE"]["IE-MN"], batch_results[1]["IE"]["IE-MN"], "Expected repeated inputs to have their own copy of the results.")
+        self.assertEqual(self.all_iso3166_2.search_batch([]), [], "Expected empty list for no input search terms.")
+#4.)
+        with (self.assertRaises(TypeError)):
+            self.all_iso3166_2.search_batch(["Monaghan", 123])
+        with (self.assertRaises(ValueError)):
+            self.all_iso3166_2.search_batch(["Monaghan"], likeness_score=101)
+        with (self.assertRaises(ValueError)):
+            self.all_iso3166_2.search_batch(["Monaghan"], filter_attribute="invalid_attribute")
+
+    # @unittest.skip("")
+    def test_search_index(self):
+        """ Testing the search index used by the search function prunes candidates without changing the results. """
+        from iso3166_2.iso3166_2 import _SearchIndex
+        from thefuzz import fuzz
+        search_index = _SearchIndex(self.all_iso3166_2.all)
+#1.)
+        for term, likeness_score in [("monaghan", 100), ("monagan", 100), ("north", 80), ("southern", 85), ("bavaria", 90), ("ab", 50), ("zzzzqqq", 85)]:
+            expected_matches = [(search_index.alpha_codes[i], search_index.codes[i], fuzz.ratio(term, name)) for i, name in enumerate(search_index.names) 
+                                if fuzz.ratio(term, name) >= likeness_score]
+            self.assertEqual(search_index.match(term, likeness_score), expected_matches, f"Expected indexed matches to equal full scan matches for {term} at {likeness_score}.")
+#2.)
+        self.assertEqual(search_index.candidates("monaghan", 100), set(search_index.exact["monaghan"]), "Expected only exact matches to be candidates at likeness score of 100.")
+        self.assertLess(len(search_index.candidates("southern", 85)), len(search_index.names) / 10, "Expected the majority of names to be pruned at likeness score of 85.")
+#3.)
+        self.assertIs(Subdivisions()._search_index(), self.all_iso3166_2._search_index(), "Expected search index to be shared between instances with the same data.")
+        test_iso3166_2_ie = Subdivisions("IE")
+        ie_search_index = test_iso3166_2_ie._search_index()
+        with redirect_stdout(StringIO()):
+            test_iso3166_2_ie.remove_attributes(["localOtherName"])
+        self.assertIsNot(test_iso3166_2_ie._search_index(), ie_search_index, "Expected search index to be rebuilt after the data is changed.")
+        self.assertEqual(test_iso3166_2_ie.search("Muineachán"), {}, "Expected removed localOtherName attribute to not be searched.")
+#4.)
+        from iso3166_2.iso3166_2 import _Dataset, _SearchIndex
+        dataset = self.all_iso3166_2._dataset
+        for alpha_code in list(self.all_iso3166_2.all)[:_Dataset.max_indexes + 5]:
+            Subdivisions(alpha_code)._search_index()
+        self.assertEqual(len(dataset.indexes), _Dataset.max_indexes, f"Expected the shared indexes to be bounded to {_Dataset.max_indexes}, got {len(dataset.indexes)}.")
+        with patch("iso3166_2.iso3166_2._SearchIndex", wraps=_SearchIndex) as search_index_class:
+            test_instances = [Subdivisions("GB, IE, FR") for _ in range(8)]
+            test_threads = [threading.Thread(target=test_instance._search_index) for test_instance in test_instances]
+            for test_thread in test_threads:
+                test_thread.start()
+            for test_thread in test_threads:
+                test_thread.join()
+        self.assertEqual(search_index_class.call_count, 1, f"Expected the shared search index to be built once across threads, got {search_index_class.call_count}.")
+        self.assertTrue(all(test_instance._search_index() is test_instances[0]._search_index() for test_instance in test_instances), "Expected the search index to be shared between threads.")
+
+    # @unittest.skip("")
+    def test_getitem_views(self):
+        """ Testing the read-only views of the country and subdivision data returned via __getitem__. """
+        test_iso3166_2 = Subdivisions("GB, IE, US")
+        test_iso3166_2_gb = test_iso3166_2["GB"]
+        test_iso3166_2_ie = test_iso3166_2["IE"]
+#1.)
+        self.assertIs(test_iso3166_2["GB"], test_iso3166_2_gb, "Expected the same view to be returned on repeated access.")
+        self.assertIs(test_iso3166_2["GBR"], test_iso3166_2_gb, "Expected the same view to be returned for the alpha-3 code.")
+        self.assertIs(test_iso3166_2["826"], test_iso3166_2_gb, "Expected the same view to be returned for the numeric code.")
+        self.assertIs(test_iso3166_2["GB, IE"]["IE"], test_iso3166_2_ie, "Expected the same view to be returned for multiple country input.")
+        self.assertIs(test_iso3166_2_gb["GB-ANS"], test_iso3166_2_gb["GB-ANS"], "Expected the same subdivision view to be returned on repeated access.")
+#2.)
+        self.assertIs(test_iso3166_2_gb["GB-ANS"], test_iso3166_2.all["GB"]["GB-ANS"], "Expected the view to hold the subdivision's shared data without copying it.")
+        self.assertIsInstance(test_iso3166_2_gb, dict, f"Expected the country view to be a dict, got {type(test_iso3166_2_gb)}.")
+        self.assertIsInstance(test_iso3166_2_gb["GB-ANS"], dict, f"Expected the subdivision view to be a dict, got {type(test_iso3166_2_gb['GB-ANS'])}.")
+        self.assertEqual(json.loads(json.dumps(test_iso3166_2_gb)), json.loads(json.dumps(test_iso3166_2.all["GB"])), "Expected the country view to be serialized via json.dumps as the country's data.")
+        self.assertEqual(json.loads(json.dumps(test_iso3166_2["GB, IE"])), json.loads(json.dumps({"GB": test_iso3166_2.all["GB"], "IE": test_iso3166_2.all["IE"]})), 
+            "Expected the country views to be serialized via json.dumps as the countries' data.")
+        self.assertEqual(json.loads(json.dumps(Subdivisions("GB", compact=True)["GB"])), json.loads(json.dumps(test_iso3166_2.all["GB"])), "Expected the compact country view to be serialized via json.dumps.")
+#3.)
+        self.assertEqual(test_iso3166_2_gb["GB-ANS"].name, "Angus", f"Expected subdivision name to be Angus, got {test_iso3166_2_gb['GB-ANS'].name}.")
+        self.assertEqual(test_iso3166_2_gb["GB-ANS"]["type"], "Council area", f"Expected subdivision type to be Council area, got {test_iso3166_2_gb['GB-ANS']['type']}.")
+        self.assertIsNone(test_iso3166_2_gb["GB-ANS"].invalid_attribute, "Expected None for an attribute not in the subdivision's data.")
+        self.assertEqual(test_iso3166_2_gb, test_iso3166_2.all["GB"], "Expected view to be equal to the country's data.")
+        self.assertEqual(len(test_iso3166_2_gb), len(test_iso3166_2.all["GB"]), "Expected length of view to equal the number of subdivisions.")
+        self.assertEqual(test_iso3166_2_ie.subdivision_codes(), test_iso3166_2.subdivision_codes("IE"), "Expected the view's subdivision codes to match.")
+#4.)
+        with self.assertRaises(AttributeError):
+            test_iso3166_2_gb["GB-ANS"].name = "Invalid"
+        with self.assertRaises(AttributeError):
+            test_iso3166_2_gb.subdivisions = {}
+        with self.assertRaises(TypeError):
+            test_iso3166_2_gb["GB-ANS"]["name"] = "Invalid"
+        with self.assertRaises(TypeError):
+            del test_iso3166_2_gb["GB-ANS"]
+#5.)
+        with redirect_stdout(StringIO()):
+            test_iso3166_2.remove_attributes(["history"])
+        self.assertIsNot(test_iso3166_2["GB"], test_iso3166_2_gb, "Expected a new view after the data has been changed.")
+        self.assertNotIn("history", test_iso3166_2["GB"]["GB-ANS"], "Expected removed attribute to not be in the new view.")
+        self.assertIn("history", self.all_iso3166_2["GB"]["GB-ANS"], "Removing attributes from one instance shouldn't change the views of another.")
+
+    # @unittest.skip("")
+    def test_compact(self):
+        """ Testing the compact in-memory representation of the subdivision data has the same data & API as the default. """
+        test_iso3166_2_compact = Subdivisions(compact=True)
+        test_iso3166_2_compact_gb_fr = Subdivisions("GB, FRA", compact=True)
+        test_iso3166_2_compact_filter = Subdivisions("IE", filter_attributes="name, latLng", compact=True)
+#1.)
+        self.assertEqual(test_iso3166_2_compact.all, self.all_iso3166_2.all, "Expected compact data to equal the default data.")
+        self.assertEqual(json.dumps(test_iso3166_2_compact._plain_data()), json.dumps(self.all_iso3166_2.all), "Expected compact data to be exported identically to the default data.")
+        self.assertEqual(list(test_iso3166_2_compact_gb_fr.all), ["GB", "FR"], f"Expected GB and FR in compact data, got {list(test_iso3166_2_compact_gb_fr.all)}.")
+        self.assertEqual(len(test_iso3166_2_compact), len(self.all_iso3166_2), f"Expected {len(self.all_iso3166_2)} subdivisions, got {len(test_iso3166_2_compact)}.")
+#2.)
+        self.assertEqual(test_iso3166_2_compact_gb_fr["GB"]["GB-ANS"].name, "Angus", f"Expected subdivision name to be Angus, got {test_iso3166_2_compact_gb_fr['GB']['GB-ANS'].name}.")
+        self.assertEqual(test_iso3166_2_compact_gb_fr["GB"]["GB-ANS"]["latLng"], self.all_iso3166_2["GB"]["GB-ANS"]["latLng"], "Expected the same coordinates in compact data.")
+        self.assertEqual(test_iso3166_2_compact["US-CA"], self.all_iso3166_2["US-CA"], "Expected the same subdivision output from compact data.")
+        self.assertEqual(test_iso3166_2_compact["DE"], self.all_iso3166_2["DE"], "Expected the same country output from compact data.")
+        self.assertNotIn("GB-XYZ", test_iso3166_2_compact_gb_fr["GB"], "Expected invalid subdivision code to not be in compact data.")
+        self.assertNotIn("FR-75C", test_iso3166_2_compact_gb_fr["GB"], "Expected another country's subdivision code to not be in the country's compact data.")
+        with self.assertRaises(KeyError):
+            test_iso3166_2_compact_gb_fr["GB"]["FR-75C"]
+        with self.assertRaises(TypeError):
+            test_iso3166_2_compact.all["GB"]["GB-ANS"]["name"] = "Invalid"
+#3.)
+        self.assertEqual(test_iso3166_2_compact.subdivision_codes(), self.all_iso3166_2.subdivision_codes(), "Expected the same subdivision codes from compact data.")
+        self.assertEqual(test_iso3166_2_compact.subdivision_names("GB, FR"), self.all_iso3166_2.subdivision_names("GB, FR"), "Expected the same subdivision names from compact data.")
+        self.assertEqual(test_iso3166_2_compact.search("Texas, Meuse"), self.all_iso3166_2.search("Texas, Meuse"), "Expected the same search results from compact data.")
+        self.assertEqual(test_iso3166_2_compact.search("Southern", likeness_score=80, exclude_match_score=0), self.all_iso3166_2.search("Southern", likeness_score=80, exclude_match_score=0), 
+            "Expected the same search results from compact data.")
+#4.)
+        self.assertEqual(list(test_iso3166_2_compact_filter["IE"]["IE-C"]), ["name", "latLng"], f"Expected only name and latLng attributes, got {list(test_iso3166_2_compact_filter['IE']['IE-C'])}.")
+        self.assertEqual(list(test_iso3166_2_compact_filter["GB"]["GB-ANS"]), ["name", "latLng"], "Expected only name and latLng attributes for country loaded on access.")
+        self.assertIn("flag", test_iso3166_2_compact.all["IE"]["IE-C"], "Filtering attributes shouldn't change the shared compact data.")
+#5.)
+        with redirect_stdout(StringIO()):
+            test_iso3166_2_compact_gb_fr.remove_attributes(["history"])
+        self.assertNotIn("history", test_iso3166_2_compact_gb_fr.all["GB"]["GB-ANS"], "Expected history attribute to be removed from instance.")
+        self.assertIn("history", test_iso3166_2_compact.all["GB"]["GB-ANS"], "Removing attributes from one instance shouldn't change the shared compact data.")
+#6.)
+        compact_footprint = test_iso3166_2_compact.memory_footprint()
+        default_footprint = self.all_iso3166_2.memory_footprint()
+        self.assertEqual(compact_footprint["backend"], "compact", f"Expected compact backend, got {compact_footprint['backend']}.")
+        self.assertEqual(default_footprint["backend"], "dict", f"Expected dict backend, got {default_footprint['backend']}.")
+        self.assertEqual(compact_footprint["subdivisions"], len(self.all_iso3166_2), f"Expected {len(self.all_iso3166_2)} subdivisions, got {compact_footprint['subdivisions']}.")
+        self.assertLess(compact_footprint["bytes"], default_footprint["bytes"] * 0.7, 
+            f"Expected compact data to be at least 30% smaller than the default data, got {compact_footprint['bytes']} and {default_footprint['bytes']} bytes.")
+
+    # @unittest.skip("")
+    def test_reverse_geocode(self):
+        """ Testing the nearest subdivisions returned for coordinates via the spatial index, compared to calculating the distance to every subdivision. """
+        def haversine(lat_lng_1, lat_lng_2):
+            lat1, lng1, lat2, lng2 = map(math.radians, (*lat_lng_1, *lat_lng_2))
+            a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+            return 2 * 6371.0088 * math.asin(math.sqrt(a))
+
+        def nearest(lat_lng, k=1, radius_km=None):
+            distances = sorted((haversine(lat_lng, data["latLng"]), code) for country in self.all_iso3166_2.all.values() for code, data in country.items())
+            distances = [(distance, code) for distance, code in distances if radius_km is None or distance <= radius_km]
+            return [code for _, code in (distances if k is None else distances[:k])]
+
+        random.seed(13)
+        test_coordinates = [[random.uniform(-90, 90), random.uniform(-180, 180)] for _ in range(50)] + [[53.349, -6.260], [89.9, 179.9], [-33.9, 151.2]]
+#1.)
+        test_dublin = self.all_iso3166_2.reverse_geocode([53.349, -6.260])
+        self.assertEqual(len(test_dublin), 1, f"Expected 1 nearest subdivision, got {len(test_dublin)}.")
+        self.assertEqual(test_dublin[0]["subdivisionCode"], "IE-D", f"Expected nearest subdivision to be IE-D, got {test_dublin[0]['subdivisionCode']}.")
+        self.assertEqual(test_dublin[0]["countryCode"], "IE", f"Expected country code to be IE, got {test_dublin[0]['countryCode']}.")
+        self.assertEqual(test_dublin[0]["name"], "Dublin", f"Expected subdivision name to be Dublin, got {test_dublin[0]['name']}.")
+        self.assertAlmostEqual(test_dublin[0]["distance"], haversine([53.349, -6.260], test_dublin[0]["latLng"]), 2, "Expected distance to match the haversine distance.")
+#2.)
+        test_gb_ans = self.all_iso3166_2.reverse_geocode(self.all_iso3166_2["GB"]["GB-ANS"]["latLng"], k=3)
+        self.assertEqual(test_gb_ans[0]["subdivisionCode"], "GB-ANS", f"Expected nearest subdivision to its own coordinates to be GB-ANS, got {test_gb_ans[0]['subdivisionCode']}.")
+        self.assertEqual(test_gb_ans[0]["distance"], 0, f"Expected distance of 0, got {test_gb_ans[0]['distance']}.")
+        self.assertEqual([result["distance"] for result in test_gb_ans], sorted(result["distance"] for result in test_gb_ans), "Expected results to be sorted by distance.")
+#3.)
+        for lat_lng in test_coordinates:
+            for k, radius_km in ((1, None), (5, None), (None, 500), (3, 250)):
+                self.assertEqual([result["subdivisionCode"] for result in self.all_iso3166_2.reverse_geocode(lat_lng, k=k, radius_km=radius_km)], nearest(lat_lng, k, radius_km), 
+                    f"Expected nearest subdivisions of {lat_lng} with k={k} and radius_km={radius_km} to match the distance to every subdivision.")
+#4.)
+        for k, radius_km in ((1, None), (4, None), (None, 300), (2, 1000)):
+            expected_results = [self.all_iso3166_2.reverse_geocode(lat_lng, k=k, radius_km=radius_km) for lat_lng in test_coordinates]
+            self.assertEqual(self.all_iso3166_2.reverse_geocode_batch(test_coordinates, k=k, radius_km=radius_km), expected_results, "Expected batch results to match the individual results.")
+            self.assertEqual(self.all_iso3166_2.reverse_geocode_batch(test_coordinates, k=k, radius_km=radius_km, vectorized=False), expected_results, "Expected batch results to match the individual results.")
+        self.assertEqual(self.all_iso3166_2.reverse_geocode_batch([]), [], "Expected no results for empty input.")
+#5.)
+        test_iso3166_2_ie = Subdivisions("IE")
+        self.assertEqual(test_iso3166_2_ie.reverse_geocode([51.5, -0.12])[0]["countryCode"], "IE", "Expected only subdivisions of the instance's countries to be returned.")
+        self.assertEqual(test_iso3166_2_ie.reverse_geocode([53.349, -6.260], k=None, radius_km=0.1), [], "Expected no subdivisions within the radius.")
+#6.)
+        with self.assertRaises(TypeError):
+            self.all_iso3166_2.reverse_geocode("53.349, -6.260")
+        with self.assertRaises(TypeError):
+            self.all_iso3166_2.reverse_geocode_batch([[53.349, -6.260], [53.349]])
+        with self.assertRaises(ValueError):
+            self.all_iso3166_2.reverse_geocode([91, 0])
+        with self.assertRaises(ValueError):
+            self.all_iso3166_2.reverse_geocode([0, 0], k=0)
+        with self.assertRaises(ValueError):
+            self.all_iso3166_2.reverse_geocode([0, 0], k=None)
+        with self.assertRaises(ValueError):
+            self.all_iso3166_2.reverse_geocode([0, 0], radius_km=-1)
+        with self.assertRaises(ValueError):
+            Subdivisions("IE", filter_attributes="name").reverse_geocode([53.349, -6.260])
+
+    # @unittest.skip("")
+    def test_check_for_updates_shards(self):
+        """ Testing checking for updates only pulls the manifest, via conditional requests, and the changed shards, from a local HTTP server. """
+        class ETagHandler(SimpleHTTPRequestHandler):
+            """ Request handler serving the test repo directory, supporting ETag & If-None-Match and logging each request. """
+            def do_GET(self):
+                filepath = self.translate_path(self.path)
+                if not (os.path.isfile(filepath)):
+                    requests_log.append((self.path, 404))
+                    return self.send_error(404)
+                with open(filepath, "rb") as fp:
+                    content = fp.read()
+                etag = '"' + hashlib.sha256(content).hexdigest() + '"'
+                if (self.headers.get("If-None-Match") == etag):
+                    requests_log.append((self.path, 304))
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                requests_log.append((self.path, 200))
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def do_HEAD(self):
+                filepath = self.translate_path(self.path)
+                if not (os.path.isfile(filepath)):
+                    requests_log.append((self.path, "HEAD 404"))
+                    return self.send_error(404)
+                with open(filepath, "rb") as fp:
+                    content = fp.read()
+                requests_log.append((self.path, "HEAD 200"))
+                self.send_response(200)
+                self.send_header("ETag", '"' + hashlib.sha256(content).hexdigest() + '"')
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        #test repo with a changed subdivision in Andorra and a new subdivision in Ireland
+        test_repo_dir = os.path.join(self.test_output_dir, "repo")
+        test_cache_dir = os.path.join(self.test_output_dir, "update_cache")
+        os.makedirs(test_repo_dir)
+        latest_iso3166_2 = json.loads(json.dumps(self.all_iso3166_2.all))
+        latest_iso3166_2["AD"]["AD-02"]["name"] = "Canillo Updated"
+        latest_iso3166_2["IE"]["IE-BF"] = {"name": "Belfast", "localOtherName": None, "type": "Province", "parentCode": None, "flag": None, "latLng": [54.596, -5.931], "history": None}
+        with open(os.path.join(test_repo_dir, "iso3166-2.json"), "w", encoding="utf-8") as output_json:
+            json.dump(latest_iso3166_2, output_json, ensure_ascii=False)
+        Subdivisions.build_shards(os.path.join(test_repo_dir, "iso3166-2.json"))
+
+        requests_log = []
+        test_server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(ETagHandler, directory=test_repo_dir))
+        threading.Thread(target=test_server.serve_forever, daemon=True).start()
+        test_base_url = f"http://127.0.0.1:{test_server.server_address[1]}/"
+        try:
+#1.)
+            with redirect_stdout(StringIO()) as output:
+                test_updates = self.all_iso3166_2.check_for_updates(base_url=test_base_url, cache_dir=test_cache_dir)
+            self.assertEqual(list(test_updates), ["AD", "IE"], f"Expected updates for AD and IE, got {list(test_updates)}.")
+            self.assertEqual(list(test_updates["AD"]), ["AD-02"], f"Expected update for AD-02, got {list(test_updates['AD'])}.")
+            self.assertEqual(test_updates["AD"]["AD-02"]["name"], "Canillo Updated", f"Expected updated name for AD-02, got {test_updates['AD']['AD-02']['name']}.")
+            self.assertEqual(list(test_updates["IE"]), ["IE-BF"], f"Expected new IE-BF subdivision, got {list(test_updates['IE'])}.")
+            self.assertIn("2 update(s) found for 2 country/countries", output.getvalue(), f"Expected updates to be output, got:\n{output.getvalue()}.")
+            self.assertEqual(sorted(requests_log, key=str), [("/iso3166-2-shards/AD.json", 200), ("/iso3166-2-shards/IE.json", 200), ("/iso3166-2-shards/manifest.json", 200), ("/iso3166-2.json", "HEAD 200")], 
+                f"Expected only the manifest and changed shards to be pulled, got {requests_log}.")
+#2.)
+            requests_log.clear()
+            with redirect_stdout(StringIO()):
+                self.assertEqual(self.all_iso3166_2.check_for_updates(base_url=test_base_url, cache_dir=test_cache_dir), test_updates, "Expected the same updates to be found.")
+            self.assertEqual(requests_log, [("/iso3166-2-shards/manifest.json", 304), ("/iso3166-2.json", "HEAD 200")], f"Expected only a conditional request for the unchanged manifest, got {requests_log}.")
+#3.)
+            requests_log.clear()
+            with redirect_stdout(StringIO()) as output:
+                self.assertEqual(Subdivisions(iso3166_2_filepath=os.path.join(test_repo_dir, "iso3166-2.json")).check_for_updates(base_url=test_base_url, cache_dir=test_cache_dir), {}, 
+                    "Expected no updates for data in sync with the repo.")
+            self.assertIn("No new updates found", output.getvalue(), f"Expected no updates to be output, got:\n{output.getvalue()}.")
+            self.assertEqual(requests_log, [("/iso3166-2-shards/manifest.json", 304), ("/iso3166-2.json", "HEAD 200")], f"Expected no shards to be pulled, got {requests_log}.")
+#4.)
+            stale_iso3166_2 = json.loads(json.dumps(latest_iso3166_2))
+            stale_iso3166_2["AD"]["AD-03"]["name"] = "Encamp Updated"
+            with open(os.path.join(test_repo_dir, "iso3166-2.json"), "w", encoding="utf-8") as output_json:
+                json.dump(stale_iso3166_2, output_json, ensure_ascii=False)
+            requests_log.clear()
+            with redirect_stdout(StringIO()):
+                test_stale_updates = self.all_iso3166_2.check_for_updates(base_url=test_base_url, cache_dir=test_cache_dir)
+            self.assertEqual(list(test_stale_updates["AD"]), ["AD-02", "AD-03"], f"Expected updates from the JSON, not the stale shards, got {list(test_stale_updates['AD'])}.")
+            self.assertEqual(requests_log, [("/iso3166-2-shards/manifest.json", 304), ("/iso3166-2.json", "HEAD 200"), ("/iso3166-2.json", 200)], 
+                f"Expected the full data object to be pulled when the manifest is out of sync with it, got {requests_log}.")
+            with open(os.path.join(test_repo_dir, "iso3166-2.json"), "w", encoding="utf-8") as output_json:
+                json.dump(latest_iso3166_2, output_json, ensure_ascii=False)
+#5.)
+            shutil.rmtree(os.path.join(test_repo_dir, "iso3166-2-shards"))
+            requests_log.clear()
+            with redirect_stdout(StringIO()):
+                self.assertEqual(self.all_iso3166_2.check_for_updates(base_url=test_base_url, cache_dir=test_cache_dir), test_updates, "Expected the same updates from the full data object.")
+            self.assertEqual(requests_log, [("/iso3166-2-shards/manifest.json", 404), ("/iso3166-2.json", 200)], f"Expected the full data object to be pulled, got {requests_log}.")
+        finally:
+            test_server.shutdown()
+            test_server.server_close()
+#6.)
+        with redirect_stdout(StringIO()) as output:
+            self.assertIsNone(self.all_iso3166_2.check_for_updates(base_url=test_base_url, cache_dir=test_cache_dir), "Expected None when the repo can't be reached.")
+        self.assertIn("Failed to fetch the latest updates data", output.getvalue(), f"Expected error to be output, got:\n{output.getvalue()}.")
+
+    # @unittest.skip("")
+    def test_snapshot(self):
+        """ Testing the binary snapshot of the dataset is loaded instead of the JSON, unless it's stale. """
+        from iso3166_2.iso3166_2 import _dataset_store, _load_snapshot, _parse_json, _Dataset
+
+        def dataset_info(filepath):
+            return [dataset for dataset in Subdivisions.dataset_cache_info() if (dataset["filepath"], dataset["mtime"], dataset["size"]) == _dataset_store._key(filepath)][0]
+
+        test_iso3166_2_copy = os.path.join(self.test_output_dir, "iso3166_2_snapshot_copy.json")
+        shutil.copyfile(self.all_iso3166_2.iso3166_2_module_path, test_iso3166_2_copy)
+        test_snapshot_filepath = Subdivisions.build_snapshot(test_iso3166_2_copy)
+#1.)
+        self.assertEqual(test_snapshot_filepath, os.path.realpath(os.path.join(self.test_output_dir, "iso3166_2_snapshot_copy.snapshot")), f"Expected snapshot to be exported next to the JSON, got {test_snapshot_filepath}.")
+        self.assertTrue(os.path.isfile(test_snapshot_filepath), f"Expected snapshot to be exported to {test_snapshot_filepath}.")
+#2.)
+        test_iso3166_2_snapshot = Subdivisions(iso3166_2_filepath=test_iso3166_2_copy)
+        self.assertTrue(dataset_info(test_iso3166_2_copy)["snapshot"], "Expected dataset to be loaded from its snapshot.")
+        self.assertEqual(test_iso3166_2_snapshot.all, self.all_iso3166_2.all, "Expected data loaded from the snapshot to equal the data parsed from the JSON.")
+        self.assertEqual(test_iso3166_2_snapshot["GB"]["GB-ANS"].name, "Angus", "Expected data loaded from the snapshot to be accessible as normal.")
+        self.assertEqual(Subdivisions(iso3166_2_filepath=test_iso3166_2_copy, compact=True).all, self.all_iso3166_2.all, "Expected compact data to be built from the snapshot.")
+#3.)
+        dataset_key = _dataset_store._key(test_iso3166_2_copy)
+        with patch("iso3166_2.iso3166_2._parse_json", wraps=_parse_json) as parse_json:
+            snapshot_data = _Dataset(dataset_key).load_all()
+        parse_json.assert_not_called()
+        self.assertEqual(snapshot_data, self.all_iso3166_2.all, "Expected the full dataset to be loaded from the snapshot without parsing the JSON.")
+#4.)
+        with patch("iso3166_2.iso3166_2.__version__", "0.0.0"):
+            self.assertIsNone(_load_snapshot(dataset_key), "Expected snapshot of a different software version to be ignored.")
+        with open(test_iso3166_2_copy, "a", encoding="utf-8") as output_json:
+            output_json.write("\n")
+        self.assertIsNone(_load_snapshot(_dataset_store._key(test_iso3166_2_copy)), "Expected stale snapshot to be ignored.")
+        Subdivisions(iso3166_2_filepath=test_iso3166_2_copy)
+        self.assertFalse(dataset_info(test_iso3166_2_copy)["snapshot"], "Expected JSON to be parsed when the snapshot is stale.")
+#5.)
+        Subdivisions.build_snapshot(test_iso3166_2_copy)
+        with open(test_snapshot_filepath, "r+b") as snapshot:
+            snapshot.truncate(1000)
+        self.assertIsNone(_load_snapshot(_dataset_store._key(test_iso3166_2_copy)), "Expected corrupted snapshot to be ignored.")
+
+    # @unittest.skip("")
+    def test_projected_loading(self):
+        """ Testing the attributes excluded via filter_attributes are never loaded into the dataset, from the JSON or its snapshot. """
+        from iso3166_2.iso3166_2 import _dataset_store, _load_snapshot, _parse_json
+
+        def expected_data(attributes):
+            return {alpha_code: {code: {attr: val for attr, val in subdivision.items() if attr in attributes} for code, subdivision in country_data.items()} 
+                    for alpha_code, country_data in self.all_iso3166_2.all.items()}
+
+        test_iso3166_2_copy = os.path.join(self.test_output_dir, "iso3166_2_projection_copy.json")
+        shutil.copyfile(self.all_iso3166_2.iso3166_2_module_path, test_iso3166_2_copy)
+        full_iso3166_2 = Subdivisions(iso3166_2_filepath=test_iso3166_2_copy)
+#1.)
+        test_iso3166_2_name_type = Subdivisions(iso3166_2_filepath=test_iso3166_2_copy, filter_attributes="name,type")
+        self.assertEqual(test_iso3166_2_name_type.all, expected_data(["name", "type"]), "Expected data to only include the name and type attributes.")
+        self.assertIsNot(test_iso3166_2_name_type._dataset, full_iso3166_2._dataset, "Expected filtered instance to use a projection of the dataset.")
+        self.assertEqual(full_iso3166_2.all, self.all_iso3166_2.all, "Expected the full dataset to be unchanged by the projection.")
+        self.assertEqual(dict(Subdivisions("DE", iso3166_2_filepath=test_iso3166_2_copy, filter_attributes="name")["FR"]["FR-75C"]), {"name": "Paris"}, 
+                "Expected country loaded on first access to exclude the filtered attributes.")
+#2.)
+        self.assertIs(Subdivisions(iso3166_2_filepath=test_iso3166_2_copy, filter_attributes="type, name")._dataset, test_iso3166_2_name_type._dataset, 
+                "Expected instances with the same filtered attributes to share the projection of the dataset.")
+        dataset_info = [dataset for dataset in Subdivisions.dataset_cache_info() if (dataset["filepath"], dataset["mtime"], dataset["size"]) == _dataset_store._key(test_iso3166_2_copy)][0]
+        self.assertEqual(dataset_info["projections"], 2, f"Expected two projections of the dataset, got {dataset_info['projections']}.")
+#3.)
+        dataset_key = _dataset_store._key(test_iso3166_2_copy)
+        self.assertEqual(_parse_json(test_iso3166_2_copy, ("flag", "history")), expected_data(["name", "localOtherName", "type", "parentCode", "latLng"]), 
+                "Expected parsed JSON to exclude the removed attributes.")
+        Subdivisions.build_snapshot(test_iso3166_2_copy)
+        self.assertEqual(_load_snapshot(dataset_key, ("flag", "history")), expected_data(["name", "localOtherName", "type", "parentCode", "latLng"]), 
+                "Expected data loaded from the snapshot to exclude the removed attributes.")
+        self.assertEqual(Subdivisions(iso3166_2_filepath=test_iso3166_2_copy, filter_attributes="latLng").all, expected_data(["latLng"]), 
+                "Expected projection loaded from the snapshot to only include the latLng attribute.")
+        #the header, layout and irregular keys segments are always loaded, plus one segment per attribute column loaded
+        with patch("iso3166_2.iso3166_2.marshal.loads", wraps=marshal.loads) as marshal_loads:
+            _load_snapshot(dataset_key, ("localOtherName", "type", "parentCode", "latLng", "flag", "history"))
+        self.assertEqual(marshal_loads.call_count, 3 + 1, f"Expected only the name column of the snapshot to be loaded, got {marshal_loads.call_count} segments.")
+        with patch("iso3166_2.iso3166_2.marshal.loads", wraps=marshal.loads) as marshal_loads:
+            _load_snapshot(dataset_key)
+        self.assertEqual(marshal_loads.call_count, 3 + 7, f"Expected every column of the snapshot to be loaded in full, got {marshal_loads.call_count} segments.")
+#4.)
+        test_iso3166_2_compact = Subdivisions(iso3166_2_filepath=test_iso3166_2_copy, filter_attributes="name,type", compact=True)
+        self.assertEqual(test_iso3166_2_compact.all, expected_data(["name", "type"]), "Expected compact data to only include the name and type attributes.")
+
+    # @unittest.skip("")
+    def test_import_time(self):
+        """ Testing the software's import only imports the standard library and parses no data, with its dependencies only imported on first use. """
+        lazy_modules = ["thefuzz", "requests", "natsort", "pprint", "pycountry", "concurrent.futures"]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(os.path.dirname(os.path.abspath(sys.modules["iso3166_2"].__file__))), os.environ.get("PYTHONPATH")])))
+
+        def run_python(code, *args):
+            return subprocess.run([sys.executable, *args, "-c", code], capture_output=True, text=True, env=env, check=True)
+#1.)
+        imported_modules = run_python("import sys; modules = set(sys.modules); from iso3166_2 import Subdivisions; "
+                                      "print(sorted({module.split('.')[0] for module in set(sys.modules) - modules} - set(sys.stdlib_module_names) - {'iso3166_2'}))").stdout.strip()
+        self.assertEqual(imported_modules, "[]", f"Expected only the standard library to be imported with the software, got {imported_modules}.")
+        dataset_info = run_python("from iso3166_2 import Subdivisions; print(Subdivisions.dataset_cache_info())").stdout.strip()
+        self.assertEqual(dataset_info, "[]", f"Expected no data to be parsed when importing the software, got {dataset_info}.")
+#2.)
+        imported_modules = run_python(f"import sys; from iso3166_2 import Subdivisions; print([module for module in {lazy_modules} if module in sys.modules])").stdout.strip()
+        self.assertEqual(imported_modules, "[]", f"Expected none of the lazily imported modules to be imported with the software, got {imported_modules}.")
+#3.)
+        imported_modules = run_python("import sys; from iso3166_2 import Subdivisions; Subdivisions('GB').search('Angus'); print(sorted(module for module in ['thefuzz', 'pycountry', 'requests'] if module in sys.modules))").stdout.strip()
+        self.assertEqual(imported_modules, "['pycountry', 'thefuzz']", f"Expected only the modules required by the features used to be imported, got {imported_modules}.")
+
+    # @unittest.skip("")
+    def test_hierarchy(self):
+        """ Testing the children, descendants and ancestors functions return the hierarchy of subdivisions via their parentCode attribute. """
+        from iso3166_2.iso3166_2 import _HierarchyIndex
+#1.)
+        fr_ara_children = self.all_iso3166_2.children("FR-ARA")
+        self.assertEqual(fr_ara_children, ['FR-01', 'FR-03', 'FR-07', 'FR-15', 'FR-26', 'FR-38', 'FR-42', 'FR-43', 'FR-63', 'FR-69', 'FR-69M', 'FR-73', 'FR-74'], 
+                f"Expected observed and expected children of FR-ARA to match, got {fr_ara_children}.")
+        self.assertEqual(self.all_iso3166_2.children("FR-01"), [], "Expected no children of FR-01.")
+        self.assertEqual(self.all_iso3166_2.children("fra"), [code for code, data in self.all_iso3166_2["FR"].items() if (data.parentCode is None)], "Expected the top-level subdivisions of France.")
+        self.assertEqual(self.all_iso3166_2["FR"].children("FR-ARA"), fr_ara_children, "Expected the children via the country's view to match.")
+#2.)
+        self.assertEqual(self.all_iso3166_2.ancestors("GB-CHE"), ["GB-ENG"], f"Expected ancestors of GB-CHE to be GB-ENG, got {self.all_iso3166_2.ancestors('GB-CHE')}.")
+        self.assertEqual(self.all_iso3166_2.ancestors("GB-ENG"), [], "Expected no ancestors of GB-ENG.")
+        self.assertEqual(self.all_iso3166_2["FR"].ancestors("FR-01"), ["FR-ARA"], "Expected ancestors of FR-01 via the country's view to be FR-ARA.")
+#3.)
+        for alpha_code in ["GB", "FR", "PL", "ES", "IT"]:
+            country_data = self.all_iso3166_2[alpha_code]
+            for code in country_data:
+                expected_descendants, parents = set(), [code]
+                while (parents):
+                    parent = parents.pop()
+                    parent_children = [child for child, data in country_data.items() if (data.parentCode == parent)]
+                    expected_descendants.update(parent_children)
+                    parents.extend(parent_children)
+                descendants = self.all_iso3166_2.descendants(code)
+                self.assertEqual((len(descendants), set(descendants)), (len(expected_descendants), expected_descendants), f"Expected observed and expected descendants of {code} to match.")
+                for descendant in descendants:
+                    self.assertIn(code, self.all_iso3166_2.ancestors(descendant), f"Expected {code} to be an ancestor of its descendant {descendant}.")
+            self.assertEqual(sorted(country_data.descendants()), sorted(country_data), f"Expected the descendants of {alpha_code} to be all of its subdivisions.")
+#4.)
+        hierarchy = _HierarchyIndex({"XX-A": {"parentCode": "XX-B"}, "XX-B": {"parentCode": "XX-A"}, "XX-C": {"parentCode": "XX-A"}, "XX-D": {"parentCode": None}, "XX-E": {"parentCode": "XX-Z"}})
+        self.assertEqual(hierarchy.order, ("XX-D", "XX-E", "XX-A", "XX-B", "XX-C"), f"Expected cycle and missing parents to be treated as top-level subdivisions, got {hierarchy.order}.")
+        self.assertEqual(hierarchy.children, {None: ("XX-D", "XX-E", "XX-A"), "XX-A": ("XX-B", "XX-C")}, f"Expected observed and expected children to match, got {hierarchy.children}.")
+        self.assertEqual(hierarchy.ends, (1, 2, 5, 4, 5), f"Expected observed and expected end positions to match, got {hierarchy.ends}.")
+#5.)
+        test_iso3166_2_copy = os.path.join(self.test_output_dir, "iso3166_2_hierarchy_copy.json")
+        test_iso3166_2 = Subdivisions("FR", iso3166_2_filepath=self.all_iso3166_2.iso3166_2_module_path)
+        test_iso3166_2.custom_subdivision("FR", "FR-XYZ", name="Test", local_other_name="", type_="department", lat_lng=[45.0, 5.0], parent_code="FR-ARA", 
+                save_new=True, save_new_filename=test_iso3166_2_copy)
+        self.assertIn("FR-XYZ", test_iso3166_2.children("FR-ARA"), "Expected custom subdivision to be included in the children of its parent.")
+        self.assertNotIn("FR-XYZ", self.all_iso3166_2.children("FR-ARA"), "Expected custom subdivision to not be included in the children of another instance.")
+        self.assertEqual(Subdivisions(compact=True).descendants("GB-ENG"), self.all_iso3166_2.descendants("GB-ENG"), "Expected the descendants via the compact representation to match.")
+        self.assertEqual(Subdivisions("DE").children("FR-ARA"), fr_ara_children, "Expected the children of a country not input on instantiation to be loaded on first access.")
+#6.)
+        with self.assertRaises(ValueError):
+            self.all_iso3166_2.children("FR-XXX")
+        with self.assertRaises(ValueError):
+            self.all_iso3166_2.descendants("ZZ")
+        with self.assertRaises(ValueError):
+            self.all_iso3166_2.ancestors("FR")
+        with self.assertRaises(ValueError):
+            Subdivisions(filter_attributes="name").children("FR-ARA")
+        with self.assertRaises(TypeError):
+            self.all_iso3166_2.children(1234)
+
+    # @unittest.skip("")
+    def test_query(self):
+        """ Testing the query function returns the subdivisions matching all of the predicates, equal to filtering the data directly. """
+        def expected_codes(predicate):
+            return [code for alpha_code, country_data in self.all_iso3166_2.all.items() for code, data in country_data.items() if (predicate(alpha_code, data))]
+#1.)
+        test_queries = [
+            ({"type_": ["State", "Province"]}, lambda alpha_code, data: (data["type"] or "").lower() in ("state", "province")),
+            ({"type_": "state", "country_code": "USA"}, lambda alpha_code, data: alpha_code == "US" and data["type"] == "State"),
+            ({"country_code": "FR,ES", "has_flag": False}, lambda alpha_code, data: alpha_code in ("FR", "ES") and not data["flag"]),
+            ({"parent_code": "FR-ARA", "lng_range": (4, 6)}, lambda alpha_code, data: data["parentCode"] == "FR-ARA" and 4 <= data["latLng"][1] <= 6),
+            ({"has_flag": True, "lat_range": (-90, 0)}, lambda alpha_code, data: bool(data["flag"]) and data["latLng"] and data["latLng"][0] <= 0),
+            ({"has_history": True, "lat_range": (40, 50), "lng_range": (-5, 10)}, lambda alpha_code, data: bool(data["history"]) and data["latLng"] and 40 <= data["latLng"][0] <= 50 and -5 <= data["latLng"][1] <= 10),
+            ({"type_": "State", "parent_code": "FR-ARA"}, lambda alpha_code, data: False),
+            ({}, lambda alpha_code, data: True)
+        ]
+        for predicates, predicate in test_queries:
+            self.assertEqual(list(self.all_iso3166_2.query(**predicates)), expected_codes(predicate), f"Expected observed and expected query results to match for predicates {predicates}.")
+#2.)
+        test_query_results = self.all_iso3166_2.query(parent_code="FR-ARA")
+        self.assertIsInstance(test_query_results, QueryResults, f"Expected query results to be a QueryResults object, got {type(test_query_results)}.")
+        self.assertEqual(len(test_query_results), 13, f"Expected 13 subdivisions with the parent FR-ARA, got {len(test_query_results)}.")
+        self.assertEqual(test_query_results["FR-01"].name, "Ain", f"Expected name of FR-01 to be Ain, got {test_query_results['FR-01'].name}.")
+        self.assertIn("FR-74", test_query_results, "Expected FR-74 to be in the query results.")
+        self.assertNotIn("FR-75C", test_query_results, "Expected FR-75C to not be in the query results.")
+        self.assertEqual(test_query_results.country_codes(), ["FR"], f"Expected country of the query results to be FR, got {test_query_results.country_codes()}.")
+        self.assertIs(self.all_iso3166_2._query_index(), Subdivisions()._query_index(), "Expected query index to be shared by instances with the same data.")
+        with self.assertRaises(KeyError):
+            test_query_results["GB-ENG"]
+        with self.assertRaises(AttributeError):
+            test_query_results.test = 1
+#3.)
+        self.assertEqual(list(Subdivisions(compact=True).query(type_="state", has_flag=True)), list(self.all_iso3166_2.query(type_="State", has_flag=True)), 
+                "Expected query results via the compact representation to match.")
+        self.assertEqual(list(Subdivisions("GB,IE").query(type_="county")), expected_codes(lambda alpha_code, data: alpha_code in ("GB", "IE") and data["type"] == "County"), 
+                "Expected query results to only include the instance's countries.")
+        test_iso3166_2_copy = os.path.join(self.test_output_dir, "iso3166_2_query_copy.json")
+        test_iso3166_2 = Subdivisions("IE")
+        test_iso3166_2.custom_subdivision("IE", "IE-XY", name="Test", local_other_name="", type_="County", lat_lng=[53.0, -8.0], save_new=True, save_new_filename=test_iso3166_2_copy)
+        self.assertIn("IE-XY", test_iso3166_2.query(type_="county"), "Expected custom subdivision to be included in the query results.")
+#4.)
+        with self.assertRaises(ValueError):
+            self.all_iso3166_2.query(country_code="ZZ")
+        with self.assertRaises(ValueError):
+            self.all_iso3166_2.query(lat_range=(10, -10))
+        with self.assertRaises(ValueError):
+            Subdivisions(filter_attributes="name").query(type_="State")
+        with self.assertRaises(TypeError):
+            self.all_iso3166_2.query(has_flag="yes")
+        with self.assertRaises(TypeError):
+            self.all_iso3166_2.query(lng_range=10)
+
     # @unittest.skip("")
     def test_len(self):
         """ Testing length functionality that outputs the total number of subdivision objects. """
@@ -395,6 +983,15 @@ class ISO3166_2_Unit_Tests(unittest.TestCase):
             self.all_iso3166_2.convert_to_alpha2("ZZ")
         with self.assertRaises(ValueError):
             self.all_iso3166_2.convert_to_alpha2("XYZ")
+#5.)
+        #the alpha-2, alpha-3 and numeric codes are converted via the lookup tables, which are only built from pycountry once
+        from iso3166_2.iso3166_2 import _country_codes
+        _country_codes.cache_clear()
+        test_alpha_codes = ["DEU", "826", "FR", "gbr", " 392 "] * 2000
+        self.assertEqual([self.all_iso3166_2.convert_to_alpha2(code) for code in test_alpha_codes], ["DE", "GB", "FR", "GB", "JP"] * 2000, "Expected each alpha code to be converted via the lookup tables.")
+        lookups_cache_info = _country_codes.cache_info()
+        self.assertEqual(lookups_cache_info.misses, 1, f"Expected the lookup tables to be built once, got {lookups_cache_info.misses} builds.")
+        self.assertEqual(lookups_cache_info.hits, len(test_alpha_codes) - 1, f"Expected every other conversion to reuse the lookup tables, got {lookups_cache_info.hits} hits.")
 
     # @unittest.skip("")
     def test_multiple_country_initialization(self):
@@ -464,6 +1061,112 @@ class ISO3166_2_Unit_Tests(unittest.TestCase):
         with self.assertRaises(ValueError):
             Subdivisions("FR, INVALID, DE")
 
+    # @unittest.skip("")
+    def test_dataset_store(self):
+        """ Testing the parsed ISO 3166-2 dataset is shared between instances of the class via the dataset store. """
+        test_iso3166_2_ie = Subdivisions("IE")
+        test_iso3166_2_ie_fr = Subdivisions("IE, FR")
+#1.)
+        self.assertIs(test_iso3166_2_ie.all["IE"], self.all_iso3166_2.all["IE"], "Instances should share the same parsed country data.")
+        self.assertIs(test_iso3166_2_ie_fr.all["FR"], self.all_iso3166_2.all["FR"], "Instances should share the same parsed country data.")
+#2.)
+        dataset_info = [dataset for dataset in Subdivisions.dataset_cache_info() if dataset["filepath"] == os.path.realpath(self.all_iso3166_2.iso3166_2_module_path)]
+        self.assertEqual(len(dataset_info), 1, f"Expected one dataset in the store for the default data file, got:\n{dataset_info}.")
+        self.assertGreaterEqual(dataset_info[0]["refCount"], 3, f"Expected dataset to be referenced by at least 3 instances, got {dataset_info[0]['refCount']}.")
+        self.assertEqual(dataset_info[0]["countries"], len(self.all_iso3166_2.all), f"Expected all countries in the dataset, got {dataset_info[0]['countries']}.")
+        self.assertGreater(dataset_info[0]["parseTime"], 0, "Expected dataset parse time to be recorded.")
+#3.)
+        with redirect_stdout(StringIO()):
+            test_iso3166_2_ie.remove_attributes(["flag", "history"])
+        self.assertNotIn("flag", test_iso3166_2_ie.all["IE"]["IE-C"], "Expected flag attribute to be removed from instance.")
+        self.assertIn("flag", self.all_iso3166_2.all["IE"]["IE-C"], "Removing attributes from one instance shouldn't change the shared dataset.")
+        self.assertIn("history", Subdivisions("IE").all["IE"]["IE-C"], "Removing attributes from one instance shouldn't change the shared dataset.")
+#4.)
+        test_iso3166_2_filter = Subdivisions("IE", filter_attributes="name")
+        self.assertEqual(list(test_iso3166_2_filter.all["IE"]["IE-C"].keys()), ["name"], "Expected only name attribute in filtered instance.")
+        self.assertIn("type", self.all_iso3166_2.all["IE"]["IE-C"], "Filtering attributes shouldn't change the shared dataset.")
+#5.)
+        test_iso3166_2_copy = os.path.join(self.test_output_dir, "iso3166_2_store_copy.json")
+        with open(test_iso3166_2_copy, "w", encoding="utf-8") as output_json:
+            json.dump({"IE": self.all_iso3166_2.all["IE"]}, output_json, ensure_ascii=False)
+        test_iso3166_2_custom = Subdivisions(iso3166_2_filepath=test_iso3166_2_copy)
+        self.assertIsNot(test_iso3166_2_custom.all["IE"], self.all_iso3166_2.all["IE"], "Different data files should be parsed separately.")
+        with redirect_stdout(StringIO()):
+            test_iso3166_2_custom.custom_subdivision("IE", "IE-BF", name="Belfast", type_="Province")
+        self.assertIn("IE-BF", Subdivisions(iso3166_2_filepath=test_iso3166_2_copy).all["IE"], "Modified data file should be re-parsed.")
+        self.assertNotIn("IE-BF", self.all_iso3166_2.all["IE"], "Custom subdivision shouldn't be added to the shared default dataset.")
+#6.)
+        test_iso3166_2_gb = Subdivisions()
+        with self.assertRaises(TypeError):
+            test_iso3166_2_gb["GB"]["GB-ANS"].latLng[0] = 999.0
+        with self.assertRaises(TypeError):
+            test_iso3166_2_gb["GB-ANS"].latLng.append(999.0)
+        with self.assertRaises(TypeError):
+            test_iso3166_2_gb.all["GB"]["GB-ANS"]["name"] = "Invalid"
+        with self.assertRaises(TypeError):
+            test_iso3166_2_gb.all["GB"]["GB-XYZ"] = {"name": "Invalid"}
+        with self.assertRaises(TypeError):
+            test_iso3166_2_gb.search("Angus")["GB"]["GB-ANS"]["latLng"][0] = 999.0
+        test_iso3166_2_gb.all["GB"] = {}
+        self.assertEqual(self.all_iso3166_2["GB"]["GB-ANS"].latLng, [56.6667, -2.9167], "Mutating one instance's data shouldn't change another instance's data.")
+        self.assertEqual(self.all_iso3166_2.all["GB"]["GB-ANS"]["name"], "Angus", "Mutating one instance's data shouldn't change another instance's data.")
+        self.assertNotIn("GB-XYZ", Subdivisions("GB").all["GB"], "Mutating one instance's data shouldn't change the shared dataset.")
+        with redirect_stdout(StringIO()):
+            test_iso3166_2_ie.remove_attributes(["name"])
+        test_iso3166_2_ie.all["IE"]["IE-C"]["latLng"][0] = 999.0
+        self.assertNotEqual(self.all_iso3166_2["IE"]["IE-C"].latLng[0], 999.0, "Changing an instance's own copy of a country's data shouldn't change the shared dataset.")
+
+    # @unittest.skip("")
+    def test_shards(self):
+        """ Testing the sharded per-country layout of the dataset and the lazy loading of countries. """
+        test_iso3166_2_copy = os.path.join(self.test_output_dir, "iso3166_2_shards_copy.json")
+        test_iso3166_2_shards = os.path.join(self.test_output_dir, "iso3166_2_shards_copy-shards")
+        with open(test_iso3166_2_copy, "w", encoding="utf-8") as output_json:
+            json.dump({code: self.all_iso3166_2.all[code] for code in ["AD", "DE", "FR", "IE"]}, output_json, ensure_ascii=False, indent=4)
+#1.)
+        self.assertEqual(Subdivisions.build_shards(test_iso3166_2_copy), test_iso3166_2_shards, "Expected shards to be exported next to the JSON.")
+        self.assertEqual(sorted(os.listdir(test_iso3166_2_shards)), ["AD.json", "DE.json", "FR.json", "IE.json", "manifest.json"], 
+            f"Expected one shard per country and a manifest, got:\n{os.listdir(test_iso3166_2_shards)}.")
+        with open(os.path.join(test_iso3166_2_shards, "manifest.json"), encoding="utf-8") as manifest_json:
+            manifest = json.load(manifest_json)
+        self.assertEqual(manifest["countries"]["AD"]["subdivisions"], 7, f"Expected 7 subdivisions for AD in manifest, got {manifest['countries']['AD']['subdivisions']}.")
+#2.)
+        test_iso3166_2_ad = Subdivisions("AD", iso3166_2_filepath=test_iso3166_2_copy)
+        dataset_info = [dataset for dataset in Subdivisions.dataset_cache_info() if dataset["filepath"] == os.path.realpath(test_iso3166_2_copy)][0]
+        self.assertTrue(dataset_info["sharded"], "Expected dataset to be loaded via its shards.")
+        self.assertFalse(dataset_info["fullyParsed"], "Expected only the AD shard to be parsed, not the full JSON.")
+        self.assertEqual(dataset_info["countries"], 1, f"Expected only 1 country to be parsed, got {dataset_info['countries']}.")
+        self.assertEqual(test_iso3166_2_ad.all, {"AD": self.all_iso3166_2.all["AD"]}, "Expected AD data parsed from shard to match the JSON.")
+#3.)
+        self.assertEqual(list(test_iso3166_2_ad["FR"].keys()), list(self.all_iso3166_2.all["FR"].keys()), "Expected FR data to be loaded on first access.")
+        self.assertEqual(test_iso3166_2_ad["IE-MN"].name, "Monaghan", f"Expected IE-MN subdivision to be loaded on first access, got {test_iso3166_2_ad['IE-MN']}.")
+        self.assertEqual(list(test_iso3166_2_ad.all.keys()), ["AD"], "Countries loaded on first access shouldn't be added to the all attribute.")
+        with self.assertRaises(ValueError):
+            test_iso3166_2_ad["GB"]
+#4.)
+        test_iso3166_2_filter = Subdivisions("AD", iso3166_2_filepath=test_iso3166_2_copy, filter_attributes="name,type")
+        self.assertEqual(list(test_iso3166_2_filter["DE"]["DE-BY"].keys()), ["name", "type"], "Expected filtered attributes on country loaded on first access.")
+#5.)
+        with redirect_stdout(StringIO()):
+            Subdivisions(iso3166_2_filepath=test_iso3166_2_copy).custom_subdivision("IE", "IE-BF", name="Belfast", type_="Province")
+        test_iso3166_2_ie = Subdivisions("IE", iso3166_2_filepath=test_iso3166_2_copy)
+        self.assertIn("IE-BF", test_iso3166_2_ie.all["IE"], "Expected shards to be re-exported with the custom subdivision.")
+        self.assertTrue([dataset for dataset in Subdivisions.dataset_cache_info() if dataset["filepath"] == os.path.realpath(test_iso3166_2_copy)][-1]["sharded"], 
+            "Expected re-exported shards to be in sync with the JSON.")
+#6.)
+        with open(test_iso3166_2_copy, "w", encoding="utf-8") as output_json:
+            json.dump({code: self.all_iso3166_2.all[code] for code in ["AD", "IE"]}, output_json, ensure_ascii=False)
+        self.assertNotIn("IE-BF", Subdivisions("IE", iso3166_2_filepath=test_iso3166_2_copy).all["IE"], "Expected out of sync shards to be ignored.")
+        with self.assertRaises(ValueError):
+            Subdivisions("FR", iso3166_2_filepath=test_iso3166_2_copy)
+#7.)
+        with open(os.path.join(os.path.dirname(self.all_iso3166_2.iso3166_2_module_path), "iso3166-2-shards", "manifest.json"), encoding="utf-8") as manifest_json:
+            manifest = json.load(manifest_json)
+        with open(self.all_iso3166_2.iso3166_2_module_path, "rb") as iso3166_2_json:
+            self.assertEqual(manifest["source"]["sha256"], hashlib.sha256(iso3166_2_json.read()).hexdigest(), 
+                "Expected the package's shards to be in sync with iso3166-2.json, re-export them via Subdivisions.build_shards().")
+        self.assertEqual(list(manifest["countries"].keys()), list(self.all_iso3166_2.all.keys()), "Expected a shard for each country in the package's dataset.")
+
     @classmethod
     def tearDown(self):
         """ Delete any test json folders and objects . """
@@ -45,6 +45,12 @@ class Main_Tests(unittest.TestCase):
     test_save_each_iteration:
         testing save_each_iteration parameter in extract function that saves the subdivision
         export per iteration rather than just at the end all in one go.
+    test_resume:
+        testing resume parameter in extract function that skips countries already
+        checkpointed in the run manifest of a previous export.
+    test_export_workers:
+        testing workers parameter in extract function that exports the countries in parallel
+        on a process pool, the output files being identical to the sequential export.
     """
     @classmethod
     def setUp(self):
@@ -819,6 +825,57 @@ class Main_Tests(unittest.TestCase):
         self.assertTrue(os.path.isfile(os.path.join(self.test_output_dir, f'{self.test_output_filename}_MA.json')), 
             f"Expected output JSON file to exist in folder: {os.path.join(self.test_output_dir, f'{self.test_output_filename}_MA.json')}.")
 
+    # @unittest.skip("")
+    def test_resume(self):
+        """ Testing resuming an interrupted export from its run manifest, skipping already completed countries. """
+        test_alpha_ad_lu = "AD,LU" #Andorra, Luxembourg
+        manifest_path = os.path.join(self.test_output_dir, f'{self.test_output_filename}_manifest.jsonl')
+#1.)
+        first_export = export_iso3166_2(alpha_codes=test_alpha_ad_lu, export_folder=self.test_output_dir, export_filename=self.test_output_filename, verbose=0, export_csv=0, export_xml=0, 
+            save_each_iteration=True, export=True) #Andorra, Luxembourg
+
+        self.assertTrue(os.path.isfile(manifest_path), f"Expected run manifest file to exist: {manifest_path}.")
+        with open(manifest_path) as manifest_file:
+            manifest_records = [json.loads(line) for line in manifest_file.read().splitlines()]
+        self.assertEqual(sorted(record["country"] for record in manifest_records[1:]), ["AD", "LU"], 
+            "Expected both countries to be marked as completed in the run manifest.")
+#2.)
+        with patch.object(FlagResolver, 'prefetch') as mock_prefetch:
+            resumed_export = export_iso3166_2(alpha_codes=test_alpha_ad_lu, export_folder=self.test_output_dir, export_filename=self.test_output_filename, verbose=0, export_csv=0, export_xml=0, 
+                resume=True, export=True) #Andorra, Luxembourg
+            mock_prefetch.assert_called_once_with([])
+
+        self.assertEqual(first_export, resumed_export, "Expected resumed export to match the original export.")
+
+    # @unittest.skip("")
+    def test_export_workers(self):
+        """ Testing the parallel export of each country across worker processes gives the same output files as the sequential export. """
+        test_alpha_ad_lu_mt = "AD,LU,MT" #Andorra, Luxembourg, Malta
+        sequential_output_dir = os.path.join(self.test_output_dir, "sequential")
+        parallel_output_dir = os.path.join(self.test_output_dir, "parallel")
+#1.)
+        sequential_export = export_iso3166_2(alpha_codes=test_alpha_ad_lu_mt, export_folder=sequential_output_dir, export_filename=self.test_output_filename, verbose=0, 
+            export=True, workers=1) #Andorra, Luxembourg, Malta
+        parallel_export = export_iso3166_2(alpha_codes=test_alpha_ad_lu_mt, export_folder=parallel_output_dir, export_filename=self.test_output_filename, verbose=0, 
+            export=True, workers=3) #Andorra, Luxembourg, Malta
+
+        self.assertEqual(list(parallel_export), ["AD", "LU", "MT"], f"Expected parallel export to contain the input countries in order, got {list(parallel_export)}.")
+        self.assertEqual(sequential_export, parallel_export, "Expected parallel export to match the sequential export.")
+#2.)
+        for extension in [".json", ".csv", ".xml"]:
+            output_filename = f"{self.test_output_filename}_AD,LU,MT{extension}"
+            with open(os.path.join(sequential_output_dir, output_filename), "rb") as sequential_file, open(os.path.join(parallel_output_dir, output_filename), "rb") as parallel_file:
+                self.assertEqual(sequential_file.read(), parallel_file.read(), f"Expected parallel export {extension} file to be identical to the sequential export.")
+#3.)
+        shards_dir = os.path.join(parallel_output_dir, f"{self.test_output_filename}_AD,LU,MT-shards")
+        with open(os.path.join(shards_dir, "manifest.json"), encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+        self.assertEqual(list(manifest["countries"]), ["AD", "LU", "MT"], f"Expected a shard per exported country in the manifest, got {list(manifest['countries'])}.")
+        with open(os.path.join(parallel_output_dir, f"{self.test_output_filename}_AD,LU,MT.json"), encoding="utf-8") as output_file:
+            parallel_export_json = json.load(output_file)
+        test_export_subdivisions = Subdivisions("LU", iso3166_2_filepath=os.path.join(parallel_output_dir, f"{self.test_output_filename}_AD,LU,MT.json"))
+        self.assertEqual(test_export_subdivisions.all["LU"], parallel_export_json["LU"], "Expected the exported country's shard to match its exported data.")
+
     @classmethod
     def tearDown(self):
         """ Delete any temp export folder. """
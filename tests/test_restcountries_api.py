@@ -50,7 +50,7 @@ class RestCountriesAPIIntegrationTests(unittest.TestCase):
     test_get_rest_countries_country_data_with_proxy:
         testing API call with proxy settings.
     """
-    @patch('scripts.restcountries_api.requests.get')
+    @patch('scripts.restcountries_api.requests.Session.get')
     def test_get_rest_countries_country_data_success(self, mock_get):
         """ Testing successful API call returns proper country data. """
         # Mock successful response
@@ -77,7 +77,7 @@ class RestCountriesAPIIntegrationTests(unittest.TestCase):
         self.assertEqual(result["cca2"], "IE")
         self.assertEqual(result["region"], "Europe")
 
-    @patch('scripts.restcountries_api.requests.get')
+    @patch('scripts.restcountries_api.requests.Session.get')
     def test_get_rest_countries_country_data_with_fields(self, mock_get):
         """ Testing API call with field filtering returns only requested fields. """
         mock_response = Mock()
@@ -101,7 +101,7 @@ class RestCountriesAPIIntegrationTests(unittest.TestCase):
         self.assertEqual(result["region"], "Europe")
 
     @patch('builtins.print')
-    @patch('scripts.restcountries_api.requests.get')
+    @patch('scripts.restcountries_api.requests.Session.get')
     def test_get_rest_countries_country_data_invalid_code(self, mock_get, mock_print):
         """ Testing API call with invalid alpha-2 code returns None. """
         mock_response = Mock()
@@ -114,7 +114,7 @@ class RestCountriesAPIIntegrationTests(unittest.TestCase):
         self.assertIsNone(result)
 
     @patch('builtins.print')
-    @patch('scripts.restcountries_api.requests.get')
+    @patch('scripts.restcountries_api.requests.Session.get')
     def test_get_rest_countries_country_data_network_error(self, mock_get, mock_print):
         """ Testing API call handles network errors and returns None. """
         mock_get.side_effect = requests.exceptions.ConnectionError("Network error")
@@ -124,7 +124,7 @@ class RestCountriesAPIIntegrationTests(unittest.TestCase):
         self.assertIsNone(result)
 
     @patch('builtins.print')
-    @patch('scripts.restcountries_api.requests.get')
+    @patch('scripts.restcountries_api.requests.Session.get')
     def test_get_rest_countries_country_data_timeout(self, mock_get, mock_print):
         """ Testing API call handles timeout and returns None. """
         mock_get.side_effect = requests.exceptions.Timeout("Request timeout")
@@ -133,7 +133,7 @@ class RestCountriesAPIIntegrationTests(unittest.TestCase):
         
         self.assertIsNone(result)
 
-    @patch('scripts.restcountries_api.requests.get')
+    @patch('scripts.restcountries_api.requests.Session.get')
     def test_get_rest_countries_country_data_with_proxy(self, mock_get):
         """ Testing API call correctly passes proxy settings. """
         mock_response = Mock()
@@ -149,7 +149,7 @@ class RestCountriesAPIIntegrationTests(unittest.TestCase):
         self.assertEqual(call_kwargs["proxies"], proxy_settings)
         self.assertIsNotNone(result)
 
-    @patch('scripts.restcountries_api.requests.get')
+    @patch('scripts.restcountries_api.requests.Session.get')
     def test_get_rest_countries_country_data_empty_response(self, mock_get):
         """ Testing API call with empty response returns None. """
         mock_response = Mock()
@@ -161,7 +161,7 @@ class RestCountriesAPIIntegrationTests(unittest.TestCase):
         
         self.assertIsNone(result)
 
-    @patch('scripts.restcountries_api.requests.get')
+    @patch('scripts.restcountries_api.requests.Session.get')
     def test_get_rest_countries_country_data_invalid_json(self, mock_get):
         """ Testing API call with invalid JSON response returns None. """
         mock_response = Mock()
@@ -0,0 +1,266 @@
+from scripts.scheduler import RequestScheduler, FetchEngine, get_scheduler, get_fetch_engine, scheduled_get, create_session, session_stats, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import unittest
+from unittest.mock import patch, Mock
+unittest.TestLoader.sortTestMethodsUsing = None
+
+# @unittest.skip("")
+class RequestSchedulerTests(unittest.TestCase):
+    """
+    Test suite for testing the request scheduler shared by the network fetchers.
+
+    Test Cases
+    ==========
+    test_token_bucket:
+        testing requests to a host are spaced by its rate after its burst is used.
+    test_priority:
+        testing requests waiting on a host are served in order of priority then arrival.
+    test_max_in_flight:
+        testing the in flight limits of each host and of the scheduler.
+    test_hosts_independent:
+        testing the limits of each host don't throttle the requests of other hosts.
+    test_scheduled_get:
+        testing scheduled GET requests are made via the shared pooled session on the shared scheduler.
+    test_pooled_session:
+        testing the pooled session reuses connections and retries transient errors after Retry-After.
+    test_fetch_engine:
+        testing the asyncio fetch engine runs fetches concurrently within each host's in flight limit.
+    """
+    def setUp(self):
+        """ Initialise a scheduler with no host limits. """
+        self.scheduler = RequestScheduler(host_limits={}, default_limit={"rate": None}, max_in_flight=None)
+
+    # @unittest.skip("")
+    def test_token_bucket(self):
+        """ Testing each host's token bucket spaces its requests by its rate. """
+#1.)
+        self.scheduler.set_limit("https://example.com", 20)
+        start = time.monotonic()
+        for _ in range(5):
+            with self.scheduler.slot("https://example.com/path?query=1"):
+                pass
+        self.assertGreaterEqual(time.monotonic() - start, 4 / 20 - 0.01, "Expected 5 requests at 20 per second to take at least 0.2 seconds.")
+        self.assertEqual(self.scheduler.stats(), {"example.com": 5})
+#2.)
+        self.scheduler.set_limit("burst.example.com", 5, burst=4)
+        start = time.monotonic()
+        with patch.object(self.scheduler.condition, "wait", wraps=self.scheduler.condition.wait) as condition_wait:
+            for _ in range(4):
+                with self.scheduler.slot("https://burst.example.com"):
+                    pass
+            self.assertEqual(condition_wait.call_count, 0, "Expected a burst of 4 requests not to be throttled.")
+            with self.scheduler.slot("https://burst.example.com"):
+                pass
+            self.assertGreater(condition_wait.call_count, 0, "Expected the request after the burst to wait for a token.")
+        self.assertGreaterEqual(time.monotonic() - start, 1 / 5 - 0.01, "Expected the request after the burst to be throttled.")
+
+    # @unittest.skip("")
+    def test_priority(self):
+        """ Testing waiting requests are served by priority then arrival. """
+        self.scheduler.set_limit("example.com", None, max_in_flight=1)
+        served = []
+        blocker = self.scheduler.slot("example.com")
+        blocker.__enter__()
+
+        def request(name, priority):
+            with self.scheduler.slot("example.com", priority):
+                served.append(name)
+
+        threads = []
+        for name, priority in [("low", PRIORITY_LOW), ("normal_1", PRIORITY_NORMAL), ("high", PRIORITY_HIGH), ("normal_2", PRIORITY_NORMAL)]:
+            threads.append(threading.Thread(target=request, args=(name, priority)))
+            threads[-1].start()
+            #wait until the request is queued, such that the arrival order is deterministic
+            while (len(self.scheduler.buckets["example.com"].waiting) < len(threads)):
+                time.sleep(0.001)
+        blocker.__exit__(None, None, None)
+        for thread in threads:
+            thread.join(5)
+#1.)
+        self.assertEqual(served, ["high", "normal_1", "normal_2", "low"])
+        self.assertEqual(self.scheduler.buckets["example.com"].waiting, [])
+
+    # @unittest.skip("")
+    def test_max_in_flight(self):
+        """ Testing the in flight limits of each host and across the scheduler. """
+        peaks = {}
+        lock = threading.Lock()
+        in_flight = {}
+
+        def request(host):
+            with self.scheduler.slot(host):
+                with lock:
+                    in_flight[host] = in_flight.get(host, 0) + 1
+                    in_flight["total"] = in_flight.get("total", 0) + 1
+                    peaks[host] = max(peaks.get(host, 0), in_flight[host])
+                    peaks["total"] = max(peaks.get("total", 0), in_flight["total"])
+                time.sleep(0.02)
+                with lock:
+                    in_flight[host] -= 1
+                    in_flight["total"] -= 1
+#1.)
+        self.scheduler.set_limit("a.example.com", None, max_in_flight=2)
+        threads = [threading.Thread(target=request, args=("a.example.com",)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(peaks["a.example.com"], 2, "Expected at most 2 requests in flight to the host.")
+#2.)
+        peaks.clear()
+        self.scheduler.max_in_flight = 3
+        self.scheduler.set_limit("a.example.com", None)
+        threads = [threading.Thread(target=request, args=(host,)) for host in ["a.example.com", "b.example.com"] * 5]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertLessEqual(peaks["total"], 3, "Expected at most 3 requests in flight across all hosts.")
+        self.assertEqual(self.scheduler.in_flight, 0)
+
+    # @unittest.skip("")
+    def test_hosts_independent(self):
+        """ Testing a throttled host doesn't delay requests to other hosts. """
+        self.scheduler.set_limit("slow.example.com", 1)
+        with self.scheduler.slot("slow.example.com"):
+            pass
+        def slow_request():
+            with self.scheduler.slot("slow.example.com"):
+                pass
+        slow_thread = threading.Thread(target=slow_request)
+        slow_thread.start()
+#1.)
+        #only count the waits of this thread, the slow request's thread waits on the same condition
+        test_thread, test_thread_waits = threading.current_thread(), []
+        condition_wait = self.scheduler.condition.wait
+        def wait(*args, **kwargs):
+            if (threading.current_thread() is test_thread):
+                test_thread_waits.append(args)
+            return condition_wait(*args, **kwargs)
+        with patch.object(self.scheduler.condition, "wait", side_effect=wait):
+            for _ in range(5):
+                with self.scheduler.slot("fast.example.com"):
+                    pass
+        self.assertEqual(test_thread_waits, [], "Expected requests to another host not to wait on the throttled host.")
+        slow_thread.join(5)
+        self.assertEqual(self.scheduler.stats(), {"slow.example.com": 2, "fast.example.com": 5})
+
+    # @unittest.skip("")
+    @patch('scripts.scheduler.requests.Session.get')
+    def test_scheduled_get(self, mock_get):
+        """ Testing scheduled GET requests are passed to the shared pooled session via the shared scheduler. """
+        mock_get.return_value = Mock(status_code=200)
+#1.)
+        self.assertIs(get_scheduler(), get_scheduler())
+        before = get_scheduler().stats().get("restcountries.com", 0)
+        response = scheduled_get("https://restcountries.com/v3.1/alpha/FR", priority=PRIORITY_HIGH, headers={"User-Agent": "test"}, timeout=12)
+        self.assertEqual(response.status_code, 200)
+        mock_get.assert_called_once_with("https://restcountries.com/v3.1/alpha/FR", headers={"User-Agent": "test"}, timeout=12)
+        self.assertEqual(get_scheduler().stats()["restcountries.com"], before + 1)
+#2.)
+        self.scheduler.get("https://example.com", params={"q": "FR"})
+        mock_get.assert_called_with("https://example.com", params={"q": "FR"})
+
+    # @unittest.skip("")
+    def test_pooled_session(self):
+        """ Testing the pooled session keeps connections alive and retries transient errors. """
+        #local server that keeps connections alive, returning 503 with a Retry-After header on every third request
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            requests_received = 0
+            transient_requests = []
+            def do_GET(self):
+                #transient path returns 503 without a Retry-After header on its first request
+                if (self.path == "/transient"):
+                    Handler.transient_requests.append(time.monotonic())
+                    status = 503 if (len(Handler.transient_requests) == 1) else 200
+                else:
+                    Handler.requests_received += 1
+                    status = 503 if (Handler.requests_received % 3 == 0) else 200
+                body = b"{}"
+                self.send_response(status)
+                if (status == 503 and self.path != "/transient"):
+                    self.send_header("Retry-After", "1")
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+        session = create_session(host_limits={}, backoff_factor=0)
+        try:
+#1.)
+            for _ in range(2):
+                self.assertEqual(session.get(url, timeout=5).status_code, 200)
+            self.assertEqual(session_stats(session), {"requests": 2, "new_connections": 1, "reused_connections": 1, "retries": 0})
+#2.)
+            start = time.monotonic()
+            self.assertEqual(session.get(url, timeout=5).status_code, 200, "Expected the 503 response to be retried.")
+            self.assertGreaterEqual(time.monotonic() - start, 0.9, "Expected the retry to wait for the Retry-After header.")
+            stats = session_stats(session)
+            self.assertEqual(stats["retries"], 1)
+            self.assertEqual(stats["requests"], 4)
+            self.assertEqual(stats["new_connections"], 1)
+            self.assertEqual(Handler.requests_received, 4)
+#3.)
+            limited_session = create_session(host_limits={"127.0.0.1": {"rate": 2, "burst": 1, "max_in_flight": 1}}, backoff_factor=0)
+            self.assertEqual(limited_session.get(url + "transient", timeout=5).status_code, 200, "Expected the 503 response to be retried.")
+            limited_session.close()
+            self.assertEqual(len(Handler.transient_requests), 2)
+            self.assertGreaterEqual(Handler.transient_requests[1] - Handler.transient_requests[0], 0.45, 
+                "Expected the retry without a Retry-After header to wait at least the interval between requests of the host.")
+        finally:
+            session.close()
+            server.shutdown()
+            server.server_close()
+
+    # @unittest.skip("")
+    def test_fetch_engine(self):
+        """ Testing the fetch engine runs fetches concurrently, bounded by each host's max in flight, and returns results in order. """
+        self.scheduler.set_limit("slow.example.com", rate=None, max_in_flight=2)
+        engine = FetchEngine(scheduler=self.scheduler, max_concurrency=8)
+        lock = threading.Lock()
+        running = {"now": 0, "max": 0}
+
+        def fetch(item):
+            with lock:
+                running["now"] += 1
+                running["max"] = max(running["max"], running["now"])
+            time.sleep(0.1)
+            with lock:
+                running["now"] -= 1
+            return item * 2
+        try:
+#1.)
+            self.assertEqual(engine.map("https://slow.example.com/api", fetch, range(6)), [0, 2, 4, 6, 8, 10])
+            self.assertEqual(running["max"], 2, "Expected the fetches to run 2 at a time, with at most 2 in flight to the host.")
+#2.)
+            running["max"] = 0
+            self.assertEqual(engine.map("https://fast.example.com", fetch, range(8)), [item * 2 for item in range(8)])
+            self.assertGreater(running["max"], 2, "Expected the default host limit to allow more fetches in flight.")
+#3.)
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(engine.map("slow.example.com", fetch, [1, 2]))) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+            self.assertEqual(results, [[2, 4]] * 3)
+            self.assertEqual(engine.map("slow.example.com", fetch, []), [])
+#4.)
+            def fail(item):
+                raise ValueError(item)
+            with self.assertRaises(ValueError):
+                engine.map("slow.example.com", fail, [1])
+            self.assertIs(get_fetch_engine(), get_fetch_engine())
+        finally:
+            engine.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
 from scripts.utils import *
 import shutil
 import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import unittest
 from unittest.mock import patch
 unittest.TestLoader.sortTestMethodsUsing = None
@@ -23,6 +26,12 @@ class UtilsUnitTests(unittest.TestCase):
         are preserved.
     test_get_flag_repo_url:
         testing function that gets the URL for each subdivision flag.
+    test_flag_resolver:
+        testing the resolver of each subdivision's flag URL from the cached listings of the
+        flag folders, using a local HTTP server in place of the GitHub API.
+    test_run_manifest:
+        testing the run manifest records completed stages and their data, and resumes
+        a run only if its parameters match.
     test_is_latin:
         testing function that checks if an individual character is a latin
         or non-latin character.
@@ -69,6 +78,15 @@ class UtilsUnitTests(unittest.TestCase):
             convert_to_alpha2(123)
             convert_to_alpha2(9.02)
             convert_to_alpha2(False)
+#7.)
+        #the alpha-2, alpha-3 and numeric codes are converted via the lookup tables, which are only built from pycountry once
+        from scripts.utils import _country_code_lookups
+        _country_code_lookups.cache_clear()
+        test_alpha_codes = ["DEU", "826", "FR", "gbr", " 392 "] * 2000
+        self.assertEqual([convert_to_alpha2(code) for code in test_alpha_codes], ["DE", "GB", "FR", "GB", "JP"] * 2000, "Expected each alpha code to be converted via the lookup tables.")
+        lookups_cache_info = _country_code_lookups.cache_info()
+        self.assertEqual(lookups_cache_info.misses, 1, f"Expected the lookup tables to be built once, got {lookups_cache_info.misses} builds.")
+        self.assertEqual(lookups_cache_info.hits, len(test_alpha_codes) - 1, f"Expected every other conversion to reuse the lookup tables, got {lookups_cache_info.hits} hits.")
 
     # @unittest.skip("")
     def test_get_alpha_codes_list(self):
@@ -183,6 +201,119 @@ class UtilsUnitTests(unittest.TestCase):
             get_flag_repo_url(123)
             get_flag_repo_url(123.456)
 
+    # @unittest.skip("")
+    def test_flag_resolver(self):
+        """ Testing the flag resolver lists each country's flag folder once, caching the listings in memory and on disk. """
+        flag_folders = {"GB": ["GB-EDH.png", "GB-EDH.svg", "GB-ENG.jpg", "README.md"], "IE": ["IE-D.png"], "FR": []}
+        requested_paths = []
+        truncated = [False]
+
+        class GitHubHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                requested_paths.append(self.path)
+                if (self.path.startswith("/repos/amckenna41/iso3166-flags/git/trees/main")):
+                    tree = [{"path": "iso3166-2-flags/" + alpha2, "type": "tree"} for alpha2 in flag_folders]
+                    tree += [{"path": "iso3166-2-flags/" + alpha2 + "/" + filename, "type": "blob"} for alpha2, files in flag_folders.items() for filename in files]
+                    body = {"tree": tree, "truncated": truncated[0]}
+                elif (self.path.startswith("/repos/amckenna41/iso3166-flags/contents/iso3166-2-flags/") and self.path.split("/")[-1].split("?")[0] in flag_folders):
+                    body = [{"name": filename, "type": "file"} for filename in flag_folders[self.path.split("/")[-1].split("?")[0]]]
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(json.dumps(body).encode("utf-8"))
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), GitHubHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        api_base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        test_cache_path = os.path.join(self.test_utils_folder, "flag_cache.json")
+        flag_base_url = "https://raw.githubusercontent.com/amckenna41/iso3166-flags/main/iso3166-2-flags/"
+#1.)
+        flag_resolver = FlagResolver(cache_path=test_cache_path, api_base_url=api_base_url)
+        flag_resolver.prefetch(["GB", "IE", "FR", "DE"])
+        self.assertEqual(len(requested_paths), 1, f"Expected all countries to be listed via a single request of the tree, got {requested_paths}.")
+        self.assertEqual(flag_resolver.flag_url("GB", "GB-EDH"), flag_base_url + "GB/GB-EDH.svg", "Expected the flag with the preferred extension to be resolved.")
+        self.assertEqual(flag_resolver.flag_url("GB", "gb-eng"), flag_base_url + "GB/GB-ENG.jpg", "Expected the flag of GB-ENG to be resolved.")
+        self.assertEqual(flag_resolver.flag_url("IE", "IE-D"), flag_base_url + "IE/IE-D.png", "Expected the flag of IE-D to be resolved.")
+        self.assertIsNone(flag_resolver.flag_url("GB", "GB-ABC"), "Expected None for a subdivision without a flag.")
+        self.assertIsNone(flag_resolver.flag_url("DE", "DE-BY"), "Expected None for a country without a flag folder.")
+        self.assertEqual(flag_resolver.country_flags("FR"), {}, "Expected no flags for a country with an empty flag folder.")
+        self.assertIsNone(flag_resolver.country_flags("DE"), "Expected None for a country without a flag folder.")
+        self.assertEqual(len(requested_paths), 1, f"Expected flags to be resolved from memory, got {requested_paths}.")
+#2.)
+        self.assertTrue(os.path.isfile(test_cache_path), "Expected the listings to be cached on disk.")
+        cached_flag_resolver = FlagResolver(cache_path=test_cache_path, api_base_url=api_base_url)
+        cached_flag_resolver.prefetch(["GB", "IE", "FR", "DE"])
+        self.assertEqual(cached_flag_resolver.flag_url("GB", "GB-EDH"), flag_base_url + "GB/GB-EDH.svg", "Expected the flag to be resolved from the disk cache.")
+        self.assertEqual(len(requested_paths), 1, f"Expected the listings to be loaded from the disk cache, got {requested_paths}.")
+        FlagResolver(cache_path=test_cache_path, ttl=0, api_base_url=api_base_url).prefetch(["GB", "IE"])
+        self.assertEqual(len(requested_paths), 2, f"Expected the expired listings to be listed again, got {requested_paths}.")
+#3.)
+        truncated[0] = True
+        requested_paths.clear()
+        scheduled_requests = get_scheduler().stats().get("127.0.0.1", 0)
+        fallback_flag_resolver = FlagResolver(cache_path="", requests_per_second=20, api_base_url=api_base_url)
+        fallback_flag_resolver.prefetch(["GB", "IE", "FR", "DE"])
+        self.assertEqual(len(requested_paths), 5, f"Expected each country to be listed when the tree is truncated, got {requested_paths}.")
+        self.assertEqual(get_scheduler().host_limits["127.0.0.1"]["rate"], 20, f"Expected the API's host to be rate limited, got {get_scheduler().host_limits['127.0.0.1']}.")
+        self.assertEqual(get_scheduler().stats()["127.0.0.1"] - scheduled_requests, 5, "Expected each request to be rate limited via the request scheduler.")
+        self.assertEqual(fallback_flag_resolver.flag_url("GB", "GB-EDH"), flag_base_url + "GB/GB-EDH.svg", "Expected the flag to be resolved from the country's listing.")
+        self.assertIsNone(fallback_flag_resolver.country_flags("DE"), "Expected None for a country without a flag folder.")
+#4.)
+        server.shutdown()
+        server.server_close()
+        offline_flag_resolver = FlagResolver(cache_path="", api_base_url=api_base_url)
+        self.assertIsNone(offline_flag_resolver.flag_url("GB", "GB-EDH"), "Expected None if the flag folder can't be listed.")
+        self.assertNotIn("GB", offline_flag_resolver.listings, "Expected failed listing to not be cached.")
+
+    # @unittest.skip("")
+    def test_run_manifest(self):
+        """ Testing the run manifest checkpoints each country's completed stages and resumes them. """
+        test_manifest_path = os.path.join(self.test_utils_folder, "test_manifest.jsonl")
+        test_data_path = os.path.join(self.test_utils_folder, "test_FR.json")
+        test_fr_data = {"FR": {"FR-75C": {"name": "Paris"}}}
+#1.)
+        manifest = RunManifest(test_manifest_path, parameters={"history": True})
+        self.assertFalse(manifest.is_complete("FR", "subdivisions"), "Expected no stages to be complete in a new manifest.")
+        manifest.complete("FR", "subdivisions", data=test_fr_data, data_path=test_data_path)
+        manifest.complete("DE", "geo", data={"total": 16})
+        self.assertTrue(manifest.is_complete("FR", "subdivisions"))
+        self.assertFalse(manifest.is_complete("FR", "geo"))
+        self.assertEqual(manifest.load("FR", "subdivisions"), test_fr_data)
+        with open(test_data_path, encoding="utf-8") as data_file:
+            self.assertEqual(json.load(data_file), test_fr_data, "Expected the stage's data to be written to its own file.")
+#2.)
+        with open(test_manifest_path, "a", encoding="utf-8") as manifest_file:
+            manifest_file.write('{"country": "IE", "stage": "geo"') #partially written line of an interrupted run
+        resumed_manifest = RunManifest(test_manifest_path, parameters={"history": True}, resume=True)
+        self.assertTrue(resumed_manifest.is_complete("FR", "subdivisions"))
+        self.assertEqual(resumed_manifest.load("FR", "subdivisions"), test_fr_data)
+        self.assertEqual(resumed_manifest.load("DE", "geo"), {"total": 16})
+        self.assertEqual(resumed_manifest.completed("geo"), ["DE"])
+        self.assertFalse(resumed_manifest.is_complete("IE", "geo"), "Expected a partially written line to be ignored.")
+        resumed_manifest.complete("ES", "geo", data={"total": 17})
+        self.assertEqual(RunManifest(test_manifest_path, parameters={"history": True}, resume=True).completed("geo"), ["DE", "ES"], 
+            "Expected the stage completed after a partially written line to be kept on the next resume.")
+#3.)
+        os.remove(test_data_path)
+        self.assertFalse(RunManifest(test_manifest_path, parameters={"history": True}, resume=True).is_complete("FR", "subdivisions"), 
+            "Expected a stage whose data file is missing to not be complete.")
+#4.)
+        self.assertFalse(RunManifest(test_manifest_path, parameters={"history": False}, resume=True).is_complete("DE", "geo"), 
+            "Expected a run with different parameters to not be resumed.")
+        self.assertFalse(RunManifest(test_manifest_path, parameters={"history": True}, resume=True).is_complete("DE", "geo"), 
+            "Expected the manifest to be started again after a run with different parameters.")
+        self.assertFalse(RunManifest(test_manifest_path, parameters={"history": True}).is_complete("DE", "geo"), 
+            "Expected a run not resuming to start a new manifest.")
+
     # @unittest.skip("")
     def test_is_latin(self):
         """ Testing function that checks if an individual character is a latin or non-latin character."""